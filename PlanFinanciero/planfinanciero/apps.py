@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PlanfinancieroConfig(AppConfig):
     name = "planfinanciero"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.25 on 2026-10-19 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("planfinanciero", "0003_add_tipo_entidad_gastos"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VersionDatos",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ambito",
+                    models.CharField(max_length=30, unique=True, verbose_name="Ámbito"),
+                ),
+                (
+                    "version",
+                    models.PositiveBigIntegerField(default=0, verbose_name="Versión"),
+                ),
+                ("fecha_modificacion", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Versión de Datos",
+                "verbose_name_plural": "Versiones de Datos",
+            },
+        ),
+    ]
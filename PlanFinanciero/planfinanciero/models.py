@@ -581,3 +581,25 @@ class MovimientoGasto(models.Model):
     def clean(self):
         if self.valor is not None and self.valor <= 0:
             raise ValidationError({'valor': 'El valor debe ser mayor a cero.'})
+
+
+# ==========================================
+# VERSIONES DE DATOS (ETag de la API de lectura)
+# ==========================================
+
+class VersionDatos(models.Model):
+    """
+    Versión de los datos de un ámbito ('ingresos' o 'gastos').
+    Se incrementa con cada escritura de rubros o movimientos del ámbito y
+    la API de lectura la usa para calcular sus ETag.
+    """
+    ambito = models.CharField(max_length=30, unique=True, verbose_name="Ámbito")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Versión")
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Versión de Datos"
+        verbose_name_plural = "Versiones de Datos"
+
+    def __str__(self):
+        return f"{self.ambito} v{self.version}"
@@ -0,0 +1,63 @@
+"""
+Señales del plan financiero: incrementan la versión de datos de ingresos o
+gastos (VersionDatos) cuando cambian sus rubros o movimientos, para que la API
+de lectura entregue un ETag nuevo.
+"""
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    IngresoAgregado, Movimiento, MovimientoGasto, OrganoEjecutor, Rubro, RubroGasto,
+    TipoIngreso, VersionDatos
+)
+
+AMBITO_INGRESOS = 'ingresos'
+AMBITO_GASTOS = 'gastos'
+
+
+def incrementar_version(ambito):
+    """
+    Incrementa la versión del ámbito al confirmar la transacción. Cada cambio
+    registra su propio callback: si la transacción o el savepoint se revierte,
+    Django lo descarta y la versión no cambia.
+    """
+    transaction.on_commit(partial(_incrementar, ambito))
+
+
+def _incrementar(ambito):
+    if VersionDatos.objects.filter(ambito=ambito).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            VersionDatos.objects.create(ambito=ambito, version=1)
+    except IntegrityError:
+        # Otro proceso creó el ámbito entre la actualización y la inserción
+        VersionDatos.objects.filter(ambito=ambito).update(version=F('version') + 1)
+
+
+@receiver(post_save, sender=Movimiento)
+@receiver(post_delete, sender=Movimiento)
+@receiver(post_save, sender=Rubro)
+@receiver(post_delete, sender=Rubro)
+@receiver(post_save, sender=IngresoAgregado)
+@receiver(post_delete, sender=IngresoAgregado)
+@receiver(post_save, sender=OrganoEjecutor)
+@receiver(post_delete, sender=OrganoEjecutor)
+@receiver(post_save, sender=TipoIngreso)
+@receiver(post_delete, sender=TipoIngreso)
+def ingresos_cambiados(sender, raw=False, **kwargs):
+    if not raw:
+        incrementar_version(AMBITO_INGRESOS)
+
+
+@receiver(post_save, sender=MovimientoGasto)
+@receiver(post_delete, sender=MovimientoGasto)
+@receiver(post_save, sender=RubroGasto)
+@receiver(post_delete, sender=RubroGasto)
+def gastos_cambiados(sender, raw=False, **kwargs):
+    if not raw:
+        incrementar_version(AMBITO_GASTOS)
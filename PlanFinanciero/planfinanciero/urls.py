@@ -49,6 +49,11 @@ urlpatterns = [
     # API para busqueda
     path('api/rubros/buscar/', views.api_buscar_rubros, name='api_buscar_rubros'),
 
+    # API de lectura (JSON con ETag / If-None-Match)
+    path('api/rubros/saldos/', views.api_rubros_saldos, name='api_rubros_saldos'),
+    path('api/movimientos/', views.api_movimientos, name='api_movimientos'),
+    path('api/gastos/saldos/', views.api_gastos_saldos, name='api_gastos_saldos'),
+
     # ==========================================
     # PLAN FINANCIERO DE GASTOS - CENTRALIZADOS
     # ==========================================
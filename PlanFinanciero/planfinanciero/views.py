@@ -5,11 +5,18 @@ from django.http import JsonResponse, HttpResponse
 from django.db.models import Sum, Q, Case, When, Value, DecimalField
 from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET
 from django.core.paginator import Paginator
 from decimal import Decimal
 import csv
+import hashlib
 
-from .models import Rubro, Movimiento, IngresoAgregado, OrganoEjecutor, TipoIngreso, Vigencia, RubroGasto, MovimientoGasto
+from .models import (
+    Rubro, Movimiento, IngresoAgregado, OrganoEjecutor, TipoIngreso, Vigencia, RubroGasto, MovimientoGasto,
+    VersionDatos
+)
+from .signals import AMBITO_GASTOS, AMBITO_INGRESOS
 from .forms import (
     RubroForm, MovimientoForm, IngresoAgregadoForm,
     TrasladoForm, AnularMovimientoForm, OrganoEjecutorForm, MovimientoGastoForm
@@ -1051,6 +1058,145 @@ def api_buscar_rubros(request):
     return JsonResponse({'results': results})
 
 
+# ==========================================
+# API DE LECTURA (JSON con ETag)
+# ==========================================
+
+def _respuesta_condicional(request, ambito, construir):
+    """
+    JsonResponse con un ETag derivado de la versión de datos del ámbito y de la
+    URL con sus filtros. Si el cliente envía If-None-Match con ese ETag se
+    responde 304 sin consultar los saldos.
+    """
+    version = VersionDatos.objects.filter(ambito=ambito).values_list('version', flat=True).first() or 0
+    firma = f'{ambito}={version}|{request.get_full_path()}'
+    etag = 'W/"%s"' % hashlib.sha1(firma.encode()).hexdigest()
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(construir())
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _pagina_json(request, queryset, por_pagina):
+    pagina = Paginator(queryset, por_pagina).get_page(request.GET.get('page'))
+    return pagina, {
+        'pagina': pagina.number,
+        'paginas': pagina.paginator.num_pages,
+        'total': pagina.paginator.count,
+    }
+
+
+@login_required
+@require_GET
+def api_rubros_saldos(request):
+    """Saldos de los rubros de ingresos (mismos filtros que la lista de rubros)"""
+    def construir():
+        rubros = Rubro.objects.filter(activo=True)
+        busqueda = request.GET.get('q', '')
+        if busqueda:
+            rubros = rubros.filter(Q(codigo__icontains=busqueda) | Q(nombre__icontains=busqueda))
+        if request.GET.get('ingreso'):
+            rubros = rubros.filter(ingreso_agregado_id=request.GET['ingreso'])
+        if request.GET.get('nivel'):
+            rubros = rubros.filter(nivel=request.GET['nivel'])
+        if request.GET.get('organo'):
+            rubros = rubros.filter(organo_ejecutor_id=request.GET['organo'])
+        rubros = get_rubros_con_saldos(rubros, solo_detalle=bool(request.GET.get('solo_detalle')))
+
+        pagina, datos = _pagina_json(request, rubros.order_by('codigo'), 100)
+        datos['totales'] = {
+            clave: float(valor) for clave, valor in calcular_totales_db(rubros.order_by()).items()
+        }
+        datos['results'] = [{
+            'id': rubro.id,
+            'codigo': rubro.codigo,
+            'nombre': rubro.nombre,
+            'es_totalizador': rubro.es_totalizador,
+            'inicial': float(rubro.presupuesto_inicial),
+            'adiciones': float(rubro.total_adiciones),
+            'reducciones': float(rubro.total_reducciones),
+            'traslados_credito': float(rubro.total_traslados_credito),
+            'traslados_debito': float(rubro.total_traslados_debito),
+            'saldo': float(rubro.saldo_actual),
+        } for rubro in pagina]
+        return datos
+
+    return _respuesta_condicional(request, AMBITO_INGRESOS, construir)
+
+
+@login_required
+@require_GET
+def api_movimientos(request):
+    """Movimientos de ingresos (mismos filtros que la lista de movimientos)"""
+    def construir():
+        movimientos = Movimiento.objects.select_related('rubro')
+        if request.GET.get('anulados', '') != '1':
+            movimientos = movimientos.filter(anulado=False)
+        if request.GET.get('tipo'):
+            movimientos = movimientos.filter(tipo=request.GET['tipo'])
+        if request.GET.get('rubro_codigo'):
+            movimientos = movimientos.filter(rubro__codigo__icontains=request.GET['rubro_codigo'])
+        if request.GET.get('fecha_desde'):
+            movimientos = movimientos.filter(fecha__gte=request.GET['fecha_desde'])
+        if request.GET.get('fecha_hasta'):
+            movimientos = movimientos.filter(fecha__lte=request.GET['fecha_hasta'])
+
+        pagina, datos = _pagina_json(request, movimientos.order_by('-fecha', '-fecha_registro'), 50)
+        datos['results'] = [{
+            'id': mov.id,
+            'fecha': mov.fecha.isoformat(),
+            'tipo': mov.tipo,
+            'rubro_id': mov.rubro_id,
+            'rubro_codigo': mov.rubro.codigo,
+            'documento_soporte': mov.documento_soporte,
+            'valor': float(mov.valor),
+            'anulado': mov.anulado,
+        } for mov in pagina]
+        return datos
+
+    return _respuesta_condicional(request, AMBITO_INGRESOS, construir)
+
+
+@login_required
+@require_GET
+def api_gastos_saldos(request):
+    """Saldos de los rubros de gastos de un tipo de entidad (?tipo_entidad=)"""
+    tipo_entidad = request.GET.get('tipo_entidad', 'CENTRALIZADO')
+    if tipo_entidad not in ['CENTRALIZADO', 'DESCENTRALIZADO']:
+        tipo_entidad = 'CENTRALIZADO'
+
+    def construir():
+        # Totales por rubro y tipo en una sola consulta
+        totales = {}
+        for fila in MovimientoGasto.objects.filter(
+            anulado=False, rubro__tipo_entidad=tipo_entidad
+        ).values('rubro_id', 'tipo').annotate(total=Sum('valor')).order_by():
+            totales[(fila['rubro_id'], fila['tipo'])] = fila['total']
+
+        results = []
+        for rubro in RubroGasto.objects.filter(activo=True, tipo_entidad=tipo_entidad):
+            valores = {
+                clave: totales.get((rubro.id, tipo)) or Decimal('0')
+                for clave, tipo in [
+                    ('inicial', 'INICIAL'), ('adiciones', 'ADICION'), ('reducciones', 'REDUCCION'),
+                    ('creditos', 'CREDITO'), ('contracreditos', 'CONTRACREDITO'),
+                ]
+            }
+            valores['saldo'] = (
+                valores['inicial'] + valores['adiciones'] - valores['reducciones'] +
+                valores['creditos'] - valores['contracreditos']
+            )
+            results.append(dict(
+                {clave: float(valor) for clave, valor in valores.items()},
+                id=rubro.id, codigo=rubro.codigo, nombre=rubro.nombre,
+            ))
+        return {'tipo_entidad': tipo_entidad, 'results': results}
+
+    return _respuesta_condicional(request, AMBITO_GASTOS, construir)
+
+
 # ==========================================
 # PLAN FINANCIERO DE GASTOS
 # ==========================================
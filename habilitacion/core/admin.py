@@ -2,11 +2,28 @@
 Admin para el módulo Core
 Sistema de Habilitación de Servicios de Salud
 
-Este módulo es el núcleo de la aplicación y no tiene modelos propios.
-Proporciona el dashboard y funcionalidades centrales del sistema.
+Este módulo es el núcleo de la aplicación: proporciona el dashboard,
+la configuración general y la cola de tareas en segundo plano.
 """
 
 from django.contrib import admin
 
-# El módulo core no tiene modelos propios
-# Proporciona el dashboard y configuración general
+from .models import AlertaVencimiento, TareaSegundoPlano
+
+
+@admin.register(TareaSegundoPlano)
+class TareaSegundoPlanoAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'estado', 'prioridad', 'intentos', 'clave_concurrencia', 'fecha_creacion', 'fecha_fin']
+    list_filter = ['estado', 'tipo']
+    search_fields = ['tipo', 'clave_concurrencia', 'error']
+    readonly_fields = ['fecha_creacion', 'fecha_inicio', 'fecha_fin', 'trabajador']
+    date_hierarchy = 'fecha_creacion'
+
+
+@admin.register(AlertaVencimiento)
+class AlertaVencimientoAdmin(admin.ModelAdmin):
+    list_display = ['nombre', 'tipo', 'entidad', 'sede', 'fecha_vencimiento', 'nivel', 'nivel_notificado']
+    list_filter = ['tipo', 'nivel']
+    search_fields = ['nombre', 'entidad__razon_social']
+    raw_id_fields = ['entidad', 'sede', 'responsable']
+    date_hierarchy = 'fecha_vencimiento'
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = "core"
+
+    def ready(self):
+        # Registrar los manejadores de tareas en segundo plano de cada aplicación
+        from django.utils.module_loading import autodiscover_modules
+
+        autodiscover_modules('tareas')
+
+        from . import signals  # noqa: F401
@@ -0,0 +1,298 @@
+"""
+Registro de auditoría con escritura diferida en lotes
+Sistema de Habilitación de Servicios de Salud
+
+Las señales de core.signals capturan las diferencias de los modelos auditados
+(evaluaciones, documentos, archivos y configuración) como RegistroActividad, y
+las vistas de evaluación registran su HistorialEvaluacion con
+`registrar_historial`. Nada se escribe en el momento: cada entrada se agrega a
+un búfer en memoria cuando se confirma la transacción que la originó (lo que
+se revierte no queda auditado) y el búfer se vacía con bulk_create:
+
+- al final de cada petición (AuditoriaMiddleware);
+- fuera de peticiones (comandos, tareas), por un hilo que lo vacía cada
+  AUDITORIA['INTERVALO_SEGUNDOS'] segundos y al terminar el proceso;
+- en cualquier caso, en cuanto acumula AUDITORIA['TAMANO_LOTE'] entradas.
+"""
+
+import atexit
+import datetime
+import decimal
+import hashlib
+import ipaddress
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models.fields.files import FieldFile
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CONFIGURACION_POR_DEFECTO = {
+    'TAMANO_LOTE': 500,
+    'INTERVALO_SEGUNDOS': 5,
+    'RETENCION_DIAS': 730,
+    'LONGITUD_MAXIMA_TEXTO': 500,
+    'PROXIES_CONFIABLES': 0,
+    'DIRECTORIO_ARCHIVO': None,
+}
+
+# Campos cuyo valor no se guarda en claro (solo una huella para detectar el cambio)
+FRAGMENTOS_SENSIBLES = ('api_key', 'password', 'token', 'secret')
+
+_bufer = []
+_candado = threading.Lock()
+_contexto = threading.local()
+_vaciador = None
+
+
+def configuracion():
+    config = dict(CONFIGURACION_POR_DEFECTO)
+    config.update(getattr(settings, 'AUDITORIA', {}))
+    return config
+
+
+# --- Contexto de la petición -------------------------------------------------
+
+def iniciar_contexto(request):
+    _contexto.request = request
+
+
+def terminar_contexto():
+    _contexto.request = None
+
+
+def ip_cliente(request):
+    """
+    IP del cliente, o None si no es una dirección válida. X-Forwarded-For lo
+    puede enviar cualquier cliente, así que solo se usa detrás de
+    AUDITORIA['PROXIES_CONFIABLES'] proxies propios: se toma la dirección que
+    agregó el más externo de ellos (contando desde la derecha).
+    """
+    ip = request.META.get('REMOTE_ADDR', '')
+    proxies = configuracion()['PROXIES_CONFIABLES']
+    if proxies:
+        reenviadas = [parte.strip() for parte in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if parte.strip()]
+        if len(reenviadas) >= proxies:
+            ip = reenviadas[-proxies]
+    try:
+        return str(ipaddress.ip_address(ip))
+    except ValueError:
+        return None
+
+
+def _datos_contexto():
+    """Usuario, IP y navegador de la petición en curso (vacíos fuera de una petición)"""
+    request = getattr(_contexto, 'request', None)
+    if request is None:
+        return {}
+    usuario = getattr(request, 'user', None)
+    return {
+        'usuario_id': usuario.pk if usuario is not None and usuario.is_authenticated else None,
+        'ip_address': ip_cliente(request),
+        'user_agent': request.META.get('HTTP_USER_AGENT', '')[:500],
+    }
+
+
+# --- Búfer -------------------------------------------------------------------
+
+def _base_datos():
+    return connection.settings_dict['NAME']
+
+
+def _agregar(entrada):
+    with _candado:
+        _bufer.append((_base_datos(), entrada))
+        lleno = len(_bufer) >= configuracion()['TAMANO_LOTE']
+    if lleno:
+        vaciar()
+    elif getattr(_contexto, 'request', None) is None:
+        _iniciar_vaciador()
+
+
+def vaciar():
+    """Escribe las entradas pendientes con un bulk_create por modelo"""
+    global _bufer
+    with _candado:
+        pendientes, _bufer = _bufer, []
+    if not pendientes:
+        return 0
+
+    # Entradas registradas contra otra base (p. ej. la de pruebas ya destruida) se descartan
+    base_datos = _base_datos()
+    por_modelo = {}
+    for nombre, entrada in pendientes:
+        if nombre == base_datos:
+            por_modelo.setdefault(type(entrada), []).append(entrada)
+    try:
+        for modelo, entradas in por_modelo.items():
+            modelo.objects.bulk_create(entradas, batch_size=configuracion()['TAMANO_LOTE'])
+    except Exception:
+        # La auditoría nunca debe romper la operación que la originó: las entradas
+        # vuelven al búfer para el siguiente intento, con un tope para no crecer sin límite
+        logger.exception('No se pudieron escribir %d entradas de auditoría', len(pendientes))
+        with _candado:
+            espacio = configuracion()['TAMANO_LOTE'] * 10 - len(_bufer)
+            _bufer[:0] = [
+                (nombre, entrada) for nombre, entrada in pendientes
+                if nombre == base_datos and entrada.pk is None
+            ][:max(espacio, 0)]
+        return 0
+    return sum(len(entradas) for entradas in por_modelo.values())
+
+
+def pendientes():
+    with _candado:
+        return len(_bufer)
+
+
+def _iniciar_vaciador():
+    global _vaciador
+    with _candado:
+        if _vaciador is not None:
+            return
+        _vaciador = threading.Thread(target=_ciclo_vaciador, name='auditoria-vaciador', daemon=True)
+    _vaciador.start()
+
+
+def _ciclo_vaciador():
+    from django.db import close_old_connections
+
+    while True:
+        time.sleep(configuracion()['INTERVALO_SEGUNDOS'])
+        if pendientes():
+            close_old_connections()
+            vaciar()
+
+
+atexit.register(vaciar)
+
+
+# --- Registro ----------------------------------------------------------------
+
+def registrar_actividad(tipo, descripcion, instancia=None, anteriores=None, nuevos=None, usuario=None):
+    """Agrega un RegistroActividad al búfer cuando se confirme la transacción actual"""
+    from usuarios.models import RegistroActividad
+
+    datos = _datos_contexto()
+    if usuario is not None:
+        datos['usuario_id'] = usuario.pk
+    entrada = RegistroActividad(
+        tipo=tipo,
+        descripcion=descripcion[:1000],
+        modelo_afectado=instancia._meta.label if instancia is not None else '',
+        objeto_id=instancia.pk if instancia is not None else None,
+        datos_anteriores=anteriores,
+        datos_nuevos=nuevos,
+        fecha=timezone.now(),
+        **datos
+    )
+    transaction.on_commit(lambda: _agregar(entrada))
+
+
+def registrar_historial(**campos):
+    """Agrega un HistorialEvaluacion al búfer cuando se confirme la transacción actual"""
+    from evaluacion.models import HistorialEvaluacion
+
+    campos.setdefault('fecha', timezone.now())
+    entrada = HistorialEvaluacion(**campos)
+    transaction.on_commit(lambda: _agregar(entrada))
+
+
+# --- Diferencias de modelos --------------------------------------------------
+
+def _valor(valor, longitud_maxima):
+    """Valor serializable en JSON; los textos largos se resumen"""
+    if isinstance(valor, FieldFile):
+        return valor.name or None
+    if isinstance(valor, (datetime.date, datetime.time, decimal.Decimal, uuid.UUID)):
+        return str(valor)
+    if isinstance(valor, str) and len(valor) > longitud_maxima:
+        return f'{valor[:longitud_maxima]}… ({len(valor)} caracteres)'
+    return valor
+
+
+def _campos(modelo):
+    """
+    (campo, es_sensible) de los campos auditados: los concretos, sin la llave
+    primaria ni las fechas automáticas
+    """
+    campos = modelo.__dict__.get('_campos_auditoria')
+    if campos is None:
+        campos = [
+            (campo.attname, any(fragmento in campo.attname for fragmento in FRAGMENTOS_SENSIBLES))
+            for campo in modelo._meta.concrete_fields
+            if not campo.primary_key
+            and not (isinstance(campo, models.DateTimeField) and (campo.auto_now or campo.auto_now_add))
+        ]
+        modelo._campos_auditoria = campos
+    return campos
+
+
+def _oculto(valor):
+    if not valor:
+        return valor
+    return f'*** ({hashlib.sha256(str(valor).encode()).hexdigest()[:8]})'
+
+
+def _valores(instancia):
+    """Valores actuales de los campos auditados, sin convertir"""
+    valores = instancia.__dict__
+    return {campo: valores[campo] for campo, _ in _campos(type(instancia)) if campo in valores}
+
+
+def estado(instancia, valores=None, campos=None):
+    """Valores serializables en JSON de los campos indicados (todos si es None)"""
+    longitud = configuracion()['LONGITUD_MAXIMA_TEXTO']
+    valores = _valores(instancia) if valores is None else valores
+    datos = {}
+    for campo, sensible in _campos(type(instancia)):
+        if campo not in valores or (campos is not None and campo not in campos):
+            continue
+        datos[campo] = _oculto(valores[campo]) if sensible else _valor(valores[campo], longitud)
+    return datos
+
+
+def tomar_estado(sender, instance, **kwargs):
+    """
+    post_init: guarda los valores originales para calcular la diferencia al
+    guardar. Solo copia referencias; la conversión a JSON se hace al registrar.
+    """
+    instance._estado_auditoria = _valores(instance) if instance.pk is not None else None
+
+
+def registrar_guardado(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    actual = _valores(instance)
+    anterior = getattr(instance, '_estado_auditoria', None)
+    instance._estado_auditoria = actual
+
+    if created or anterior is None:
+        registrar_actividad(
+            'CREAR', f'Creación de {sender._meta.verbose_name} #{instance.pk}', instance,
+            nuevos=estado(instance, actual)
+        )
+        return
+
+    cambios = [campo for campo in actual if campo in anterior and anterior[campo] != actual[campo]]
+    if not cambios:
+        return
+    registrar_actividad(
+        'EDITAR',
+        f'Edición de {sender._meta.verbose_name} #{instance.pk}: {", ".join(cambios)}',
+        instance,
+        anteriores=estado(instance, anterior, cambios),
+        nuevos=estado(instance, actual, cambios),
+    )
+
+
+def registrar_eliminacion(sender, instance, **kwargs):
+    registrar_actividad(
+        'ELIMINAR', f'Eliminación de {sender._meta.verbose_name} #{instance.pk}', instance,
+        anteriores=estado(instance, getattr(instance, '_estado_auditoria', None))
+    )
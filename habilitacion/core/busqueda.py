@@ -0,0 +1,294 @@
+"""
+Búsqueda de texto completo sobre criterios, normativas y documentos generados
+Sistema de Habilitación de Servicios de Salud
+
+EntradaBusqueda guarda el texto plano de cada objeto; el motor mantiene su
+propio índice sobre esa tabla (FTS5 con plegado de tildes en SQLite, tsvector
+'spanish' con índice GIN en PostgreSQL, ver la migración core 0003). Las
+señales de core.signals reindexan los objetos modificados al confirmar la
+transacción; `reindexar` reconstruye todo (comando reindexar_busqueda).
+
+Los criterios y las normativas son comunes (entidad vacía); los documentos
+pertenecen a la entidad de su sede y solo los ven sus usuarios.
+"""
+
+import html
+import re
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import escape, strip_tags
+from django.utils.safestring import mark_safe
+
+from .diferido import programar
+
+
+# Marcas del fragmento resaltado: se escapan y se reemplazan por <mark> al final
+MARCA_INICIO = '\ue000'
+MARCA_FIN = '\ue001'
+
+TAMANO_LOTE = 500
+
+# Palabras vacías que no aportan a la consulta ("dónde dice lavado de manos")
+PALABRAS_VACIAS = {
+    'a', 'al', 'como', 'con', 'cual', 'de', 'del', 'dice', 'donde', 'dónde', 'el', 'en', 'es',
+    'la', 'las', 'lo', 'los', 'o', 'para', 'por', 'que', 'qué', 'se', 'su', 'un', 'una', 'y',
+}
+
+
+def _texto_plano(contenido_html):
+    return re.sub(r'\s+', ' ', html.unescape(strip_tags(contenido_html or ''))).strip()
+
+
+def _entradas(tipo, ids=None):
+    """Genera (objeto_id, entidad_id, titulo, contenido) de los objetos del tipo indicado"""
+    if tipo == 'CRITERIO':
+        from estandares.models import Criterio
+
+        criterios = Criterio.objects.all()
+        if ids is not None:
+            criterios = criterios.filter(pk__in=ids)
+        for criterio in criterios.values(
+            'pk', 'numero', 'texto', 'estandar__codigo', 'estandar__nombre'
+        ).iterator(chunk_size=2000):
+            yield (
+                criterio['pk'], None,
+                f'Criterio {criterio["numero"]} - {criterio["estandar__codigo"]} {criterio["estandar__nombre"]}',
+                criterio['texto'],
+            )
+
+    elif tipo == 'NORMATIVA':
+        from documentos.models import NormativaReferencia
+
+        normativas = NormativaReferencia.objects.all()
+        if ids is not None:
+            normativas = normativas.filter(pk__in=ids)
+        for normativa in normativas.iterator(chunk_size=200):
+            yield (
+                normativa.pk, None,
+                f'{normativa.get_tipo_display()} {normativa.numero} de {normativa.anio}: {normativa.titulo}',
+                f'{normativa.resumen}\n{_texto_plano(normativa.contenido_completo)}',
+            )
+
+    elif tipo == 'DOCUMENTO':
+        from evaluacion.models import DocumentoEvaluacion
+
+        documentos = DocumentoEvaluacion.objects.all()
+        if ids is not None:
+            documentos = documentos.filter(pk__in=ids)
+        for documento in documentos.values(
+            'pk', 'nombre', 'version', 'descripcion', 'contenido_html', 'evaluacion__sede__entidad_id'
+        ).iterator(chunk_size=200):
+            yield (
+                documento['pk'], documento['evaluacion__sede__entidad_id'],
+                f'{documento["nombre"]} (v{documento["version"]})',
+                f'{documento["descripcion"]}\n{_texto_plano(documento["contenido_html"])}'.strip(),
+            )
+
+
+def indexar(tipo, ids):
+    """Actualiza las entradas de los objetos indicados y elimina las de los que ya no existen"""
+    from .models import EntradaBusqueda
+
+    ids = set(ids)
+    existentes = {
+        entrada.objeto_id: entrada
+        for entrada in EntradaBusqueda.objects.filter(tipo=tipo, objeto_id__in=ids)
+    }
+    nuevas, modificadas, vistos = [], [], set()
+    for objeto_id, entidad_id, titulo, contenido in _entradas(tipo, ids):
+        vistos.add(objeto_id)
+        entrada = existentes.get(objeto_id)
+        if entrada is None:
+            nuevas.append(EntradaBusqueda(
+                tipo=tipo, objeto_id=objeto_id, entidad_id=entidad_id, titulo=titulo[:300], contenido=contenido
+            ))
+        elif (entrada.entidad_id, entrada.titulo, entrada.contenido) != (entidad_id, titulo[:300], contenido):
+            entrada.entidad_id, entrada.titulo, entrada.contenido = entidad_id, titulo[:300], contenido
+            modificadas.append(entrada)
+
+    with transaction.atomic():
+        EntradaBusqueda.objects.filter(tipo=tipo, objeto_id__in=ids - vistos).delete()
+        EntradaBusqueda.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE)
+        EntradaBusqueda.objects.bulk_update(
+            modificadas, ['entidad', 'titulo', 'contenido', 'fecha_indexacion'], batch_size=TAMANO_LOTE
+        )
+    return len(nuevas) + len(modificadas)
+
+
+def reindexar(tipos=None):
+    """Reconstruye el índice completo de los tipos indicados (todos si es None)"""
+    from .models import EntradaBusqueda
+
+    total = 0
+    for tipo in tipos or [valor for valor, _ in EntradaBusqueda.TIPOS]:
+        with transaction.atomic():
+            EntradaBusqueda.objects.filter(tipo=tipo).delete()
+            lote = []
+            for objeto_id, entidad_id, titulo, contenido in _entradas(tipo):
+                lote.append(EntradaBusqueda(
+                    tipo=tipo, objeto_id=objeto_id, entidad_id=entidad_id, titulo=titulo[:300], contenido=contenido
+                ))
+                if len(lote) >= TAMANO_LOTE:
+                    EntradaBusqueda.objects.bulk_create(lote)
+                    total += len(lote)
+                    lote = []
+            EntradaBusqueda.objects.bulk_create(lote)
+            total += len(lote)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO core_entradabusqueda_fts(core_entradabusqueda_fts) VALUES ('optimize')")
+    return total
+
+
+def programar_indexacion(tipo, ids):
+    """Reindexa los objetos al confirmar la transacción, una sola vez por objeto"""
+    programar(f'busqueda:{tipo}', ids, partial(indexar, tipo))
+
+
+def terminos(consulta):
+    """Palabras de la consulta sin palabras vacías, en minúscula"""
+    palabras = [palabra.lower() for palabra in re.findall(r'\w+', consulta)]
+    utiles = [palabra for palabra in palabras if palabra not in PALABRAS_VACIAS]
+    return utiles or palabras
+
+
+def _alcance(entidad_id, todas):
+    """Condición SQL y parámetros del alcance por entidad"""
+    if todas:
+        return '', []
+    if entidad_id is None:
+        return ' AND e.entidad_id IS NULL', []
+    return ' AND (e.entidad_id IS NULL OR e.entidad_id = %s)', [entidad_id]
+
+
+def _buscar_sqlite(palabras, operador, filtro, parametros, limite):
+    # Las palabras solo contienen \w, así que entre comillas no alteran la sintaxis de FTS5
+    expresion = f' {operador} '.join(
+        f'"{palabra}"*' if len(palabra) >= 3 else f'"{palabra}"' for palabra in palabras
+    )
+    sql = f"""
+        SELECT e.id, e.tipo, e.objeto_id, e.entidad_id,
+               highlight(core_entradabusqueda_fts, 0, %s, %s),
+               snippet(core_entradabusqueda_fts, 1, %s, %s, '…', 30),
+               bm25(core_entradabusqueda_fts, 5.0, 1.0) AS rango
+        FROM core_entradabusqueda_fts
+        JOIN core_entradabusqueda e ON e.id = core_entradabusqueda_fts.rowid
+        WHERE core_entradabusqueda_fts MATCH %s{filtro}
+        ORDER BY rango
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [MARCA_INICIO, MARCA_FIN, MARCA_INICIO, MARCA_FIN, expresion, *parametros, limite])
+        return [(fila[:6], -fila[6]) for fila in cursor.fetchall()]
+
+
+def _buscar_postgresql(palabras, operador, filtro, parametros, limite):
+    expresion = f' {"&" if operador == "AND" else "|"} '.join(
+        f'{palabra}:*' if len(palabra) >= 3 else palabra for palabra in palabras
+    )
+    opciones = f'StartSel={MARCA_INICIO}, StopSel={MARCA_FIN}, HighlightAll=true'
+    sql = f"""
+        SELECT e.id, e.tipo, e.objeto_id, e.entidad_id,
+               ts_headline('spanish', e.titulo, q, %s),
+               ts_headline('spanish', e.contenido, q, %s),
+               ts_rank(to_tsvector('spanish', e.titulo || ' ' || e.contenido), q) AS rango
+        FROM core_entradabusqueda e, to_tsquery('spanish', %s) q
+        WHERE to_tsvector('spanish', e.titulo || ' ' || e.contenido) @@ q{filtro}
+        ORDER BY rango DESC
+        LIMIT %s
+    """
+    fragmento = f'StartSel={MARCA_INICIO}, StopSel={MARCA_FIN}, MaxWords=35, MinWords=15, MaxFragments=2'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [opciones, fragmento, expresion, *parametros, limite])
+        return [(fila[:6], fila[6]) for fila in cursor.fetchall()]
+
+
+def _buscar_generico(palabras, operador, entidad_id, todas, limite):
+    """Motores sin índice de texto: coincidencia simple, sin ranking"""
+    from .models import EntradaBusqueda
+
+    condicion = Q()
+    for palabra in palabras:
+        termino = Q(titulo__icontains=palabra) | Q(contenido__icontains=palabra)
+        condicion = (condicion & termino) if operador == 'AND' else (condicion | termino)
+    entradas = EntradaBusqueda.objects.filter(condicion)
+    if not todas:
+        entradas = entradas.filter(Q(entidad__isnull=True) | Q(entidad_id=entidad_id))
+    filas = []
+    for entrada in entradas[:limite]:
+        inicio = min(
+            (posicion for posicion in (entrada.contenido.lower().find(p) for p in palabras) if posicion >= 0),
+            default=0
+        )
+        fragmento = entrada.contenido[max(0, inicio - 80):inicio + 200]
+        filas.append(((entrada.pk, entrada.tipo, entrada.objeto_id, entrada.entidad_id,
+                       entrada.titulo, fragmento), 0))
+    return filas
+
+
+def _resaltar(texto):
+    return mark_safe(escape(texto).replace(MARCA_INICIO, '<mark>').replace(MARCA_FIN, '</mark>'))
+
+
+def url_resultado(tipo, objeto_id, evaluacion_id=None):
+    if tipo == 'CRITERIO':
+        return reverse('estandares:detalle_criterio', args=[objeto_id])
+    if tipo == 'DOCUMENTO' and evaluacion_id:
+        return reverse('evaluacion:documento', args=[evaluacion_id])
+    return reverse('documentos:normativas')
+
+
+def buscar(consulta, entidad_id=None, todas=False, tipo=None, limite=50):
+    """
+    Busca `consulta` en el índice y retorna los resultados ordenados por
+    relevancia: dicts con tipo, objeto_id, titulo y fragmento (HTML seguro,
+    con las coincidencias en <mark>) y url. Primero exige todas las palabras;
+    si no hay resultados, acepta cualquiera de ellas.
+    `todas=True` ignora el alcance por entidad (usuarios SUPER).
+    """
+    from .models import EntradaBusqueda
+
+    palabras = terminos(consulta)
+    if not palabras:
+        return []
+
+    filtro, parametros = _alcance(entidad_id, todas)
+    if tipo:
+        filtro += ' AND e.tipo = %s'
+        parametros = parametros + [tipo]
+
+    filas = []
+    for operador in ('AND', 'OR') if len(palabras) > 1 else ('AND',):
+        if connection.vendor == 'sqlite':
+            filas = _buscar_sqlite(palabras, operador, filtro, parametros, limite)
+        elif connection.vendor == 'postgresql':
+            filas = _buscar_postgresql(palabras, operador, filtro, parametros, limite)
+        else:
+            filas = _buscar_generico(palabras, operador, entidad_id, todas, limite)
+            if tipo:
+                filas = [fila for fila in filas if fila[0][1] == tipo]
+        if filas:
+            break
+
+    # Enlace de los documentos: la evaluación a la que pertenecen
+    from evaluacion.models import DocumentoEvaluacion
+    evaluaciones = dict(DocumentoEvaluacion.objects.filter(
+        pk__in=[fila[2] for fila, _ in filas if fila[1] == 'DOCUMENTO']
+    ).values_list('pk', 'evaluacion_id'))
+    tipos = dict(EntradaBusqueda.TIPOS)
+
+    return [
+        {
+            'tipo': tipo_fila,
+            'tipo_display': tipos.get(tipo_fila, tipo_fila),
+            'objeto_id': objeto_id,
+            'titulo': _resaltar(titulo),
+            'fragmento': _resaltar(fragmento),
+            'rango': round(rango, 4),
+            'url': url_resultado(tipo_fila, objeto_id, evaluaciones.get(objeto_id)),
+        }
+        for (_, tipo_fila, objeto_id, _entidad, titulo, fragmento), rango in filas
+    ]
@@ -16,9 +16,9 @@ def global_settings(request):
         'HABILITACION_CONFIG': settings.HABILITACION_CONFIG,
     }
 
-    # Añadir información del usuario actual
-    if request.user.is_authenticated:
-        context['entidad_actual'] = getattr(request.user, 'entidad', None)
-        context['sedes_usuario'] = request.user.sedes.all() if hasattr(request.user, 'sedes') else []
+    # Añadir información del usuario actual (principal en sesión, sin consultas)
+    principal = getattr(request, 'principal', None)
+    if principal is not None and principal.autenticado:
+        context['principal'] = principal
 
     return context
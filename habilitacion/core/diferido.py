@@ -0,0 +1,75 @@
+"""
+Trabajo diferido hasta confirmar la transacción
+Sistema de Habilitación de Servicios de Salud
+
+Las señales que mantienen datos derivados (aplicabilidad, resúmenes, índice
+de búsqueda, versiones de la API) no los recalculan en cada escritura:
+
+    programar('cartera:sedes', [sede.pk], actualizar_sedes)
+
+acumula los ids bajo la clave y llama `funcion(ids)` una sola vez al confirmar
+la transacción, aunque la petición escriba muchas filas. Los ids programados
+dentro de una transacción (o savepoint) que se revierte se descartan junto con
+ella. Fuera de una transacción la función se ejecuta de inmediato.
+"""
+
+import threading
+from functools import partial
+
+from django.db import transaction
+
+_estado = threading.local()
+
+
+class _Volcado:
+    """Callback final de una clave: entrega a la función los ids confirmados"""
+
+    def __init__(self, clave, funcion):
+        self.clave = clave
+        self.funcion = funcion
+        self.activo = True
+
+    def __call__(self):
+        if not self.activo:
+            # Un programar() posterior dejó otro volcado más adelante en la cola
+            return
+        acumulados = _acumulados().pop(self.clave, set())
+        if acumulados:
+            self.funcion(acumulados)
+
+
+def _acumulados():
+    if not hasattr(_estado, 'acumulados'):
+        _estado.acumulados = {}
+        _estado.volcados = {}
+    return _estado.acumulados
+
+
+def _acumular(clave, ids):
+    _acumulados().setdefault(clave, set()).update(ids)
+
+
+def programar(clave, ids, funcion):
+    """Ejecuta funcion(ids acumulados) al confirmar la transacción, una vez por clave"""
+    ids = set(ids)
+    if not ids:
+        return
+    conexion = transaction.get_connection()
+    if not conexion.in_atomic_block:
+        funcion(ids)
+        return
+
+    # Los ids viajan en un callback propio: Django lo descarta si su savepoint se revierte
+    transaction.on_commit(partial(_acumular, clave, ids))
+
+    # El volcado va siempre al final y sin savepoints, así corre después de todos
+    # los ids de la clave y solo lo descarta el rollback de la transacción completa.
+    # on_commit() no permite registrar fuera del savepoint actual: se agrega a la
+    # cola de la conexión con su formato de Django 4.2 (versión fijada en
+    # requirements.txt y cubierta por core.tests.DiferidoTests)
+    _acumulados()
+    anterior = _estado.volcados.get(clave)
+    if anterior is not None:
+        anterior.activo = False
+    volcado = _estado.volcados[clave] = _Volcado(clave, funcion)
+    conexion.run_on_commit.append((set(), volcado, False))
@@ -0,0 +1,49 @@
+"""
+Comando que recalcula las alertas de vencimiento y envía los avisos por correo.
+Pensado para ejecutarse una vez al día desde cron; es idempotente, así que
+repetirlo no duplica alertas ni correos.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.vencimientos import notificar_alertas, sincronizar_alertas
+
+
+class Command(BaseCommand):
+    help = 'Calcula los vencimientos próximos y vencidos de todas las entidades y envía los avisos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=settings.HABILITACION_CONFIG['DIAS_ALERTA_VENCIMIENTO'],
+            help='Horizonte de aviso en días'
+        )
+        parser.add_argument(
+            '--sin-correo',
+            action='store_true',
+            help='Solo actualiza la tabla de alertas, sin enviar avisos'
+        )
+
+    def handle(self, *args, **options):
+        if options['dias'] < 0:
+            raise CommandError('--dias debe ser mayor o igual a cero')
+
+        resultado = sincronizar_alertas(dias=options['dias'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Alertas vigentes: {resultado['total']} (nuevas: {resultado['creadas']}, "
+            f"actualizadas: {resultado['actualizadas']}, eliminadas: {resultado['eliminadas']})"
+        ))
+
+        if options['sin_correo']:
+            return
+        enviados, notificadas = notificar_alertas()
+        if notificadas or not enviados:
+            self.stdout.write(self.style.SUCCESS(
+                f'Correos enviados: {enviados} ({notificadas} alertas notificadas)'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                'No se pudieron enviar todos los avisos; se reintentarán en la próxima ejecución'
+            ))
@@ -0,0 +1,62 @@
+"""
+Comando que procesa la cola de tareas en segundo plano.
+Pensado para ejecutarse como servicio (systemd, supervisor o un contenedor aparte)
+cuando TAREAS_SEGUNDO_PLANO['MODO'] es 'EXTERNO', o desde cron con --una-vez.
+"""
+
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core.tareas import (
+    GrupoTrabajadores, configuracion, procesar_pendientes, recuperar_tareas_colgadas
+)
+
+
+class Command(BaseCommand):
+    help = 'Procesa las tareas en segundo plano (miniaturas, generación con IA, exportaciones...)'
+
+    def add_arguments(self, parser):
+        config = configuracion()
+        parser.add_argument(
+            '--hilos',
+            type=int,
+            default=config['HILOS'],
+            help='Número de tareas que se procesan simultáneamente'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=config['INTERVALO_SEGUNDOS'],
+            help='Segundos de espera cuando la cola está vacía'
+        )
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa las tareas pendientes y termina'
+        )
+
+    def handle(self, *args, **options):
+        if options['una_vez']:
+            recuperadas = recuperar_tareas_colgadas()
+            procesadas = procesar_pendientes()
+            self.stdout.write(self.style.SUCCESS(
+                f'Tareas procesadas: {procesadas} (recuperadas: {recuperadas})'
+            ))
+            return
+
+        grupo = GrupoTrabajadores(max(1, options['hilos']), options['intervalo'])
+
+        def detener(*_):
+            self.stdout.write('Deteniendo trabajadores...')
+            grupo.detener.set()
+            grupo.evento.set()
+
+        signal.signal(signal.SIGINT, detener)
+        signal.signal(signal.SIGTERM, detener)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Procesando tareas con {grupo.hilos} hilo(s). Ctrl+C para detener.'
+        ))
+        grupo.iniciar()
+        grupo.esperar()
@@ -0,0 +1,31 @@
+"""
+Comando que reconstruye el índice de búsqueda de texto completo.
+Necesario una vez tras migrar y después de cargas masivas que no disparan
+señales; los cambios normales se indexan solos.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.busqueda import reindexar
+from core.models import EntradaBusqueda
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de criterios, normativas y documentos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tipo',
+            action='append',
+            choices=[valor for valor, _ in EntradaBusqueda.TIPOS],
+            help='Reindexar solo este tipo (se puede repetir)'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total = reindexar(options['tipo'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Entradas indexadas: {total} ({time.perf_counter() - inicio:.1f} s)'
+        ))
@@ -0,0 +1,41 @@
+"""
+Middleware del módulo core.
+"""
+
+from django.utils.functional import SimpleLazyObject
+
+from usuarios.principal import obtener_principal
+
+from . import auditoria
+
+
+class PrincipalMiddleware:
+    """
+    Expone request.principal: rol, entidad y sedes del usuario, cargados a lo
+    sumo una vez por sesión (ver usuarios.principal). Se evalúa al primer uso.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.principal = SimpleLazyObject(lambda: obtener_principal(request))
+        return self.get_response(request)
+
+
+class AuditoriaMiddleware:
+    """
+    Asocia las entradas de auditoría a la petición (usuario, IP, navegador) y
+    escribe en un solo lote todo lo registrado durante ella.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        auditoria.iniciar_contexto(request)
+        try:
+            return self.get_response(request)
+        finally:
+            auditoria.terminar_contexto()
+            auditoria.vaciar()
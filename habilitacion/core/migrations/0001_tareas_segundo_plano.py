@@ -0,0 +1,137 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:25
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="TareaSegundoPlano",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        db_index=True, max_length=100, verbose_name="Tipo"
+                    ),
+                ),
+                (
+                    "parametros",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="Parámetros"
+                    ),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("PENDIENTE", "Pendiente"),
+                            ("EN_PROCESO", "En Proceso"),
+                            ("COMPLETADA", "Completada"),
+                            ("ERROR", "Error"),
+                        ],
+                        default="PENDIENTE",
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "prioridad",
+                    models.SmallIntegerField(
+                        default=0,
+                        help_text="Las tareas con menor valor se procesan primero",
+                        verbose_name="Prioridad",
+                    ),
+                ),
+                (
+                    "intentos",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Intentos"
+                    ),
+                ),
+                (
+                    "max_intentos",
+                    models.PositiveSmallIntegerField(
+                        default=3, verbose_name="Máximo de intentos"
+                    ),
+                ),
+                (
+                    "disponible_desde",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Disponible desde",
+                    ),
+                ),
+                (
+                    "clave_concurrencia",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="Clave de concurrencia"
+                    ),
+                ),
+                (
+                    "limite_concurrencia",
+                    models.PositiveSmallIntegerField(
+                        blank=True, null=True, verbose_name="Límite de concurrencia"
+                    ),
+                ),
+                (
+                    "trabajador",
+                    models.CharField(
+                        blank=True, max_length=100, verbose_name="Trabajador"
+                    ),
+                ),
+                (
+                    "resultado",
+                    models.JSONField(blank=True, null=True, verbose_name="Resultado"),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="Error")),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha de creación"
+                    ),
+                ),
+                (
+                    "fecha_inicio",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Fecha de inicio"
+                    ),
+                ),
+                (
+                    "fecha_fin",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Fecha de finalización"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tarea en Segundo Plano",
+                "verbose_name_plural": "Tareas en Segundo Plano",
+                "ordering": ["prioridad", "id"],
+                "indexes": [
+                    models.Index(
+                        fields=["estado", "disponible_desde", "prioridad"],
+                        name="core_tarea_cola_idx",
+                    ),
+                    models.Index(
+                        fields=["clave_concurrencia", "estado"],
+                        name="core_tarea_clave_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entidades", "0006_version_aplicabilidad_sede"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0001_tareas_segundo_plano"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlertaVencimiento",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("DOCUMENTO", "Documento de la entidad"),
+                            ("HABILITACION", "Habilitación de la entidad"),
+                            ("VIGENCIA", "Vigencia de habilitación"),
+                            ("EVALUACION", "Documento de criterio"),
+                            ("PQRS", "Respuesta a PQRS"),
+                        ],
+                        max_length=20,
+                        verbose_name="Tipo",
+                    ),
+                ),
+                (
+                    "objeto_id",
+                    models.PositiveIntegerField(verbose_name="ID del objeto"),
+                ),
+                (
+                    "nombre",
+                    models.CharField(max_length=300, verbose_name="Descripción"),
+                ),
+                (
+                    "fecha_vencimiento",
+                    models.DateField(verbose_name="Fecha de vencimiento"),
+                ),
+                (
+                    "nivel",
+                    models.CharField(
+                        choices=[
+                            ("PROXIMO", "Próximo a vencer"),
+                            ("CRITICO", "Vence en 30 días o menos"),
+                            ("VENCIDO", "Vencido"),
+                        ],
+                        max_length=10,
+                        verbose_name="Nivel",
+                    ),
+                ),
+                (
+                    "nivel_notificado",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("PROXIMO", "Próximo a vencer"),
+                            ("CRITICO", "Vence en 30 días o menos"),
+                            ("VENCIDO", "Vencido"),
+                        ],
+                        help_text="Se envía un nuevo aviso solo cuando el nivel empeora",
+                        max_length=10,
+                        verbose_name="Último nivel notificado",
+                    ),
+                ),
+                (
+                    "fecha_calculo",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Fecha de cálculo"
+                    ),
+                ),
+                (
+                    "entidad",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="alertas_vencimiento",
+                        to="entidades.entidadprestadora",
+                        verbose_name="Entidad",
+                    ),
+                ),
+                (
+                    "responsable",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Destinatario adicional del aviso (p. ej. el responsable de la PQRS)",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="alertas_vencimiento",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "sede",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="alertas_vencimiento",
+                        to="entidades.sede",
+                        verbose_name="Sede",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Alerta de Vencimiento",
+                "verbose_name_plural": "Alertas de Vencimiento",
+                "ordering": ["fecha_vencimiento"],
+                "indexes": [
+                    models.Index(
+                        fields=["entidad", "fecha_vencimiento"],
+                        name="core_alerta_ent_fecha_idx",
+                    ),
+                    models.Index(
+                        fields=["fecha_vencimiento"], name="core_alerta_fecha_idx"
+                    ),
+                ],
+                "unique_together": {("tipo", "objeto_id")},
+            },
+        ),
+    ]
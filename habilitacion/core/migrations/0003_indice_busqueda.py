@@ -0,0 +1,134 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Índice de texto completo según el motor. En SQLite, una tabla FTS5 de
+# contenido externo sincronizada con disparadores (unicode61 sin tildes); en
+# PostgreSQL, un índice GIN sobre el tsvector con la configuración 'spanish'.
+SQL_SQLITE = [
+    """
+    CREATE VIRTUAL TABLE core_entradabusqueda_fts USING fts5(
+        titulo, contenido,
+        content='core_entradabusqueda', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER core_entradabusqueda_ai AFTER INSERT ON core_entradabusqueda BEGIN
+        INSERT INTO core_entradabusqueda_fts(rowid, titulo, contenido)
+        VALUES (new.id, new.titulo, new.contenido);
+    END
+    """,
+    """
+    CREATE TRIGGER core_entradabusqueda_ad AFTER DELETE ON core_entradabusqueda BEGIN
+        INSERT INTO core_entradabusqueda_fts(core_entradabusqueda_fts, rowid, titulo, contenido)
+        VALUES ('delete', old.id, old.titulo, old.contenido);
+    END
+    """,
+    """
+    CREATE TRIGGER core_entradabusqueda_au AFTER UPDATE ON core_entradabusqueda BEGIN
+        INSERT INTO core_entradabusqueda_fts(core_entradabusqueda_fts, rowid, titulo, contenido)
+        VALUES ('delete', old.id, old.titulo, old.contenido);
+        INSERT INTO core_entradabusqueda_fts(rowid, titulo, contenido)
+        VALUES (new.id, new.titulo, new.contenido);
+    END
+    """,
+]
+SQL_SQLITE_REVERSA = [
+    'DROP TRIGGER IF EXISTS core_entradabusqueda_au',
+    'DROP TRIGGER IF EXISTS core_entradabusqueda_ad',
+    'DROP TRIGGER IF EXISTS core_entradabusqueda_ai',
+    'DROP TABLE IF EXISTS core_entradabusqueda_fts',
+]
+SQL_POSTGRESQL = [
+    """
+    CREATE INDEX core_busqueda_vector_idx ON core_entradabusqueda
+    USING gin (to_tsvector('spanish', titulo || ' ' || contenido))
+    """,
+]
+SQL_POSTGRESQL_REVERSA = ['DROP INDEX IF EXISTS core_busqueda_vector_idx']
+
+
+def crear_indice_texto(apps, schema_editor):
+    sentencias = {'sqlite': SQL_SQLITE, 'postgresql': SQL_POSTGRESQL}
+    for sentencia in sentencias.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sentencia)
+
+
+def eliminar_indice_texto(apps, schema_editor):
+    sentencias = {'sqlite': SQL_SQLITE_REVERSA, 'postgresql': SQL_POSTGRESQL_REVERSA}
+    for sentencia in sentencias.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sentencia)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entidades", "0006_version_aplicabilidad_sede"),
+        ("core", "0002_alertas_vencimiento"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EntradaBusqueda",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "tipo",
+                    models.CharField(
+                        choices=[
+                            ("CRITERIO", "Criterio"),
+                            ("NORMATIVA", "Normativa"),
+                            ("DOCUMENTO", "Documento"),
+                        ],
+                        max_length=20,
+                        verbose_name="Tipo",
+                    ),
+                ),
+                (
+                    "objeto_id",
+                    models.PositiveIntegerField(verbose_name="ID del objeto"),
+                ),
+                ("titulo", models.CharField(max_length=300, verbose_name="Título")),
+                ("contenido", models.TextField(blank=True, verbose_name="Contenido")),
+                (
+                    "fecha_indexacion",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Fecha de indexación"
+                    ),
+                ),
+                (
+                    "entidad",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Vacío para contenido común a todas las entidades",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="entradas_busqueda",
+                        to="entidades.entidadprestadora",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Entrada de Búsqueda",
+                "verbose_name_plural": "Entradas de Búsqueda",
+                "indexes": [
+                    models.Index(
+                        fields=["entidad", "tipo"], name="core_busqueda_ent_idx"
+                    )
+                ],
+                "unique_together": {("tipo", "objeto_id")},
+            },
+        ),
+        migrations.RunPython(crear_indice_texto, eliminar_indice_texto),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_indice_busqueda"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VersionDatos",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ambito",
+                    models.CharField(max_length=60, unique=True, verbose_name="Ámbito"),
+                ),
+                (
+                    "version",
+                    models.PositiveBigIntegerField(default=0, verbose_name="Versión"),
+                ),
+                (
+                    "fecha_modificacion",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Fecha de modificación"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Versión de datos",
+                "verbose_name_plural": "Versiones de datos",
+            },
+        ),
+    ]
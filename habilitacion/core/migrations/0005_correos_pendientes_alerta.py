@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_versiones_datos"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="alertavencimiento",
+            name="correos_pendientes",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Destinatarios del último aviso cuyo correo no se pudo enviar",
+                verbose_name="Correos pendientes",
+            ),
+        ),
+    ]
@@ -1,3 +1,199 @@
+"""
+Modelos del módulo Core
+Sistema de Habilitación de Servicios de Salud
+"""
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+class TareaSegundoPlano(models.Model):
+    """
+    Cola de tareas en segundo plano respaldada por la base de datos.
+    No requiere broker: los trabajadores (hilos del proceso web o el comando
+    procesar_tareas) reclaman las tareas pendientes directamente de esta tabla.
+    """
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En Proceso'),
+        ('COMPLETADA', 'Completada'),
+        ('ERROR', 'Error'),
+    ]
+
+    tipo = models.CharField('Tipo', max_length=100, db_index=True)
+    parametros = models.JSONField('Parámetros', default=dict, blank=True)
+    estado = models.CharField('Estado', max_length=20, choices=ESTADOS, default='PENDIENTE')
+    prioridad = models.SmallIntegerField(
+        'Prioridad', default=0,
+        help_text='Las tareas con menor valor se procesan primero'
+    )
+
+    # Reintentos
+    intentos = models.PositiveSmallIntegerField('Intentos', default=0)
+    max_intentos = models.PositiveSmallIntegerField('Máximo de intentos', default=3)
+    disponible_desde = models.DateTimeField('Disponible desde', default=timezone.now)
+
+    # Concurrencia por clave (ej. 'entidad:5'): máximo de tareas simultáneas con la misma clave
+    clave_concurrencia = models.CharField('Clave de concurrencia', max_length=100, blank=True)
+    limite_concurrencia = models.PositiveSmallIntegerField('Límite de concurrencia', null=True, blank=True)
+
+    # Ejecución
+    trabajador = models.CharField('Trabajador', max_length=100, blank=True)
+    resultado = models.JSONField('Resultado', null=True, blank=True)
+    error = models.TextField('Error', blank=True)
+    fecha_creacion = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    fecha_inicio = models.DateTimeField('Fecha de inicio', null=True, blank=True)
+    fecha_fin = models.DateTimeField('Fecha de finalización', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Tarea en Segundo Plano'
+        verbose_name_plural = 'Tareas en Segundo Plano'
+        ordering = ['prioridad', 'id']
+        indexes = [
+            models.Index(fields=['estado', 'disponible_desde', 'prioridad'], name='core_tarea_cola_idx'),
+            models.Index(fields=['clave_concurrencia', 'estado'], name='core_tarea_clave_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.get_estado_display()})"
+
+    @property
+    def terminada(self):
+        return self.estado in ('COMPLETADA', 'ERROR')
+
+
+class AlertaVencimiento(models.Model):
+    """
+    Vencimientos próximos y vencidos de todas las entidades, precalculados por
+    el comando generar_alertas_vencimiento. Los tableros y el reporte de
+    vencimientos leen esta tabla en lugar de recorrer los documentos.
+    Cada alerta se identifica por (tipo, objeto_id), lo que hace idempotente
+    la regeneración.
+    """
+    TIPOS = [
+        ('DOCUMENTO', 'Documento de la entidad'),
+        ('HABILITACION', 'Habilitación de la entidad'),
+        ('VIGENCIA', 'Vigencia de habilitación'),
+        ('EVALUACION', 'Documento de criterio'),
+        ('PQRS', 'Respuesta a PQRS'),
+    ]
+
+    NIVELES = [
+        ('PROXIMO', 'Próximo a vencer'),
+        ('CRITICO', 'Vence en 30 días o menos'),
+        ('VENCIDO', 'Vencido'),
+    ]
+
+    tipo = models.CharField('Tipo', max_length=20, choices=TIPOS)
+    objeto_id = models.PositiveIntegerField('ID del objeto')
+    entidad = models.ForeignKey(
+        'entidades.EntidadPrestadora',
+        on_delete=models.CASCADE,
+        related_name='alertas_vencimiento',
+        verbose_name='Entidad'
+    )
+    sede = models.ForeignKey(
+        'entidades.Sede',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='alertas_vencimiento',
+        verbose_name='Sede'
+    )
+    responsable = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='alertas_vencimiento',
+        help_text='Destinatario adicional del aviso (p. ej. el responsable de la PQRS)'
+    )
+    nombre = models.CharField('Descripción', max_length=300)
+    fecha_vencimiento = models.DateField('Fecha de vencimiento')
+    nivel = models.CharField('Nivel', max_length=10, choices=NIVELES)
+    nivel_notificado = models.CharField(
+        'Último nivel notificado', max_length=10, choices=NIVELES, blank=True,
+        help_text='Se envía un nuevo aviso solo cuando el nivel empeora'
+    )
+    correos_pendientes = models.JSONField(
+        'Correos pendientes', default=list, blank=True,
+        help_text='Destinatarios del último aviso cuyo correo no se pudo enviar'
+    )
+    fecha_calculo = models.DateTimeField('Fecha de cálculo', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Alerta de Vencimiento'
+        verbose_name_plural = 'Alertas de Vencimiento'
+        ordering = ['fecha_vencimiento']
+        unique_together = ['tipo', 'objeto_id']
+        indexes = [
+            models.Index(fields=['entidad', 'fecha_vencimiento'], name='core_alerta_ent_fecha_idx'),
+            models.Index(fields=['fecha_vencimiento'], name='core_alerta_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.nombre} ({self.fecha_vencimiento})"
+
+    @property
+    def dias_restantes(self):
+        """Días hasta el vencimiento (negativo si ya venció)"""
+        return (self.fecha_vencimiento - timezone.localdate()).days
+
+
+class EntradaBusqueda(models.Model):
+    """
+    Texto plano de los criterios, las normativas y los documentos generados,
+    indexado para la búsqueda de texto completo (ver core.busqueda). El índice
+    propio del motor (FTS5 en SQLite, tsvector en PostgreSQL) se crea en la
+    migración y se mantiene sincronizado con esta tabla.
+    """
+    TIPOS = [
+        ('CRITERIO', 'Criterio'),
+        ('NORMATIVA', 'Normativa'),
+        ('DOCUMENTO', 'Documento'),
+    ]
+
+    tipo = models.CharField('Tipo', max_length=20, choices=TIPOS)
+    objeto_id = models.PositiveIntegerField('ID del objeto')
+    entidad = models.ForeignKey(
+        'entidades.EntidadPrestadora',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='entradas_busqueda',
+        help_text='Vacío para contenido común a todas las entidades'
+    )
+    titulo = models.CharField('Título', max_length=300)
+    contenido = models.TextField('Contenido', blank=True)
+    fecha_indexacion = models.DateTimeField('Fecha de indexación', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Entrada de Búsqueda'
+        verbose_name_plural = 'Entradas de Búsqueda'
+        unique_together = ['tipo', 'objeto_id']
+        indexes = [
+            models.Index(fields=['entidad', 'tipo'], name='core_busqueda_ent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.titulo}"
+
+
+class VersionDatos(models.Model):
+    """
+    Contador de cambios por ámbito de datos ('sede:12', 'entidad:3'). Las
+    respuestas de la API de lectura derivan su ETag de estas versiones (ver
+    core.versiones), de modo que una consulta repetida sin cambios se responde
+    con 304 sin recalcular nada.
+    """
+    ambito = models.CharField('Ámbito', max_length=60, unique=True)
+    version = models.PositiveBigIntegerField('Versión', default=0)
+    fecha_modificacion = models.DateTimeField('Fecha de modificación', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Versión de datos'
+        verbose_name_plural = 'Versiones de datos'
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.ambito} v{self.version}"
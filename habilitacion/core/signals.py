@@ -0,0 +1,77 @@
+"""
+Señales del módulo core: mantienen al día el índice de búsqueda cuando cambian
+los criterios, las normativas o los documentos de las evaluaciones, alimentan
+el registro de auditoría con las diferencias de los modelos auditados e inician
+los trabajadores de la cola con la primera petición de cada proceso.
+"""
+
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_started
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from documentos.models import ConfiguracionIA, NormativaReferencia
+from entidades.models import (
+    ConfiguracionEstandarSede, ConfiguracionEvaluacionSede, DocumentoEntidad, EntidadPrestadora, Sede,
+    ServicioHabilitado, VigenciaHabilitacion
+)
+from estandares.models import Criterio
+from evaluacion.models import ArchivoRepositorio, DocumentoEvaluacion, Evaluacion, EvaluacionCriterio
+from siau.models import PQRS, ConfiguracionSIAU
+
+from . import auditoria
+from .busqueda import programar_indexacion
+from .tareas import iniciar_trabajadores
+
+# Evaluaciones, documentos, archivos, PQRS y configuración de entidades y sedes
+MODELOS_AUDITADOS = [
+    Evaluacion, EvaluacionCriterio, DocumentoEvaluacion, ArchivoRepositorio,
+    DocumentoEntidad, EntidadPrestadora, Sede, ServicioHabilitado, VigenciaHabilitacion,
+    ConfiguracionEvaluacionSede, ConfiguracionEstandarSede, ConfiguracionIA, ConfiguracionSIAU, PQRS,
+]
+
+for modelo in MODELOS_AUDITADOS:
+    post_init.connect(auditoria.tomar_estado, sender=modelo, dispatch_uid=f'auditoria_init_{modelo._meta.label}')
+    post_save.connect(auditoria.registrar_guardado, sender=modelo, dispatch_uid=f'auditoria_save_{modelo._meta.label}')
+    post_delete.connect(
+        auditoria.registrar_eliminacion, sender=modelo, dispatch_uid=f'auditoria_delete_{modelo._meta.label}'
+    )
+
+
+@receiver(request_started)
+def peticion_iniciada(sender, **kwargs):
+    # Modo HILOS: sin esto la cola solo se procesa cuando el proceso encola algo.
+    # Solo servidores reales: el cliente de pruebas no levanta hilos.
+    if issubclass(sender, (WSGIHandler, ASGIHandler)):
+        iniciar_trabajadores()
+
+
+@receiver(user_logged_in)
+def sesion_iniciada(sender, request, user, **kwargs):
+    auditoria.registrar_actividad('LOGIN', f'Inicio de sesión de {user.email}', usuario=user)
+
+
+@receiver(user_logged_out)
+def sesion_cerrada(sender, request, user, **kwargs):
+    if user is not None:
+        auditoria.registrar_actividad('LOGOUT', f'Cierre de sesión de {user.email}', usuario=user)
+
+TIPOS_INDEXADOS = {
+    Criterio: 'CRITERIO',
+    NormativaReferencia: 'NORMATIVA',
+    DocumentoEvaluacion: 'DOCUMENTO',
+}
+
+
+@receiver(post_save, sender=Criterio)
+@receiver(post_delete, sender=Criterio)
+@receiver(post_save, sender=NormativaReferencia)
+@receiver(post_delete, sender=NormativaReferencia)
+@receiver(post_save, sender=DocumentoEvaluacion)
+@receiver(post_delete, sender=DocumentoEvaluacion)
+def contenido_indexado_cambiado(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    programar_indexacion(TIPOS_INDEXADOS[sender], [instance.pk])
@@ -0,0 +1,299 @@
+"""
+Cola de tareas en segundo plano sobre la base de datos
+Sistema de Habilitación de Servicios de Salud
+
+Cada aplicación registra sus manejadores en su propio módulo `tareas.py`:
+
+    from core.tareas import tarea
+
+    @tarea('evaluacion.generar_versiones')
+    def generar_versiones(contenido_id):
+        ...
+
+y los encola con `encolar('evaluacion.generar_versiones', {'contenido_id': 5})`.
+
+Modos de ejecución (settings.TAREAS_SEGUNDO_PLANO['MODO']):
+- HILOS: un grupo de hilos dentro del proceso web procesa la cola. Cada
+  proceso lo inicia con su primera petición (y al encolar), así las tareas
+  pendientes, en reintento o recuperadas tras un reinicio no esperan a que
+  ese proceso encole algo nuevo.
+- EXTERNO: la cola la procesa el comando `python manage.py procesar_tareas`.
+- INMEDIATO: la tarea se ejecuta al confirmar la transacción (pruebas).
+"""
+
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_MANEJADORES = {}
+_AL_FALLAR = {}
+
+CONFIGURACION_POR_DEFECTO = {
+    'MODO': 'HILOS',
+    'HILOS': 2,
+    'INTERVALO_SEGUNDOS': 2,
+    'TIEMPO_MAXIMO_SEGUNDOS': 900,
+    'ESPERA_REINTENTO_SEGUNDOS': 30,
+}
+
+
+def configuracion():
+    """Configuración de la cola combinada con los valores por defecto"""
+    config = dict(CONFIGURACION_POR_DEFECTO)
+    config.update(getattr(settings, 'TAREAS_SEGUNDO_PLANO', {}))
+    return config
+
+
+class TareaNoReintentable(Exception):
+    """Error definitivo: la tarea se marca en ERROR sin agotar los reintentos"""
+
+
+def tarea(nombre, al_fallar=None):
+    """
+    Decorador que registra un manejador de tareas.
+    `al_fallar(error, **parametros)` se invoca cuando la tarea queda en ERROR
+    definitivo (reintentos agotados o TareaNoReintentable).
+    """
+    def registrar(funcion):
+        _MANEJADORES[nombre] = funcion
+        if al_fallar is not None:
+            _AL_FALLAR[nombre] = al_fallar
+        return funcion
+    return registrar
+
+
+def manejador(nombre):
+    return _MANEJADORES.get(nombre)
+
+
+def encolar(tipo, parametros=None, prioridad=0, max_intentos=3,
+            clave_concurrencia='', limite_concurrencia=None, retraso=None):
+    """
+    Crea una tarea pendiente. Los trabajadores la verán cuando se confirme
+    la transacción actual.
+    """
+    from .models import TareaSegundoPlano
+
+    tarea_nueva = TareaSegundoPlano.objects.create(
+        tipo=tipo,
+        parametros=parametros or {},
+        prioridad=prioridad,
+        max_intentos=max_intentos,
+        clave_concurrencia=clave_concurrencia,
+        limite_concurrencia=limite_concurrencia,
+        disponible_desde=timezone.now() + (retraso or timedelta(0)),
+    )
+    transaction.on_commit(despertar_trabajadores)
+    return tarea_nueva
+
+
+def _nombre_trabajador():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"[:100]
+
+
+def reclamar_siguiente(trabajador=None):
+    """
+    Reclama la siguiente tarea disponible respetando los límites de concurrencia.
+    El reclamo es un UPDATE condicionado al estado PENDIENTE, por lo que dos
+    trabajadores nunca obtienen la misma tarea.
+    """
+    from .models import TareaSegundoPlano
+
+    ahora = timezone.now()
+    candidatas = TareaSegundoPlano.objects.filter(
+        estado='PENDIENTE', disponible_desde__lte=ahora
+    ).order_by('prioridad', 'id')
+
+    ocupadas = {}
+    for candidata in candidatas.only('id', 'clave_concurrencia', 'limite_concurrencia')[:50]:
+        clave = candidata.clave_concurrencia
+        if clave and candidata.limite_concurrencia:
+            if clave not in ocupadas:
+                ocupadas[clave] = TareaSegundoPlano.objects.filter(
+                    clave_concurrencia=clave, estado='EN_PROCESO'
+                ).count()
+            if ocupadas[clave] >= candidata.limite_concurrencia:
+                continue
+
+        # El intento se cuenta al reclamar, para que recuperar_tareas_colgadas
+        # sepa si el trabajador que dejó de responder agotó el último
+        reclamada = TareaSegundoPlano.objects.filter(
+            pk=candidata.pk, estado='PENDIENTE'
+        ).update(
+            estado='EN_PROCESO',
+            trabajador=trabajador or _nombre_trabajador(),
+            fecha_inicio=ahora,
+            intentos=F('intentos') + 1,
+        )
+        if reclamada:
+            return TareaSegundoPlano.objects.get(pk=candidata.pk)
+    return None
+
+
+def ejecutar(tarea_actual):
+    """Ejecuta una tarea reclamada y registra su resultado o programa el reintento"""
+    funcion = manejador(tarea_actual.tipo)
+
+    try:
+        if funcion is None:
+            raise TareaNoReintentable(f'No hay manejador registrado para "{tarea_actual.tipo}"')
+        resultado = funcion(**tarea_actual.parametros)
+    except Exception as e:
+        logger.exception('Error en la tarea %s #%s', tarea_actual.tipo, tarea_actual.pk)
+        tarea_actual.error = f'{type(e).__name__}: {e}'
+        if isinstance(e, TareaNoReintentable) or tarea_actual.intentos >= tarea_actual.max_intentos:
+            tarea_actual.estado = 'ERROR'
+            tarea_actual.fecha_fin = timezone.now()
+            _notificar_falla(tarea_actual, e)
+        else:
+            # Espera exponencial entre reintentos
+            espera = configuracion()['ESPERA_REINTENTO_SEGUNDOS'] * 2 ** (tarea_actual.intentos - 1)
+            tarea_actual.estado = 'PENDIENTE'
+            tarea_actual.disponible_desde = timezone.now() + timedelta(seconds=espera)
+    else:
+        tarea_actual.estado = 'COMPLETADA'
+        tarea_actual.resultado = resultado
+        tarea_actual.error = ''
+        tarea_actual.fecha_fin = timezone.now()
+
+    tarea_actual.save(update_fields=[
+        'estado', 'intentos', 'resultado', 'error', 'disponible_desde', 'fecha_fin'
+    ])
+    return tarea_actual
+
+
+def _notificar_falla(tarea_actual, error):
+    """Invoca el al_fallar registrado para el tipo de la tarea"""
+    al_fallar = _AL_FALLAR.get(tarea_actual.tipo)
+    if al_fallar is not None:
+        try:
+            al_fallar(error, **tarea_actual.parametros)
+        except Exception:
+            logger.exception('Error al registrar la falla de la tarea #%s', tarea_actual.pk)
+
+
+def latido(tarea_id):
+    """
+    Renueva fecha_inicio de una tarea en curso. Las tareas que duran más que
+    TIEMPO_MAXIMO_SEGUNDOS deben llamarlo periódicamente para que no se
+    consideren colgadas.
+    """
+    from .models import TareaSegundoPlano
+
+    if tarea_id:
+        TareaSegundoPlano.objects.filter(pk=tarea_id, estado='EN_PROCESO').update(fecha_inicio=timezone.now())
+
+
+def recuperar_tareas_colgadas():
+    """
+    Devuelve a la cola las tareas EN_PROCESO cuyo trabajador dejó de responder
+    (sin latido durante TIEMPO_MAXIMO_SEGUNDOS). Las que ya usaron su último
+    intento quedan en ERROR en lugar de volver a ejecutarse.
+    """
+    from .models import TareaSegundoPlano
+
+    ahora = timezone.now()
+    colgadas = TareaSegundoPlano.objects.filter(
+        estado='EN_PROCESO',
+        fecha_inicio__lt=ahora - timedelta(seconds=configuracion()['TIEMPO_MAXIMO_SEGUNDOS'])
+    )
+
+    agotadas = 0
+    error = TareaNoReintentable('El trabajador dejó de responder')
+    for tarea_agotada in colgadas.filter(intentos__gte=F('max_intentos')):
+        if colgadas.filter(pk=tarea_agotada.pk).update(
+            estado='ERROR', trabajador='', error=f'{type(error).__name__}: {error}', fecha_fin=ahora
+        ):
+            agotadas += 1
+            _notificar_falla(tarea_agotada, error)
+
+    return agotadas + colgadas.update(estado='PENDIENTE', trabajador='')
+
+
+def procesar_pendientes(max_tareas=None, trabajador=None):
+    """Procesa tareas hasta vaciar la cola (o hasta max_tareas). Retorna cuántas procesó."""
+    procesadas = 0
+    while max_tareas is None or procesadas < max_tareas:
+        siguiente = reclamar_siguiente(trabajador)
+        if siguiente is None:
+            break
+        ejecutar(siguiente)
+        procesadas += 1
+    return procesadas
+
+
+class GrupoTrabajadores:
+    """Hilos que procesan la cola hasta que se les pide detenerse"""
+
+    def __init__(self, hilos, intervalo):
+        self.hilos = hilos
+        self.intervalo = intervalo
+        self.evento = threading.Event()
+        self.detener = threading.Event()
+        self._hilos = []
+
+    def iniciar(self):
+        for numero in range(self.hilos):
+            hilo = threading.Thread(
+                target=self._bucle, name=f'tareas-{numero + 1}', daemon=True
+            )
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def esperar(self):
+        for hilo in self._hilos:
+            hilo.join()
+
+    def _bucle(self):
+        while not self.detener.is_set():
+            procesadas = 0
+            try:
+                close_old_connections()
+                recuperar_tareas_colgadas()
+                procesadas = procesar_pendientes(max_tareas=10)
+            except Exception:
+                logger.exception('Error en el trabajador de tareas')
+            finally:
+                connection.close()
+
+            if not procesadas:
+                self.evento.wait(self.intervalo)
+                self.evento.clear()
+
+
+_grupo = None
+_grupo_lock = threading.Lock()
+
+
+def iniciar_trabajadores():
+    """Inicia una sola vez por proceso el grupo de hilos del modo HILOS; None en otros modos"""
+    global _grupo
+
+    config = configuracion()
+    if config['MODO'] != 'HILOS':
+        return None
+    if _grupo is None:
+        with _grupo_lock:
+            if _grupo is None:
+                _grupo = GrupoTrabajadores(config['HILOS'], config['INTERVALO_SEGUNDOS'])
+                _grupo.iniciar()
+    return _grupo
+
+
+def despertar_trabajadores():
+    """Según el modo configurado, procesa la cola o avisa a los trabajadores"""
+    if configuracion()['MODO'] == 'INMEDIATO':
+        procesar_pendientes()
+        return
+    grupo = iniciar_trabajadores()
+    if grupo is not None:
+        grupo.evento.set()
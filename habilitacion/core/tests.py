@@ -1,3 +1,55 @@
-from django.test import TestCase
+"""
+Pruebas del trabajo diferido hasta confirmar la transacción (core.diferido)
+"""
 
-# Create your tests here.
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from .diferido import programar
+
+
+class DiferidoTests(TransactionTestCase):
+
+    def setUp(self):
+        self.llamadas = []
+
+    def registrar(self, ids):
+        self.llamadas.append(set(ids))
+
+    def revertir(self, clave, ids):
+        try:
+            with transaction.atomic():
+                programar(clave, ids, self.registrar)
+                raise ValueError
+        except ValueError:
+            pass
+
+    def test_fuera_de_transaccion_se_ejecuta_de_inmediato(self):
+        programar('clave', [1], self.registrar)
+        self.assertEqual(self.llamadas, [{1}])
+
+    def test_una_llamada_por_clave_al_confirmar(self):
+        with transaction.atomic():
+            programar('clave', [1], self.registrar)
+            programar('clave', [2, 1], self.registrar)
+            programar('otra', [3], self.registrar)
+            self.assertEqual(self.llamadas, [])
+        self.assertEqual(self.llamadas, [{1, 2}, {3}])
+
+    def test_savepoint_revertido_al_final(self):
+        with transaction.atomic():
+            programar('clave', [1], self.registrar)
+            self.revertir('clave', [2])
+        self.assertEqual(self.llamadas, [{1}])
+
+    def test_savepoint_revertido_al_inicio(self):
+        with transaction.atomic():
+            self.revertir('clave', [2])
+            programar('clave', [1], self.registrar)
+        self.assertEqual(self.llamadas, [{1}])
+
+    def test_rollback_completo_no_pasa_a_la_siguiente_transaccion(self):
+        self.revertir('clave', [9])
+        with transaction.atomic():
+            programar('clave', [1], self.registrar)
+        self.assertEqual(self.llamadas, [{1}])
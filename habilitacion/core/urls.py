@@ -7,4 +7,5 @@ app_name = 'core'
 urlpatterns = [
     path('', views.home, name='home'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('buscar/', views.buscar, name='buscar'),
 ]
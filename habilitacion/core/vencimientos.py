@@ -0,0 +1,271 @@
+"""
+Cálculo de alertas de vencimiento y envío de avisos por correo
+Sistema de Habilitación de Servicios de Salud
+
+`sincronizar_alertas` recorre una vez todas las fuentes con fecha de
+vencimiento (documentos de la entidad, habilitación, vigencias, documentos
+de criterios y PQRS abiertas) y deja AlertaVencimiento exactamente con los
+elementos dentro del horizonte de aviso: crea, actualiza o elimina según
+corresponda. Ejecutarlo varias veces el mismo día no cambia nada.
+
+`notificar_alertas` envía un solo correo por destinatario con todas sus
+alertas cuyo nivel empeoró desde el último aviso, usando una sola conexión
+SMTP y lotes de mensajes.
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+GRAVEDAD = {'': 0, 'PROXIMO': 1, 'CRITICO': 2, 'VENCIDO': 3}
+DIAS_CRITICO = 30
+TAMANO_LOTE_CORREOS = 50
+
+CAMPOS_ALERTA = ['entidad_id', 'sede_id', 'responsable_id', 'nombre', 'fecha_vencimiento', 'nivel']
+
+
+def nivel_para(fecha, hoy):
+    dias = (fecha - hoy).days
+    if dias < 0:
+        return 'VENCIDO'
+    if dias <= DIAS_CRITICO:
+        return 'CRITICO'
+    return 'PROXIMO'
+
+
+def elementos_por_vencer(hoy, horizonte):
+    """
+    Genera (tipo, objeto_id, datos) de todo lo que vence hasta `horizonte`
+    (incluye lo ya vencido), con una consulta por fuente.
+    """
+    from entidades.models import DocumentoEntidad, EntidadPrestadora, VigenciaHabilitacion
+    from evaluacion.models import Evaluacion
+    from siau.models import PQRS
+
+    for documento in DocumentoEntidad.objects.filter(
+        fecha_vencimiento__lte=horizonte
+    ).values('pk', 'entidad_id', 'nombre', 'fecha_vencimiento').iterator():
+        yield 'DOCUMENTO', documento['pk'], {
+            'entidad_id': documento['entidad_id'],
+            'nombre': documento['nombre'],
+            'fecha_vencimiento': documento['fecha_vencimiento'],
+        }
+
+    for entidad in EntidadPrestadora.objects.filter(
+        fecha_vencimiento_habilitacion__lte=horizonte
+    ).exclude(estado='INACTIVO').values('pk', 'fecha_vencimiento_habilitacion').iterator():
+        yield 'HABILITACION', entidad['pk'], {
+            'entidad_id': entidad['pk'],
+            'nombre': 'Habilitación de la entidad',
+            'fecha_vencimiento': entidad['fecha_vencimiento_habilitacion'],
+        }
+
+    for vigencia in VigenciaHabilitacion.objects.filter(
+        estado='ACTIVA', fecha_fin__lte=horizonte
+    ).values('pk', 'entidad_id', 'numero_resolucion', 'fecha_fin').iterator():
+        resolucion = vigencia['numero_resolucion']
+        yield 'VIGENCIA', vigencia['pk'], {
+            'entidad_id': vigencia['entidad_id'],
+            'nombre': f'Vigencia de habilitación{f" (resolución {resolucion})" if resolucion else ""}',
+            'fecha_vencimiento': vigencia['fecha_fin'],
+        }
+
+    for evaluacion in Evaluacion.objects.filter(
+        fecha_vencimiento__lte=horizonte, sede__activa=True
+    ).values(
+        'pk', 'sede_id', 'sede__entidad_id', 'criterio__numero', 'criterio__estandar__codigo',
+        'responsable_desarrollo_id', 'fecha_vencimiento'
+    ).iterator():
+        yield 'EVALUACION', evaluacion['pk'], {
+            'entidad_id': evaluacion['sede__entidad_id'],
+            'sede_id': evaluacion['sede_id'],
+            'responsable_id': evaluacion['responsable_desarrollo_id'],
+            'nombre': (
+                f'Documento del criterio {evaluacion["criterio__numero"]} '
+                f'({evaluacion["criterio__estandar__codigo"]})'
+            ),
+            'fecha_vencimiento': evaluacion['fecha_vencimiento'],
+        }
+
+    for pqrs in PQRS.objects.filter(
+        estado__in=['RECIBIDA', 'EN_PROCESO'], fecha_vencimiento__lte=horizonte
+    ).values(
+        'pk', 'entidad_id', 'sede_id', 'responsable_id', 'radicado', 'tipo', 'fecha_vencimiento'
+    ).iterator():
+        yield 'PQRS', pqrs['pk'], {
+            'entidad_id': pqrs['entidad_id'],
+            'sede_id': pqrs['sede_id'],
+            'responsable_id': pqrs['responsable_id'],
+            'nombre': f'Respuesta a {pqrs["tipo"].lower()} {pqrs["radicado"]}',
+            'fecha_vencimiento': pqrs['fecha_vencimiento'],
+        }
+
+
+def sincronizar_alertas(hoy=None, dias=None):
+    """
+    Deja la tabla de alertas igual al estado actual de las fuentes.
+    Retorna un diccionario con creadas, actualizadas, eliminadas y total.
+    """
+    from .models import AlertaVencimiento
+
+    hoy = hoy or timezone.localdate()
+    if dias is None:
+        dias = settings.HABILITACION_CONFIG['DIAS_ALERTA_VENCIMIENTO']
+    horizonte = hoy + timedelta(days=dias)
+
+    existentes = {
+        (alerta.tipo, alerta.objeto_id): alerta
+        for alerta in AlertaVencimiento.objects.all()
+    }
+    nuevas, modificadas, vigentes = [], [], set()
+    ahora = timezone.now()
+    for tipo, objeto_id, datos in elementos_por_vencer(hoy, horizonte):
+        datos.setdefault('sede_id', None)
+        datos.setdefault('responsable_id', None)
+        datos['nombre'] = datos['nombre'][:300]
+        datos['nivel'] = nivel_para(datos['fecha_vencimiento'], hoy)
+        clave = (tipo, objeto_id)
+        vigentes.add(clave)
+
+        alerta = existentes.get(clave)
+        if alerta is None:
+            nuevas.append(AlertaVencimiento(tipo=tipo, objeto_id=objeto_id, **datos))
+        elif any(getattr(alerta, campo) != valor for campo, valor in datos.items()):
+            for campo, valor in datos.items():
+                setattr(alerta, campo, valor)
+            # Una fecha renovada (nivel menos grave) habilita un nuevo aviso futuro
+            if GRAVEDAD[alerta.nivel] < GRAVEDAD[alerta.nivel_notificado]:
+                alerta.nivel_notificado = ''
+                alerta.correos_pendientes = []
+            # bulk_update no aplica auto_now
+            alerta.fecha_calculo = ahora
+            modificadas.append(alerta)
+
+    obsoletas = [alerta.pk for clave, alerta in existentes.items() if clave not in vigentes]
+
+    with transaction.atomic():
+        AlertaVencimiento.objects.bulk_create(nuevas, batch_size=500)
+        AlertaVencimiento.objects.bulk_update(
+            modificadas, CAMPOS_ALERTA + ['nivel_notificado', 'correos_pendientes', 'fecha_calculo'], batch_size=500
+        )
+        for inicio in range(0, len(obsoletas), 500):
+            AlertaVencimiento.objects.filter(pk__in=obsoletas[inicio:inicio + 500]).delete()
+
+    return {
+        'creadas': len(nuevas),
+        'actualizadas': len(modificadas),
+        'eliminadas': len(obsoletas),
+        'total': len(vigentes),
+    }
+
+
+def _destinatarios(alertas):
+    """{email: [alertas]}: administradores y responsables de calidad de cada entidad, y el responsable directo"""
+    from usuarios.models import Usuario
+
+    entidades = {alerta.entidad_id for alerta in alertas}
+    por_entidad = {}
+    for entidad_id, email in Usuario.objects.filter(
+        entidad_id__in=entidades, rol__in=['ADMIN', 'CALIDAD'], is_active=True
+    ).exclude(email='').values_list('entidad_id', 'email'):
+        por_entidad.setdefault(entidad_id, set()).add(email)
+
+    responsables = dict(Usuario.objects.filter(
+        pk__in={alerta.responsable_id for alerta in alertas if alerta.responsable_id}, is_active=True
+    ).values_list('pk', 'email'))
+
+    destinatarios = {}
+    for alerta in alertas:
+        correos = set(por_entidad.get(alerta.entidad_id, ()))
+        if responsables.get(alerta.responsable_id):
+            correos.add(responsables[alerta.responsable_id])
+        for email in correos:
+            destinatarios.setdefault(email, []).append(alerta)
+    return destinatarios
+
+
+def _mensaje(email, alertas):
+    lineas = ['Los siguientes elementos requieren atención:', '']
+    hoy = timezone.localdate()
+    for alerta in sorted(alertas, key=lambda a: a.fecha_vencimiento):
+        dias = (alerta.fecha_vencimiento - hoy).days
+        cuando = f'venció hace {-dias} días' if dias < 0 else f'vence en {dias} días'
+        lineas.append(
+            f'- [{alerta.get_tipo_display()}] {alerta.nombre} - {alerta.entidad.razon_social}'
+            f'{f" / {alerta.sede.nombre}" if alerta.sede_id else ""}: '
+            f'{alerta.fecha_vencimiento:%d/%m/%Y} ({cuando})'
+        )
+    lineas += ['', 'Sistema de Habilitación de Servicios de Salud']
+    vencidas = sum(1 for alerta in alertas if alerta.nivel == 'VENCIDO')
+    asunto = f'Vencimientos: {len(alertas)} alerta(s)' + (f', {vencidas} vencida(s)' if vencidas else '')
+    return EmailMessage(asunto, '\n'.join(lineas), to=[email])
+
+
+def notificar_alertas():
+    """
+    Envía un resumen por destinatario de las alertas cuyo nivel empeoró desde
+    el último aviso, y reintenta los correos de avisos anteriores que
+    fallaron. Cada lote enviado se marca de inmediato, de modo que un fallo
+    posterior no reenvía lo que ya llegó. Retorna (correos enviados, alertas
+    notificadas por completo).
+    """
+    from django.db.models import F, Q
+
+    from .models import AlertaVencimiento
+
+    # Las que nunca se notificaron, cuyo nivel es más grave que el notificado
+    # o que tienen destinatarios pendientes de un aviso anterior
+    alertas = [
+        alerta
+        for alerta in AlertaVencimiento.objects.filter(
+            ~Q(nivel=F('nivel_notificado')) | ~Q(correos_pendientes=[])
+        ).select_related('entidad', 'sede')
+        if GRAVEDAD[alerta.nivel] > GRAVEDAD[alerta.nivel_notificado] or alerta.correos_pendientes
+    ]
+    if not alertas:
+        return 0, 0
+
+    # Correos que aún deben recibir cada alerta
+    pendientes = {}
+    destinatarios = []
+    for email, lista in _destinatarios(alertas).items():
+        lista = [
+            alerta for alerta in lista
+            if GRAVEDAD[alerta.nivel] > GRAVEDAD[alerta.nivel_notificado] or email in alerta.correos_pendientes
+        ]
+        for alerta in lista:
+            pendientes.setdefault(alerta.pk, set()).add(email)
+        if lista:
+            destinatarios.append((email, lista))
+
+    enviados = 0
+    notificadas = 0
+    conexion = get_connection()
+    for inicio in range(0, len(destinatarios), TAMANO_LOTE_CORREOS):
+        lote = destinatarios[inicio:inicio + TAMANO_LOTE_CORREOS]
+        try:
+            enviados += conexion.send_messages([_mensaje(email, lista) for email, lista in lote]) or 0
+        except Exception:
+            # Los destinatarios de este lote quedan pendientes para la próxima ejecución
+            logger.exception('No se pudo enviar un lote de avisos de vencimiento')
+            continue
+
+        enviadas = {}
+        for email, lista in lote:
+            for alerta in lista:
+                pendientes[alerta.pk].discard(email)
+                enviadas[alerta.pk] = alerta
+        for alerta in enviadas.values():
+            alerta.nivel_notificado = alerta.nivel
+            alerta.correos_pendientes = sorted(pendientes[alerta.pk])
+            notificadas += not alerta.correos_pendientes
+        AlertaVencimiento.objects.bulk_update(
+            enviadas.values(), ['nivel_notificado', 'correos_pendientes'], batch_size=500
+        )
+    return enviados, notificadas
@@ -0,0 +1,104 @@
+"""
+Versiones de datos por ámbito y respuestas condicionales
+Sistema de Habilitación de Servicios de Salud
+
+Cada escritura que cambia lo que muestra la API de lectura aumenta la versión
+de su ámbito: 'sede:<id>' para evaluaciones, archivos y aplicabilidad de una
+sede, 'entidad:<id>' para cualquier cambio en alguna de sus sedes y
+'catalogo' para los nombres de grupos, estándares y criterios. El
+aumento se hace al confirmar la transacción, una sola vez por ámbito aunque
+la petición escriba muchas filas.
+
+`respuesta_condicional` arma el ETag con las versiones de los ámbitos que
+componen la respuesta (una consulta) y, si el cliente ya tiene esa versión
+(If-None-Match), responde 304 sin ejecutar las consultas del contenido.
+"""
+
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .diferido import programar
+
+AMBITO_CATALOGO = 'catalogo'
+
+
+def ambito_sede(sede_id):
+    return f'sede:{sede_id}'
+
+
+def ambito_entidad(entidad_id):
+    return f'entidad:{entidad_id}'
+
+
+def incrementar(ambitos):
+    """Aumenta la versión de los ámbitos indicados al confirmar la transacción actual"""
+    programar('versiones', ambitos, _incrementar_pendientes)
+
+
+def incrementar_sedes(sede_ids):
+    """Aumenta la versión de las sedes indicadas y de sus entidades"""
+    incrementar(ambito_sede(sede_id) for sede_id in sede_ids if sede_id)
+
+
+def _incrementar_pendientes(ambitos):
+    from entidades.models import Sede
+
+    from .models import VersionDatos
+
+    sede_ids = [int(ambito.split(':')[1]) for ambito in ambitos if ambito.startswith('sede:')]
+    if sede_ids:
+        ambitos.update(
+            ambito_entidad(entidad_id)
+            for entidad_id in Sede.objects.filter(pk__in=sede_ids).values_list('entidad_id', flat=True).distinct()
+        )
+
+    actualizados = VersionDatos.objects.filter(ambito__in=ambitos)
+    existentes = set(actualizados.values_list('ambito', flat=True))
+    actualizados.update(version=F('version') + 1, fecha_modificacion=timezone.now())
+    nuevos = [VersionDatos(ambito=ambito, version=1) for ambito in ambitos - existentes]
+    if nuevos:
+        try:
+            with transaction.atomic():
+                VersionDatos.objects.bulk_create(nuevos)
+        except IntegrityError:
+            # Otro proceso creó el ámbito entre la lectura y la inserción
+            VersionDatos.objects.filter(ambito__in=[nuevo.ambito for nuevo in nuevos]).update(
+                version=F('version') + 1, fecha_modificacion=timezone.now()
+            )
+
+
+def versiones(ambitos):
+    """Versión actual de cada ámbito (0 si nunca se escribió)"""
+    from .models import VersionDatos
+
+    actuales = dict(VersionDatos.objects.filter(ambito__in=ambitos).values_list('ambito', 'version'))
+    return {ambito: actuales.get(ambito, 0) for ambito in ambitos}
+
+
+def calcular_etag(ambitos, *partes):
+    """ETag débil a partir de las versiones de los ámbitos y de las partes adicionales"""
+    firma = [f'{ambito}={version}' for ambito, version in sorted(versiones(ambitos).items())]
+    firma.extend(str(parte) for parte in partes)
+    return 'W/"%s"' % hashlib.sha1('|'.join(firma).encode()).hexdigest()
+
+
+def respuesta_condicional(request, ambitos, construir, *partes):
+    """
+    JsonResponse con ETag para los ámbitos indicados, o 304 si el cliente ya
+    tiene esa versión. `construir` se llama solo cuando hay que armar el
+    contenido; `partes` agrega al ETag lo que no cubren las versiones (la URL
+    con sus parámetros se incluye siempre).
+    """
+    etag = calcular_etag(ambitos, request.get_full_path(), *partes)
+    respuesta = get_conditional_response(request, etag=etag)
+    if respuesta is None:
+        respuesta = JsonResponse(construir())
+    respuesta['ETag'] = etag
+    # El navegador guarda la respuesta, pero la revalida en cada consulta
+    patch_cache_control(respuesta, private=True, no_cache=True)
+    return respuesta
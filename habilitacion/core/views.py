@@ -3,8 +3,11 @@ Vistas del módulo core.
 Dashboard principal y páginas generales del sistema.
 """
 
+import time
+
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.db.models import Count, Q
 from django.utils import timezone
 
@@ -24,7 +27,7 @@ def dashboard(request):
     }
 
     # Si el usuario tiene una entidad asignada, mostrar estadísticas
-    if hasattr(request.user, 'entidad') and request.user.entidad:
+    if request.principal.entidad_id:
         entidad = request.user.entidad
         context['entidad'] = entidad
 
@@ -50,17 +53,65 @@ def dashboard(request):
         else:
             context['porcentaje_cumplimiento'] = 0
 
-        # Documentos por vencer (próximos 30 días)
-        from entidades.models import DocumentoEntidad
-        fecha_limite = timezone.now().date() + timezone.timedelta(days=30)
-        context['documentos_por_vencer'] = DocumentoEntidad.objects.filter(
-            entidad=entidad,
-            fecha_vencimiento__isnull=False,
-            fecha_vencimiento__lte=fecha_limite,
-            fecha_vencimiento__gte=timezone.now().date()
+        # Vencimientos (próximos 30 días), precalculados por generar_alertas_vencimiento
+        from .models import AlertaVencimiento
+        hoy = timezone.localdate()
+        alertas = AlertaVencimiento.objects.filter(entidad=entidad)
+        context['documentos_por_vencer'] = alertas.filter(
+            tipo='DOCUMENTO',
+            fecha_vencimiento__gte=hoy,
+            fecha_vencimiento__lte=hoy + timezone.timedelta(days=30)
         ).count()
+        # Dentro del horizonte de aviso (DIAS_ALERTA_VENCIMIENTO), vencida o no
+        context['alerta_habilitacion'] = alertas.filter(tipo__in=['HABILITACION', 'VIGENCIA']).first()
 
         # Últimas evaluaciones modificadas
         context['ultimas_evaluaciones'] = evaluaciones.order_by('-fecha_modificacion')[:5]
 
     return render(request, 'core/dashboard.html', context)
+
+
+@login_required
+def buscar(request):
+    """
+    Búsqueda de texto completo en criterios, normativas y documentos generados,
+    ordenada por relevancia y con las coincidencias resaltadas. Los documentos
+    se limitan a la entidad del usuario (SUPER ve todos). Con ?formato=json
+    retorna los resultados para consumo desde JavaScript.
+    """
+    from .busqueda import buscar as buscar_texto
+    from .models import EntradaBusqueda
+
+    consulta = request.GET.get('q', '').strip()[:200]
+    tipo = request.GET.get('tipo', '')
+    if tipo not in dict(EntradaBusqueda.TIPOS):
+        tipo = ''
+
+    inicio = time.perf_counter()
+    resultados = buscar_texto(
+        consulta,
+        entidad_id=request.principal.entidad_id,
+        todas=request.principal.es_super,
+        tipo=tipo or None,
+    ) if consulta else []
+    tiempo_ms = round((time.perf_counter() - inicio) * 1000, 1)
+
+    if request.GET.get('formato') == 'json':
+        return JsonResponse({
+            'consulta': consulta,
+            'tiempo_ms': tiempo_ms,
+            'resultados': [
+                {clave: str(valor) if clave in ('titulo', 'fragmento') else valor
+                 for clave, valor in resultado.items()}
+                for resultado in resultados
+            ],
+        })
+
+    return render(request, 'core/busqueda.html', {
+        'titulo': 'Búsqueda',
+        'consulta': consulta,
+        'tipo': tipo,
+        'tipos': EntradaBusqueda.TIPOS,
+        'resultados': resultados,
+        'tiempo_ms': tiempo_ms,
+    })
@@ -6,8 +6,8 @@ Sistema de Habilitación de Servicios de Salud
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
-    ConfiguracionIA, PromptTemplate,
-    SolicitudIA, NormativaReferencia
+    ConfiguracionIA, PromptTemplate, SolicitudIA,
+    GeneracionMasivaIA, RespuestaIACache, NormativaReferencia
 )
 
 
@@ -37,6 +37,12 @@ class ConfiguracionIAAdmin(admin.ModelAdmin):
         ('Prompt del Sistema', {
             'fields': ('prompt_sistema',)
         }),
+        ('Cola de Solicitudes', {
+            'fields': (('max_reintentos', 'max_solicitudes_simultaneas'),)
+        }),
+        ('Generación Masiva', {
+            'fields': (('solicitudes_por_minuto', 'presupuesto_tokens_lote'),)
+        }),
     )
 
     autocomplete_fields = ['entidad']
@@ -87,7 +93,7 @@ class SolicitudIAAdmin(admin.ModelAdmin):
         'id', 'usuario', 'entidad', 'estado_badge', 'modelo_usado',
         'tokens_total', 'costo_display', 'tiempo_display', 'fecha_solicitud'
     ]
-    list_filter = ['estado', 'modelo_usado', 'entidad']
+    list_filter = ['estado', 'desde_cache', 'modelo_usado', 'entidad']
     search_fields = ['usuario__email', 'entidad__razon_social', 'prompt_enviado']
     date_hierarchy = 'fecha_solicitud'
     ordering = ['-fecha_solicitud']
@@ -100,13 +106,15 @@ class SolicitudIAAdmin(admin.ModelAdmin):
             'fields': ('prompt_enviado', 'respuesta')
         }),
         ('Estado', {
-            'fields': ('estado', 'mensaje_error')
+            'fields': (
+                'estado', 'mensaje_error', 'tarea', 'generacion_masiva', ('desde_cache', 'huella')
+            )
         }),
         ('Métricas', {
             'fields': (
                 'modelo_usado',
                 ('tokens_prompt', 'tokens_respuesta', 'tokens_total'),
-                ('costo_estimado', 'tiempo_procesamiento')
+                ('costo_estimado', 'tiempo_primer_token', 'tiempo_procesamiento')
             )
         }),
         ('Fechas', {
@@ -117,9 +125,9 @@ class SolicitudIAAdmin(admin.ModelAdmin):
 
     readonly_fields = [
         'usuario', 'entidad', 'evaluacion', 'prompt_template',
-        'prompt_enviado', 'respuesta', 'estado', 'mensaje_error',
+        'prompt_enviado', 'respuesta', 'estado', 'mensaje_error', 'tarea', 'generacion_masiva', 'desde_cache', 'huella',
         'modelo_usado', 'tokens_prompt', 'tokens_respuesta', 'tokens_total',
-        'costo_estimado', 'tiempo_procesamiento', 'fecha_solicitud', 'fecha_respuesta'
+        'costo_estimado', 'tiempo_primer_token', 'tiempo_procesamiento', 'fecha_solicitud', 'fecha_respuesta'
     ]
 
     def estado_badge(self, obj):
@@ -155,6 +163,48 @@ class SolicitudIAAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(GeneracionMasivaIA)
+class GeneracionMasivaIAAdmin(admin.ModelAdmin):
+    """Admin para generaciones masivas con IA"""
+
+    list_display = [
+        'id', 'sede', 'estandar', 'estado', 'total', 'completadas',
+        'fallidas', 'omitidas', 'tokens_usados', 'fecha_creacion'
+    ]
+    list_filter = ['estado', 'entidad']
+    search_fields = ['sede__nombre', 'entidad__razon_social']
+    date_hierarchy = 'fecha_creacion'
+    readonly_fields = [
+        'entidad', 'sede', 'estandar', 'prompt_template', 'instruccion', 'usuario',
+        'estado', 'total', 'completadas', 'fallidas', 'omitidas', 'desde_cache',
+        'tokens_usados', 'presupuesto_tokens', 'mensaje', 'tarea',
+        'fecha_creacion', 'fecha_inicio', 'fecha_fin'
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(RespuestaIACache)
+class RespuestaIACacheAdmin(admin.ModelAdmin):
+    """Admin para la caché de respuestas de IA"""
+
+    list_display = ['huella_corta', 'modelo', 'usos', 'tokens_total', 'fecha_creacion', 'ultimo_uso']
+    list_filter = ['modelo']
+    search_fields = ['huella', 'respuesta']
+    readonly_fields = [
+        'huella', 'modelo', 'respuesta', 'tokens_total', 'solicitud_origen',
+        'usos', 'fecha_creacion', 'ultimo_uso'
+    ]
+
+    def huella_corta(self, obj):
+        return obj.huella[:12]
+    huella_corta.short_description = 'Huella'
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(NormativaReferencia)
 class NormativaReferenciaAdmin(admin.ModelAdmin):
     """Admin para normativas de referencia"""
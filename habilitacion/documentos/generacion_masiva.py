@@ -0,0 +1,331 @@
+"""
+Generación masiva con IA de los documentos faltantes de una sede o de un estándar
+Sistema de Habilitación de Servicios de Salud
+
+Una sola tarea en segundo plano recorre las evaluaciones sin documento
+(estado_documento 'NT'), crea una SolicitudIA por criterio y las envía a un
+grupo acotado de hilos (max_solicitudes_simultaneas de la ConfiguracionIA),
+respetando el ritmo de solicitudes por minuto y el presupuesto de tokens del
+lote. Cada documento se guarda apenas termina su solicitud, por lo que un
+corte a mitad de camino conserva lo ya generado.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from core.tareas import TareaNoReintentable, encolar, latido
+
+from .ia import (
+    crear_solicitud, parametros_entidad, procesar_solicitud, prompt_documento_criterio
+)
+
+logger = logging.getLogger(__name__)
+
+ESPERA_REINTENTO_SEGUNDOS = 5
+
+
+class LimitadorRitmo:
+    """Espacia los envíos para no superar `por_minuto` solicitudes por minuto"""
+
+    def __init__(self, por_minuto):
+        self.intervalo = 60.0 / por_minuto if por_minuto else 0
+        self.siguiente = 0.0
+        self.lock = threading.Lock()
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self.lock:
+            ahora = time.monotonic()
+            espera = max(0.0, self.siguiente - ahora)
+            self.siguiente = max(ahora, self.siguiente) + self.intervalo
+        if espera:
+            time.sleep(espera)
+
+
+class Latido:
+    """
+    Renueva la tarea de la generación como máximo cada INTERVALO segundos: una
+    corrida dura mucho más que TIEMPO_MAXIMO_SEGUNDOS de la cola y sin latido
+    se la daría por colgada.
+    """
+
+    INTERVALO = 30
+
+    def __init__(self, tarea_id):
+        self.tarea_id = tarea_id
+        self.ultimo = 0.0
+
+    def __call__(self):
+        ahora = time.monotonic()
+        if ahora - self.ultimo >= self.INTERVALO:
+            self.ultimo = ahora
+            latido(self.tarea_id)
+
+
+def criterios_sede(sede, estandar=None):
+    """
+    Criterios evaluables de la sede según la matriz de aplicabilidad: los del
+    estándar indicado o, sin estándar, todos los que aplican a la sede.
+    """
+    from estandares.models import Criterio
+    from evaluacion.aplicabilidad import asegurar
+
+    asegurar(sede)
+    criterios = Criterio.objects.filter(aplicabilidades__sede=sede)
+    if estandar is not None:
+        return criterios.filter(estandar=estandar)
+    return criterios
+
+
+def evaluaciones_sin_documento(sede, estandar=None, crear=False):
+    """
+    Evaluaciones generales (sin servicio) de la sede con el documento sin
+    trabajar. Con crear=True primero registra, en bloque, las evaluaciones que
+    aún no existen para los criterios del alcance.
+    """
+    from evaluacion.models import Evaluacion
+
+    criterios = criterios_sede(sede, estandar)
+    if crear:
+        existentes = set(Evaluacion.objects.filter(
+            sede=sede, servicio_habilitado__isnull=True, criterio__in=criterios
+        ).values_list('criterio_id', flat=True))
+        Evaluacion.objects.bulk_create([
+            Evaluacion(sede=sede, criterio_id=criterio_id)
+            for criterio_id in criterios.values_list('id', flat=True)
+            if criterio_id not in existentes
+        ], ignore_conflicts=True)
+
+    return Evaluacion.objects.filter(
+        sede=sede,
+        servicio_habilitado__isnull=True,
+        criterio__in=criterios,
+        estado_documento='NT',
+        documentos__isnull=True,
+    ).select_related(
+        'sede__entidad', 'criterio__estandar'
+    ).order_by('criterio__estandar__orden', 'criterio__clave_orden', 'criterio__orden')
+
+
+def contar_pendientes(sede, estandar=None):
+    """Documentos que generaría una corrida: evaluaciones NT más criterios aún sin evaluación"""
+    from evaluacion.models import Evaluacion
+
+    criterios = criterios_sede(sede, estandar)
+    con_evaluacion = Evaluacion.objects.filter(
+        sede=sede, servicio_habilitado__isnull=True, criterio__in=criterios
+    )
+    sin_evaluacion = criterios.exclude(
+        id__in=con_evaluacion.values('criterio_id')
+    ).count()
+    return evaluaciones_sin_documento(sede, estandar).count() + sin_evaluacion
+
+
+def iniciar_generacion(usuario, sede, estandar=None, prompt_template=None, instruccion=''):
+    """Registra la generación masiva y encola su tarea (una a la vez por entidad)"""
+    from .models import GeneracionMasivaIA
+
+    generacion = GeneracionMasivaIA.objects.create(
+        entidad=sede.entidad,
+        sede=sede,
+        estandar=estandar,
+        prompt_template=prompt_template,
+        instruccion=instruccion,
+        usuario=usuario,
+        presupuesto_tokens=parametros_entidad(sede.entidad)['presupuesto_tokens'],
+    )
+    generacion.tarea = encolar(
+        'documentos.generacion_masiva',
+        {'generacion_id': generacion.pk},
+        prioridad=1,
+        max_intentos=1,
+        clave_concurrencia=f'ia-masiva:{sede.entidad_id}',
+        limite_concurrencia=1
+    )
+    generacion.save(update_fields=['tarea'])
+    return generacion
+
+
+def datos_generacion(generacion, recientes=10):
+    """Estado JSON de una generación masiva con sus últimas solicitudes terminadas"""
+    from django.urls import reverse
+
+    solicitudes = generacion.solicitudes.filter(
+        estado__in=['COMPLETADA', 'ERROR']
+    ).select_related('evaluacion__criterio').order_by('-fecha_respuesta')[:recientes]
+
+    return {
+        'id': generacion.pk,
+        'estado': generacion.estado,
+        'estado_display': generacion.get_estado_display(),
+        'terminada': generacion.terminada,
+        'total': generacion.total,
+        'completadas': generacion.completadas,
+        'fallidas': generacion.fallidas,
+        'omitidas': generacion.omitidas,
+        'desde_cache': generacion.desde_cache,
+        'procesadas': generacion.procesadas,
+        'porcentaje': generacion.porcentaje,
+        'tokens_usados': generacion.tokens_usados,
+        'presupuesto_tokens': generacion.presupuesto_tokens,
+        'mensaje': generacion.mensaje,
+        'url_estado': reverse('documentos:api_estado_generacion', args=[generacion.pk]),
+        'recientes': [
+            {
+                'criterio': solicitud.evaluacion.criterio.numero if solicitud.evaluacion_id else '',
+                'estado': solicitud.estado,
+                'desde_cache': solicitud.desde_cache,
+                'mensaje_error': solicitud.mensaje_error,
+                'url_resultado': reverse('documentos:resultado_ia', args=[solicitud.pk]),
+            }
+            for solicitud in solicitudes
+        ],
+    }
+
+
+def _procesar_en_hilo(solicitud_id, max_reintentos):
+    """
+    Procesa una solicitud dentro del grupo de hilos, con reintentos en línea.
+    Retorna (completada, tokens).
+    """
+    from .models import SolicitudIA
+
+    try:
+        for intento in range(max_reintentos + 1):
+            solicitud = SolicitudIA.objects.select_related(
+                'entidad', 'usuario', 'evaluacion__criterio'
+            ).get(pk=solicitud_id)
+            try:
+                procesar_solicitud(solicitud)
+                return True, solicitud.tokens_total
+            except Exception as e:
+                logger.warning('Generación masiva: falló la solicitud #%s (%s)', solicitud_id, e)
+                if isinstance(e, TareaNoReintentable) or intento >= max_reintentos:
+                    SolicitudIA.objects.filter(pk=solicitud_id).update(
+                        estado='ERROR', mensaje_error=str(e), fecha_respuesta=timezone.now()
+                    )
+                    return False, 0
+                SolicitudIA.objects.filter(pk=solicitud_id).update(
+                    estado='PENDIENTE', mensaje_error=f'Reintentando: {e}'
+                )
+                time.sleep(ESPERA_REINTENTO_SEGUNDOS * 2 ** intento)
+    finally:
+        connection.close()
+
+
+def _cancelada(generacion):
+    from .models import GeneracionMasivaIA
+
+    return GeneracionMasivaIA.objects.filter(pk=generacion.pk, estado='CANCELADA').exists()
+
+
+def ejecutar_generacion(generacion):
+    """
+    Ejecuta la generación masiva (desde la tarea en segundo plano).
+    Las solicitudes que no se envían, por presupuesto agotado o cancelación,
+    quedan en ERROR y se cuentan como omitidas.
+    """
+    from .models import GeneracionMasivaIA, SolicitudIA
+
+    registro = GeneracionMasivaIA.objects.filter(pk=generacion.pk)
+
+    # Solo una corrida por generación: si ya está en curso (o terminó), no se repite
+    if not registro.filter(estado='PENDIENTE').update(estado='EN_PROCESO', fecha_inicio=timezone.now()):
+        registro.filter(estado='CANCELADA', fecha_fin__isnull=True).update(fecha_fin=timezone.now())
+        generacion.refresh_from_db()
+        return generacion
+
+    parametros = parametros_entidad(generacion.entidad)
+    max_simultaneas = max(parametros['max_simultaneas'], 1)
+    presupuesto = generacion.presupuesto_tokens
+    renovar = Latido(generacion.tarea_id)
+
+    evaluaciones = list(evaluaciones_sin_documento(
+        generacion.sede, generacion.estandar, crear=True
+    ))
+    registro.update(total=len(evaluaciones))
+
+    # Las respuestas en caché se resuelven al crear la solicitud
+    pendientes = []
+    sin_solicitud = 0
+    motivo_corte = ''
+    for posicion, evaluacion in enumerate(evaluaciones):
+        renovar()
+        if _cancelada(generacion):
+            sin_solicitud = len(evaluaciones) - posicion
+            motivo_corte = 'Cancelada por el usuario.'
+            break
+        solicitud = crear_solicitud(
+            usuario=generacion.usuario,
+            entidad=generacion.entidad,
+            prompt=prompt_documento_criterio(
+                evaluacion, generacion.instruccion, generacion.prompt_template
+            ),
+            instruccion=generacion.instruccion,
+            evaluacion=evaluacion,
+            prompt_template=generacion.prompt_template,
+            generacion_masiva=generacion,
+            en_cola=False,
+        )
+        if solicitud.terminada:
+            registro.update(completadas=F('completadas') + 1, desde_cache=F('desde_cache') + 1)
+        else:
+            pendientes.append(solicitud.pk)
+
+    limitador = LimitadorRitmo(parametros['por_minuto'])
+    tokens_usados = 0
+    enviadas = 0
+
+    def registrar(futuros):
+        nonlocal tokens_usados
+        for futuro in futuros:
+            completada, tokens = futuro.result()
+            tokens_usados += tokens
+            if completada:
+                registro.update(
+                    completadas=F('completadas') + 1, tokens_usados=F('tokens_usados') + tokens
+                )
+            else:
+                registro.update(fallidas=F('fallidas') + 1)
+
+    with ThreadPoolExecutor(max_workers=max_simultaneas, thread_name_prefix='ia-masiva') as grupo:
+        en_curso = set()
+        for solicitud_id in pendientes:
+            renovar()
+            if _cancelada(generacion):
+                motivo_corte = 'Cancelada por el usuario.'
+                break
+            # Reserva max_tokens por solicitud en curso para no exceder el presupuesto
+            if presupuesto and tokens_usados + len(en_curso) * parametros['max_tokens'] >= presupuesto:
+                motivo_corte = f'Se agotó el presupuesto de {presupuesto} tokens.'
+                break
+            while len(en_curso) >= max_simultaneas:
+                terminados, en_curso = wait(en_curso, timeout=Latido.INTERVALO, return_when=FIRST_COMPLETED)
+                registrar(terminados)
+                renovar()
+            limitador.esperar()
+            en_curso.add(grupo.submit(_procesar_en_hilo, solicitud_id, parametros['max_reintentos']))
+            enviadas += 1
+        while en_curso:
+            terminados, en_curso = wait(en_curso, timeout=Latido.INTERVALO)
+            registrar(terminados)
+            renovar()
+
+    omitidas = pendientes[enviadas:]
+    SolicitudIA.objects.filter(pk__in=omitidas).update(
+        estado='ERROR', mensaje_error=f'Omitida: {motivo_corte}', fecha_respuesta=timezone.now()
+    )
+    if omitidas or sin_solicitud:
+        registro.update(omitidas=F('omitidas') + len(omitidas) + sin_solicitud, mensaje=motivo_corte)
+
+    registro.filter(estado='EN_PROCESO').update(estado='COMPLETADA')
+    registro.update(fecha_fin=timezone.now())
+    generacion.refresh_from_db()
+    return generacion
@@ -0,0 +1,581 @@
+"""
+Servicio de generación de documentos con IA.
+
+Las solicitudes se registran en SolicitudIA y se procesan en segundo plano
+(core.tareas): la vista encola y responde de inmediato, y la interfaz consulta
+el estado hasta que la respuesta está lista. Las solicitudes idénticas (misma
+huella normalizada) se responden desde RespuestaIACache sin llamar al modelo.
+
+El cliente se elige con settings.IA_BACKEND. 'documentos.ia.ClienteSimulado'
+no usa la red y sirve para desarrollo y pruebas.
+"""
+
+import hashlib
+import json
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.tareas import TareaNoReintentable, encolar
+
+PROMPT_SISTEMA_POR_DEFECTO = (
+    'Eres un experto en habilitación de servicios de salud en Colombia, '
+    'especializado en la Resolución 3100 de 2019.'
+)
+
+STREAMING_POR_DEFECTO = {
+    'ACTIVO': True,
+    'INTERVALO_GUARDADO': 0.5,
+    'DURACION_CONEXION': 25,
+    'INTERVALO_CONSULTA_MAXIMO': 2,
+}
+
+CACHE_POR_DEFECTO = {
+    'ACTIVA': True,
+    'TTL_HORAS': 24 * 30,
+    'MAX_ENTRADAS': 5000,
+}
+
+PARAMETROS_POR_DEFECTO = {
+    'modelo': 'gpt-4o',
+    'max_tokens': 4000,
+    'temperatura': 0.7,
+    'max_reintentos': 2,
+    'max_simultaneas': 2,
+    'por_minuto': 20,
+    'presupuesto_tokens': 500000,
+}
+
+
+class RespuestaIA:
+    """Resultado de una llamada al modelo"""
+
+    def __init__(self, contenido, tokens_prompt=0, tokens_respuesta=0):
+        self.contenido = contenido
+        self.tokens_prompt = tokens_prompt
+        self.tokens_respuesta = tokens_respuesta
+
+    @property
+    def tokens_total(self):
+        return self.tokens_prompt + self.tokens_respuesta
+
+
+class ClienteOpenAI:
+    """
+    Cliente de la API de chat de OpenAI.
+    generar_stream() produce el texto por fragmentos y, al terminar, deja el
+    consumo de tokens en self.uso.
+    """
+
+    def __init__(self, api_key):
+        from openai import OpenAI
+
+        self.cliente = OpenAI(api_key=api_key)
+        self.uso = None
+
+    def generar(self, modelo, mensajes, max_tokens, temperatura):
+        response = self.cliente.chat.completions.create(
+            model=modelo,
+            messages=mensajes,
+            max_tokens=max_tokens,
+            temperature=temperatura
+        )
+        return RespuestaIA(
+            response.choices[0].message.content,
+            tokens_prompt=response.usage.prompt_tokens,
+            tokens_respuesta=response.usage.completion_tokens
+        )
+
+    def generar_stream(self, modelo, mensajes, max_tokens, temperatura):
+        stream = self.cliente.chat.completions.create(
+            model=modelo,
+            messages=mensajes,
+            max_tokens=max_tokens,
+            temperature=temperatura,
+            stream=True,
+            stream_options={'include_usage': True}
+        )
+        for chunk in stream:
+            # El último fragmento trae el consumo y no tiene choices
+            if chunk.usage:
+                self.uso = RespuestaIA(
+                    '',
+                    tokens_prompt=chunk.usage.prompt_tokens,
+                    tokens_respuesta=chunk.usage.completion_tokens
+                )
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class ClienteSimulado:
+    """
+    Cliente sin red: responde con un documento HTML construido a partir del prompt.
+    generar_stream() lo entrega palabra por palabra, esperando `retardo` segundos
+    entre fragmentos.
+    """
+
+    retardo = 0
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self.uso = None
+
+    def generar(self, modelo, mensajes, max_tokens, temperatura):
+        prompt = mensajes[-1]['content'].strip()
+        contenido = (
+            '<h2>Documento de soporte</h2>\n'
+            f'<p>{prompt[:500]}</p>\n'
+            '<p>Contenido generado sin conexión para desarrollo y pruebas.</p>'
+        )
+        return RespuestaIA(
+            contenido,
+            tokens_prompt=sum(len(m['content'].split()) for m in mensajes),
+            tokens_respuesta=len(contenido.split())
+        )
+
+    def generar_stream(self, modelo, mensajes, max_tokens, temperatura):
+        respuesta = self.generar(modelo, mensajes, max_tokens, temperatura)
+        for fragmento in re.findall(r'\S+\s*', respuesta.contenido):
+            if self.retardo:
+                time.sleep(self.retardo)
+            yield fragmento
+        self.uso = respuesta
+
+
+def obtener_cliente(api_key):
+    """Instancia el cliente configurado en settings.IA_BACKEND"""
+    clase = import_string(getattr(settings, 'IA_BACKEND', 'documentos.ia.ClienteOpenAI'))
+    return clase(api_key)
+
+
+def configuracion_entidad(entidad):
+    """ConfiguracionIA de la entidad, o None si no tiene"""
+    from .models import ConfiguracionIA
+
+    if entidad is None:
+        return None
+    return ConfiguracionIA.objects.filter(entidad=entidad).first()
+
+
+def api_key_entidad(entidad):
+    """API key propia de la entidad o, en su defecto, la global"""
+    config = configuracion_entidad(entidad)
+    if config and config.api_key_personalizada:
+        return config.api_key_personalizada
+    return settings.OPENAI_API_KEY
+
+
+def parametros_entidad(entidad):
+    """Parámetros del modelo y de la cola según la ConfiguracionIA de la entidad"""
+    parametros = dict(PARAMETROS_POR_DEFECTO, prompt_sistema=PROMPT_SISTEMA_POR_DEFECTO)
+    config = configuracion_entidad(entidad)
+    if config is not None:
+        parametros.update({
+            'modelo': config.modelo_preferido,
+            'max_tokens': config.max_tokens,
+            'temperatura': float(config.temperatura),
+            'max_reintentos': config.max_reintentos,
+            'max_simultaneas': config.max_solicitudes_simultaneas,
+            'por_minuto': config.solicitudes_por_minuto,
+            'presupuesto_tokens': config.presupuesto_tokens_lote,
+        })
+        if config.prompt_sistema:
+            parametros['prompt_sistema'] = config.prompt_sistema
+    return parametros
+
+
+def ia_disponible(entidad):
+    """Retorna (disponible, mensaje) según la configuración de la entidad"""
+    config = configuracion_entidad(entidad)
+    if config is not None and not config.activo:
+        return False, 'La IA está desactivada para esta entidad.'
+    if not api_key_entidad(entidad):
+        return False, 'No hay API key de OpenAI configurada.'
+    return True, ''
+
+
+def configuracion_cache():
+    """Configuración de la caché de respuestas combinada con los valores por defecto"""
+    config = dict(CACHE_POR_DEFECTO)
+    config.update(getattr(settings, 'IA_CACHE', {}))
+    return config
+
+
+def _normalizar(texto):
+    """Minúsculas y espacios colapsados: prompts casi idénticos comparten huella"""
+    return ' '.join(str(texto or '').split()).lower()
+
+
+def huella_solicitud(parametros, prompt, prompt_template=None):
+    """
+    Huella SHA-256 de una solicitud: modelo, prompt del sistema, prompt
+    (que incluye el texto del criterio), plantilla y parámetros del modelo.
+    """
+    partes = {
+        'modelo': _normalizar(parametros['modelo']),
+        'sistema': _normalizar(parametros['prompt_sistema']),
+        'prompt': _normalizar(prompt),
+        'plantilla': _normalizar(prompt_template.prompt) if prompt_template else '',
+        'max_tokens': int(parametros['max_tokens']),
+        'temperatura': round(float(parametros['temperatura']), 2),
+    }
+    return hashlib.sha256(
+        json.dumps(partes, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+
+
+def buscar_en_cache(huella):
+    """Entrada vigente de la caché para la huella, marcándola como usada (LRU)"""
+    from django.db.models import F
+    from .models import RespuestaIACache
+
+    config = configuracion_cache()
+    if not config['ACTIVA']:
+        return None
+
+    vigencia = timezone.now() - timedelta(hours=config['TTL_HORAS'])
+    entrada = RespuestaIACache.objects.filter(huella=huella, fecha_creacion__gte=vigencia).first()
+    if entrada is not None:
+        RespuestaIACache.objects.filter(pk=entrada.pk).update(
+            usos=F('usos') + 1, ultimo_uso=timezone.now()
+        )
+    return entrada
+
+
+def guardar_en_cache(solicitud):
+    """Guarda la respuesta de una solicitud completada y aplica TTL y límite LRU"""
+    from .models import RespuestaIACache
+
+    config = configuracion_cache()
+    if not config['ACTIVA'] or not solicitud.huella:
+        return
+
+    ahora = timezone.now()
+    RespuestaIACache.objects.update_or_create(
+        huella=solicitud.huella,
+        defaults={
+            'modelo': solicitud.modelo_usado,
+            'respuesta': solicitud.respuesta,
+            'tokens_total': solicitud.tokens_total,
+            'solicitud_origen': solicitud,
+            'fecha_creacion': ahora,
+            'ultimo_uso': ahora,
+        }
+    )
+
+    # Vencidas por TTL y, si se supera el máximo, las menos usadas recientemente
+    RespuestaIACache.objects.filter(
+        fecha_creacion__lt=ahora - timedelta(hours=config['TTL_HORAS'])
+    ).delete()
+    sobrantes = RespuestaIACache.objects.count() - config['MAX_ENTRADAS']
+    if sobrantes > 0:
+        ids = list(RespuestaIACache.objects.order_by('ultimo_uso').values_list('pk', flat=True)[:sobrantes])
+        RespuestaIACache.objects.filter(pk__in=ids).delete()
+
+
+def datos_solicitud(solicitud):
+    """Estado JSON de una solicitud de IA para el seguimiento desde la interfaz"""
+    from django.urls import reverse
+
+    datos = {
+        'id': solicitud.pk,
+        'estado': solicitud.estado,
+        'estado_display': solicitud.get_estado_display(),
+        'terminada': solicitud.terminada,
+        'desde_cache': solicitud.desde_cache,
+        'mensaje_error': solicitud.mensaje_error,
+        'url_estado': reverse('documentos:api_estado_solicitud', args=[solicitud.pk]),
+        'url_stream': reverse('documentos:stream_solicitud', args=[solicitud.pk]),
+        'url_resultado': reverse('documentos:resultado_ia', args=[solicitud.pk]),
+    }
+    if solicitud.estado == 'COMPLETADA':
+        datos.update({
+            'respuesta': solicitud.respuesta,
+            'tokens_total': solicitud.tokens_total,
+            'tiempo_procesamiento': float(solicitud.tiempo_procesamiento or 0),
+            'tiempo_primer_token': float(solicitud.tiempo_primer_token or 0),
+        })
+    return datos
+
+
+class _ContextoPrompt(dict):
+    """Deja intactas las {variables} que la plantilla usa pero no se conocen"""
+
+    def __missing__(self, clave):
+        return '{' + clave + '}'
+
+
+def renderizar_prompt(plantilla, **contexto):
+    """Sustituye {criterio}, {entidad}, {servicio}... en el texto de una PromptTemplate"""
+    try:
+        return plantilla.format_map(_ContextoPrompt(contexto))
+    except (ValueError, IndexError, AttributeError):
+        # Llaves sueltas o formatos inválidos: se envía la plantilla tal cual
+        return plantilla
+
+
+def prompt_documento_criterio(evaluacion, instruccion='', prompt_template=None):
+    """
+    Prompt para generar el documento de soporte de una evaluación: la
+    PromptTemplate indicada (renderizada) o el prompt estándar por criterio.
+    """
+    criterio = evaluacion.criterio
+    if prompt_template is not None:
+        servicio = evaluacion.servicio_habilitado
+        prompt = renderizar_prompt(
+            prompt_template.prompt,
+            criterio=criterio.texto,
+            numero=criterio.numero,
+            estandar=criterio.estandar.nombre,
+            entidad=evaluacion.sede.entidad.razon_social,
+            sede=evaluacion.sede.nombre,
+            servicio=str(servicio) if servicio else '',
+            instruccion=instruccion,
+        )
+        if instruccion and '{instruccion}' not in prompt_template.prompt:
+            prompt += f'\n\nInstrucción adicional: {instruccion}'
+        return prompt
+
+    return f"""
+        Criterio a documentar:
+        {criterio.texto}
+
+        Instrucción del usuario: {instruccion}
+
+        Genera un documento profesional en formato HTML que demuestre el cumplimiento
+        de este criterio. El documento debe ser formal, específico y aplicable a
+        una institución prestadora de servicios de salud.
+        """
+
+
+def crear_solicitud(usuario, entidad, prompt, instruccion='', evaluacion=None,
+                    prompt_template=None, usar_cache=True, generacion_masiva=None,
+                    en_cola=True):
+    """
+    Registra una SolicitudIA y la encola. Los reintentos y el máximo de
+    solicitudes simultáneas por entidad salen de la ConfiguracionIA.
+    Si hay una respuesta en caché para la misma huella (y usar_cache), la
+    solicitud se completa al instante sin llamar al modelo.
+    Con en_cola=False la solicitud queda PENDIENTE para que la procese quien
+    la creó (generación masiva).
+    """
+    from .models import SolicitudIA
+
+    inicio = time.monotonic()
+    parametros = parametros_entidad(entidad)
+    max_reintentos = parametros.pop('max_reintentos')
+    max_simultaneas = parametros.pop('max_simultaneas')
+    for clave in ('por_minuto', 'presupuesto_tokens'):
+        parametros.pop(clave)
+    huella = huella_solicitud(parametros, prompt, prompt_template)
+    parametros['instruccion'] = instruccion
+
+    with transaction.atomic():
+        solicitud = SolicitudIA.objects.create(
+            usuario=usuario,
+            entidad=entidad,
+            evaluacion=evaluacion,
+            prompt_template=prompt_template,
+            prompt_enviado=prompt,
+            parametros=parametros,
+            modelo_usado=parametros['modelo'],
+            huella=huella,
+            generacion_masiva=generacion_masiva,
+            estado='PENDIENTE'
+        )
+
+        entrada = buscar_en_cache(huella) if usar_cache else None
+        if entrada is not None:
+            solicitud.respuesta = entrada.respuesta
+            solicitud.modelo_usado = entrada.modelo
+            solicitud.desde_cache = True
+            solicitud.estado = 'COMPLETADA'
+            solicitud.fecha_respuesta = timezone.now()
+            solicitud.tiempo_procesamiento = round(time.monotonic() - inicio, 3)
+            solicitud.save()
+            if evaluacion is not None:
+                guardar_documento_evaluacion(solicitud)
+            return solicitud
+
+        if not en_cola:
+            return solicitud
+
+        solicitud.tarea = encolar(
+            'documentos.procesar_solicitud_ia',
+            {'solicitud_id': solicitud.pk},
+            max_intentos=max_reintentos + 1,
+            clave_concurrencia=f'ia-entidad:{entidad.pk}' if entidad else 'ia-global',
+            limite_concurrencia=max_simultaneas or None
+        )
+        solicitud.save(update_fields=['tarea'])
+    return solicitud
+
+
+def configuracion_streaming():
+    """Configuración de la generación por fragmentos combinada con los valores por defecto"""
+    config = dict(STREAMING_POR_DEFECTO)
+    config.update(getattr(settings, 'IA_STREAMING', {}))
+    return config
+
+
+class EscrituraProgresiva:
+    """
+    Vuelca la respuesta parcial en SolicitudIA.respuesta y, si la solicitud es
+    de una evaluación, en DocumentoEvaluacion.contenido_html, como máximo cada
+    `intervalo` segundos. Si la generación falla, revierte el documento.
+    """
+
+    def __init__(self, solicitud, intervalo):
+        self.solicitud = solicitud
+        self.intervalo = intervalo
+        self.ultima_escritura = 0
+        self.documento = None
+        self.documento_creado = False
+        self.contenido_anterior = ''
+
+    def escribir(self, partes):
+        from evaluacion.models import DocumentoEvaluacion
+        from .models import SolicitudIA
+
+        ahora = time.monotonic()
+        if ahora - self.ultima_escritura < self.intervalo:
+            return
+        self.ultima_escritura = ahora
+
+        texto = ''.join(partes)
+        SolicitudIA.objects.filter(pk=self.solicitud.pk).update(respuesta=texto)
+        if self.solicitud.evaluacion_id:
+            documento = self._documento()
+            DocumentoEvaluacion.objects.filter(pk=documento.pk).update(contenido_html=texto)
+
+    def _documento(self):
+        from evaluacion.models import DocumentoEvaluacion
+
+        if self.documento is None:
+            self.documento = DocumentoEvaluacion.objects.filter(evaluacion_id=self.solicitud.evaluacion_id).first()
+            if self.documento is None:
+                self.documento = DocumentoEvaluacion.objects.create(
+                    evaluacion_id=self.solicitud.evaluacion_id,
+                    nombre=f'Documento - {self.solicitud.evaluacion.criterio.numero}',
+                    generado_con_ia=True,
+                    prompt_ia=self.solicitud.parametros.get('instruccion', ''),
+                    creado_por=self.solicitud.usuario
+                )
+                self.documento_creado = True
+            else:
+                self.contenido_anterior = self.documento.contenido_html
+        return self.documento
+
+    def revertir(self):
+        from evaluacion.models import DocumentoEvaluacion
+        from .models import SolicitudIA
+
+        SolicitudIA.objects.filter(pk=self.solicitud.pk).update(respuesta='')
+        if self.documento is None:
+            return
+        if self.documento_creado:
+            self.documento.delete()
+        else:
+            DocumentoEvaluacion.objects.filter(pk=self.documento.pk).update(
+                contenido_html=self.contenido_anterior
+            )
+
+
+def procesar_solicitud(solicitud):
+    """
+    Llama al modelo para una solicitud y guarda la respuesta (ejecutado por el trabajador).
+    Con IA_STREAMING activo la respuesta se recibe por fragmentos y se persiste
+    progresivamente; tiempo_primer_token y tiempo_procesamiento registran el
+    tiempo hasta el primer fragmento y el total.
+    """
+    api_key = api_key_entidad(solicitud.entidad)
+    if not api_key:
+        raise TareaNoReintentable('No hay API key de OpenAI configurada.')
+
+    parametros = solicitud.parametros
+    solicitud.estado = 'PROCESANDO'
+    solicitud.save(update_fields=['estado'])
+
+    cliente = obtener_cliente(api_key)
+    argumentos = (
+        parametros['modelo'],
+        [
+            {'role': 'system', 'content': parametros['prompt_sistema']},
+            {'role': 'user', 'content': solicitud.prompt_enviado},
+        ],
+        parametros['max_tokens'],
+        parametros['temperatura']
+    )
+    config = configuracion_streaming()
+
+    inicio = time.monotonic()
+    if config['ACTIVO'] and hasattr(cliente, 'generar_stream'):
+        escritura = EscrituraProgresiva(solicitud, config['INTERVALO_GUARDADO'])
+        partes = []
+        try:
+            for fragmento in cliente.generar_stream(*argumentos):
+                if not partes:
+                    solicitud.tiempo_primer_token = round(time.monotonic() - inicio, 3)
+                partes.append(fragmento)
+                escritura.escribir(partes)
+        except Exception:
+            escritura.revertir()
+            raise
+        respuesta = cliente.uso or RespuestaIA('')
+        respuesta.contenido = ''.join(partes)
+    else:
+        respuesta = cliente.generar(*argumentos)
+        solicitud.tiempo_primer_token = round(time.monotonic() - inicio, 3)
+
+    solicitud.respuesta = respuesta.contenido
+    solicitud.modelo_usado = parametros['modelo']
+    solicitud.tokens_prompt = respuesta.tokens_prompt
+    solicitud.tokens_respuesta = respuesta.tokens_respuesta
+    solicitud.tokens_total = respuesta.tokens_total
+    solicitud.estado = 'COMPLETADA'
+    solicitud.mensaje_error = ''
+    solicitud.fecha_respuesta = timezone.now()
+    solicitud.tiempo_procesamiento = round(time.monotonic() - inicio, 3)
+
+    with transaction.atomic():
+        solicitud.save()
+        if solicitud.evaluacion_id:
+            guardar_documento_evaluacion(solicitud)
+        guardar_en_cache(solicitud)
+    return solicitud
+
+
+def guardar_documento_evaluacion(solicitud):
+    """Guarda la respuesta como DocumentoEvaluacion de la evaluación asociada"""
+    from evaluacion.models import DocumentoEvaluacion
+
+    evaluacion = solicitud.evaluacion
+    instruccion = solicitud.parametros.get('instruccion', '')
+
+    doc, created = DocumentoEvaluacion.objects.get_or_create(
+        evaluacion=evaluacion,
+        defaults={
+            'nombre': f'Documento - {evaluacion.criterio.numero}',
+            'contenido_html': solicitud.respuesta,
+            'generado_con_ia': True,
+            'prompt_ia': instruccion,
+            'creado_por': solicitud.usuario
+        }
+    )
+
+    if not created:
+        doc.contenido_html = solicitud.respuesta
+        doc.generado_con_ia = True
+        doc.prompt_ia = instruccion
+        doc.save()
+
+    # Actualizar estado del documento a "En Desarrollo"
+    if evaluacion.estado_documento == 'NT':
+        evaluacion.estado_documento = 'ED'
+        evaluacion.save()
+    return doc
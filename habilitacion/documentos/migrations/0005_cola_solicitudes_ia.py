@@ -0,0 +1,54 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_tareas_segundo_plano"),
+        ("documentos", "0004_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="configuracionia",
+            name="max_reintentos",
+            field=models.PositiveSmallIntegerField(
+                default=2,
+                help_text="Reintentos ante errores de la API (límites de uso, tiempo de espera...)",
+                verbose_name="Máximo de reintentos",
+            ),
+        ),
+        migrations.AddField(
+            model_name="configuracionia",
+            name="max_solicitudes_simultaneas",
+            field=models.PositiveSmallIntegerField(
+                default=2,
+                help_text="Máximo de solicitudes de la entidad que se procesan a la vez",
+                verbose_name="Solicitudes simultáneas",
+            ),
+        ),
+        migrations.AddField(
+            model_name="solicitudia",
+            name="parametros",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Modelo, prompt del sistema, max_tokens y temperatura con que se encoló la solicitud",
+                verbose_name="Parámetros",
+            ),
+        ),
+        migrations.AddField(
+            model_name="solicitudia",
+            name="tarea",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="solicitudes_ia",
+                to="core.tareasegundoplano",
+            ),
+        ),
+    ]
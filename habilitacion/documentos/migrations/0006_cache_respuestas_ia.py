@@ -0,0 +1,89 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documentos", "0005_cola_solicitudes_ia"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="solicitudia",
+            name="desde_cache",
+            field=models.BooleanField(
+                default=False,
+                help_text="La respuesta se reutilizó de una solicitud anterior idéntica, sin consumir tokens",
+                verbose_name="Respondida desde caché",
+            ),
+        ),
+        migrations.AddField(
+            model_name="solicitudia",
+            name="huella",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="SHA-256 normalizado de modelo, prompts y parámetros",
+                max_length=64,
+                verbose_name="Huella",
+            ),
+        ),
+        migrations.CreateModel(
+            name="RespuestaIACache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "huella",
+                    models.CharField(max_length=64, unique=True, verbose_name="Huella"),
+                ),
+                ("modelo", models.CharField(max_length=50, verbose_name="Modelo")),
+                ("respuesta", models.TextField(verbose_name="Respuesta")),
+                (
+                    "tokens_total",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Tokens de la generación original"
+                    ),
+                ),
+                (
+                    "usos",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Usos desde caché"
+                    ),
+                ),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(verbose_name="Fecha de creación"),
+                ),
+                (
+                    "ultimo_uso",
+                    models.DateTimeField(db_index=True, verbose_name="Último uso"),
+                ),
+                (
+                    "solicitud_origen",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="documentos.solicitudia",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Respuesta de IA en caché",
+                "verbose_name_plural": "Respuestas de IA en caché",
+                "ordering": ["-ultimo_uso"],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("documentos", "0006_cache_respuestas_ia"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="solicitudia",
+            name="tiempo_primer_token",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=3,
+                max_digits=10,
+                null=True,
+                verbose_name="Tiempo hasta el primer token (segundos)",
+            ),
+        ),
+    ]
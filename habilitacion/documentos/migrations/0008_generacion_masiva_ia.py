@@ -0,0 +1,200 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_tareas_segundo_plano"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("estandares", "0003_tipo_criterio"),
+        ("entidades", "0005_add_configuracion_estandar_sede"),
+        ("documentos", "0007_tiempo_primer_token"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="configuracionia",
+            name="presupuesto_tokens_lote",
+            field=models.PositiveIntegerField(
+                default=500000,
+                help_text="Tokens máximos que puede consumir una generación masiva (0 = sin límite)",
+                verbose_name="Presupuesto de tokens por lote",
+            ),
+        ),
+        migrations.AddField(
+            model_name="configuracionia",
+            name="solicitudes_por_minuto",
+            field=models.PositiveIntegerField(
+                default=20,
+                help_text="Límite de ritmo en la generación masiva (0 = sin límite)",
+                verbose_name="Solicitudes por minuto",
+            ),
+        ),
+        migrations.CreateModel(
+            name="GeneracionMasivaIA",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "instruccion",
+                    models.TextField(blank=True, verbose_name="Instrucción adicional"),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("PENDIENTE", "Pendiente"),
+                            ("EN_PROCESO", "En proceso"),
+                            ("COMPLETADA", "Completada"),
+                            ("CANCELADA", "Cancelada"),
+                            ("ERROR", "Error"),
+                        ],
+                        default="PENDIENTE",
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Documentos a generar"
+                    ),
+                ),
+                (
+                    "completadas",
+                    models.PositiveIntegerField(default=0, verbose_name="Completadas"),
+                ),
+                (
+                    "fallidas",
+                    models.PositiveIntegerField(default=0, verbose_name="Fallidas"),
+                ),
+                (
+                    "omitidas",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="No se enviaron por agotar el presupuesto de tokens o por cancelación",
+                        verbose_name="Omitidas",
+                    ),
+                ),
+                (
+                    "desde_cache",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Reutilizadas de caché"
+                    ),
+                ),
+                (
+                    "tokens_usados",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Tokens usados"
+                    ),
+                ),
+                (
+                    "presupuesto_tokens",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Presupuesto de tokens"
+                    ),
+                ),
+                ("mensaje", models.TextField(blank=True, verbose_name="Mensaje")),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha de creación"
+                    ),
+                ),
+                (
+                    "fecha_inicio",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Fecha de inicio"
+                    ),
+                ),
+                (
+                    "fecha_fin",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Fecha de finalización"
+                    ),
+                ),
+                (
+                    "entidad",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="generaciones_masivas_ia",
+                        to="entidades.entidadprestadora",
+                    ),
+                ),
+                (
+                    "estandar",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Vacío para todos los estándares habilitados de la sede",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="generaciones_masivas_ia",
+                        to="estandares.estandar",
+                    ),
+                ),
+                (
+                    "prompt_template",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="documentos.prompttemplate",
+                    ),
+                ),
+                (
+                    "sede",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="generaciones_masivas_ia",
+                        to="entidades.sede",
+                    ),
+                ),
+                (
+                    "tarea",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="core.tareasegundoplano",
+                    ),
+                ),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="generaciones_masivas_ia",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Generación masiva con IA",
+                "verbose_name_plural": "Generaciones masivas con IA",
+                "ordering": ["-fecha_creacion"],
+            },
+        ),
+        migrations.AddField(
+            model_name="solicitudia",
+            name="generacion_masiva",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="solicitudes",
+                to="documentos.generacionmasivaia",
+            ),
+        ),
+    ]
@@ -50,6 +50,28 @@ class ConfiguracionIA(models.Model):
     )
     activo = models.BooleanField('IA activa', default=True)
 
+    # Cola de solicitudes
+    max_reintentos = models.PositiveSmallIntegerField(
+        'Máximo de reintentos',
+        default=2,
+        help_text='Reintentos ante errores de la API (límites de uso, tiempo de espera...)'
+    )
+    max_solicitudes_simultaneas = models.PositiveSmallIntegerField(
+        'Solicitudes simultáneas',
+        default=2,
+        help_text='Máximo de solicitudes de la entidad que se procesan a la vez'
+    )
+    solicitudes_por_minuto = models.PositiveIntegerField(
+        'Solicitudes por minuto',
+        default=20,
+        help_text='Límite de ritmo en la generación masiva (0 = sin límite)'
+    )
+    presupuesto_tokens_lote = models.PositiveIntegerField(
+        'Presupuesto de tokens por lote',
+        default=500000,
+        help_text='Tokens máximos que puede consumir una generación masiva (0 = sin límite)'
+    )
+
     class Meta:
         verbose_name = 'Configuración de IA'
         verbose_name_plural = 'Configuraciones de IA'
@@ -162,7 +184,27 @@ class SolicitudIA(models.Model):
         blank=True
     )
     prompt_enviado = models.TextField('Prompt enviado')
+    parametros = models.JSONField(
+        'Parámetros',
+        default=dict,
+        blank=True,
+        help_text='Modelo, prompt del sistema, max_tokens y temperatura con que se encoló la solicitud'
+    )
     respuesta = models.TextField('Respuesta', blank=True)
+    tarea = models.ForeignKey(
+        'core.TareaSegundoPlano',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='solicitudes_ia'
+    )
+    generacion_masiva = models.ForeignKey(
+        'GeneracionMasivaIA',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='solicitudes'
+    )
 
     modelo_usado = models.CharField('Modelo usado', max_length=50, blank=True)
     tokens_prompt = models.PositiveIntegerField('Tokens del prompt', default=0)
@@ -178,6 +220,20 @@ class SolicitudIA(models.Model):
     estado = models.CharField('Estado', max_length=20, choices=ESTADOS, default='PENDIENTE')
     mensaje_error = models.TextField('Mensaje de error', blank=True)
 
+    # Caché de respuestas
+    huella = models.CharField(
+        'Huella',
+        max_length=64,
+        blank=True,
+        db_index=True,
+        help_text='SHA-256 normalizado de modelo, prompts y parámetros'
+    )
+    desde_cache = models.BooleanField(
+        'Respondida desde caché',
+        default=False,
+        help_text='La respuesta se reutilizó de una solicitud anterior idéntica, sin consumir tokens'
+    )
+
     fecha_solicitud = models.DateTimeField('Fecha de solicitud', auto_now_add=True)
     fecha_respuesta = models.DateTimeField('Fecha de respuesta', null=True, blank=True)
     tiempo_procesamiento = models.DecimalField(
@@ -187,6 +243,13 @@ class SolicitudIA(models.Model):
         null=True,
         blank=True
     )
+    tiempo_primer_token = models.DecimalField(
+        'Tiempo hasta el primer token (segundos)',
+        max_digits=10,
+        decimal_places=3,
+        null=True,
+        blank=True
+    )
 
     class Meta:
         verbose_name = 'Solicitud de IA'
@@ -196,6 +259,133 @@ class SolicitudIA(models.Model):
     def __str__(self):
         return f"Solicitud {self.id} - {self.usuario} - {self.estado}"
 
+    @property
+    def terminada(self):
+        return self.estado in ('COMPLETADA', 'ERROR')
+
+
+class GeneracionMasivaIA(models.Model):
+    """
+    Generación con IA de todos los documentos faltantes (estado_documento 'NT')
+    de una sede, o de un estándar dentro de la sede, en un solo trabajo.
+    """
+
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En proceso'),
+        ('COMPLETADA', 'Completada'),
+        ('CANCELADA', 'Cancelada'),
+        ('ERROR', 'Error'),
+    ]
+
+    entidad = models.ForeignKey(
+        'entidades.EntidadPrestadora',
+        on_delete=models.CASCADE,
+        related_name='generaciones_masivas_ia'
+    )
+    sede = models.ForeignKey(
+        'entidades.Sede',
+        on_delete=models.CASCADE,
+        related_name='generaciones_masivas_ia'
+    )
+    estandar = models.ForeignKey(
+        'estandares.Estandar',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='generaciones_masivas_ia',
+        help_text='Vacío para todos los estándares habilitados de la sede'
+    )
+    prompt_template = models.ForeignKey(
+        PromptTemplate,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    instruccion = models.TextField('Instrucción adicional', blank=True)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='generaciones_masivas_ia'
+    )
+
+    estado = models.CharField('Estado', max_length=20, choices=ESTADOS, default='PENDIENTE')
+    total = models.PositiveIntegerField('Documentos a generar', default=0)
+    completadas = models.PositiveIntegerField('Completadas', default=0)
+    fallidas = models.PositiveIntegerField('Fallidas', default=0)
+    omitidas = models.PositiveIntegerField(
+        'Omitidas',
+        default=0,
+        help_text='No se enviaron por agotar el presupuesto de tokens o por cancelación'
+    )
+    desde_cache = models.PositiveIntegerField('Reutilizadas de caché', default=0)
+    tokens_usados = models.PositiveIntegerField('Tokens usados', default=0)
+    presupuesto_tokens = models.PositiveIntegerField('Presupuesto de tokens', default=0)
+    mensaje = models.TextField('Mensaje', blank=True)
+    tarea = models.ForeignKey(
+        'core.TareaSegundoPlano',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    fecha_creacion = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    fecha_inicio = models.DateTimeField('Fecha de inicio', null=True, blank=True)
+    fecha_fin = models.DateTimeField('Fecha de finalización', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Generación masiva con IA'
+        verbose_name_plural = 'Generaciones masivas con IA'
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        alcance = self.estandar.codigo if self.estandar_id else 'todos los estándares'
+        return f"{self.sede.nombre} - {alcance} ({self.get_estado_display()})"
+
+    @property
+    def procesadas(self):
+        return self.completadas + self.fallidas + self.omitidas
+
+    @property
+    def porcentaje(self):
+        return round(self.procesadas / self.total * 100) if self.total else 0
+
+    @property
+    def terminada(self):
+        return self.estado in ('COMPLETADA', 'CANCELADA', 'ERROR')
+
+
+class RespuestaIACache(models.Model):
+    """
+    Caché de respuestas de la IA por huella de la solicitud.
+    Las entradas vencen por antigüedad (TTL) y, al superar el máximo,
+    se eliminan las menos usadas recientemente (LRU).
+    """
+    huella = models.CharField('Huella', max_length=64, unique=True)
+    modelo = models.CharField('Modelo', max_length=50)
+    respuesta = models.TextField('Respuesta')
+    tokens_total = models.PositiveIntegerField('Tokens de la generación original', default=0)
+    solicitud_origen = models.ForeignKey(
+        SolicitudIA,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    usos = models.PositiveIntegerField('Usos desde caché', default=0)
+    fecha_creacion = models.DateTimeField('Fecha de creación')
+    ultimo_uso = models.DateTimeField('Último uso', db_index=True)
+
+    class Meta:
+        verbose_name = 'Respuesta de IA en caché'
+        verbose_name_plural = 'Respuestas de IA en caché'
+        ordering = ['-ultimo_uso']
+
+    def __str__(self):
+        return f"{self.huella[:12]} ({self.usos} usos)"
+
 
 class NormativaReferencia(models.Model):
     """
@@ -0,0 +1,72 @@
+"""
+Tareas en segundo plano del módulo de documentos
+"""
+
+from django.utils import timezone
+
+from core.tareas import tarea
+
+
+def _registrar_falla(error, solicitud_id):
+    """La solicitud agotó sus reintentos: queda en ERROR con el último mensaje"""
+    from .models import SolicitudIA
+
+    SolicitudIA.objects.filter(pk=solicitud_id).update(
+        estado='ERROR',
+        mensaje_error=str(error),
+        fecha_respuesta=timezone.now()
+    )
+
+
+@tarea('documentos.procesar_solicitud_ia', al_fallar=_registrar_falla)
+def procesar_solicitud_ia(solicitud_id):
+    """Procesa una SolicitudIA encolada"""
+    from .ia import procesar_solicitud
+    from .models import SolicitudIA
+
+    solicitud = SolicitudIA.objects.select_related(
+        'entidad', 'usuario', 'evaluacion__criterio'
+    ).filter(pk=solicitud_id).first()
+    if solicitud is None or solicitud.terminada:
+        return {'estado': 'OMITIDA'}
+
+    try:
+        procesar_solicitud(solicitud)
+    except Exception as e:
+        # Vuelve a PENDIENTE mientras la cola la reintenta
+        SolicitudIA.objects.filter(pk=solicitud_id).update(
+            estado='PENDIENTE', mensaje_error=f'Reintentando: {e}'
+        )
+        raise
+
+    return {'estado': solicitud.estado, 'tokens': solicitud.tokens_total}
+
+
+def _registrar_falla_generacion(error, generacion_id):
+    from .models import GeneracionMasivaIA
+
+    GeneracionMasivaIA.objects.filter(pk=generacion_id).exclude(
+        estado__in=['COMPLETADA', 'CANCELADA']
+    ).update(estado='ERROR', mensaje=str(error), fecha_fin=timezone.now())
+
+
+@tarea('documentos.generacion_masiva', al_fallar=_registrar_falla_generacion)
+def generacion_masiva(generacion_id):
+    """Genera con IA los documentos faltantes de una sede o estándar"""
+    from .generacion_masiva import ejecutar_generacion
+    from .models import GeneracionMasivaIA
+
+    generacion = GeneracionMasivaIA.objects.select_related(
+        'entidad', 'sede', 'estandar', 'prompt_template', 'usuario'
+    ).filter(pk=generacion_id).first()
+    if generacion is None or generacion.terminada:
+        return {'estado': 'OMITIDA'}
+
+    generacion = ejecutar_generacion(generacion)
+    return {
+        'estado': generacion.estado,
+        'completadas': generacion.completadas,
+        'fallidas': generacion.fallidas,
+        'omitidas': generacion.omitidas,
+        'tokens': generacion.tokens_usados,
+    }
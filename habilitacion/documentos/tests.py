@@ -1,3 +1,201 @@
-from django.test import TestCase
+"""
+Pruebas de la cola de solicitudes de IA con el cliente simulado (sin red)
+"""
 
-# Create your tests here.
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import TareaSegundoPlano
+from entidades.models import Departamento, EntidadPrestadora, Municipio, Sede, TipoPrestador
+from estandares.models import Criterio, Estandar, GrupoEstandar
+from evaluacion.models import DocumentoEvaluacion, Evaluacion
+from usuarios.models import Usuario
+
+from .ia import ClienteSimulado, buscar_en_cache, crear_solicitud, huella_solicitud, parametros_entidad
+from .models import ConfiguracionIA, RespuestaIACache, SolicitudIA
+
+
+class ClienteConFallas:
+    """Cliente que falla las primeras `fallas` llamadas y luego responde como el simulado"""
+
+    fallas = 0
+    llamadas = 0
+
+    def __init__(self, api_key=None):
+        pass
+
+    def generar(self, modelo, mensajes, max_tokens, temperatura):
+        from .ia import ClienteSimulado
+
+        ClienteConFallas.llamadas += 1
+        if ClienteConFallas.llamadas <= ClienteConFallas.fallas:
+            raise RuntimeError('429 rate limit')
+        return ClienteSimulado().generar(modelo, mensajes, max_tokens, temperatura)
+
+
+class ClienteObservado(ClienteSimulado):
+    """Cliente simulado que anota lo guardado en la base de datos antes de cada fragmento"""
+
+    guardado = []
+
+    def generar_stream(self, modelo, mensajes, max_tokens, temperatura):
+        for fragmento in super().generar_stream(modelo, mensajes, max_tokens, temperatura):
+            solicitud = SolicitudIA.objects.get()
+            documento = DocumentoEvaluacion.objects.filter(evaluacion_id=solicitud.evaluacion_id).first()
+            ClienteObservado.guardado.append(
+                (solicitud.estado, solicitud.respuesta, documento.contenido_html if documento else None)
+            )
+            yield fragmento
+
+
+@override_settings(
+    IA_BACKEND='documentos.ia.ClienteSimulado',
+    OPENAI_API_KEY='clave-de-prueba',
+    IA_STREAMING={'ACTIVO': False},
+    IA_CACHE={'ACTIVA': True},
+    TAREAS_SEGUNDO_PLANO={'MODO': 'INMEDIATO', 'ESPERA_REINTENTO_SEGUNDOS': 0},
+)
+class SolicitudIATests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        tipo = TipoPrestador.objects.create(codigo='IPS', nombre='IPS')
+        departamento = Departamento.objects.create(codigo='05', nombre='Antioquia')
+        municipio = Municipio.objects.create(departamento=departamento, codigo='05001', nombre='Medellín')
+        cls.entidad = EntidadPrestadora.objects.create(
+            tipo_prestador=tipo, razon_social='Clínica de Prueba', nit='900000001',
+            digito_verificacion='1', representante_legal='Representante',
+            documento_representante='1', departamento=departamento, municipio=municipio,
+            direccion='Calle 1', telefono='1', email='clinica@example.com'
+        )
+        sede = Sede.objects.create(
+            entidad=cls.entidad, nombre='Principal', departamento=departamento,
+            municipio=municipio, direccion='Calle 1', telefono='1', codigo_reps_sede='S1'
+        )
+        grupo = GrupoEstandar.objects.create(codigo='11.1', nombre='Todos los servicios', orden=1)
+        estandar = Estandar.objects.create(grupo=grupo, codigo='11.1.1', nombre='Talento humano', orden=1)
+        criterio = Criterio.objects.create(
+            estandar=estandar, numero='1.1', texto='Cuenta con el talento humano requerido.', orden=1
+        )
+        cls.evaluacion = Evaluacion.objects.create(sede=sede, criterio=criterio)
+        cls.usuario = Usuario.objects.create_user(
+            'evaluador@example.com', 'clave', primer_nombre='Ana', primer_apellido='Pérez',
+            rol='ADMIN', entidad=cls.entidad
+        )
+        ConfiguracionIA.objects.create(entidad=cls.entidad, max_reintentos=1)
+
+    def crear(self, prompt='Documento de talento humano', **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            solicitud = crear_solicitud(self.usuario, self.entidad, prompt, **kwargs)
+        solicitud.refresh_from_db()
+        return solicitud
+
+    def test_cola_procesa_la_solicitud(self):
+        solicitud = self.crear(evaluacion=self.evaluacion, instruccion='manual')
+
+        self.assertEqual(solicitud.estado, 'COMPLETADA')
+        self.assertFalse(solicitud.desde_cache)
+        self.assertIn('Documento de talento humano', solicitud.respuesta)
+        self.assertGreater(solicitud.tokens_total, 0)
+        self.assertEqual(solicitud.tarea.estado, 'COMPLETADA')
+
+        documento = DocumentoEvaluacion.objects.get(evaluacion=self.evaluacion)
+        self.assertTrue(documento.generado_con_ia)
+        self.assertEqual(documento.prompt_ia, 'manual')
+
+    def test_solicitud_identica_se_responde_desde_cache(self):
+        original = self.crear()
+        huella = huella_solicitud(dict(parametros_entidad(self.entidad)), '  DOCUMENTO de talento   humano ')
+        self.assertEqual(huella, original.huella)
+        self.assertIsNotNone(buscar_en_cache(huella))
+
+        repetida = self.crear('  DOCUMENTO de talento   humano ')
+
+        self.assertEqual(repetida.estado, 'COMPLETADA')
+        self.assertTrue(repetida.desde_cache)
+        self.assertIsNone(repetida.tarea)
+        self.assertEqual(repetida.respuesta, original.respuesta)
+        self.assertEqual(RespuestaIACache.objects.get().usos, 2)
+
+    def test_sin_cache_se_llama_al_modelo(self):
+        self.crear()
+        repetida = self.crear(usar_cache=False)
+
+        self.assertFalse(repetida.desde_cache)
+        self.assertIsNotNone(repetida.tarea)
+
+    @override_settings(IA_BACKEND='documentos.tests.ClienteConFallas')
+    def test_falla_transitoria_se_reintenta(self):
+        ClienteConFallas.fallas, ClienteConFallas.llamadas = 1, 0
+
+        solicitud = self.crear()
+
+        self.assertEqual(solicitud.estado, 'COMPLETADA')
+        self.assertEqual(solicitud.tarea.intentos, 2)
+        self.assertEqual(ClienteConFallas.llamadas, 2)
+
+    @override_settings(IA_BACKEND='documentos.tests.ClienteConFallas')
+    def test_reintentos_agotados_dejan_la_solicitud_en_error(self):
+        ClienteConFallas.fallas, ClienteConFallas.llamadas = 10, 0
+
+        solicitud = self.crear()
+
+        self.assertEqual(solicitud.estado, 'ERROR')
+        self.assertIn('429', solicitud.mensaje_error)
+        self.assertEqual(solicitud.tarea.estado, 'ERROR')
+        # max_reintentos=1: el intento original y un reintento
+        self.assertEqual(solicitud.tarea.intentos, 2)
+        self.assertFalse(RespuestaIACache.objects.exists())
+
+    @override_settings(OPENAI_API_KEY='')
+    def test_sin_api_key_no_se_reintenta(self):
+        solicitud = self.crear()
+
+        self.assertEqual(solicitud.estado, 'ERROR')
+        self.assertEqual(solicitud.tarea.intentos, 1)
+        self.assertEqual(TareaSegundoPlano.objects.get().estado, 'ERROR')
+
+    @override_settings(
+        IA_BACKEND='documentos.tests.ClienteObservado',
+        IA_STREAMING={'ACTIVO': True, 'INTERVALO_GUARDADO': 0},
+    )
+    def test_streaming_guarda_la_respuesta_parcial(self):
+        ClienteObservado.guardado = []
+
+        solicitud = self.crear(evaluacion=self.evaluacion)
+
+        self.assertEqual(solicitud.estado, 'COMPLETADA')
+        self.assertIsNotNone(solicitud.tiempo_primer_token)
+        self.assertLessEqual(solicitud.tiempo_primer_token, solicitud.tiempo_procesamiento)
+        self.assertGreater(solicitud.tokens_total, 0)
+
+        # Antes de cada fragmento ya está guardado todo lo anterior
+        parciales = [respuesta for _, respuesta, _ in ClienteObservado.guardado]
+        self.assertEqual(parciales[0], '')
+        self.assertGreater(len(set(parciales)), 2)
+        for anterior, siguiente in zip(parciales, parciales[1:]):
+            self.assertTrue(siguiente.startswith(anterior))
+            self.assertTrue(solicitud.respuesta.startswith(siguiente))
+        self.assertEqual({estado for estado, _, _ in ClienteObservado.guardado}, {'PROCESANDO'})
+        self.assertEqual(ClienteObservado.guardado[-1][2], parciales[-1])
+        self.assertEqual(DocumentoEvaluacion.objects.get(evaluacion=self.evaluacion).contenido_html, solicitud.respuesta)
+
+    @override_settings(IA_STREAMING={'ACTIVO': True, 'INTERVALO_GUARDADO': 0})
+    def test_eventos_del_stream(self):
+        solicitud = self.crear()
+        self.client.force_login(self.usuario)
+        self.client.get(reverse('core:dashboard'))
+
+        enviado = 10
+        respuesta = self.client.get(
+            reverse('documentos:stream_solicitud', args=[solicitud.pk]), HTTP_LAST_EVENT_ID=str(enviado)
+        )
+
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        eventos = b''.join(respuesta.streaming_content).decode()
+        self.assertIn(f'id: {len(solicitud.respuesta)}\nevent: fragmento\n', eventos)
+        self.assertIn(json.dumps({'texto': solicitud.respuesta[enviado:]}), eventos)
+        self.assertIn('event: fin\n', eventos)
+        self.assertLess(eventos.index('event: fragmento'), eventos.index('event: fin'))
@@ -7,6 +7,13 @@ app_name = 'documentos'
 urlpatterns = [
     path('', views.lista_documentos, name='lista'),
     path('generar-ia/', views.generar_con_ia, name='generar_ia'),
+    path('resultado-ia/<int:pk>/', views.resultado_ia, name='resultado_ia'),
+    path('api/solicitudes/<int:pk>/', views.estado_solicitud_ia, name='api_estado_solicitud'),
+    path('api/solicitudes/<int:pk>/stream/', views.stream_solicitud_ia, name='stream_solicitud'),
+    path('generacion-masiva/sede/<int:sede_pk>/', views.generacion_masiva, name='generacion_masiva'),
+    path('generacion-masiva/<int:pk>/', views.progreso_generacion_masiva, name='progreso_generacion_masiva'),
+    path('api/generaciones/<int:pk>/', views.estado_generacion_masiva, name='api_estado_generacion'),
+    path('generacion-masiva/<int:pk>/cancelar/', views.cancelar_generacion_masiva, name='cancelar_generacion_masiva'),
     path('mejorar-ia/<int:documento_pk>/', views.mejorar_con_ia, name='mejorar_ia'),
     path('prompts/', views.lista_prompts, name='prompts'),
     path('prompts/crear/', views.crear_prompt, name='crear_prompt'),
@@ -6,9 +6,16 @@ Gestión de documentos con integración de IA (OpenAI/ChatGPT).
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.conf import settings
-from django.utils import timezone
-from .models import ConfiguracionIA, PromptTemplate, SolicitudIA, NormativaReferencia
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from estandares.models import Criterio
+from .generacion_masiva import contar_pendientes, datos_generacion, iniciar_generacion
+from .ia import (
+    configuracion_streaming, crear_solicitud, datos_solicitud, ia_disponible, parametros_entidad
+)
+from .models import (
+    ConfiguracionIA, GeneracionMasivaIA, PromptTemplate, SolicitudIA, NormativaReferencia
+)
 
 
 @login_required
@@ -16,9 +23,9 @@ def lista_documentos(request):
     """Lista de documentos generados"""
     from evaluacion.models import DocumentoEvaluacion
 
-    if request.user.entidad:
+    if request.principal.entidad_id:
         documentos = DocumentoEvaluacion.objects.filter(
-            evaluacion__sede__entidad=request.user.entidad
+            evaluacion__sede__entidad_id=request.principal.entidad_id
         ).order_by('-fecha_creacion')
     else:
         documentos = DocumentoEvaluacion.objects.none()
@@ -29,100 +36,266 @@ def lista_documentos(request):
     })
 
 
+def _obtener_solicitud(request, pk):
+    """Solicitud de IA visible para el usuario (su entidad, o cualquiera para SUPER)"""
+    solicitudes = SolicitudIA.objects.all()
+    if not request.principal.es_super:
+        solicitudes = solicitudes.filter(entidad_id=request.principal.entidad_id)
+    return get_object_or_404(solicitudes, pk=pk)
+
+
 @login_required
 def generar_con_ia(request):
-    """Generar documento con IA"""
+    """
+    Generar documento con IA.
+    La solicitud se encola y se procesa en segundo plano; la respuesta
+    se consulta en la página de resultado.
+    """
     if request.method == 'POST':
-        prompt = request.POST.get('prompt', '')
-        evaluacion_id = request.POST.get('evaluacion_id')
+        prompt = request.POST.get('prompt', '').strip()
+        criterio_id = request.POST.get('criterio')
+
+        criterio = None
+        if criterio_id:
+            criterio = Criterio.objects.filter(pk=criterio_id, activo=True).first()
 
-        if not prompt:
+        if not prompt and criterio is None:
             messages.error(request, 'Debe proporcionar un prompt.')
             return redirect('documentos:generar_ia')
 
-        # Obtener configuración de IA
-        config = None
-        if request.user.entidad:
-            config = getattr(request.user.entidad, 'config_ia', None)
-
-        # Usar API key de la entidad o la global
-        api_key = settings.OPENAI_API_KEY
-        if config and config.api_key_personalizada:
-            api_key = config.api_key_personalizada
-
-        if not api_key:
-            messages.error(request, 'No hay API key de OpenAI configurada.')
+        disponible, mensaje = ia_disponible(request.user.entidad)
+        if not disponible:
+            messages.error(request, mensaje)
             return redirect('documentos:generar_ia')
 
-        # Crear solicitud
-        solicitud = SolicitudIA.objects.create(
-            usuario=request.user,
-            entidad=request.user.entidad,
-            prompt_enviado=prompt,
-            estado='PROCESANDO'
-        )
-
-        try:
-            import openai
-            from openai import OpenAI
+        prompt_completo = prompt
+        if criterio is not None:
+            prompt_completo = (
+                f'Criterio a documentar ({criterio.numero}):\n{criterio.texto}\n\n'
+                f'Instrucciones adicionales: {prompt or "ninguna"}'
+            )
 
-            client = OpenAI(api_key=api_key)
+        # "Generar de nuevo": no reutilizar una respuesta en caché
+        usar_cache = request.POST.get('sin_cache') != '1'
+        solicitud = crear_solicitud(
+            request.user, request.user.entidad, prompt_completo,
+            instruccion=prompt, usar_cache=usar_cache
+        )
 
-            modelo = 'gpt-4o' if config is None else config.modelo_preferido
-            sistema_prompt = (
-                'Eres un experto en habilitación de servicios de salud en Colombia, '
-                'especializado en la Resolución 3100 de 2019.'
-            )
-            if config and config.prompt_sistema:
-                sistema_prompt = config.prompt_sistema
-
-            inicio = timezone.now()
-            response = client.chat.completions.create(
-                model=modelo,
-                messages=[
-                    {"role": "system", "content": sistema_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=4000 if config is None else config.max_tokens,
-                temperature=0.7 if config is None else float(config.temperatura)
-            )
-            fin = timezone.now()
-
-            respuesta = response.choices[0].message.content
-            solicitud.respuesta = respuesta
-            solicitud.modelo_usado = modelo
-            solicitud.tokens_prompt = response.usage.prompt_tokens
-            solicitud.tokens_respuesta = response.usage.completion_tokens
-            solicitud.tokens_total = response.usage.total_tokens
-            solicitud.estado = 'COMPLETADA'
-            solicitud.fecha_respuesta = fin
-            solicitud.tiempo_procesamiento = (fin - inicio).total_seconds()
-            solicitud.save()
-
-            messages.success(request, 'Documento generado exitosamente.')
-
-            return render(request, 'documentos/resultado_ia.html', {
-                'titulo': 'Documento Generado',
-                'solicitud': solicitud,
-                'respuesta': respuesta,
-            })
-
-        except Exception as e:
-            solicitud.estado = 'ERROR'
-            solicitud.mensaje_error = str(e)
-            solicitud.save()
-            messages.error(request, f'Error al generar documento: {e}')
-            return redirect('documentos:generar_ia')
+        if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+            return JsonResponse(datos_solicitud(solicitud), status=200 if solicitud.terminada else 202)
+        return redirect('documentos:resultado_ia', pk=solicitud.pk)
 
     # GET - mostrar formulario
     prompts = PromptTemplate.objects.filter(activo=True)
+    criterios = Criterio.objects.filter(
+        activo=True, tipo_criterio='CRITERIO'
+    ).only('id', 'numero', 'texto').order_by(
+        'estandar__grupo__orden', 'estandar__orden', 'clave_orden', 'orden'
+    )
 
     return render(request, 'documentos/generar_ia.html', {
         'titulo': 'Generar con IA',
         'prompts': prompts,
+        'criterios': criterios,
+    })
+
+
+@login_required
+def resultado_ia(request, pk):
+    """Resultado de una solicitud de IA (consulta el estado mientras se procesa)"""
+    solicitud = _obtener_solicitud(request, pk)
+
+    return render(request, 'documentos/resultado_ia.html', {
+        'titulo': 'Documento Generado',
+        'solicitud': solicitud,
+        'resultado': solicitud.respuesta,
+    })
+
+
+@login_required
+def estado_solicitud_ia(request, pk):
+    """Estado JSON de una solicitud de IA"""
+    solicitud = _obtener_solicitud(request, pk)
+    return JsonResponse(datos_solicitud(solicitud))
+
+
+def _eventos_solicitud(pk, enviado, intervalo=0.3, intervalo_maximo=2, latido=15, duracion_maxima=25):
+    """
+    Generador de Server-Sent Events: emite lo que el trabajador va guardando
+    en SolicitudIA.respuesta (evento 'fragmento') y un evento 'fin' con el
+    estado final. El id de cada evento es la cantidad de caracteres enviados,
+    para que EventSource reanude con Last-Event-ID tras una reconexión.
+
+    Cada conexión ocupa un hilo del servidor, así que dura como máximo
+    `duracion_maxima` segundos (el navegador reconecta solo y continúa desde
+    el último id) y la consulta se espacia hasta `intervalo_maximo` mientras
+    no llegan fragmentos nuevos.
+    """
+    import json
+    import time
+
+    inicio = ultimo_envio = time.monotonic()
+    espera = intervalo
+    yield 'retry: 2000\n\n'
+    while time.monotonic() - inicio < duracion_maxima:
+        solicitud = SolicitudIA.objects.get(pk=pk)
+        respuesta = solicitud.respuesta or ''
+
+        if len(respuesta) < enviado:
+            # La generación falló y se está reintentando desde el principio
+            enviado = 0
+            yield 'id: 0\nevent: reinicio\ndata: {}\n\n'
+
+        if len(respuesta) > enviado:
+            delta = respuesta[enviado:]
+            enviado = len(respuesta)
+            ultimo_envio = time.monotonic()
+            espera = intervalo
+            yield f'id: {enviado}\nevent: fragmento\ndata: {json.dumps({"texto": delta})}\n\n'
+        else:
+            espera = min(espera * 1.5, intervalo_maximo)
+
+        if solicitud.terminada:
+            yield f'event: fin\ndata: {json.dumps(datos_solicitud(solicitud))}\n\n'
+            return
+
+        if time.monotonic() - ultimo_envio > latido:
+            # Comentario SSE para que los proxies no cierren la conexión inactiva
+            ultimo_envio = time.monotonic()
+            yield ': latido\n\n'
+        time.sleep(espera)
+
+
+@login_required
+def stream_solicitud_ia(request, pk):
+    """Respuesta de una solicitud de IA a medida que se genera (text/event-stream)"""
+    solicitud = _obtener_solicitud(request, pk)
+
+    try:
+        enviado = int(request.headers.get('Last-Event-ID') or request.GET.get('desde') or 0)
+    except ValueError:
+        enviado = 0
+
+    config = configuracion_streaming()
+    response = StreamingHttpResponse(
+        _eventos_solicitud(
+            solicitud.pk, enviado,
+            intervalo_maximo=config['INTERVALO_CONSULTA_MAXIMO'],
+            duracion_maxima=config['DURACION_CONEXION'],
+        ),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # nginx: no acumular la respuesta en el búfer del proxy
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _sede_para_generacion(request, sede_pk):
+    """Sede sobre la que el usuario puede lanzar una generación masiva, o None"""
+    from entidades.models import Sede
+
+    sede = get_object_or_404(Sede.objects.select_related('entidad'), pk=sede_pk)
+    if request.principal.solo_lectura or not request.principal.accede_entidad(sede.entidad_id):
+        return None
+    return sede
+
+
+def _obtener_generacion(request, pk):
+    """Generación masiva visible para el usuario (su entidad, o cualquiera para SUPER)"""
+    generaciones = GeneracionMasivaIA.objects.select_related('sede', 'estandar')
+    if not request.principal.es_super:
+        generaciones = generaciones.filter(entidad_id=request.principal.entidad_id)
+    return get_object_or_404(generaciones, pk=pk)
+
+
+@login_required
+def generacion_masiva(request, sede_pk):
+    """
+    Generar con IA todos los documentos faltantes de una sede
+    (o de un estándar con ?estandar=). El trabajo corre en segundo plano.
+    """
+    from estandares.models import Estandar
+
+    sede = _sede_para_generacion(request, sede_pk)
+    if sede is None:
+        messages.error(request, 'No tiene permisos para generar documentos en esta sede.')
+        return redirect('evaluacion:sedes_evaluar')
+
+    estandar_id = request.POST.get('estandar') or request.GET.get('estandar')
+    estandar = get_object_or_404(Estandar, pk=estandar_id) if estandar_id else None
+
+    if request.method == 'POST':
+        disponible, mensaje = ia_disponible(sede.entidad)
+        if not disponible:
+            messages.error(request, mensaje)
+            return redirect(request.get_full_path())
+
+        en_curso = GeneracionMasivaIA.objects.filter(
+            sede=sede, estandar=estandar, estado__in=['PENDIENTE', 'EN_PROCESO']
+        ).first()
+        if en_curso is not None:
+            messages.info(request, 'Ya hay una generación en curso para este alcance.')
+            return redirect('documentos:progreso_generacion_masiva', pk=en_curso.pk)
+
+        prompt_template = None
+        if request.POST.get('prompt_template'):
+            prompt_template = get_object_or_404(
+                PromptTemplate, pk=request.POST['prompt_template'], activo=True
+            )
+
+        generacion = iniciar_generacion(
+            request.user, sede, estandar,
+            prompt_template=prompt_template,
+            instruccion=request.POST.get('instruccion', '').strip()
+        )
+        return redirect('documentos:progreso_generacion_masiva', pk=generacion.pk)
+
+    prompts = PromptTemplate.objects.filter(activo=True, tipo='GENERAR')
+    if estandar is not None:
+        prompts = prompts.filter(Q(estandar__isnull=True) | Q(estandar=estandar))
+
+    return render(request, 'documentos/generacion_masiva.html', {
+        'titulo': 'Generación masiva con IA',
+        'sede': sede,
+        'estandar': estandar,
+        'pendientes': contar_pendientes(sede, estandar),
+        'prompts': prompts,
+        'parametros': parametros_entidad(sede.entidad),
+        'generaciones': GeneracionMasivaIA.objects.filter(sede=sede).select_related('estandar')[:10],
+    })
+
+
+@login_required
+def progreso_generacion_masiva(request, pk):
+    """Progreso de una generación masiva (la página consulta el estado JSON)"""
+    generacion = _obtener_generacion(request, pk)
+    return render(request, 'documentos/progreso_generacion_masiva.html', {
+        'titulo': 'Generación masiva con IA',
+        'generacion': generacion,
+        'datos': datos_generacion(generacion),
     })
 
 
+@login_required
+def estado_generacion_masiva(request, pk):
+    """Estado JSON de una generación masiva"""
+    generacion = _obtener_generacion(request, pk)
+    return JsonResponse(datos_generacion(generacion))
+
+
+@login_required
+def cancelar_generacion_masiva(request, pk):
+    """Detiene el envío de nuevas solicitudes; las que están en curso terminan"""
+    generacion = _obtener_generacion(request, pk)
+    if request.method == 'POST' and not request.principal.solo_lectura:
+        GeneracionMasivaIA.objects.filter(
+            pk=generacion.pk, estado__in=['PENDIENTE', 'EN_PROCESO']
+        ).update(estado='CANCELADA', mensaje='Cancelada por el usuario.')
+    return redirect('documentos:progreso_generacion_masiva', pk=generacion.pk)
+
+
 @login_required
 def mejorar_con_ia(request, documento_pk):
     """Mejorar documento existente con IA"""
@@ -140,10 +313,10 @@ def lista_prompts(request):
     """Lista de plantillas de prompts"""
     prompts = PromptTemplate.objects.filter(activo=True)
 
-    if request.user.entidad and request.user.rol != 'SUPER':
+    if request.principal.entidad_id and not request.principal.es_super:
         prompts = prompts.filter(
             es_global=True
-        ) | prompts.filter(entidad=request.user.entidad)
+        ) | prompts.filter(entidad_id=request.principal.entidad_id)
 
     return render(request, 'documentos/prompts/lista.html', {
         'titulo': 'Plantillas de Prompts',
@@ -163,8 +336,8 @@ def crear_prompt(request):
             nombre=nombre,
             tipo=tipo,
             prompt=prompt,
-            es_global=request.user.rol == 'SUPER',
-            entidad=request.user.entidad if request.user.rol != 'SUPER' else None
+            es_global=request.principal.es_super,
+            entidad_id=None if request.principal.es_super else request.principal.entidad_id
         )
 
         messages.success(request, 'Plantilla creada correctamente.')
@@ -190,10 +363,10 @@ def lista_normativas(request):
 @login_required
 def historial_ia(request):
     """Historial de solicitudes a la IA"""
-    if request.user.entidad:
+    if request.principal.entidad_id:
         solicitudes = SolicitudIA.objects.filter(
-            entidad=request.user.entidad
-        ).order_by('-fecha_solicitud')
+            entidad_id=request.principal.entidad_id
+        ).select_related('usuario', 'prompt_template').order_by('-fecha_solicitud')
     else:
         solicitudes = SolicitudIA.objects.none()
 
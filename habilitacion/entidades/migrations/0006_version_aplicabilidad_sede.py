@@ -0,0 +1,20 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entidades", "0005_add_configuracion_estandar_sede"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="sede",
+            name="version_aplicabilidad",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Versión de aplicabilidad"
+            ),
+        ),
+    ]
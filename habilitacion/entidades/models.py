@@ -228,6 +228,11 @@ class Sede(models.Model):
     # Estado
     activa = models.BooleanField('Sede activa', default=True)
 
+    # Se incrementa cada vez que cambia su matriz de aplicabilidad (0 = sin calcular)
+    version_aplicabilidad = models.PositiveIntegerField(
+        'Versión de aplicabilidad', default=0, editable=False
+    )
+
     # Auditoría
     fecha_creacion = models.DateTimeField('Fecha de creación', auto_now_add=True)
     fecha_modificacion = models.DateTimeField('Fecha de modificación', auto_now=True)
@@ -18,10 +18,10 @@ import string
 @login_required
 def lista_entidades(request):
     """Lista de entidades prestadoras"""
-    if request.user.rol == 'SUPER':
+    if request.principal.es_super:
         entidades = EntidadPrestadora.objects.all()
     else:
-        entidades = EntidadPrestadora.objects.filter(pk=request.user.entidad_id)
+        entidades = EntidadPrestadora.objects.filter(pk=request.principal.entidad_id)
 
     return render(request, 'entidades/lista.html', {
         'titulo': 'Entidades Prestadoras',
@@ -32,7 +32,7 @@ def lista_entidades(request):
 @login_required
 def crear_entidad(request):
     """Crear nueva entidad"""
-    if request.user.rol != 'SUPER':
+    if not request.principal.es_super:
         messages.error(request, 'No tiene permisos para esta acción.')
         return redirect('entidades:lista')
 
@@ -270,7 +270,7 @@ def generar_password(longitud=12):
 @login_required
 def crear_entidad_con_usuario(request):
     """Crear nueva entidad con usuario automático"""
-    if request.user.rol != 'SUPER':
+    if not request.principal.es_super:
         messages.error(request, 'No tiene permisos para esta accion.')
         return redirect('entidades:lista')
 
@@ -363,7 +363,7 @@ def configuracion_servicios(request, pk):
     """
     entidad = get_object_or_404(EntidadPrestadora, pk=pk)
 
-    if request.user.rol != 'SUPER' and request.user.entidad_id != pk:
+    if not request.principal.accede_entidad(pk):
         messages.error(request, 'No tiene permisos para esta accion.')
         return redirect('entidades:lista')
 
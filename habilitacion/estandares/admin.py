@@ -48,7 +48,7 @@ class CriterioInline(admin.TabularInline):
     model = Criterio
     extra = 0
     fields = ['numero', 'texto', 'es_titulo', 'orden', 'activo']
-    ordering = ['orden', 'numero']
+    ordering = ['clave_orden', 'orden']
 
 
 @admin.register(Estandar)
@@ -121,7 +121,7 @@ class CriterioServicioInline(admin.TabularInline):
     fk_name = 'estandar_servicio'
     extra = 0
     fields = ['numero', 'texto', 'es_titulo', 'orden', 'activo']
-    ordering = ['orden', 'numero']
+    ordering = ['clave_orden', 'orden']
 
 
 @admin.register(EstandarServicio)
@@ -155,7 +155,7 @@ class CriterioAdmin(admin.ModelAdmin):
     list_display = ['numero', 'texto_corto', 'estandar_padre', 'es_titulo', 'orden', 'activo']
     list_filter = ['es_titulo', 'activo', 'estandar__grupo', 'estandar']
     search_fields = ['numero', 'texto']
-    ordering = ['orden', 'numero']
+    ordering = ['estandar__orden', 'clave_orden']
 
     fieldsets = (
         ('Pertenece a', {
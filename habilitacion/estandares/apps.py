@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class EstandaresConfig(AppConfig):
     name = "estandares"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,348 @@
+"""
+Lectura del libro Excel del anexo técnico de la Resolución 3100 de 2019
+Sistema de Habilitación de Servicios de Salud
+
+El libro tiene una hoja por estándar. Cada hoja se recorre una sola vez en
+modo de solo lectura (`read_only=True, values_only=True`) y sus filas se
+clasifican en memoria como título, subtítulo o criterio. El resultado son
+tuplas simples (numero, texto, tipo, orden) que luego se comparan contra los
+criterios existentes por (estándar, número) y se aplican en bloque.
+"""
+
+import re
+from collections import defaultdict
+
+# Mapeo de hojas del Excel a estructura
+MAPEO_HOJAS = {
+    # Grupo 11.1 - Todos los Servicios
+    '11.1.1TH': {'grupo': '11.1', 'estandar': '11.1.1', 'nombre': 'Talento Humano', 'codigo_corto': 'TSTH'},
+    '11.1.2.INF': {'grupo': '11.1', 'estandar': '11.1.2', 'nombre': 'Infraestructura', 'codigo_corto': 'TSINF'},
+    '11.1.3.DOT': {'grupo': '11.1', 'estandar': '11.1.3', 'nombre': 'Dotación', 'codigo_corto': 'TSDOT'},
+    '11.1.4MD': {'grupo': '11.1', 'estandar': '11.1.4', 'nombre': 'Medicamentos, Dispositivos Médicos e Insumos', 'codigo_corto': 'TSMD'},
+    '11.1.5.PP': {'grupo': '11.1', 'estandar': '11.1.5', 'nombre': 'Procesos Prioritarios', 'codigo_corto': 'TSPP'},
+    '11.1.6.HCR': {'grupo': '11.1', 'estandar': '11.1.6', 'nombre': 'Historia Clínica y Registros', 'codigo_corto': 'TSHCR'},
+    '11.1.7INT': {'grupo': '11.1', 'estandar': '11.1.7', 'nombre': 'Interdependencia', 'codigo_corto': 'TSINT'},
+
+    # Grupo 11.2 - Consulta Externa
+    '11.2.1.S_CE_G': {'grupo': '11.2', 'estandar': '11.2.1', 'nombre': 'Consulta Externa General', 'codigo_corto': 'CEG'},
+    '11.2.2.S_CE_E': {'grupo': '11.2', 'estandar': '11.2.2', 'nombre': 'Consulta Externa Especializada', 'codigo_corto': 'CEE'},
+    '11.2.3.S_CE_V': {'grupo': '11.2', 'estandar': '11.2.3', 'nombre': 'Consulta Externa Vacunación', 'codigo_corto': 'CEV'},
+    '11.2.4.S_CE_SST': {'grupo': '11.2', 'estandar': '11.2.4', 'nombre': 'Consulta Externa SST', 'codigo_corto': 'CESST'},
+
+    # Grupo 11.3 - Apoyo Diagnóstico
+    '11.3.1.S_TR': {'grupo': '11.3', 'estandar': '11.3.1', 'nombre': 'Toma de Muestras', 'codigo_corto': 'TR'},
+    ' 11.3.2.SF': {'grupo': '11.3', 'estandar': '11.3.2', 'nombre': 'Servicio Farmacéutico', 'codigo_corto': 'SF'},
+    '11.3.3.S_Rx_OD': {'grupo': '11.3', 'estandar': '11.3.3', 'nombre': 'Radiología e Imágenes Diagnósticas', 'codigo_corto': 'RxOD'},
+    '11.3.4.S_IDx': {'grupo': '11.3', 'estandar': '11.3.4', 'nombre': 'Imágenes Diagnósticas', 'codigo_corto': 'IDx'},
+    ' 11.3.5.S_MNuc': {'grupo': '11.3', 'estandar': '11.3.5', 'nombre': 'Medicina Nuclear', 'codigo_corto': 'MNuc'},
+    '11.3.6.S_Radio': {'grupo': '11.3', 'estandar': '11.3.6', 'nombre': 'Radioterapia', 'codigo_corto': 'Radio'},
+    '11.3.7.S_Quimio': {'grupo': '11.3', 'estandar': '11.3.7', 'nombre': 'Quimioterapia', 'codigo_corto': 'Quimio'},
+    '11.3.8 S_Dx VASC': {'grupo': '11.3', 'estandar': '11.3.8', 'nombre': 'Diagnóstico Vascular', 'codigo_corto': 'DxVASC'},
+    '11.3.9S_HI': {'grupo': '11.3', 'estandar': '11.3.9', 'nombre': 'Hemodinamia e Intervencionismo', 'codigo_corto': 'HI'},
+    '11.3.10 S_GPT': {'grupo': '11.3', 'estandar': '11.3.10', 'nombre': 'Gestión Pre-Transfusional', 'codigo_corto': 'GPT'},
+    '11.3.11.S_TMLC': {'grupo': '11.3', 'estandar': '11.3.11', 'nombre': 'Toma Muestras Lab Clínico', 'codigo_corto': 'TMLC'},
+    '11.3.12.S_LC': {'grupo': '11.3', 'estandar': '11.3.12', 'nombre': 'Laboratorio Clínico', 'codigo_corto': 'LC'},
+    ' 11.3.13 S_TM_CU': {'grupo': '11.3', 'estandar': '11.3.13', 'nombre': 'Toma Muestras Citología', 'codigo_corto': 'TMCU'},
+    '11.3.14.S_LCU': {'grupo': '11.3', 'estandar': '11.3.14', 'nombre': 'Laboratorio Citología', 'codigo_corto': 'LCU'},
+    '11.3.15.S_LHT': {'grupo': '11.3', 'estandar': '11.3.15', 'nombre': 'Laboratorio Histotecnología', 'codigo_corto': 'LHT'},
+    '11.3.16.S_LPT': {'grupo': '11.3', 'estandar': '11.3.16', 'nombre': 'Laboratorio Patología', 'codigo_corto': 'LPT'},
+    '11.3.17.S_Dial': {'grupo': '11.3', 'estandar': '11.3.17', 'nombre': 'Diálisis', 'codigo_corto': 'Dial'},
+
+    # Grupo 11.4 - Internación
+    '11.4.1.S_HP': {'grupo': '11.4', 'estandar': '11.4.1', 'nombre': 'Hospitalización', 'codigo_corto': 'HP'},
+    '11.4.2.S_HP_PC': {'grupo': '11.4', 'estandar': '11.4.2', 'nombre': 'Hospitalización Parcial', 'codigo_corto': 'HPPC'},
+    '11.4.3.S_CBN': {'grupo': '11.4', 'estandar': '11.4.3', 'nombre': 'Cuidado Básico Neonatal', 'codigo_corto': 'CBN'},
+    '11.4.4.S_CIN ': {'grupo': '11.4', 'estandar': '11.4.4', 'nombre': 'Cuidado Intermedio Neonatal', 'codigo_corto': 'CIN'},
+    '11.4.5.S_CINN': {'grupo': '11.4', 'estandar': '11.4.5', 'nombre': 'Cuidado Intensivo Neonatal', 'codigo_corto': 'CINN'},
+    '11.4.6. S_CINP': {'grupo': '11.4', 'estandar': '11.4.6', 'nombre': 'Cuidado Intermedio Pediátrico', 'codigo_corto': 'CINP'},
+    '11.4.7.S_CIP': {'grupo': '11.4', 'estandar': '11.4.7', 'nombre': 'Cuidado Intensivo Pediátrico', 'codigo_corto': 'CIP'},
+    '11.4.8.S_CIMA': {'grupo': '11.4', 'estandar': '11.4.8', 'nombre': 'Cuidado Intermedio Adulto', 'codigo_corto': 'CIMA'},
+    '11.4.9.S_CIA': {'grupo': '11.4', 'estandar': '11.4.9', 'nombre': 'Cuidado Intensivo Adulto', 'codigo_corto': 'CIA'},
+    '11.4.10.S_HSM CSP': {'grupo': '11.4', 'estandar': '11.4.10', 'nombre': 'Hospitalización Salud Mental', 'codigo_corto': 'HSM'},
+    '11.4.11.S_HSP': {'grupo': '11.4', 'estandar': '11.4.11', 'nombre': 'Hospitalización Psiquiátrica', 'codigo_corto': 'HSP'},
+    '11.4.12.S_CB_CSP': {'grupo': '11.4', 'estandar': '11.4.12', 'nombre': 'Cuidados Básicos Especiales', 'codigo_corto': 'CBCSP'},
+
+    # Grupo 11.5 - Quirúrgico
+    '11.5.1.S_CX': {'grupo': '11.5', 'estandar': '11.5.1', 'nombre': 'Cirugía', 'codigo_corto': 'CX'},
+
+    # Grupo 11.6 - Atención Inmediata
+    '11.6.1.S_UR': {'grupo': '11.6', 'estandar': '11.6.1', 'nombre': 'Urgencias', 'codigo_corto': 'UR'},
+    '11.6.2.S_TR_AS': {'grupo': '11.6', 'estandar': '11.6.2', 'nombre': 'Transporte Asistencial', 'codigo_corto': 'TRAS'},
+    '11.6.3.S_AT_PH': {'grupo': '11.6', 'estandar': '11.6.3', 'nombre': 'Atención Prehospitalaria', 'codigo_corto': 'ATPH'},
+    '11.6.4.S_A.parto': {'grupo': '11.6', 'estandar': '11.6.4', 'nombre': 'Atención del Parto', 'codigo_corto': 'AParto'},
+}
+
+GRUPOS_INFO = {
+    '11.1': {'nombre': 'Estándares aplicables a todos los servicios', 'aplica_todos': True, 'orden': 1},
+    '11.2': {'nombre': 'Grupo Consulta Externa', 'aplica_todos': False, 'orden': 2},
+    '11.3': {'nombre': 'Grupo Apoyo Diagnóstico y Complementación Terapéutica', 'aplica_todos': False, 'orden': 3},
+    '11.4': {'nombre': 'Grupo Internación', 'aplica_todos': False, 'orden': 4},
+    '11.5': {'nombre': 'Grupo Quirúrgico', 'aplica_todos': False, 'orden': 5},
+    '11.6': {'nombre': 'Grupo Atención Inmediata', 'aplica_todos': False, 'orden': 6},
+}
+
+
+FILA_INICIO = 4  # Las filas 1-3 son el enlace a la tabla de contenido y los encabezados
+
+PATRON_NUMERO = re.compile(r'^(\d+\.?\d*\.?\d*\.?\d*)\s*\.?\s*')
+PATRON_NUMERO_INICIO = re.compile(r'^\d+\.?\d*\.?\d*\.?\d*\s*\.?\s+')
+
+TEXTOS_IGNORADOS = {'CUMPLE', 'NO CUMPLE', 'NO APLICA', 'TOTAL', 'ESTADO', 'CRITERIOS'}
+
+
+def clasificar_texto(texto):
+    """
+    Tipo de una fila según su texto: 'CRITERIO' si empieza con numeración,
+    'SUBTITULO' si termina en ":" y 'TITULO' en otro caso. Retorna None para
+    filas de resumen, fórmulas y enlaces de navegación.
+    """
+    texto_upper = texto.upper()
+    if texto_upper in TEXTOS_IGNORADOS or texto.startswith('=') or 'VOLVER A TABLA' in texto_upper:
+        return None
+
+    if texto.endswith(':'):
+        return 'SUBTITULO'
+    if PATRON_NUMERO_INICIO.match(texto):
+        return 'CRITERIO'
+    return 'TITULO'
+
+
+def clasificar_filas(filas):
+    """
+    Clasifica las filas (tuplas de valores desde la columna A) de una hoja.
+    Retorna una lista de tuplas (numero, texto, tipo, orden). Las filas sin
+    numeración reciben 'T<posición>' como número.
+    """
+    resultado = []
+    orden = 0
+    for fila in filas:
+        if len(fila) < 2 or not fila[1]:
+            continue
+        texto = str(fila[1]).strip()
+        tipo = clasificar_texto(texto) if texto else None
+        if tipo is None:
+            continue
+
+        # "12.10.Incubadora" conserva el número aunque no tenga espacio tras él,
+        # pero el texto solo se recorta cuando la numeración va seguida de espacio
+        coincidencia = PATRON_NUMERO.match(texto)
+        numero = coincidencia.group(1).rstrip('.') if coincidencia else f'T{orden}'
+        if coincidencia and PATRON_NUMERO_INICIO.match(texto):
+            texto = texto[coincidencia.end():].strip()
+
+        orden += 1
+        resultado.append((numero, texto, tipo, orden))
+    return resultado
+
+
+def leer_hojas(ruta, hojas):
+    """
+    Abre el libro en modo de solo lectura y clasifica las hojas indicadas.
+    Solo usa openpyxl y retorna tuplas simples, por lo que puede ejecutarse en
+    otro proceso sin inicializar Django.
+    """
+    import openpyxl
+
+    libro = openpyxl.load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        return {
+            nombre: clasificar_filas(
+                libro[nombre].iter_rows(min_row=FILA_INICIO, max_col=3, values_only=True)
+            )
+            for nombre in hojas if nombre in libro.sheetnames
+        }
+    finally:
+        libro.close()
+
+
+def leer_libro(ruta, hojas=None, procesos=1):
+    """
+    Retorna {nombre_hoja: filas clasificadas} para las hojas de MAPEO_HOJAS
+    (o las indicadas) presentes en el archivo, en el orden del mapeo.
+    Con procesos > 1 las hojas se reparten entre un grupo de procesos; la
+    escritura en la base sigue siendo de un solo proceso (el que llama).
+    """
+    hojas = list(hojas or MAPEO_HOJAS)
+    procesos = max(1, min(procesos, len(hojas)))
+    if procesos == 1:
+        return leer_hojas(ruta, hojas)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Reparto intercalado: las hojas grandes y pequeñas quedan mezcladas
+    lotes = [hojas[indice::procesos] for indice in range(procesos)]
+    leidas = {}
+    with ProcessPoolExecutor(max_workers=procesos) as grupo:
+        for resultado in grupo.map(leer_hojas, [ruta] * procesos, lotes):
+            leidas.update(resultado)
+    return {nombre: leidas[nombre] for nombre in hojas if nombre in leidas}
+
+
+CAMPOS_CRITERIO = ['texto', 'tipo_criterio', 'es_titulo', 'orden', 'activo']
+
+
+class PlanImportacion:
+    """Diferencias entre el libro y la base de datos, listas para aplicarse en bloque"""
+
+    def __init__(self):
+        self.grupos_nuevos = []
+        self.estandares_nuevos = []
+        self.criterios_nuevos = []        # [(codigo_estandar, Criterio sin guardar)]
+        self.criterios_actualizados = []  # [(Criterio, [campos cambiados])]
+        self.criterios_faltantes = []     # Criterios que ya no están en el libro
+        self.sin_cambios = 0
+        self.tipos = defaultdict(int)
+        self.por_estandar = {}            # codigo -> {'nuevos', 'actualizados', 'faltantes'}
+
+    @property
+    def hay_cambios(self):
+        return bool(
+            self.grupos_nuevos or self.estandares_nuevos or self.criterios_nuevos
+            or self.criterios_actualizados
+        )
+
+    def _contar(self, codigo, clave):
+        resumen = self.por_estandar.setdefault(
+            codigo, {'nuevos': 0, 'actualizados': 0, 'faltantes': 0}
+        )
+        resumen[clave] += 1
+
+
+def planificar(hojas_leidas):
+    """
+    Compara las filas clasificadas ({nombre_hoja: filas}) con los criterios
+    existentes. Los criterios se emparejan por (estándar, número); cuando un
+    número se repite dentro de la misma hoja se empareja por orden de aparición.
+    """
+    from .models import Criterio, Estandar, GrupoEstandar
+
+    plan = PlanImportacion()
+    info_hojas = [MAPEO_HOJAS[nombre] for nombre in hojas_leidas]
+
+    grupos_existentes = set(GrupoEstandar.objects.values_list('codigo', flat=True))
+    plan.grupos_nuevos = sorted({
+        info['grupo'] for info in info_hojas if info['grupo'] not in grupos_existentes
+    })
+
+    estandares = {
+        (estandar.grupo.codigo, estandar.codigo): estandar
+        for estandar in Estandar.objects.select_related('grupo').filter(
+            codigo__in=[info['estandar'] for info in info_hojas]
+        )
+    }
+    plan.estandares_nuevos = [
+        info for info in info_hojas if (info['grupo'], info['estandar']) not in estandares
+    ]
+
+    # estandar_id -> numero -> criterios en orden de aparición
+    existentes = defaultdict(lambda: defaultdict(list))
+    for criterio in Criterio.objects.filter(
+        estandar__in=list(estandares.values())
+    ).order_by('estandar_id', 'orden', 'id'):
+        existentes[criterio.estandar_id][criterio.numero].append(criterio)
+
+    for nombre_hoja, filas in hojas_leidas.items():
+        info = MAPEO_HOJAS[nombre_hoja]
+        codigo = info['estandar']
+        estandar = estandares.get((info['grupo'], codigo))
+        del_estandar = existentes[estandar.pk] if estandar else {}
+        emparejados = set()
+        ocurrencias = defaultdict(int)
+
+        for numero, texto, tipo, orden in filas:
+            plan.tipos[tipo] += 1
+            valores = {
+                'texto': texto,
+                'tipo_criterio': tipo,
+                'es_titulo': tipo in ('TITULO', 'SUBTITULO'),
+                'orden': orden,
+                'activo': True,
+            }
+            candidatos = del_estandar.get(numero, [])
+            posicion = ocurrencias[numero]
+            ocurrencias[numero] += 1
+
+            if posicion >= len(candidatos):
+                plan.criterios_nuevos.append((codigo, Criterio(numero=numero, **valores)))
+                plan._contar(codigo, 'nuevos')
+                continue
+
+            criterio = candidatos[posicion]
+            emparejados.add(criterio.pk)
+            cambios = [campo for campo, valor in valores.items() if getattr(criterio, campo) != valor]
+            if cambios:
+                for campo in cambios:
+                    setattr(criterio, campo, valores[campo])
+                plan.criterios_actualizados.append((criterio, cambios))
+                plan._contar(codigo, 'actualizados')
+            else:
+                plan.sin_cambios += 1
+
+        for criterios in del_estandar.values():
+            for criterio in criterios:
+                if criterio.pk not in emparejados and criterio.activo:
+                    plan.criterios_faltantes.append(criterio)
+                    plan._contar(codigo, 'faltantes')
+
+    return plan
+
+
+def aplicar(plan, desactivar_faltantes=False, tamano_lote=500):
+    """
+    Aplica el plan en una sola transacción: grupos y estándares nuevos, luego
+    bulk_create de criterios nuevos y bulk_update de los modificados. Los
+    criterios que ya no están en el libro se desactivan (nunca se borran: pueden
+    tener evaluaciones) solo si desactivar_faltantes.
+    """
+    from django.db import transaction
+
+    from .models import Criterio, Estandar, GrupoEstandar
+    from .numeracion import recalcular_claves
+    from .signals import invalidar_criterios
+
+    with transaction.atomic():
+        for codigo in plan.grupos_nuevos:
+            info = GRUPOS_INFO.get(codigo, {})
+            GrupoEstandar.objects.create(
+                codigo=codigo,
+                nombre=info.get('nombre', codigo),
+                aplica_todos=info.get('aplica_todos', False),
+                orden=info.get('orden', 0),
+            )
+
+        grupos = {grupo.codigo: grupo for grupo in GrupoEstandar.objects.all()}
+        siguiente_orden = Estandar.objects.count()
+        for info in plan.estandares_nuevos:
+            Estandar.objects.create(
+                grupo=grupos[info['grupo']],
+                codigo=info['estandar'],
+                codigo_corto=info['codigo_corto'],
+                nombre=info['nombre'],
+                orden=siguiente_orden,
+            )
+            siguiente_orden += 1
+
+        estandares = {
+            estandar.codigo: estandar
+            for estandar in Estandar.objects.filter(
+                codigo__in={codigo for codigo, _ in plan.criterios_nuevos}
+            )
+        }
+        nuevos = []
+        for codigo, criterio in plan.criterios_nuevos:
+            criterio.estandar = estandares[codigo]
+            nuevos.append(criterio)
+        Criterio.objects.bulk_create(nuevos, batch_size=tamano_lote)
+
+        actualizados = [criterio for criterio, _ in plan.criterios_actualizados]
+        if desactivar_faltantes:
+            for criterio in plan.criterios_faltantes:
+                criterio.activo = False
+            actualizados.extend(plan.criterios_faltantes)
+        if actualizados:
+            Criterio.objects.bulk_update(actualizados, CAMPOS_CRITERIO, batch_size=tamano_lote)
+        # bulk_create/bulk_update no emiten señales: recalcular la clave de orden
+        # e invalidar el texto en caché aquí
+        estandar_ids = {criterio.estandar_id for criterio in nuevos + actualizados}
+        recalcular_claves(estandar_ids)
+        invalidar_criterios(estandar_ids)
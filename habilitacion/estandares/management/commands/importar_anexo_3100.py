@@ -0,0 +1,130 @@
+"""
+Comando para importar (o sincronizar) los estándares y criterios desde el
+libro Excel del anexo técnico de la Resolución 3100 de 2019.
+
+Reemplaza a los scripts importar_excel_completo.py, importar_excel_v2.py,
+importar_criterios.py y al comando importar_estandares: lee cada hoja una
+sola vez en modo de solo lectura, compara contra la base por (estándar,
+número) y aplica las diferencias en bloque dentro de una transacción.
+"""
+
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.busqueda import reindexar
+from estandares.importacion_anexo import MAPEO_HOJAS, aplicar, leer_libro, planificar
+from evaluacion.aplicabilidad import recalcular_todas
+
+
+class Command(BaseCommand):
+    help = 'Importa estándares y criterios del anexo técnico de la Resolución 3100 de 2019'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archivo',
+            type=str,
+            default='autoevaluacion-_resolucion-3100-2019-anexo-estandar.xlsx',
+            help='Ruta al archivo Excel de autoevaluación'
+        )
+        parser.add_argument(
+            '--hoja',
+            action='append',
+            dest='hojas',
+            help='Importar solo esta hoja (se puede repetir)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Procesos para leer las hojas en paralelo (la escritura siempre es de un solo proceso)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra los cambios sin escribir en la base de datos'
+        )
+        parser.add_argument(
+            '--desactivar-faltantes',
+            action='store_true',
+            help='Desactiva los criterios que ya no aparecen en el libro'
+        )
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        if not os.path.isabs(archivo):
+            archivo = os.path.join(settings.BASE_DIR, archivo)
+        if not os.path.exists(archivo):
+            raise CommandError(f'No se encontró el archivo: {archivo}')
+
+        hojas = options['hojas']
+        if hojas:
+            desconocidas = [hoja for hoja in hojas if hoja not in MAPEO_HOJAS]
+            if desconocidas:
+                raise CommandError(f'Hojas no mapeadas: {", ".join(desconocidas)}')
+
+        if options['workers'] < 1:
+            raise CommandError('--workers debe ser al menos 1')
+
+        tiempos = {}
+        inicio = time.perf_counter()
+        hojas_leidas = leer_libro(archivo, hojas, procesos=options['workers'])
+        tiempos['lectura'] = time.perf_counter() - inicio
+
+        faltantes = [hoja for hoja in (hojas or MAPEO_HOJAS) if hoja not in hojas_leidas]
+        for hoja in faltantes:
+            self.stdout.write(self.style.WARNING(f'  [!] Hoja "{hoja}" no encontrada en el libro'))
+
+        inicio = time.perf_counter()
+        plan = planificar(hojas_leidas)
+        tiempos['comparación'] = time.perf_counter() - inicio
+
+        self.mostrar_plan(plan, options['desactivar_faltantes'])
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Simulación (--dry-run): no se escribió nada.'))
+        elif plan.hay_cambios or (options['desactivar_faltantes'] and plan.criterios_faltantes):
+            inicio = time.perf_counter()
+            aplicar(plan, desactivar_faltantes=options['desactivar_faltantes'])
+            tiempos['escritura'] = time.perf_counter() - inicio
+
+            # Las escrituras en bloque no disparan señales: recalcular la matriz de aplicabilidad
+            # y el índice de búsqueda de los criterios
+            inicio = time.perf_counter()
+            recalcular_todas()
+            tiempos['aplicabilidad'] = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            reindexar(['CRITERIO'])
+            tiempos['búsqueda'] = time.perf_counter() - inicio
+            self.stdout.write(self.style.SUCCESS('Importación aplicada.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('La base ya está sincronizada con el libro.'))
+
+        self.stdout.write('Tiempos: ' + ', '.join(
+            f'{fase} {segundos:.2f}s' for fase, segundos in tiempos.items()
+        ))
+
+    def mostrar_plan(self, plan, desactivar_faltantes):
+        for codigo, resumen in sorted(plan.por_estandar.items()):
+            if any(resumen.values()):
+                self.stdout.write(
+                    f'  {codigo}: {resumen["nuevos"]} nuevos, '
+                    f'{resumen["actualizados"]} actualizados, {resumen["faltantes"]} faltantes'
+                )
+
+        accion_faltantes = 'a desactivar' if desactivar_faltantes else 'sin cambios'
+        self.stdout.write(
+            f'\nFilas leídas: {sum(plan.tipos.values())} '
+            f'({plan.tipos["CRITERIO"]} criterios, {plan.tipos["TITULO"]} títulos, '
+            f'{plan.tipos["SUBTITULO"]} subtítulos)'
+        )
+        self.stdout.write(f'  Grupos nuevos: {len(plan.grupos_nuevos)}')
+        self.stdout.write(f'  Estándares nuevos: {len(plan.estandares_nuevos)}')
+        self.stdout.write(f'  Criterios nuevos: {len(plan.criterios_nuevos)}')
+        self.stdout.write(f'  Criterios actualizados: {len(plan.criterios_actualizados)}')
+        self.stdout.write(f'  Criterios sin cambios: {plan.sin_cambios}')
+        self.stdout.write(
+            f'  Criterios que ya no están en el libro: {len(plan.criterios_faltantes)} ({accion_faltantes})'
+        )
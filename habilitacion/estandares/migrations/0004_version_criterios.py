@@ -0,0 +1,20 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("estandares", "0003_tipo_criterio"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="estandar",
+            name="version_criterios",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Versión de criterios"
+            ),
+        ),
+    ]
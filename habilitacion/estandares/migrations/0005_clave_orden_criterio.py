@@ -0,0 +1,68 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:35
+
+from django.db import migrations, models
+from django.db.models import F
+
+from estandares.numeracion import claves_orden
+
+
+def calcular_claves_orden(apps, schema_editor):
+    Criterio = apps.get_model("estandares", "Criterio")
+    Estandar = apps.get_model("estandares", "Estandar")
+    grupos = {}
+    for criterio in Criterio.objects.order_by("orden", "id").only(
+        "id", "estandar_id", "estandar_servicio_id", "numero", "tipo_criterio"
+    ):
+        grupos.setdefault((criterio.estandar_id, criterio.estandar_servicio_id), []).append(criterio)
+    cambiados = []
+    for lista in grupos.values():
+        claves = claves_orden((criterio.numero, criterio.tipo_criterio) for criterio in lista)
+        for criterio, clave in zip(lista, claves):
+            criterio.clave_orden = clave
+            cambiados.append(criterio)
+    Criterio.objects.bulk_update(cambiados, ["clave_orden"], batch_size=500)
+    # El fragmento en caché de cada estándar se armó con el orden anterior
+    Estandar.objects.update(version_criterios=F("version_criterios") + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("estandares", "0004_version_criterios"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="criterio",
+            options={
+                "ordering": ["clave_orden", "orden"],
+                "verbose_name": "Criterio",
+                "verbose_name_plural": "Criterios",
+            },
+        ),
+        migrations.AddField(
+            model_name="criterio",
+            name="clave_orden",
+            field=models.CharField(
+                blank=True,
+                default="",
+                editable=False,
+                max_length=80,
+                verbose_name="Clave de orden",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="criterio",
+            index=models.Index(
+                fields=["estandar", "clave_orden"], name="est_criterio_clave_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="criterio",
+            index=models.Index(
+                fields=["estandar_servicio", "clave_orden"],
+                name="est_criterio_serv_clave_idx",
+            ),
+        ),
+        migrations.RunPython(calcular_claves_orden, migrations.RunPython.noop),
+    ]
@@ -72,6 +72,9 @@ class Estandar(models.Model):
     )
     orden = models.PositiveIntegerField('Orden de presentación', default=0)
     activo = models.BooleanField('Activo', default=True)
+    # Aumenta con cada cambio en sus criterios; forma parte de la llave del
+    # fragmento en caché con el texto de los criterios (ver estandares.signals)
+    version_criterios = models.PositiveIntegerField('Versión de criterios', default=0, editable=False)
 
     class Meta:
         verbose_name = 'Estándar'
@@ -246,10 +249,18 @@ class Criterio(models.Model):
     orden = models.PositiveIntegerField('Orden', default=0)
     activo = models.BooleanField('Activo', default=True)
 
+    # Numeración rellenada con ceros para ordenar y filtrar subárboles por índice
+    # (ver estandares.numeracion); se recalcula al guardar y al importar
+    clave_orden = models.CharField('Clave de orden', max_length=80, blank=True, default='', editable=False)
+
     class Meta:
         verbose_name = 'Criterio'
         verbose_name_plural = 'Criterios'
-        ordering = ['orden', 'numero']
+        ordering = ['clave_orden', 'orden']
+        indexes = [
+            models.Index(fields=['estandar', 'clave_orden'], name='est_criterio_clave_idx'),
+            models.Index(fields=['estandar_servicio', 'clave_orden'], name='est_criterio_serv_clave_idx'),
+        ]
 
     def __str__(self):
         texto_corto = self.texto[:100] + '...' if len(self.texto) > 100 else self.texto
@@ -265,6 +276,18 @@ class Criterio(models.Model):
         """Indica si el criterio requiere evaluación (C/NC/NA)"""
         return self.tipo_criterio == 'CRITERIO' and not self.es_titulo
 
+    def subcriterios(self):
+        """Criterios numerados bajo este (2.3 -> 2.3.1, 2.3.1.4, ...) en orden de numeración"""
+        from .numeracion import filtro_subarbol
+
+        if self.estandar_id:
+            hermanos = Criterio.objects.filter(estandar_id=self.estandar_id)
+        else:
+            hermanos = Criterio.objects.filter(estandar_servicio_id=self.estandar_servicio_id)
+        return hermanos.filter(filtro_subarbol(self.clave_orden)).exclude(
+            tipo_criterio='TITULO'
+        ).order_by('clave_orden', 'orden')
+
 
 class PlantillaDocumento(models.Model):
     """
@@ -0,0 +1,114 @@
+"""
+Clave de orden jerárquica de los criterios
+Sistema de Habilitación de Servicios de Salud
+
+`Criterio.numero` es texto ('1.1.10'): ordenado como cadena, 1.10 queda antes
+de 1.2. `clave_orden` guarda la numeración con cada nivel rellenado con ceros
+('00.0001.0001.0010'), de modo que el orden de la cadena es el numérico y el
+subárbol de un criterio es un rango del índice (estandar, clave_orden).
+
+- El primer segmento es el bloque: algunas hojas del anexo reinician la
+  numeración (varios servicios en un mismo estándar). Cuando el primer nivel
+  vuelve a un número menor que el mayor visto se abre un bloque nuevo; dentro
+  de un mismo primer nivel el orden lo da solo la numeración (1.10 puede
+  registrarse antes que 1.2).
+- Los títulos y las filas sin numeración no tienen número propio: toman la
+  clave de la fila anterior más '!', que los ubica justo después de ella y
+  antes de cualquier número que la siga (incluidos sus hijos).
+- Las filas cuyo número repite una clave ya vista (errores de digitación del
+  anexo: '16.1' repetido tras '16.1.16', '1' tras '1.1') se tratan igual:
+  quedan justo después de la fila anterior en lugar de junto al original.
+"""
+
+import re
+
+from django.db.models import Q
+
+ANCHO_SEGMENTO = 4
+
+_NUMERACION = re.compile(r'^\d+(\.\d+)*$')
+
+
+def segmentos(numero):
+    """(13, 1, 2) para '13.1.2'; None si el texto no es una numeración"""
+    numero = (numero or '').strip().rstrip('.')
+    if not _NUMERACION.match(numero):
+        return None
+    return tuple(int(parte) for parte in numero.split('.'))
+
+
+def _clave(bloque, ruta):
+    return '%02d' % bloque + ''.join('.%0*d' % (ANCHO_SEGMENTO, parte) for parte in ruta)
+
+
+def claves_orden(filas):
+    """
+    Claves de orden para las filas (numero, tipo_criterio) de un estándar en el
+    orden en que aparecen en el anexo.
+    """
+    claves = []
+    vistas = set()
+    bloque = 0
+    mayor = 0
+    anterior = None
+    for numero, tipo in filas:
+        ruta = segmentos(numero) if tipo != 'TITULO' else None
+        clave = None
+        if ruta is not None:
+            if ruta[0] < mayor:
+                bloque += 1
+                mayor = 0
+            mayor = max(mayor, ruta[0])
+            if _clave(bloque, ruta) not in vistas:
+                clave = _clave(bloque, ruta)
+        if clave is None:
+            clave = anterior + '!' if anterior is not None else _clave(bloque, ())
+        vistas.add(clave)
+        claves.append(clave)
+        anterior = clave
+    return claves
+
+
+def filtro_subarbol(clave_orden):
+    """Q de los descendientes de la clave (2.3 -> 2.3.1, 2.3.1.4, ...) como rango del índice"""
+    return Q(clave_orden__gte=clave_orden + '.', clave_orden__lt=clave_orden + '/')
+
+
+def recalcular_claves(estandar_ids=(), estandar_servicio_ids=()):
+    """
+    Recalcula clave_orden de todos los criterios de los estándares indicados
+    (generales o de servicio) y guarda solo las que cambiaron. Retorna
+    {criterio_id: clave} de las cambiadas.
+    """
+    from .models import Criterio
+
+    filtro = Q(estandar_id__in=[pk for pk in estandar_ids if pk])
+    filtro |= Q(estandar_servicio_id__in=[pk for pk in estandar_servicio_ids if pk])
+    return _recalcular(Criterio.objects.filter(filtro))
+
+
+def recalcular_todas():
+    """Recalcula clave_orden de todo el catálogo"""
+    from .models import Criterio
+
+    return _recalcular(Criterio.objects.all())
+
+
+def _recalcular(criterios):
+    from .models import Criterio
+
+    grupos = {}
+    for criterio in criterios.order_by('orden', 'id').only(
+        'id', 'estandar_id', 'estandar_servicio_id', 'numero', 'tipo_criterio', 'clave_orden'
+    ):
+        grupos.setdefault((criterio.estandar_id, criterio.estandar_servicio_id), []).append(criterio)
+
+    cambiados = []
+    for lista in grupos.values():
+        claves = claves_orden((criterio.numero, criterio.tipo_criterio) for criterio in lista)
+        for criterio, clave in zip(lista, claves):
+            if criterio.clave_orden != clave:
+                criterio.clave_orden = clave
+                cambiados.append(criterio)
+    Criterio.objects.bulk_update(cambiados, ['clave_orden'], batch_size=500)
+    return {criterio.pk: criterio.clave_orden for criterio in cambiados}
@@ -0,0 +1,33 @@
+"""
+Señales del módulo de estándares.
+Cuando cambian los criterios de un estándar recalculan su clave de orden
+(estandares.numeracion) e invalidan el fragmento en caché con su texto.
+"""
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Criterio, Estandar
+from .numeracion import recalcular_claves
+
+# Campos de los que depende la clave de orden de los criterios del estándar
+CAMPOS_NUMERACION = {'numero', 'tipo_criterio', 'orden', 'estandar', 'estandar_servicio'}
+
+
+def invalidar_criterios(estandar_ids):
+    """Aumenta la versión de criterios de los estándares indicados"""
+    estandar_ids = {pk for pk in estandar_ids if pk}
+    if estandar_ids:
+        Estandar.objects.filter(pk__in=estandar_ids).update(version_criterios=F('version_criterios') + 1)
+
+
+@receiver(post_save, sender=Criterio)
+@receiver(post_delete, sender=Criterio)
+def criterio_cambiado(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is None or CAMPOS_NUMERACION & set(update_fields):
+        claves = recalcular_claves([instance.estandar_id], [instance.estandar_servicio_id])
+        instance.clave_orden = claves.get(instance.pk, instance.clave_orden)
+    invalidar_criterios([instance.estandar_id])
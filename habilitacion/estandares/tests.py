@@ -1,3 +1,69 @@
-from django.test import TestCase
+"""
+Pruebas de la clave de orden jerárquica de los criterios
+"""
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .numeracion import claves_orden, filtro_subarbol, segmentos
+
+
+def criterios(*numeros):
+    return [(numero, 'CRITERIO') for numero in numeros]
+
+
+class ClavesOrdenTests(SimpleTestCase):
+
+    def test_segmentos(self):
+        self.assertEqual(segmentos('13.1.2'), (13, 1, 2))
+        self.assertEqual(segmentos(' 4. '), (4,))
+        self.assertIsNone(segmentos('T5'))
+        self.assertIsNone(segmentos(''))
+
+    def test_orden_numerico_sin_importar_el_orden_de_registro(self):
+        for numeros in (('1', '1.1', '1.2', '1.10'), ('1', '1.1', '1.10', '1.2', '1.3')):
+            claves = claves_orden(criterios(*numeros))
+            ordenados = [numero for _, numero in sorted(zip(claves, numeros))]
+            self.assertEqual(ordenados, sorted(numeros, key=segmentos))
+        self.assertEqual(
+            claves_orden(criterios('1.10', '1.2')), ['00.0001.0010', '00.0001.0002']
+        )
+
+    def test_reinicio_de_numeracion_abre_un_bloque(self):
+        claves = claves_orden(criterios('1', '1.1', '2', '1', '1.1'))
+        self.assertEqual(claves, ['00.0001', '00.0001.0001', '00.0002', '01.0001', '01.0001.0001'])
+        self.assertEqual(claves, sorted(claves))
+
+    def test_titulos_despues_de_la_fila_anterior(self):
+        claves = claves_orden([('T0', 'TITULO'), ('1', 'SUBTITULO'), ('T2', 'TITULO'), ('1.1', 'CRITERIO')])
+        self.assertEqual(claves, ['00', '00.0001', '00.0001!', '00.0001.0001'])
+
+    def test_numero_repetido_queda_despues_de_la_fila_anterior(self):
+        filas = criterios('16', '16.1', '16.1.1', '16.1.16', '16.1', '16', '16.1', '16.2') + [('T', 'TITULO')]
+        claves = claves_orden(filas)
+        self.assertEqual(claves[4:7], ['00.0016.0001.0016!', '00.0016.0001.0016!!', '00.0016.0001.0016!!!'])
+        self.assertEqual(claves[8], '00.0016.0002!')
+        self.assertEqual(claves, sorted(claves))
+        self.assertEqual(len(set(claves)), len(claves))
+
+        claves = claves_orden(criterios('1', '1.1', '1', '3', '8', '8', '8.2'))
+        self.assertEqual(claves[2], '00.0001.0001!')
+        self.assertEqual(claves[5], '00.0008!')
+        self.assertEqual(claves, sorted(claves))
+
+
+class FiltroSubarbolTests(SimpleTestCase):
+
+    def dentro(self, clave, candidata):
+        rango = dict(filtro_subarbol(clave).children)
+        return rango['clave_orden__gte'] <= candidata < rango['clave_orden__lt']
+
+    def test_descendientes(self):
+        dos = '00.0002'
+        self.assertTrue(self.dentro(dos, '00.0002.0001'))
+        self.assertTrue(self.dentro(dos, '00.0002.0010.0003'))
+        self.assertTrue(self.dentro(dos, '00.0002.0001!'))
+        self.assertFalse(self.dentro(dos, dos))
+        self.assertFalse(self.dentro(dos, '00.0002!'))
+        self.assertFalse(self.dentro(dos, '00.0003'))
+        self.assertFalse(self.dentro(dos, '00.0020.0001'))
+        self.assertFalse(self.dentro(dos, '01.0002.0001'))
@@ -218,9 +218,10 @@ class PeriodoEvaluacionAdmin(admin.ModelAdmin):
             'fields': (('fecha_inicio', 'fecha_fin'),)
         }),
         ('Resultados', {
-            'fields': ('porcentaje_cumplimiento_general', 'observaciones')
+            'fields': ('porcentaje_cumplimiento_general', 'fecha_cierre', 'observaciones')
         }),
     )
+    readonly_fields = ['fecha_cierre']
 
     autocomplete_fields = ['entidad']
     inlines = [ResumenCumplimientoInline]
@@ -229,9 +230,11 @@ class PeriodoEvaluacionAdmin(admin.ModelAdmin):
 
     @admin.action(description='Calcular porcentaje de cumplimiento')
     def calcular_cumplimiento(self, request, queryset):
-        for periodo in queryset:
+        # Los períodos cerrados conservan el porcentaje de su instantánea
+        abiertos = queryset.filter(fecha_cierre__isnull=True)
+        for periodo in abiertos:
             periodo.calcular_porcentaje_cumplimiento()
-        self.message_user(request, f'Se calculó el cumplimiento para {queryset.count()} período(s).')
+        self.message_user(request, f'Se calculó el cumplimiento para {abiertos.count()} período(s).')
 
 
 @admin.register(ResumenCumplimiento)
@@ -0,0 +1,250 @@
+"""
+Aplicabilidad de criterios por sede
+Sistema de Habilitación de Servicios de Salud
+
+Un criterio evaluable aplica a una sede cuando:
+- su grupo es el obligatorio (11.1) o está activo en ConfiguracionEvaluacionSede;
+- si la sede tiene ConfiguracionEstandarSede para su estándar, esa configuración
+  está activa;
+- si el criterio restringe complejidad_aplica / modalidad_aplica, algún servicio
+  habilitado de la sede (del mismo grupo, o cualquiera para el grupo 11.1) coincide.
+  Una sede sin servicios registrados no se excluye por este motivo.
+
+El resultado se materializa en AplicabilidadCriterio y se recalcula por sede
+cuando cambian sus servicios o su configuración (ver evaluacion.signals). Cada
+proceso mantiene además un bitset por sede (bit n = criterio con id n) para
+responder `aplica()` sin consultas; se invalida con Sede.version_aplicabilidad.
+"""
+
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.dispatch import Signal
+
+from core.diferido import programar
+
+GRUPO_OBLIGATORIO = '11.1'
+
+# Se envía con sede_id cuando cambia el conjunto de criterios que aplican a una sede
+aplicabilidad_actualizada = Signal()
+
+_bitsets = {}
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def _coincide(restriccion, valor):
+    """Restricción vacía: aplica siempre. Si no, el valor debe mencionarse en el texto."""
+    if not restriccion.strip():
+        return True
+    # 'TELEMEDICINA_REMISOR' -> 'telemedicina'
+    return _normalizar(valor).split('_')[0] in _normalizar(restriccion)
+
+
+def calcular_criterios_aplicables(sede_id):
+    """Retorna {criterio_id: (estandar_id, grupo_id)} de los criterios que aplican a la sede"""
+    from entidades.models import (
+        ConfiguracionEstandarSede, ConfiguracionEvaluacionSede, ServicioHabilitado
+    )
+    from estandares.models import Criterio
+
+    grupos_activos = set(ConfiguracionEvaluacionSede.objects.filter(
+        sede_id=sede_id, activo=True
+    ).values_list('grupo_estandar_id', flat=True))
+    estandares_configurados = dict(ConfiguracionEstandarSede.objects.filter(
+        sede_id=sede_id
+    ).values_list('estandar_id', 'activo'))
+    servicios = list(ServicioHabilitado.objects.filter(
+        sede_id=sede_id, activo=True
+    ).values_list('servicio__grupo_id', 'complejidad', 'modalidad'))
+
+    criterios = Criterio.objects.filter(
+        activo=True,
+        tipo_criterio='CRITERIO',
+        es_titulo=False,
+        estandar__activo=True,
+        estandar__grupo__activo=True,
+    ).values_list(
+        'id', 'estandar_id', 'estandar__grupo_id', 'estandar__grupo__codigo',
+        'complejidad_aplica', 'modalidad_aplica'
+    )
+
+    aplicables = {}
+    for criterio_id, estandar_id, grupo_id, codigo_grupo, complejidad, modalidad in criterios:
+        obligatorio = codigo_grupo == GRUPO_OBLIGATORIO
+        if not obligatorio:
+            if grupo_id not in grupos_activos:
+                continue
+            if not estandares_configurados.get(estandar_id, True):
+                continue
+
+        if (complejidad or modalidad) and servicios:
+            relevantes = [s for s in servicios if obligatorio or s[0] == grupo_id]
+            if relevantes and not any(
+                _coincide(complejidad, s[1]) and _coincide(modalidad, s[2]) for s in relevantes
+            ):
+                continue
+
+        aplicables[criterio_id] = (estandar_id, grupo_id)
+    return aplicables
+
+
+def _bitset(criterio_ids):
+    """Entero con el bit n encendido por cada criterio_id n"""
+    if not criterio_ids:
+        return 0
+    bits = bytearray(max(criterio_ids) // 8 + 1)
+    for criterio_id in criterio_ids:
+        bits[criterio_id // 8] |= 1 << (criterio_id % 8)
+    return int.from_bytes(bytes(bits), 'little')
+
+
+def recalcular_sede(sede_id):
+    """
+    Recalcula la matriz de una sede aplicando solo las diferencias.
+    Retorna (agregados, eliminados).
+    """
+    from entidades.models import Sede
+
+    from .models import AplicabilidadCriterio
+
+    nuevos = calcular_criterios_aplicables(sede_id)
+    with transaction.atomic():
+        existentes = set(AplicabilidadCriterio.objects.filter(
+            sede_id=sede_id
+        ).values_list('criterio_id', flat=True))
+
+        eliminados = existentes - set(nuevos)
+        agregados = [criterio_id for criterio_id in nuevos if criterio_id not in existentes]
+
+        if eliminados:
+            AplicabilidadCriterio.objects.filter(
+                sede_id=sede_id, criterio_id__in=eliminados
+            ).delete()
+        AplicabilidadCriterio.objects.bulk_create([
+            AplicabilidadCriterio(
+                sede_id=sede_id, criterio_id=criterio_id,
+                estandar_id=nuevos[criterio_id][0], grupo_id=nuevos[criterio_id][1]
+            )
+            for criterio_id in agregados
+        ], batch_size=500)
+
+        sede = Sede.objects.select_for_update().filter(pk=sede_id).only('version_aplicabilidad').first()
+        if sede is None:
+            return 0, 0
+        if agregados or eliminados or not sede.version_aplicabilidad:
+            Sede.objects.filter(pk=sede_id).update(version_aplicabilidad=F('version_aplicabilidad') + 1)
+            sede.refresh_from_db(fields=['version_aplicabilidad'])
+
+    _bitsets[sede_id] = (sede.version_aplicabilidad, _bitset(nuevos))
+    if agregados or eliminados:
+        aplicabilidad_actualizada.send(sender=AplicabilidadCriterio, sede_id=sede_id)
+    return len(agregados), len(eliminados)
+
+
+def recalcular_todas(sede_ids=None):
+    """Recalcula la matriz de todas las sedes (o de las indicadas)"""
+    from entidades.models import Sede
+
+    if sede_ids is None:
+        sede_ids = Sede.objects.values_list('pk', flat=True)
+    totales = [0, 0]
+    for sede_id in list(sede_ids):
+        agregados, eliminados = recalcular_sede(sede_id)
+        totales[0] += agregados
+        totales[1] += eliminados
+    return tuple(totales)
+
+
+def programar_recalculo(sede_ids):
+    """
+    Recalcula las sedes al confirmar la transacción actual. Varios cambios de
+    una misma petición (p. ej. guardar la configuración de todos los
+    estándares) producen un solo recálculo por sede.
+    """
+    programar('aplicabilidad', sede_ids, recalcular_todas)
+
+
+def asegurar(sede):
+    """Calcula la matriz de una sede que nunca se ha calculado"""
+    if not sede.version_aplicabilidad:
+        recalcular_sede(sede.pk)
+        sede.refresh_from_db(fields=['version_aplicabilidad'])
+
+
+def bitset_sede(sede):
+    """Bitset de criterios aplicables de la sede, cacheado por proceso y versión"""
+    from .models import AplicabilidadCriterio
+
+    asegurar(sede)
+    entrada = _bitsets.get(sede.pk)
+    if entrada is None or entrada[0] != sede.version_aplicabilidad:
+        entrada = (sede.version_aplicabilidad, _bitset(list(
+            AplicabilidadCriterio.objects.filter(sede=sede).values_list('criterio_id', flat=True)
+        )))
+        _bitsets[sede.pk] = entrada
+    return entrada[1]
+
+
+def aplica(sede, criterio_id):
+    """Indica si el criterio aplica a la sede (sin consultas con el bitset en memoria)"""
+    return bool(bitset_sede(sede) >> criterio_id & 1)
+
+
+def resumen_aplicable(sedes, por=None, **filtros):
+    """
+    Conteos de cumplimiento sobre los criterios que aplican, en una sola consulta.
+    `por` agrupa por 'sede_id', 'grupo_id' o 'estandar_id'; `filtros` restringe la
+    matriz (p. ej. grupo_id=3). Retorna {clave: resumen} (o el resumen único si
+    no se agrupa) con total, cumple, no_cumple, no_aplica, pendiente, evaluados
+    y porcentaje (cumple sobre los que no son N/A).
+    """
+    from entidades.models import Sede
+
+    from .models import AplicabilidadCriterio, EvaluacionCriterio
+
+    if isinstance(sedes, Sede):
+        sedes = [sedes]
+    sedes = list(sedes)
+    for sede in sedes:
+        asegurar(sede)
+
+    estado = EvaluacionCriterio.objects.filter(
+        sede_id=OuterRef('sede_id'), criterio_id=OuterRef('criterio_id')
+    ).values('estado')[:1]
+    columnas = [por] if por else []
+    filas = AplicabilidadCriterio.objects.filter(
+        sede__in=sedes, **filtros
+    ).annotate(estado=Subquery(estado)).values(*columnas, 'estado').annotate(
+        cantidad=Count('id')
+    ).order_by()
+
+    resumenes = {}
+    for fila in filas:
+        resumen = resumenes.setdefault(fila[por] if por else None, resumen_vacio())
+        resumen['total'] += fila['cantidad']
+        clave = {'C': 'cumple', 'NC': 'no_cumple', 'NA': 'no_aplica'}.get(fila['estado'])
+        if clave:
+            resumen[clave] += fila['cantidad']
+
+    for resumen in resumenes.values():
+        _completar(resumen)
+    if por:
+        return resumenes
+    return resumenes.get(None) or resumen_vacio()
+
+
+def resumen_vacio():
+    return _completar({'total': 0, 'cumple': 0, 'no_cumple': 0, 'no_aplica': 0})
+
+
+def _completar(resumen):
+    resumen['evaluados'] = resumen['cumple'] + resumen['no_cumple'] + resumen['no_aplica']
+    resumen['pendiente'] = resumen['total'] - resumen['evaluados']
+    aplican = resumen['total'] - resumen['no_aplica']
+    resumen['porcentaje'] = round(resumen['cumple'] / aplican * 100, 1) if aplican > 0 else 0
+    return resumen
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class EvaluacionConfig(AppConfig):
     name = "evaluacion"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,219 @@
+"""
+Instantáneas de cumplimiento por período
+Sistema de Habilitación de Servicios de Salud
+
+EvaluacionCriterio se sobrescribe en cada cambio, así que el cumplimiento de un
+período cerrado no se puede reconstruir después. `congelar` guarda, por sede,
+el estado de cada criterio aplicable en dos columnas empaquetadas:
+
+- criterios: ids de criterio ordenados, uint32 little-endian.
+- estados: un byte por criterio en el mismo orden (0=P, 1=C, 2=NC, 3=NA).
+
+`comparar` recorre las columnas de dos períodos a la vez (mezcla de listas
+ordenadas) y solo consulta el texto de los criterios que cambiaron.
+"""
+
+import sys
+from array import array
+
+from django.db import transaction
+from django.utils import timezone
+
+from .aplicabilidad import _completar, asegurar, resumen_vacio
+
+ESTADOS = ('P', 'C', 'NC', 'NA')
+CODIGOS = {estado: codigo for codigo, estado in enumerate(ESTADOS)}
+CLAVES_RESUMEN = {'C': 'cumple', 'NC': 'no_cumple', 'NA': 'no_aplica'}
+# Posición en los conteos por grupo: [cumple, no_cumple, no_aplica, pendiente]
+POSICION_GRUPO = {'C': 0, 'NC': 1, 'NA': 2}
+
+
+def empaquetar(criterio_ids, estados):
+    """(bytes de criterios, bytes de estados) para ids ordenados y sus estados"""
+    columna = array('I', criterio_ids)
+    if sys.byteorder == 'big':
+        columna.byteswap()
+    return columna.tobytes(), bytes(CODIGOS.get(estado, 0) for estado in estados)
+
+
+def desempaquetar(instantanea):
+    """(array de ids de criterio, bytes de códigos de estado)"""
+    columna = array('I')
+    columna.frombytes(bytes(instantanea.criterios))
+    if sys.byteorder == 'big':
+        columna.byteswap()
+    return columna, bytes(instantanea.estados)
+
+
+def congelar(periodo):
+    """
+    Guarda la instantánea de las sedes activas de la entidad del período con el
+    estado actual de sus criterios aplicables y marca el período como cerrado.
+    Retorna las instantáneas creadas. Lanza ValueError si el período ya está
+    cerrado: para reemplazar su instantánea hay que reabrirlo primero.
+    """
+    from .models import AplicabilidadCriterio, EvaluacionCriterio, InstantaneaSede, PeriodoEvaluacion
+
+    if periodo.fecha_cierre:
+        raise ValueError('La vigencia ya está cerrada.')
+    sedes = list(periodo.entidad.sedes.filter(activa=True))
+    for sede in sedes:
+        asegurar(sede)
+
+    estados = {
+        (sede_id, criterio_id): estado
+        for sede_id, criterio_id, estado in EvaluacionCriterio.objects.filter(
+            sede__in=sedes
+        ).values_list('sede_id', 'criterio_id', 'estado')
+    }
+    # sede_id -> [(criterio_id, grupo_id), ...] en orden de criterio
+    matriz = {sede.pk: [] for sede in sedes}
+    for sede_id, criterio_id, grupo_id in AplicabilidadCriterio.objects.filter(
+        sede__in=sedes
+    ).order_by('sede_id', 'criterio_id').values_list('sede_id', 'criterio_id', 'grupo_id'):
+        matriz[sede_id].append((criterio_id, grupo_id))
+
+    fecha = timezone.now()
+    instantaneas = []
+    total = resumen_vacio()
+    for sede in sedes:
+        filas = matriz[sede.pk]
+        estados_sede = [estados.get((sede.pk, criterio_id), 'P') for criterio_id, _ in filas]
+        resumen = resumen_vacio()
+        resumen['total'] = len(filas)
+        conteos_grupo = {}
+        for (_, grupo_id), estado in zip(filas, estados_sede):
+            clave = CLAVES_RESUMEN.get(estado)
+            if clave:
+                resumen[clave] += 1
+            conteos_grupo.setdefault(str(grupo_id), [0, 0, 0, 0])[POSICION_GRUPO.get(estado, 3)] += 1
+        _completar(resumen)
+        for clave in ('total', 'cumple', 'no_cumple', 'no_aplica'):
+            total[clave] += resumen[clave]
+
+        criterios, codigos = empaquetar([criterio_id for criterio_id, _ in filas], estados_sede)
+        instantaneas.append(InstantaneaSede(
+            periodo=periodo, sede=sede, criterios=criterios, estados=codigos,
+            total=resumen['total'], cumple=resumen['cumple'], no_cumple=resumen['no_cumple'],
+            no_aplica=resumen['no_aplica'], pendiente=resumen['pendiente'],
+            porcentaje=resumen['porcentaje'], conteos_grupo=conteos_grupo, fecha=fecha,
+        ))
+    _completar(total)
+
+    with transaction.atomic():
+        if not PeriodoEvaluacion.objects.select_for_update().filter(
+            pk=periodo.pk, fecha_cierre__isnull=True
+        ).exists():
+            raise ValueError('La vigencia ya está cerrada.')
+        InstantaneaSede.objects.filter(periodo=periodo).delete()
+        InstantaneaSede.objects.bulk_create(instantaneas)
+        periodo.fecha_cierre = fecha
+        periodo.porcentaje_cumplimiento_general = total['porcentaje']
+        periodo.save(update_fields=['fecha_cierre', 'porcentaje_cumplimiento_general'])
+    return instantaneas
+
+
+def reabrir(periodo):
+    """
+    Quita la marca de cierre del período. La instantánea se conserva hasta que
+    se vuelva a cerrar, momento en que se reemplaza con el estado de ese día.
+    """
+    periodo.fecha_cierre = None
+    periodo.save(update_fields=['fecha_cierre'])
+
+
+def resumen_grupos(periodo):
+    """Conteos por grupo del período congelado, sumando las instantáneas: {grupo_id: resumen}"""
+    resumenes = {}
+    for conteos_grupo in periodo.instantaneas.values_list('conteos_grupo', flat=True):
+        for grupo_id, (cumple, no_cumple, no_aplica, pendiente) in conteos_grupo.items():
+            resumen = resumenes.setdefault(int(grupo_id), resumen_vacio())
+            resumen['total'] += cumple + no_cumple + no_aplica + pendiente
+            resumen['cumple'] += cumple
+            resumen['no_cumple'] += no_cumple
+            resumen['no_aplica'] += no_aplica
+    for resumen in resumenes.values():
+        _completar(resumen)
+    return resumenes
+
+
+def _cambios(anterior, actual):
+    """
+    Mezcla dos columnas ordenadas de (ids, códigos) en una pasada. Retorna los
+    (criterio_id, estado_anterior, estado_actual) que cambiaron; None indica
+    que el criterio no aplicaba en ese período.
+    """
+    ids_a, codigos_a = anterior
+    ids_b, codigos_b = actual
+    cambios = []
+    i = j = 0
+    while i < len(ids_a) or j < len(ids_b):
+        if j >= len(ids_b) or (i < len(ids_a) and ids_a[i] < ids_b[j]):
+            criterio_id, estado_a, estado_b = ids_a[i], ESTADOS[codigos_a[i]], None
+            i += 1
+        elif i >= len(ids_a) or ids_b[j] < ids_a[i]:
+            criterio_id, estado_a, estado_b = ids_b[j], None, ESTADOS[codigos_b[j]]
+            j += 1
+        else:
+            criterio_id, estado_a, estado_b = ids_a[i], ESTADOS[codigos_a[i]], ESTADOS[codigos_b[j]]
+            i += 1
+            j += 1
+        if estado_a != estado_b:
+            cambios.append((criterio_id, estado_a, estado_b))
+    return cambios
+
+
+def comparar(anterior, actual):
+    """
+    Diferencias entre dos períodos congelados de la misma entidad. Retorna una
+    lista por sede con ambas instantáneas (None si la sede no estaba), la
+    diferencia de porcentaje, cuántos criterios pasaron a cumplir o dejaron de
+    cumplir y los criterios que cambiaron (con número, texto y estándar), en
+    orden de catálogo.
+    """
+    from estandares.models import Criterio
+
+    instantaneas_a = {i.sede_id: i for i in anterior.instantaneas.select_related('sede')}
+    instantaneas_b = {i.sede_id: i for i in actual.instantaneas.select_related('sede')}
+    vacia = (array('I'), b'')
+
+    sedes = []
+    cambiados = set()
+    for sede_id in sorted(instantaneas_a.keys() | instantaneas_b.keys()):
+        instantanea_a = instantaneas_a.get(sede_id)
+        instantanea_b = instantaneas_b.get(sede_id)
+        cambios = _cambios(
+            desempaquetar(instantanea_a) if instantanea_a else vacia,
+            desempaquetar(instantanea_b) if instantanea_b else vacia,
+        )
+        cambiados.update(criterio_id for criterio_id, _, _ in cambios)
+        sedes.append({
+            'sede': (instantanea_b or instantanea_a).sede,
+            'anterior': instantanea_a,
+            'actual': instantanea_b,
+            'delta_porcentaje': (
+                (instantanea_b.porcentaje if instantanea_b else 0) -
+                (instantanea_a.porcentaje if instantanea_a else 0)
+            ),
+            'mejoras': sum(1 for _, _, estado_b in cambios if estado_b == 'C'),
+            'retrocesos': sum(1 for _, estado_a, _ in cambios if estado_a == 'C'),
+            'cambios': cambios,
+        })
+
+    # Número y texto solo de los criterios que cambiaron, en orden de catálogo
+    posiciones = {}
+    info = {}
+    for posicion, criterio in enumerate(Criterio.objects.filter(pk__in=cambiados).values(
+        'pk', 'numero', 'texto', 'estandar__codigo'
+    ).order_by('estandar__grupo__orden', 'estandar__orden', 'clave_orden', 'orden')):
+        posiciones[criterio['pk']] = posicion
+        info[criterio['pk']] = criterio
+    for datos in sedes:
+        datos['cambios'] = [
+            {'criterio': info[criterio_id], 'anterior': estado_a, 'actual': estado_b}
+            for criterio_id, estado_a, estado_b in sorted(
+                datos['cambios'], key=lambda cambio: posiciones.get(cambio[0], len(posiciones))
+            )
+            if criterio_id in info
+        ]
+    return sedes
@@ -0,0 +1,31 @@
+"""
+Comando para programar la generación de miniaturas y versiones PDF
+de los contenidos del repositorio que aún no las tienen.
+"""
+
+from django.core.management.base import BaseCommand
+
+from evaluacion.models import ContenidoArchivo
+
+
+class Command(BaseCommand):
+    help = 'Encola la generación de miniaturas y versiones PDF de los archivos del repositorio'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todos',
+            action='store_true',
+            help='Regenera también los contenidos que ya tienen versiones'
+        )
+
+    def handle(self, *args, **options):
+        contenidos = ContenidoArchivo.objects.all()
+        if not options['todos']:
+            contenidos = contenidos.filter(estado_versiones__in=['PENDIENTE', 'ERROR'])
+
+        total = 0
+        for contenido in contenidos.only('pk').iterator():
+            contenido.encolar_versiones()
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Contenidos encolados: {total}'))
@@ -0,0 +1,39 @@
+"""
+Comando para eliminar cargas fragmentadas abandonadas.
+Borra los fragmentos temporales de cargas que no se completaron a tiempo.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from evaluacion.models import CargaArchivo
+
+
+class Command(BaseCommand):
+    help = 'Elimina las cargas de archivos fragmentadas abandonadas y sus fragmentos temporales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horas',
+            type=int,
+            default=settings.HABILITACION_CONFIG['CARGA_HORAS_EXPIRACION'],
+            help='Antigüedad mínima (sin actividad) de las cargas a eliminar'
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(hours=options['horas'])
+        cargas = CargaArchivo.objects.filter(fecha_modificacion__lt=limite)
+
+        abandonadas = 0
+        for carga in cargas.filter(estado='ABIERTA').iterator():
+            carga.descartar_fragmentos()
+            abandonadas += 1
+
+        total, _ = cargas.delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Cargas eliminadas: {total} ({abandonadas} abandonadas sin completar)'
+        ))
@@ -0,0 +1,50 @@
+"""
+Comando para migrar los archivos del repositorio al almacén por contenido.
+Calcula el SHA-256 de los archivos anteriores a ContenidoArchivo, los
+deduplica y los enlaza, de modo que todos tengan ETag fuerte y conteo de
+referencias.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from evaluacion.models import ArchivoRepositorio, ContenidoArchivo
+
+
+class Command(BaseCommand):
+    help = 'Migra los archivos del repositorio sin contenido asociado al almacén por SHA-256'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--conservar-originales',
+            action='store_true',
+            help='No elimina el archivo original después de migrarlo'
+        )
+
+    def handle(self, *args, **options):
+        pendientes = ArchivoRepositorio.objects.filter(contenido__isnull=True)
+        self.stdout.write(f'Archivos por migrar: {pendientes.count()}')
+
+        migrados = 0
+        faltantes = 0
+        for archivo in pendientes.iterator():
+            nombre_original = archivo.archivo.name
+            try:
+                with transaction.atomic():
+                    with archivo.archivo.open('rb') as origen:
+                        contenido = ContenidoArchivo.registrar(origen, nombre_original)
+                    archivo.contenido = contenido
+                    archivo.archivo.name = contenido.archivo.name
+                    archivo.save(update_fields=['contenido', 'archivo'])
+            except FileNotFoundError:
+                faltantes += 1
+                self.stdout.write(self.style.WARNING(f'  No encontrado: {nombre_original}'))
+                continue
+
+            if not options['conservar_originales'] and nombre_original != contenido.archivo.name:
+                archivo.archivo.storage.delete(nombre_original)
+            migrados += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Migración completada: {migrados} migrados, {faltantes} no encontrados'
+        ))
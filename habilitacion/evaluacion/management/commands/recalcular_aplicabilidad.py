@@ -0,0 +1,38 @@
+"""
+Comando para recalcular la matriz de aplicabilidad sede × criterio.
+Normalmente se mantiene sola (señales sobre servicios y configuración de la
+sede); sirve tras cargas masivas o para reconstruirla por completo.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from entidades.models import Sede
+from evaluacion.aplicabilidad import recalcular_todas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la matriz de criterios que aplican a cada sede'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sede',
+            type=int,
+            action='append',
+            dest='sedes',
+            help='ID de la sede a recalcular (se puede repetir); por defecto todas'
+        )
+
+    def handle(self, *args, **options):
+        sede_ids = options['sedes']
+        if sede_ids:
+            existentes = set(Sede.objects.filter(pk__in=sede_ids).values_list('pk', flat=True))
+            desconocidas = [str(sede_id) for sede_id in sede_ids if sede_id not in existentes]
+            if desconocidas:
+                raise CommandError(f'Sedes inexistentes: {", ".join(desconocidas)}')
+
+        agregados, eliminados = recalcular_todas(sede_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Matriz de aplicabilidad recalculada: {agregados} criterios agregados, '
+            f'{eliminados} eliminados'
+        ))
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+import evaluacion.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evaluacion", "0005_quitar_null_sede"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="historialevaluacion",
+            name="evaluacion_criterio",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="historial",
+                to="evaluacion.evaluacioncriterio",
+                verbose_name="Evaluación de criterio",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="archivorepositorio",
+            name="archivo",
+            field=models.FileField(
+                upload_to=evaluacion.models.ruta_archivo_criterio,
+                verbose_name="Archivo",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="historialevaluacion",
+            name="evaluacion",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="historial",
+                to="evaluacion.evaluacion",
+                verbose_name="Evaluación",
+            ),
+        ),
+    ]
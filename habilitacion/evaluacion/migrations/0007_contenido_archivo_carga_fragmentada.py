@@ -0,0 +1,202 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import evaluacion.models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("evaluacion", "0006_historial_evaluacion_criterio"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ContenidoArchivo",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sha256",
+                    models.CharField(
+                        max_length=64, unique=True, verbose_name="SHA-256"
+                    ),
+                ),
+                (
+                    "archivo",
+                    models.FileField(
+                        max_length=255,
+                        upload_to=evaluacion.models.ruta_contenido_archivo,
+                        verbose_name="Archivo",
+                    ),
+                ),
+                (
+                    "tamano",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Tamaño (bytes)"
+                    ),
+                ),
+                (
+                    "referencias",
+                    models.PositiveIntegerField(default=0, verbose_name="Referencias"),
+                ),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha de creación"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Contenido de Archivo",
+                "verbose_name_plural": "Contenidos de Archivos",
+                "ordering": ["-fecha_creacion"],
+            },
+        ),
+        migrations.AlterField(
+            model_name="archivorepositorio",
+            name="archivo",
+            field=models.FileField(
+                max_length=255,
+                upload_to=evaluacion.models.ruta_archivo_criterio,
+                verbose_name="Archivo",
+            ),
+        ),
+        migrations.CreateModel(
+            name="CargaArchivo",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "token",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        unique=True,
+                        verbose_name="Token",
+                    ),
+                ),
+                (
+                    "nombre_archivo",
+                    models.CharField(
+                        max_length=255, verbose_name="Nombre del archivo original"
+                    ),
+                ),
+                ("nombre", models.CharField(max_length=255, verbose_name="Nombre")),
+                (
+                    "descripcion",
+                    models.TextField(blank=True, verbose_name="Descripción"),
+                ),
+                (
+                    "tamano_total",
+                    models.PositiveBigIntegerField(verbose_name="Tamaño total (bytes)"),
+                ),
+                (
+                    "tamano_fragmento",
+                    models.PositiveIntegerField(
+                        verbose_name="Tamaño de fragmento (bytes)"
+                    ),
+                ),
+                (
+                    "fragmentos_recibidos",
+                    models.JSONField(
+                        blank=True, default=list, verbose_name="Fragmentos recibidos"
+                    ),
+                ),
+                (
+                    "sha256_esperado",
+                    models.CharField(
+                        blank=True, max_length=64, verbose_name="SHA-256 esperado"
+                    ),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("ABIERTA", "Abierta"),
+                            ("COMPLETADA", "Completada"),
+                            ("CANCELADA", "Cancelada"),
+                        ],
+                        default="ABIERTA",
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha de creación"
+                    ),
+                ),
+                (
+                    "fecha_modificacion",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Fecha de modificación"
+                    ),
+                ),
+                (
+                    "archivo_resultante",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="evaluacion.archivorepositorio",
+                    ),
+                ),
+                (
+                    "evaluacion",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cargas_archivo",
+                        to="evaluacion.evaluacioncriterio",
+                        verbose_name="Evaluación",
+                    ),
+                ),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="cargas_archivo",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Carga de Archivo",
+                "verbose_name_plural": "Cargas de Archivos",
+                "ordering": ["-fecha_creacion"],
+            },
+        ),
+        migrations.AddField(
+            model_name="archivorepositorio",
+            name="contenido",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Contenido compartido (vacío para archivos anteriores al almacén por SHA-256)",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="archivos",
+                to="evaluacion.contenidoarchivo",
+                verbose_name="Contenido",
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evaluacion", "0007_contenido_archivo_carga_fragmentada"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contenidoarchivo",
+            name="estado_versiones",
+            field=models.CharField(
+                choices=[
+                    ("PENDIENTE", "Pendiente"),
+                    ("LISTA", "Lista"),
+                    ("SIN_SOPORTE", "Sin soporte"),
+                    ("ERROR", "Error"),
+                ],
+                default="PENDIENTE",
+                max_length=20,
+                verbose_name="Estado de versiones",
+            ),
+        ),
+        migrations.AddField(
+            model_name="contenidoarchivo",
+            name="miniatura",
+            field=models.FileField(
+                blank=True, max_length=255, upload_to="", verbose_name="Miniatura"
+            ),
+        ),
+        migrations.AddField(
+            model_name="contenidoarchivo",
+            name="version_pdf",
+            field=models.FileField(
+                blank=True,
+                help_text="Conversión a PDF de documentos de Office para su previsualización",
+                max_length=255,
+                upload_to="",
+                verbose_name="Versión PDF",
+            ),
+        ),
+    ]
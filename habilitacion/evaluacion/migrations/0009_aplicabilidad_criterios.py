@@ -0,0 +1,79 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("estandares", "0003_tipo_criterio"),
+        ("entidades", "0006_version_aplicabilidad_sede"),
+        ("evaluacion", "0008_versiones_contenido_archivo"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AplicabilidadCriterio",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "criterio",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="aplicabilidades",
+                        to="estandares.criterio",
+                        verbose_name="Criterio",
+                    ),
+                ),
+                (
+                    "estandar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="estandares.estandar",
+                        verbose_name="Estándar",
+                    ),
+                ),
+                (
+                    "grupo",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="estandares.grupoestandar",
+                        verbose_name="Grupo",
+                    ),
+                ),
+                (
+                    "sede",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="criterios_aplicables",
+                        to="entidades.sede",
+                        verbose_name="Sede",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Aplicabilidad de Criterio",
+                "verbose_name_plural": "Aplicabilidad de Criterios",
+                "indexes": [
+                    models.Index(
+                        fields=["sede", "grupo"], name="eval_aplic_sede_grupo_idx"
+                    ),
+                    models.Index(
+                        fields=["sede", "estandar"], name="eval_aplic_sede_est_idx"
+                    ),
+                ],
+                "unique_together": {("sede", "criterio")},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:01
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evaluacion", "0009_aplicabilidad_criterios"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="historialevaluacion",
+            name="fecha",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False, verbose_name="Fecha"
+            ),
+        ),
+    ]
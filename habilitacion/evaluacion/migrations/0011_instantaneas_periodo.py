@@ -0,0 +1,109 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entidades", "0006_version_aplicabilidad_sede"),
+        ("evaluacion", "0010_historial_fecha_registro"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="periodoevaluacion",
+            name="fecha_cierre",
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True, verbose_name="Fecha de cierre"
+            ),
+        ),
+        migrations.CreateModel(
+            name="InstantaneaSede",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("criterios", models.BinaryField(verbose_name="Criterios (uint32)")),
+                (
+                    "estados",
+                    models.BinaryField(verbose_name="Estados (un byte por criterio)"),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Total criterios"
+                    ),
+                ),
+                (
+                    "cumple",
+                    models.PositiveIntegerField(default=0, verbose_name="Cumple"),
+                ),
+                (
+                    "no_cumple",
+                    models.PositiveIntegerField(default=0, verbose_name="No cumple"),
+                ),
+                (
+                    "no_aplica",
+                    models.PositiveIntegerField(default=0, verbose_name="No aplica"),
+                ),
+                (
+                    "pendiente",
+                    models.PositiveIntegerField(default=0, verbose_name="Pendiente"),
+                ),
+                (
+                    "porcentaje",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=5,
+                        verbose_name="Porcentaje de cumplimiento",
+                    ),
+                ),
+                (
+                    "conteos_grupo",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="Conteos por grupo"
+                    ),
+                ),
+                (
+                    "fecha",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Fecha de la instantánea",
+                    ),
+                ),
+                (
+                    "periodo",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="instantaneas",
+                        to="evaluacion.periodoevaluacion",
+                        verbose_name="Período",
+                    ),
+                ),
+                (
+                    "sede",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="instantaneas",
+                        to="entidades.sede",
+                        verbose_name="Sede",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Instantánea de Sede",
+                "verbose_name_plural": "Instantáneas de Sedes",
+                "unique_together": {("periodo", "sede")},
+            },
+        ),
+    ]
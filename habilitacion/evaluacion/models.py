@@ -3,6 +3,8 @@ Modelos de Evaluación y Autoevaluación
 Sistema de seguimiento del cumplimiento de criterios de habilitación
 """
 
+import uuid
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
@@ -263,7 +265,18 @@ class HistorialEvaluacion(models.Model):
         Evaluacion,
         on_delete=models.CASCADE,
         related_name='historial',
-        verbose_name='Evaluación'
+        verbose_name='Evaluación',
+        null=True,
+        blank=True
+    )
+    # Historial del sistema por sede (tabla de criterios)
+    evaluacion_criterio = models.ForeignKey(
+        'EvaluacionCriterio',
+        on_delete=models.CASCADE,
+        related_name='historial',
+        verbose_name='Evaluación de criterio',
+        null=True,
+        blank=True
     )
     usuario = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -276,7 +289,8 @@ class HistorialEvaluacion(models.Model):
     estado_anterior = models.CharField('Estado anterior', max_length=5, blank=True)
     estado_nuevo = models.CharField('Estado nuevo', max_length=5, blank=True)
     datos_adicionales = models.JSONField('Datos adicionales', null=True, blank=True)
-    fecha = models.DateTimeField('Fecha', auto_now_add=True)
+    # Se fija al registrar el cambio, no al escribir el lote (ver core.auditoria)
+    fecha = models.DateTimeField('Fecha', default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = 'Historial de Evaluación'
@@ -284,7 +298,7 @@ class HistorialEvaluacion(models.Model):
         ordering = ['-fecha']
 
     def __str__(self):
-        return f"{self.evaluacion} - {self.accion} - {self.fecha}"
+        return f"{self.evaluacion or self.evaluacion_criterio} - {self.accion} - {self.fecha}"
 
 
 class PeriodoEvaluacion(models.Model):
@@ -313,6 +327,9 @@ class PeriodoEvaluacion(models.Model):
         blank=True
     )
 
+    # Se fija al congelar el período (ver evaluacion.instantaneas)
+    fecha_cierre = models.DateTimeField('Fecha de cierre', null=True, blank=True, editable=False)
+
     fecha_creacion = models.DateTimeField('Fecha de creación', auto_now_add=True)
 
     class Meta:
@@ -323,6 +340,11 @@ class PeriodoEvaluacion(models.Model):
     def __str__(self):
         return f"{self.nombre} ({self.entidad.razon_social})"
 
+    @property
+    def congelado(self):
+        """Indica si el período tiene instantánea de sus sedes"""
+        return self.fecha_cierre is not None
+
     def calcular_porcentaje_cumplimiento(self):
         """Calcula el porcentaje de cumplimiento del período"""
         from django.db.models import Count, Q
@@ -361,6 +383,50 @@ class PeriodoEvaluacion(models.Model):
         return self.porcentaje_cumplimiento_general
 
 
+class InstantaneaSede(models.Model):
+    """
+    Estado de los criterios aplicables de una sede al congelar un período.
+    Se guarda en columnas empaquetadas (ver evaluacion.instantaneas): los ids
+    de criterio ordenados como uint32 y un byte de estado por criterio en el
+    mismo orden, más los contadores ya calculados.
+    """
+    periodo = models.ForeignKey(
+        PeriodoEvaluacion,
+        on_delete=models.CASCADE,
+        related_name='instantaneas',
+        verbose_name='Período'
+    )
+    sede = models.ForeignKey(
+        'entidades.Sede',
+        on_delete=models.CASCADE,
+        related_name='instantaneas',
+        verbose_name='Sede'
+    )
+
+    criterios = models.BinaryField('Criterios (uint32)')
+    estados = models.BinaryField('Estados (un byte por criterio)')
+
+    # Contadores
+    total = models.PositiveIntegerField('Total criterios', default=0)
+    cumple = models.PositiveIntegerField('Cumple', default=0)
+    no_cumple = models.PositiveIntegerField('No cumple', default=0)
+    no_aplica = models.PositiveIntegerField('No aplica', default=0)
+    pendiente = models.PositiveIntegerField('Pendiente', default=0)
+    porcentaje = models.DecimalField('Porcentaje de cumplimiento', max_digits=5, decimal_places=2, default=0)
+    # grupo_id -> [cumple, no_cumple, no_aplica, pendiente]
+    conteos_grupo = models.JSONField('Conteos por grupo', default=dict, blank=True)
+
+    fecha = models.DateTimeField('Fecha de la instantánea', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Instantánea de Sede'
+        verbose_name_plural = 'Instantáneas de Sedes'
+        unique_together = ['periodo', 'sede']
+
+    def __str__(self):
+        return f"{self.periodo.nombre} - {self.sede.nombre}: {self.porcentaje}%"
+
+
 class ResumenCumplimiento(models.Model):
     """
     Resumen de cumplimiento por estándar/grupo para una sede.
@@ -560,6 +626,53 @@ class EvaluacionCriterio(models.Model):
         return self.sede.entidad
 
 
+class AplicabilidadCriterio(models.Model):
+    """
+    Matriz materializada sede × criterio: una fila por cada criterio evaluable
+    que aplica a la sede. La calcula evaluacion.aplicabilidad a partir de la
+    configuración de grupos y estándares de la sede, sus servicios habilitados
+    y la regla del grupo obligatorio 11.1; los conteos de avance y cumplimiento
+    se hacen uniendo contra esta tabla.
+    """
+    sede = models.ForeignKey(
+        'entidades.Sede',
+        on_delete=models.CASCADE,
+        related_name='criterios_aplicables',
+        verbose_name='Sede'
+    )
+    criterio = models.ForeignKey(
+        'estandares.Criterio',
+        on_delete=models.CASCADE,
+        related_name='aplicabilidades',
+        verbose_name='Criterio'
+    )
+    # Desnormalizados para agrupar por estándar o grupo sin más uniones
+    estandar = models.ForeignKey(
+        'estandares.Estandar',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Estándar'
+    )
+    grupo = models.ForeignKey(
+        'estandares.GrupoEstandar',
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Grupo'
+    )
+
+    class Meta:
+        verbose_name = 'Aplicabilidad de Criterio'
+        verbose_name_plural = 'Aplicabilidad de Criterios'
+        unique_together = ['sede', 'criterio']
+        indexes = [
+            models.Index(fields=['sede', 'grupo'], name='eval_aplic_sede_grupo_idx'),
+            models.Index(fields=['sede', 'estandar'], name='eval_aplic_sede_est_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sede_id} - {self.criterio_id}"
+
+
 def ruta_archivo_criterio(instance, filename):
     """
     Genera la ruta de almacenamiento para archivos de criterios.
@@ -590,6 +703,133 @@ def ruta_archivo_criterio(instance, filename):
     return f'documentos/{entidad_slug}/{grupo_codigo}/{estandar_codigo}/{criterio_numero}/{nombre_archivo}'
 
 
+def calcular_sha256(origen, tamano_bloque=1024 * 1024):
+    """Calcula el SHA-256 de un archivo leyéndolo por bloques"""
+    import hashlib
+
+    digest = hashlib.sha256()
+    origen.seek(0)
+    for bloque in iter(lambda: origen.read(tamano_bloque), b''):
+        digest.update(bloque)
+    origen.seek(0)
+    return digest.hexdigest()
+
+
+def ruta_contenido_archivo(instance, filename):
+    """
+    Ruta direccionada por contenido: repositorio/contenido/ab/abcdef...pdf
+    El mismo archivo compartido entre criterios y sedes se guarda una sola vez.
+    """
+    import os
+
+    extension = os.path.splitext(filename)[1].lower()
+    return f'repositorio/contenido/{instance.sha256[:2]}/{instance.sha256}{extension}'
+
+
+class ContenidoArchivo(models.Model):
+    """
+    Contenido físico de los archivos del repositorio, identificado por SHA-256.
+    Varios ArchivoRepositorio pueden apuntar al mismo contenido; el archivo se
+    elimina del almacenamiento cuando ya no tiene referencias.
+    """
+    sha256 = models.CharField('SHA-256', max_length=64, unique=True)
+    archivo = models.FileField('Archivo', upload_to=ruta_contenido_archivo, max_length=255)
+    tamano = models.PositiveBigIntegerField('Tamaño (bytes)', default=0)
+    referencias = models.PositiveIntegerField('Referencias', default=0)
+    fecha_creacion = models.DateTimeField('Fecha de creación', auto_now_add=True)
+
+    # Versiones derivadas, generadas en segundo plano junto al original
+    ESTADOS_VERSIONES = [
+        ('PENDIENTE', 'Pendiente'),
+        ('LISTA', 'Lista'),
+        ('SIN_SOPORTE', 'Sin soporte'),
+        ('ERROR', 'Error'),
+    ]
+    miniatura = models.FileField('Miniatura', max_length=255, blank=True)
+    version_pdf = models.FileField(
+        'Versión PDF', max_length=255, blank=True,
+        help_text='Conversión a PDF de documentos de Office para su previsualización'
+    )
+    estado_versiones = models.CharField(
+        'Estado de versiones', max_length=20, choices=ESTADOS_VERSIONES, default='PENDIENTE'
+    )
+
+    class Meta:
+        verbose_name = 'Contenido de Archivo'
+        verbose_name_plural = 'Contenidos de Archivos'
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.referencias} ref.)"
+
+    @classmethod
+    def registrar(cls, origen, nombre_archivo, sha256=None):
+        """
+        Registra un archivo en el almacén direccionado por contenido.
+        Si el contenido ya existe solo incrementa su contador de referencias.
+        """
+        from django.core.files import File
+        from django.db import IntegrityError, transaction
+
+        if sha256 is None:
+            sha256 = calcular_sha256(origen)
+
+        with transaction.atomic():
+            contenido = cls.objects.select_for_update().filter(sha256=sha256).first()
+            if contenido is None:
+                try:
+                    with transaction.atomic():
+                        contenido = cls(sha256=sha256, tamano=origen.size, referencias=1)
+                        origen.seek(0)
+                        contenido.archivo.save(nombre_archivo, File(origen), save=False)
+                        contenido.save()
+                        contenido.encolar_versiones()
+                        return contenido
+                except IntegrityError:
+                    # Otra carga concurrente creó el mismo contenido
+                    contenido = cls.objects.select_for_update().get(sha256=sha256)
+
+            contenido.retener()
+        return contenido
+
+    def retener(self):
+        """Suma una referencia al contenido"""
+        from django.db.models import F
+
+        ContenidoArchivo.objects.filter(pk=self.pk).update(referencias=F('referencias') + 1)
+        self.refresh_from_db(fields=['referencias'])
+
+    def liberar(self):
+        """Resta una referencia y elimina el archivo cuando ya nadie lo usa"""
+        from django.db import transaction
+        from django.db.models import F
+
+        with transaction.atomic():
+            ContenidoArchivo.objects.filter(pk=self.pk).update(referencias=F('referencias') - 1)
+            contenido = ContenidoArchivo.objects.select_for_update().get(pk=self.pk)
+            if contenido.referencias == 0:
+                contenido.delete()
+                transaction.on_commit(contenido.eliminar_archivos)
+
+    def eliminar_archivos(self):
+        """Borra del almacenamiento el original y sus versiones derivadas"""
+        for campo in (self.archivo, self.miniatura, self.version_pdf):
+            if campo:
+                campo.delete(save=False)
+
+    def ruta_version(self, sufijo):
+        """Ruta de una versión derivada junto al original: <sha256>_<sufijo>"""
+        import posixpath
+
+        return posixpath.join(posixpath.dirname(self.archivo.name), f'{self.sha256}_{sufijo}')
+
+    def encolar_versiones(self):
+        """Programa la generación de miniatura y versión PDF en segundo plano"""
+        from core.tareas import encolar
+
+        return encolar('evaluacion.generar_versiones', {'contenido_id': self.pk}, prioridad=5)
+
+
 class ArchivoRepositorio(models.Model):
     """
     Repositorio de archivos por evaluación de criterio.
@@ -604,7 +844,17 @@ class ArchivoRepositorio(models.Model):
     )
     archivo = models.FileField(
         'Archivo',
-        upload_to=ruta_archivo_criterio
+        upload_to=ruta_archivo_criterio,
+        max_length=255
+    )
+    contenido = models.ForeignKey(
+        ContenidoArchivo,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='archivos',
+        verbose_name='Contenido',
+        help_text='Contenido compartido (vacío para archivos anteriores al almacén por SHA-256)'
     )
     nombre = models.CharField('Nombre', max_length=255)
     descripcion = models.TextField('Descripción', blank=True)
@@ -626,6 +876,35 @@ class ArchivoRepositorio(models.Model):
     def __str__(self):
         return f"{self.nombre} - {self.evaluacion.criterio.numero}"
 
+    @classmethod
+    def crear_desde_contenido(cls, evaluacion, contenido, nombre, descripcion='', usuario=None):
+        """Crea la referencia de un criterio a un contenido ya registrado"""
+        return cls.objects.create(
+            evaluacion=evaluacion,
+            contenido=contenido,
+            archivo=contenido.archivo.name,
+            nombre=nombre,
+            descripcion=descripcion,
+            subido_por=usuario
+        )
+
+    def eliminar(self):
+        """
+        Elimina el archivo. La referencia al contenido compartido se libera en
+        la señal post_delete, igual que en los borrados en cascada y del Admin.
+        """
+        self.delete()
+
+    def liberar_contenido(self):
+        """Libera el contenido compartido del archivo ya eliminado (o su archivo propio si es anterior al almacén)"""
+        from django.db import transaction
+
+        if self.contenido_id:
+            ContenidoArchivo(pk=self.contenido_id).liberar()
+        elif self.archivo:
+            archivo = self.archivo
+            transaction.on_commit(lambda: archivo.delete(save=False))
+
     @property
     def extension(self):
         """Retorna la extensión del archivo"""
@@ -652,6 +931,16 @@ class ArchivoRepositorio(models.Model):
         """Indica si el archivo es un documento Excel"""
         return self.extension in ['.xls', '.xlsx']
 
+    @property
+    def tiene_miniatura(self):
+        """Indica si el contenido ya tiene miniatura generada"""
+        return bool(self.contenido_id and self.contenido.miniatura)
+
+    @property
+    def tiene_version_pdf(self):
+        """Indica si el documento de Office tiene una versión PDF para previsualizar"""
+        return bool(self.contenido_id and self.contenido.version_pdf)
+
     @property
     def es_previsualizable(self):
         """Indica si el archivo se puede previsualizar en el navegador"""
@@ -669,3 +958,169 @@ class ArchivoRepositorio(models.Model):
         elif self.es_excel:
             return 'excel'
         return 'otro'
+
+
+class CargaArchivo(models.Model):
+    """
+    Sesión de carga fragmentada y reanudable de un archivo del repositorio.
+    El cliente envía el archivo en fragmentos de tamaño fijo; al completar
+    se reensamblan en el servidor y se registran en ContenidoArchivo.
+    """
+
+    ESTADOS = [
+        ('ABIERTA', 'Abierta'),
+        ('COMPLETADA', 'Completada'),
+        ('CANCELADA', 'Cancelada'),
+    ]
+
+    token = models.UUIDField('Token', default=uuid.uuid4, unique=True, editable=False)
+    evaluacion = models.ForeignKey(
+        EvaluacionCriterio,
+        on_delete=models.CASCADE,
+        related_name='cargas_archivo',
+        verbose_name='Evaluación'
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='cargas_archivo'
+    )
+    nombre_archivo = models.CharField('Nombre del archivo original', max_length=255)
+    nombre = models.CharField('Nombre', max_length=255)
+    descripcion = models.TextField('Descripción', blank=True)
+    tamano_total = models.PositiveBigIntegerField('Tamaño total (bytes)')
+    tamano_fragmento = models.PositiveIntegerField('Tamaño de fragmento (bytes)')
+    fragmentos_recibidos = models.JSONField('Fragmentos recibidos', default=list, blank=True)
+    sha256_esperado = models.CharField('SHA-256 esperado', max_length=64, blank=True)
+    estado = models.CharField('Estado', max_length=20, choices=ESTADOS, default='ABIERTA')
+    archivo_resultante = models.ForeignKey(
+        ArchivoRepositorio,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    fecha_creacion = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    fecha_modificacion = models.DateTimeField('Fecha de modificación', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Carga de Archivo'
+        verbose_name_plural = 'Cargas de Archivos'
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"{self.nombre_archivo} ({self.get_estado_display()})"
+
+    @property
+    def total_fragmentos(self):
+        """Cantidad de fragmentos esperados"""
+        return max(1, -(-self.tamano_total // self.tamano_fragmento))
+
+    @property
+    def fragmentos_faltantes(self):
+        """Índices de fragmentos que aún no se han recibido"""
+        recibidos = set(self.fragmentos_recibidos)
+        return [i for i in range(self.total_fragmentos) if i not in recibidos]
+
+    def tamano_esperado_fragmento(self, indice):
+        """Tamaño que debe tener el fragmento indicado"""
+        if indice == self.total_fragmentos - 1:
+            return self.tamano_total - indice * self.tamano_fragmento
+        return self.tamano_fragmento
+
+    def ruta_fragmento(self, indice):
+        """Ruta temporal del fragmento en el almacenamiento"""
+        return f'cargas/{self.token}/{indice:06d}.part'
+
+    def guardar_fragmento(self, indice, datos):
+        """
+        Guarda un fragmento. Reenviar un fragmento ya recibido lo reemplaza,
+        lo que permite reintentar sin perder el avance.
+        """
+        from django.core.files.storage import default_storage
+        from django.db import transaction
+
+        if not 0 <= indice < self.total_fragmentos:
+            raise ValueError(f'Fragmento fuera de rango: {indice}')
+        if datos.size != self.tamano_esperado_fragmento(indice):
+            raise ValueError(
+                f'Tamaño de fragmento inválido: {datos.size} '
+                f'(esperado {self.tamano_esperado_fragmento(indice)})'
+            )
+
+        ruta = self.ruta_fragmento(indice)
+        if default_storage.exists(ruta):
+            default_storage.delete(ruta)
+        default_storage.save(ruta, datos)
+
+        with transaction.atomic():
+            carga = CargaArchivo.objects.select_for_update().get(pk=self.pk)
+            if indice not in carga.fragmentos_recibidos:
+                carga.fragmentos_recibidos = sorted(carga.fragmentos_recibidos + [indice])
+                carga.save(update_fields=['fragmentos_recibidos', 'fecha_modificacion'])
+            self.fragmentos_recibidos = carga.fragmentos_recibidos
+
+    def completar(self):
+        """
+        Reensambla los fragmentos, verifica tamaño y hash, y crea el
+        ArchivoRepositorio apuntando al contenido deduplicado.
+        """
+        import hashlib
+        import tempfile
+        from django.core.files import File
+        from django.core.files.storage import default_storage
+        from django.db import transaction
+
+        faltantes = self.fragmentos_faltantes
+        if faltantes:
+            raise ValueError(f'Faltan fragmentos: {faltantes[:20]}')
+
+        digest = hashlib.sha256()
+        with tempfile.TemporaryFile() as ensamblado:
+            try:
+                for indice in range(self.total_fragmentos):
+                    with default_storage.open(self.ruta_fragmento(indice), 'rb') as fragmento:
+                        for bloque in iter(lambda: fragmento.read(1024 * 1024), b''):
+                            digest.update(bloque)
+                            ensamblado.write(bloque)
+            except FileNotFoundError:
+                # Otro completado del mismo token ya descartó los fragmentos
+                raise ValueError('La carga ya fue completada o sus fragmentos no están disponibles')
+
+            if ensamblado.tell() != self.tamano_total:
+                raise ValueError('El tamaño del archivo reensamblado no coincide')
+            sha256 = digest.hexdigest()
+            if self.sha256_esperado and self.sha256_esperado.lower() != sha256:
+                raise ValueError('El SHA-256 del archivo no coincide con el esperado')
+
+            ensamblado.seek(0)
+            with transaction.atomic():
+                # Dos completados simultáneos del mismo token: solo el primero registra
+                carga = CargaArchivo.objects.select_for_update().get(pk=self.pk)
+                if carga.estado != 'ABIERTA':
+                    raise ValueError('La carga ya fue completada')
+                contenido = ContenidoArchivo.registrar(
+                    File(ensamblado, name=self.nombre_archivo), self.nombre_archivo, sha256=sha256
+                )
+                archivo = ArchivoRepositorio.crear_desde_contenido(
+                    self.evaluacion, contenido, self.nombre, self.descripcion, self.usuario
+                )
+                self.estado = 'COMPLETADA'
+                self.archivo_resultante = archivo
+                self.save(update_fields=['estado', 'archivo_resultante', 'fecha_modificacion'])
+
+        self.descartar_fragmentos()
+        return archivo
+
+    def descartar_fragmentos(self):
+        """Elimina los fragmentos temporales del almacenamiento"""
+        from django.core.files.storage import default_storage
+
+        for indice in self.fragmentos_recibidos:
+            ruta = self.ruta_fragmento(indice)
+            if default_storage.exists(ruta):
+                default_storage.delete(ruta)
+        try:
+            default_storage.delete(f'cargas/{self.token}')
+        except OSError:
+            pass
@@ -0,0 +1,154 @@
+"""
+Paquete de evidencias de una sede en un ZIP transmitido en streaming
+Sistema de Habilitación de Servicios de Salud
+
+El ZIP se escribe sobre un flujo no posicionable: zipfile agrega los
+descriptores de datos al final de cada entrada y se fuerza ZIP64, así que
+no hay archivo temporal ni límite de 4 GB. Cada archivo del repositorio se
+copia por bloques mientras se calcula su SHA-256, y al final se agrega
+indice.csv con criterio -> archivos y sus sumas de verificación. La memoria
+del servidor no depende del tamaño del paquete.
+"""
+
+import csv
+import hashlib
+import os
+import tempfile
+import zipfile
+
+from django.utils import timezone
+
+TAMANO_BLOQUE = 1024 * 1024
+
+COLUMNAS_INDICE = [
+    'grupo', 'estandar', 'criterio', 'estado', 'ruta_en_zip', 'nombre_original',
+    'tamano_bytes', 'sha256', 'fecha_subida', 'subido_por',
+]
+
+
+class _SalidaZip:
+    """
+    Destino de escritura sin tell() ni seek(): zipfile lo trata como flujo
+    no posicionable. Acumula lo escrito hasta que el generador lo entrega.
+    """
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def vaciar(self):
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+
+def archivos_sede(sede, grupo=None, estandar=None, estado=None):
+    """Archivos del repositorio de la sede en el orden del anexo técnico"""
+    from .models import ArchivoRepositorio
+
+    archivos = ArchivoRepositorio.objects.filter(evaluacion__sede=sede)
+    if grupo is not None:
+        archivos = archivos.filter(evaluacion__criterio__estandar__grupo=grupo)
+    if estandar is not None:
+        archivos = archivos.filter(evaluacion__criterio__estandar=estandar)
+    if estado:
+        archivos = archivos.filter(evaluacion__estado=estado)
+    return archivos.select_related(
+        'evaluacion__criterio__estandar__grupo', 'evaluacion__sede__entidad', 'subido_por'
+    ).order_by(
+        'evaluacion__criterio__estandar__grupo__orden', 'evaluacion__criterio__estandar__orden',
+        'evaluacion__criterio__clave_orden', 'evaluacion__criterio_id', 'fecha_subida', 'pk'
+    )
+
+
+def _ruta_unica(ruta, usadas):
+    """Evita nombres repetidos dentro del ZIP: archivo.pdf, archivo (2).pdf, ..."""
+    base, extension = os.path.splitext(ruta)
+    candidata, numero = ruta, 2
+    while candidata in usadas:
+        candidata = f'{base} ({numero}){extension}'
+        numero += 1
+    usadas.add(candidata)
+    return candidata
+
+
+def generar_paquete(archivos):
+    """
+    Generador de los bytes del ZIP. `archivos` es un queryset de
+    ArchivoRepositorio; se recorre por bloques.
+    """
+    from .models import ruta_archivo_criterio
+
+    salida = _SalidaZip()
+    usadas = set()
+    estados = None
+
+    with tempfile.SpooledTemporaryFile(
+        max_size=TAMANO_BLOQUE, mode='w+', newline='', encoding='utf-8'
+    ) as indice:
+        escritor = csv.writer(indice)
+        escritor.writerow(COLUMNAS_INDICE)
+
+        with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as paquete:
+            for archivo in archivos.iterator(chunk_size=500):
+                evaluacion = archivo.evaluacion
+                criterio = evaluacion.criterio
+                if estados is None:
+                    estados = dict(type(evaluacion).ESTADOS)
+                fila = [
+                    criterio.estandar.grupo.codigo, criterio.estandar.codigo, criterio.numero,
+                    estados.get(evaluacion.estado, evaluacion.estado),
+                ]
+                subido_por = archivo.subido_por.nombre_completo if archivo.subido_por_id else ''
+                fecha = timezone.localtime(archivo.fecha_subida)
+
+                try:
+                    origen = archivo.archivo.open('rb')
+                except (FileNotFoundError, OSError, ValueError):
+                    escritor.writerow(fila + [
+                        '', archivo.nombre, '', 'ARCHIVO NO ENCONTRADO', f'{fecha:%Y-%m-%d %H:%M}', subido_por
+                    ])
+                    continue
+
+                nombre = archivo.nombre or os.path.basename(archivo.archivo.name)
+                ruta = _ruta_unica(ruta_archivo_criterio(archivo, nombre), usadas)
+                info = zipfile.ZipInfo(ruta, date_time=fecha.timetuple()[:6])
+                info.compress_type = zipfile.ZIP_STORED
+                digest = hashlib.sha256()
+                tamano = 0
+                with origen, paquete.open(info, 'w', force_zip64=True) as destino:
+                    for bloque in iter(lambda: origen.read(TAMANO_BLOQUE), b''):
+                        digest.update(bloque)
+                        tamano += len(bloque)
+                        destino.write(bloque)
+                        if salida.partes:
+                            yield salida.vaciar()
+
+                escritor.writerow(fila + [
+                    ruta, archivo.nombre, tamano, digest.hexdigest(), f'{fecha:%Y-%m-%d %H:%M}', subido_por
+                ])
+                yield salida.vaciar()
+
+            indice.seek(0)
+            info = zipfile.ZipInfo('indice.csv', date_time=timezone.localtime().timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with paquete.open(info, 'w', force_zip64=True) as destino:
+                # BOM para que Excel reconozca el CSV como UTF-8
+                destino.write('\ufeff'.encode('utf-8'))
+                for bloque in iter(lambda: indice.read(TAMANO_BLOQUE), ''):
+                    destino.write(bloque.encode('utf-8'))
+                    yield salida.vaciar()
+
+    yield salida.vaciar()
+
+
+def nombre_paquete(sede):
+    identificador = sede.codigo_reps_sede or str(sede.pk)
+    return f'evidencias_{identificador}_{timezone.localdate():%Y%m%d}.zip'
+
@@ -0,0 +1,119 @@
+"""
+Señales del módulo de evaluación: mantienen al día la matriz de aplicabilidad
+(AplicabilidadCriterio) cuando cambian los servicios o la configuración de una
+sede, o los criterios y estándares, y las versiones de datos (de cada sede y
+del catálogo) que usa la API de lectura para sus ETag (core.versiones), y
+liberan el contenido compartido de los archivos eliminados.
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from entidades.models import (
+    ConfiguracionEstandarSede, ConfiguracionEvaluacionSede, EntidadPrestadora, Sede, ServicioHabilitado
+)
+from estandares.models import Criterio, Estandar, GrupoEstandar
+
+from core.versiones import AMBITO_CATALOGO, ambito_entidad, incrementar, incrementar_sedes
+
+from .aplicabilidad import aplicabilidad_actualizada, programar_recalculo
+from .models import ArchivoRepositorio, Evaluacion, EvaluacionCriterio
+
+
+@receiver(post_save, sender=ServicioHabilitado)
+@receiver(post_delete, sender=ServicioHabilitado)
+@receiver(post_save, sender=ConfiguracionEvaluacionSede)
+@receiver(post_delete, sender=ConfiguracionEvaluacionSede)
+@receiver(post_save, sender=ConfiguracionEstandarSede)
+@receiver(post_delete, sender=ConfiguracionEstandarSede)
+def configuracion_sede_cambiada(sender, instance, **kwargs):
+    programar_recalculo([instance.sede_id])
+
+
+# Campos del catálogo de los que depende la aplicabilidad (ver calcular_criterios_aplicables)
+CAMPOS_APLICABILIDAD = {
+    Criterio: ('activo', 'tipo_criterio', 'es_titulo', 'estandar', 'complejidad_aplica', 'modalidad_aplica'),
+    Estandar: ('activo', 'grupo'),
+    GrupoEstandar: ('activo', 'codigo'),
+}
+
+
+@receiver(pre_save, sender=Criterio)
+@receiver(pre_save, sender=Estandar)
+@receiver(pre_save, sender=GrupoEstandar)
+def catalogo_por_guardar(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Marca si el guardado cambia algún campo de aplicabilidad (corregir un texto no recalcula)"""
+    campos = CAMPOS_APLICABILIDAD[sender]
+    if raw or instance._state.adding or instance.pk is None:
+        instance._cambia_aplicabilidad = True
+        return
+    if update_fields is not None:
+        nombres = {sender._meta.get_field(campo).attname for campo in campos} | set(campos)
+        if not nombres & set(update_fields):
+            instance._cambia_aplicabilidad = False
+            return
+    atributos = [sender._meta.get_field(campo).attname for campo in campos]
+    anteriores = sender.objects.filter(pk=instance.pk).values_list(*atributos).first()
+    instance._cambia_aplicabilidad = (
+        anteriores is None or anteriores != tuple(getattr(instance, atributo) for atributo in atributos)
+    )
+
+
+@receiver(post_save, sender=Criterio)
+@receiver(post_save, sender=Estandar)
+@receiver(post_save, sender=GrupoEstandar)
+def catalogo_cambiado(sender, instance, raw=False, **kwargs):
+    """Un cambio de aplicabilidad en el catálogo afecta a todas las sedes ya calculadas"""
+    if raw:
+        return
+    incrementar([AMBITO_CATALOGO])
+    if getattr(instance, '_cambia_aplicabilidad', True):
+        programar_recalculo(
+            Sede.objects.filter(version_aplicabilidad__gt=0).values_list('pk', flat=True)
+        )
+
+
+@receiver(post_save, sender=Sede)
+def sede_guardada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        incrementar_sedes([instance.pk])
+
+
+@receiver(post_delete, sender=Sede)
+def sede_eliminada(sender, instance, **kwargs):
+    incrementar([ambito_entidad(instance.entidad_id)])
+
+
+@receiver(post_save, sender=EntidadPrestadora)
+def entidad_guardada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        incrementar([ambito_entidad(instance.pk)])
+
+
+@receiver(post_save, sender=EvaluacionCriterio)
+@receiver(post_delete, sender=EvaluacionCriterio)
+@receiver(post_save, sender=Evaluacion)
+@receiver(post_delete, sender=Evaluacion)
+def evaluacion_cambiada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        incrementar_sedes([instance.sede_id])
+
+
+@receiver(post_save, sender=ArchivoRepositorio)
+@receiver(post_delete, sender=ArchivoRepositorio)
+def archivo_cambiado(sender, instance, raw=False, **kwargs):
+    if not raw:
+        incrementar_sedes(
+            EvaluacionCriterio.objects.filter(pk=instance.evaluacion_id).values_list('sede_id', flat=True)
+        )
+
+
+@receiver(post_delete, sender=ArchivoRepositorio)
+def archivo_eliminado(sender, instance, **kwargs):
+    """Libera el contenido en cualquier borrado: eliminar(), cascada o Admin"""
+    instance.liberar_contenido()
+
+
+@receiver(aplicabilidad_actualizada)
+def aplicabilidad_cambiada(sender, sede_id, **kwargs):
+    incrementar_sedes([sede_id])
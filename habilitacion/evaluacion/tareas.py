@@ -0,0 +1,23 @@
+"""
+Tareas en segundo plano del módulo de evaluación
+"""
+
+from core.tareas import tarea
+
+
+@tarea('evaluacion.generar_versiones')
+def generar_versiones_contenido(contenido_id):
+    """Genera miniatura y versión PDF de un contenido del repositorio"""
+    from .models import ContenidoArchivo
+    from .versiones import generar_versiones
+
+    contenido = ContenidoArchivo.objects.filter(pk=contenido_id).first()
+    if contenido is None:
+        # El archivo se eliminó antes de procesar la tarea
+        return {'estado': 'OMITIDA'}
+
+    try:
+        return generar_versiones(contenido)
+    except Exception:
+        ContenidoArchivo.objects.filter(pk=contenido_id).update(estado_versiones='ERROR')
+        raise
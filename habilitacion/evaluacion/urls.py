@@ -10,6 +10,9 @@ urlpatterns = [
     path('vigencias/nueva/', views.crear_vigencia, name='crear_vigencia'),
     path('vigencias/<int:pk>/', views.detalle_vigencia, name='detalle_vigencia'),
     path('vigencias/<int:pk>/editar/', views.editar_vigencia, name='editar_vigencia'),
+    path('vigencias/<int:pk>/cerrar/', views.congelar_vigencia, name='congelar_vigencia'),
+    path('vigencias/<int:pk>/reabrir/', views.reabrir_vigencia, name='reabrir_vigencia'),
+    path('vigencias/<int:pk>/comparar/', views.comparar_vigencias, name='comparar_vigencias'),
 
     # ===== EVALUACIONES LEGACY (mantener por compatibilidad) =====
     path('lista/', views.lista_evaluaciones, name='lista'),
@@ -50,6 +53,7 @@ urlpatterns = [
 
     # Resumen de evaluación de sede
     path('sede/<int:sede_pk>/resumen/', views.resumen_evaluacion_sede, name='sede_resumen'),
+    path('sede/<int:sede_pk>/evidencias.zip', views.paquete_evidencias_sede, name='sede_paquete_evidencias'),
 
     # ===== LEGACY: Mantener por compatibilidad =====
     path('mi-evaluacion/', views.dashboard_evaluacion_entidad, name='dashboard_entidad'),
@@ -58,9 +62,25 @@ urlpatterns = [
 
     # ===== API AJAX PARA GUARDADO AUTOMATICO (SEDE) =====
     path('api/guardar-criterio/', views.guardar_evaluacion_criterio_sede, name='api_guardar_criterio'),
+    path('api/guardar-criterios-lote/', views.guardar_evaluaciones_criterio_lote, name='api_guardar_criterios_lote'),
     path('api/subir-archivo/<int:evaluacion_pk>/', views.subir_archivo_criterio_sede, name='api_subir_archivo'),
     path('api/eliminar-archivo/<int:archivo_pk>/', views.eliminar_archivo_criterio_sede, name='api_eliminar_archivo'),
 
+    # ===== API DE CARGA FRAGMENTADA Y REANUDABLE =====
+    path('api/cargas/iniciar/<int:evaluacion_pk>/', views.iniciar_carga_archivo, name='api_iniciar_carga'),
+    path('api/cargas/<uuid:token>/', views.estado_carga_archivo, name='api_estado_carga'),
+    path('api/cargas/<uuid:token>/fragmento/<int:indice>/', views.subir_fragmento_archivo, name='api_fragmento_carga'),
+    path('api/cargas/<uuid:token>/completar/', views.completar_carga_archivo, name='api_completar_carga'),
+
+    # ===== API DE LECTURA (JSON con ETag / If-None-Match) =====
+    path('api/sedes/<int:sede_pk>/resumen/', views.api_resumen_sede, name='api_resumen_sede'),
+    path('api/entidades/<int:entidad_pk>/resumen/', views.api_resumen_entidad, name='api_resumen_entidad'),
+    path(
+        'api/sedes/<int:sede_pk>/estandares/<int:estandar_pk>/criterios/',
+        views.api_criterios_sede, name='api_criterios_sede'
+    ),
+
     # ===== PREVIEW DE ARCHIVOS (para auditores) =====
     path('preview-archivo/<int:archivo_pk>/', views.preview_archivo, name='preview_archivo'),
+    path('miniatura-archivo/<int:archivo_pk>/', views.miniatura_archivo, name='miniatura_archivo'),
 ]
@@ -0,0 +1,148 @@
+"""
+Generación de versiones derivadas de los archivos del repositorio:
+miniaturas PNG y conversión a PDF de documentos de Office.
+
+- Imágenes: Pillow.
+- PDF (primera página): PyMuPDF si está instalado, si no `pdftoppm` (poppler-utils).
+- Word/Excel/PowerPoint: LibreOffice (`soffice --headless --convert-to pdf`).
+
+Si la herramienta necesaria no está disponible la versión simplemente no se genera.
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+
+TAMANO_MINIATURA = (320, 320)
+TIEMPO_MAXIMO_CONVERSION = 120
+
+EXTENSIONES_IMAGEN = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tif', '.tiff']
+EXTENSIONES_OFIMATICA = ['.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt', '.ods', '.odp']
+
+
+def miniatura_desde_imagen(origen):
+    """Reduce una imagen a TAMANO_MINIATURA y la retorna como PNG (bytes)"""
+    from PIL import Image, ImageOps
+
+    with Image.open(origen) as imagen:
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen.thumbnail(TAMANO_MINIATURA)
+        if imagen.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            imagen = imagen.convert('RGBA' if 'A' in imagen.getbands() else 'RGB')
+        salida = io.BytesIO()
+        imagen.save(salida, format='PNG', optimize=True)
+    return salida.getvalue()
+
+
+def primera_pagina_pdf(ruta_pdf):
+    """
+    Renderiza la primera página de un PDF como PNG (bytes), ya reducida a miniatura.
+    Retorna None si no hay un renderizador disponible.
+    """
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        fitz = None
+
+    if fitz is not None:
+        with fitz.open(ruta_pdf) as documento:
+            if documento.page_count == 0:
+                return None
+            pagina = documento.load_page(0)
+            escala = TAMANO_MINIATURA[0] * 2 / max(pagina.rect.width, 1)
+            imagen = pagina.get_pixmap(matrix=fitz.Matrix(escala, escala)).tobytes('png')
+        return miniatura_desde_imagen(io.BytesIO(imagen))
+
+    pdftoppm = shutil.which('pdftoppm')
+    if not pdftoppm:
+        return None
+
+    with tempfile.TemporaryDirectory() as directorio:
+        prefijo = os.path.join(directorio, 'pagina')
+        subprocess.run(
+            [pdftoppm, '-png', '-f', '1', '-l', '1', '-singlefile',
+             '-scale-to', str(TAMANO_MINIATURA[0] * 2), ruta_pdf, prefijo],
+            check=True, capture_output=True, timeout=TIEMPO_MAXIMO_CONVERSION
+        )
+        with open(prefijo + '.png', 'rb') as imagen:
+            return miniatura_desde_imagen(imagen)
+
+
+def convertir_a_pdf(ruta_documento):
+    """
+    Convierte un documento de Office a PDF con LibreOffice y retorna los bytes.
+    Retorna None si LibreOffice no está instalado.
+    """
+    soffice = shutil.which('soffice') or shutil.which('libreoffice')
+    if not soffice:
+        return None
+
+    with tempfile.TemporaryDirectory() as directorio:
+        # Perfil propio por conversión: LibreOffice no admite dos procesos con el mismo perfil
+        perfil = 'file://' + os.path.join(directorio, 'perfil')
+        subprocess.run(
+            [soffice, f'-env:UserInstallation={perfil}', '--headless',
+             '--convert-to', 'pdf', '--outdir', directorio, ruta_documento],
+            check=True, capture_output=True, timeout=TIEMPO_MAXIMO_CONVERSION
+        )
+        nombre_pdf = os.path.splitext(os.path.basename(ruta_documento))[0] + '.pdf'
+        ruta_pdf = os.path.join(directorio, nombre_pdf)
+        if not os.path.exists(ruta_pdf):
+            raise RuntimeError('LibreOffice no generó el PDF')
+        with open(ruta_pdf, 'rb') as pdf:
+            return pdf.read()
+
+
+def generar_versiones(contenido):
+    """
+    Genera la miniatura y, para documentos de Office, la versión PDF de un
+    ContenidoArchivo. Guarda los archivos junto al original y actualiza el estado.
+    """
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+
+    extension = os.path.splitext(contenido.archivo.name)[1].lower()
+    miniatura = None
+    version_pdf = None
+
+    with tempfile.TemporaryDirectory() as directorio:
+        # Copia local: el almacenamiento puede no ser el sistema de archivos
+        ruta_local = os.path.join(directorio, f'original{extension}')
+        with contenido.archivo.open('rb') as original, open(ruta_local, 'wb') as copia:
+            shutil.copyfileobj(original, copia)
+
+        if extension in EXTENSIONES_IMAGEN:
+            miniatura = miniatura_desde_imagen(ruta_local)
+        elif extension == '.pdf':
+            miniatura = primera_pagina_pdf(ruta_local)
+        elif extension in EXTENSIONES_OFIMATICA:
+            version_pdf = convertir_a_pdf(ruta_local)
+            if version_pdf:
+                ruta_pdf = os.path.join(directorio, 'version.pdf')
+                with open(ruta_pdf, 'wb') as pdf:
+                    pdf.write(version_pdf)
+                miniatura = primera_pagina_pdf(ruta_pdf)
+
+    campos = ['estado_versiones']
+    for campo, datos, sufijo in (
+        (contenido.miniatura, miniatura, 'miniatura.png'),
+        (contenido.version_pdf, version_pdf, 'vista.pdf'),
+    ):
+        if datos is None:
+            continue
+        ruta = contenido.ruta_version(sufijo)
+        # Un reintento reemplaza la versión anterior en lugar de crear otra con sufijo
+        if default_storage.exists(ruta):
+            default_storage.delete(ruta)
+        campo.name = default_storage.save(ruta, ContentFile(datos))
+        campos.append(campo.field.name)
+
+    contenido.estado_versiones = 'LISTA' if (miniatura or version_pdf) else 'SIN_SOPORTE'
+    contenido.save(update_fields=campos)
+    return {
+        'estado': contenido.estado_versiones,
+        'miniatura': bool(miniatura),
+        'version_pdf': bool(version_pdf),
+    }
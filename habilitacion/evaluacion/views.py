@@ -7,14 +7,27 @@ Sistema basado en SEDES (no en Entidades).
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.conf import settings
 from django.utils import timezone
-from django.http import JsonResponse, FileResponse, HttpResponse
-from django.views.decorators.http import require_POST
+from django.http import JsonResponse, FileResponse, HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET, require_POST
 from django.views.decorators.clickjacking import xframe_options_sameorigin
 import mimetypes
+import os
+from urllib.parse import quote
+from django.db import transaction
 from django.db.models import Count, Q
-from .models import Evaluacion, DocumentoEvaluacion, HistorialEvaluacion, ResumenCumplimiento, PeriodoEvaluacion, EvaluacionCriterio, ArchivoRepositorio
+from .models import (
+    Evaluacion, DocumentoEvaluacion, HistorialEvaluacion, ResumenCumplimiento, PeriodoEvaluacion,
+    EvaluacionCriterio, ArchivoRepositorio, ContenidoArchivo, CargaArchivo
+)
 from entidades.models import EntidadPrestadora, Sede, ConfiguracionEvaluacionSede
+from .aplicabilidad import GRUPO_OBLIGATORIO, aplica, asegurar, resumen_aplicable, resumen_vacio
+from core.auditoria import registrar_historial
+from reportes.cartera import programar_actualizacion as programar_actualizacion_cartera
+from core.versiones import (
+    AMBITO_CATALOGO, ambito_entidad, ambito_sede, incrementar_sedes, respuesta_condicional
+)
 from estandares.models import GrupoEstandar, Estandar, Criterio, Servicio
 from usuarios.models import Usuario
 import json
@@ -27,10 +40,10 @@ import json
 @login_required
 def lista_vigencias(request):
     """Lista de vigencias/períodos de evaluación"""
-    if request.user.rol == 'SUPER':
+    if request.principal.es_super:
         vigencias = PeriodoEvaluacion.objects.all().select_related('entidad')
-    elif request.user.entidad:
-        vigencias = PeriodoEvaluacion.objects.filter(entidad=request.user.entidad)
+    elif request.principal.entidad_id:
+        vigencias = PeriodoEvaluacion.objects.filter(entidad_id=request.principal.entidad_id)
     else:
         vigencias = PeriodoEvaluacion.objects.none()
 
@@ -43,10 +56,10 @@ def lista_vigencias(request):
 @login_required
 def crear_vigencia(request):
     """Crear nueva vigencia/período de evaluación"""
-    if request.user.rol == 'SUPER':
+    if request.principal.es_super:
         entidades = EntidadPrestadora.objects.filter(estado='ACTIVO')
     else:
-        entidades = EntidadPrestadora.objects.filter(pk=request.user.entidad_id)
+        entidades = EntidadPrestadora.objects.filter(pk=request.principal.entidad_id)
 
     if request.method == 'POST':
         try:
@@ -77,13 +90,21 @@ def detalle_vigencia(request, pk):
     """Detalle de una vigencia con resumen de cumplimiento"""
     vigencia = get_object_or_404(PeriodoEvaluacion, pk=pk)
 
-    # Calcular porcentaje de cumplimiento
-    vigencia.calcular_porcentaje_cumplimiento()
-
     # Obtener resúmenes por grupo
     grupos = GrupoEstandar.objects.filter(activo=True)
     sedes = vigencia.entidad.sedes.filter(activa=True)
 
+    if vigencia.congelado:
+        # Vigencia cerrada: los conteos salen de la instantánea, sin recontar
+        from .instantaneas import resumen_grupos
+
+        conteos = resumen_grupos(vigencia)
+        resumenes_grupos = [dict(conteos[grupo.pk], grupo=grupo) for grupo in grupos if grupo.pk in conteos]
+        return _render_detalle_vigencia(request, vigencia, sedes, resumenes_grupos)
+
+    # Calcular porcentaje de cumplimiento
+    vigencia.calcular_porcentaje_cumplimiento()
+
     resumenes_grupos = []
     for grupo in grupos:
         total_c = 0
@@ -117,11 +138,109 @@ def detalle_vigencia(request, pk):
             'porcentaje': porcentaje
         })
 
+    return _render_detalle_vigencia(request, vigencia, sedes, resumenes_grupos)
+
+
+def _render_detalle_vigencia(request, vigencia, sedes, resumenes_grupos):
     return render(request, 'evaluacion/vigencias/detalle.html', {
         'titulo': vigencia.nombre,
         'vigencia': vigencia,
         'sedes': sedes,
         'resumenes_grupos': resumenes_grupos,
+        'puede_cerrar': (
+            request.principal.puede_aprobar and request.principal.accede_entidad(vigencia.entidad_id)
+        ),
+    })
+
+
+@login_required
+@require_POST
+def congelar_vigencia(request, pk):
+    """
+    Cierra la vigencia guardando una instantánea del estado de los criterios de
+    cada sede activa. Una vigencia ya cerrada debe reabrirse antes.
+    """
+    from .instantaneas import congelar
+
+    vigencia = get_object_or_404(PeriodoEvaluacion, pk=pk)
+
+    if not (request.principal.puede_aprobar and request.principal.accede_entidad(vigencia.entidad_id)):
+        messages.error(request, 'No tiene permisos para cerrar esta vigencia.')
+        return redirect('evaluacion:detalle_vigencia', pk=vigencia.pk)
+
+    try:
+        instantaneas = congelar(vigencia)
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('evaluacion:detalle_vigencia', pk=vigencia.pk)
+    messages.success(
+        request, f'Vigencia "{vigencia.nombre}" cerrada con la instantánea de {len(instantaneas)} sede(s).'
+    )
+    return redirect('evaluacion:detalle_vigencia', pk=vigencia.pk)
+
+
+@login_required
+@require_POST
+def reabrir_vigencia(request, pk):
+    """
+    Reabre una vigencia cerrada. Su instantánea se reemplazará con el estado de
+    los criterios del día en que se vuelva a cerrar.
+    """
+    from .instantaneas import reabrir
+
+    vigencia = get_object_or_404(PeriodoEvaluacion, pk=pk)
+
+    if not (request.principal.puede_aprobar and request.principal.accede_entidad(vigencia.entidad_id)):
+        messages.error(request, 'No tiene permisos para reabrir esta vigencia.')
+        return redirect('evaluacion:detalle_vigencia', pk=vigencia.pk)
+
+    if not vigencia.congelado:
+        messages.error(request, 'La vigencia no está cerrada.')
+        return redirect('evaluacion:detalle_vigencia', pk=vigencia.pk)
+
+    reabrir(vigencia)
+    messages.warning(
+        request,
+        f'Vigencia "{vigencia.nombre}" reabierta. Al cerrarla de nuevo se reemplazará la instantánea anterior.'
+    )
+    return redirect('evaluacion:detalle_vigencia', pk=vigencia.pk)
+
+
+@login_required
+def comparar_vigencias(request, pk):
+    """
+    Diferencias de cumplimiento entre la vigencia y otra vigencia cerrada de la
+    misma entidad (?con=<pk>, por defecto la cerrada inmediatamente anterior),
+    leídas de sus instantáneas.
+    """
+    from .instantaneas import comparar
+
+    vigencia = get_object_or_404(PeriodoEvaluacion.objects.select_related('entidad'), pk=pk)
+
+    if not request.principal.accede_entidad(vigencia.entidad_id):
+        messages.error(request, 'No tiene acceso a esta vigencia.')
+        return redirect('evaluacion:lista_vigencias')
+
+    if not vigencia.congelado:
+        messages.error(request, 'La vigencia debe estar cerrada para compararla.')
+        return redirect('evaluacion:detalle_vigencia', pk=vigencia.pk)
+
+    cerradas = PeriodoEvaluacion.objects.filter(
+        entidad_id=vigencia.entidad_id, fecha_cierre__isnull=False
+    ).exclude(pk=vigencia.pk).order_by('-fecha_inicio')
+    con = request.GET.get('con', '')
+    if con.isdigit():
+        anterior = cerradas.filter(pk=con).first()
+    else:
+        anterior = cerradas.filter(fecha_inicio__lt=vigencia.fecha_inicio).first()
+
+    return render(request, 'evaluacion/vigencias/comparar.html', {
+        'titulo': f'Comparar {vigencia.nombre}',
+        'vigencia': vigencia,
+        'anterior': anterior,
+        'cerradas': cerradas,
+        'sedes': comparar(anterior, vigencia) if anterior else [],
+        'estados': dict(EvaluacionCriterio.ESTADOS),
     })
 
 
@@ -130,10 +249,10 @@ def editar_vigencia(request, pk):
     """Editar vigencia existente"""
     vigencia = get_object_or_404(PeriodoEvaluacion, pk=pk)
 
-    if request.user.rol == 'SUPER':
+    if request.principal.es_super:
         entidades = EntidadPrestadora.objects.filter(estado='ACTIVO')
     else:
-        entidades = EntidadPrestadora.objects.filter(pk=request.user.entidad_id)
+        entidades = EntidadPrestadora.objects.filter(pk=request.principal.entidad_id)
 
     if request.method == 'POST':
         try:
@@ -166,14 +285,14 @@ def editar_vigencia(request, pk):
 @login_required
 def lista_evaluaciones(request):
     """Lista de evaluaciones"""
-    if request.user.rol == 'SUPER':
+    if request.principal.es_super:
         evaluaciones = Evaluacion.objects.all().select_related('sede', 'criterio')[:100]
         entidades = EntidadPrestadora.objects.all()
-    elif request.user.entidad:
+    elif request.principal.entidad_id:
         evaluaciones = Evaluacion.objects.filter(
-            sede__entidad=request.user.entidad
+            sede__entidad_id=request.principal.entidad_id
         ).select_related('sede', 'criterio')[:100]
-        entidades = EntidadPrestadora.objects.filter(pk=request.user.entidad_id)
+        entidades = EntidadPrestadora.objects.filter(pk=request.principal.entidad_id)
     else:
         evaluaciones = Evaluacion.objects.none()
         entidades = EntidadPrestadora.objects.none()
@@ -270,7 +389,7 @@ def editar_evaluacion(request, pk):
     """Editar una evaluación"""
     evaluacion = get_object_or_404(Evaluacion, pk=pk)
 
-    if not evaluacion.puede_editar and not request.user.es_administrador:
+    if not evaluacion.puede_editar and not request.principal.es_administrador:
         messages.error(request, 'Esta evaluación ya está aprobada y no puede ser editada.')
         return redirect('evaluacion:detalle', pk=pk)
 
@@ -282,7 +401,7 @@ def editar_evaluacion(request, pk):
         evaluacion.modificado_por = request.user
         evaluacion.save()
 
-        HistorialEvaluacion.objects.create(
+        registrar_historial(
             evaluacion=evaluacion,
             usuario=request.user,
             accion='EDITAR',
@@ -305,7 +424,7 @@ def aprobar_evaluacion(request, pk):
     """Aprobar una evaluación"""
     evaluacion = get_object_or_404(Evaluacion, pk=pk)
 
-    if not request.user.puede_aprobar:
+    if not request.principal.puede_aprobar:
         messages.error(request, 'No tiene permisos para aprobar evaluaciones.')
         return redirect('evaluacion:detalle', pk=pk)
 
@@ -404,7 +523,7 @@ def evaluar_criterio(request, sede_pk, criterio_pk):
     usuarios = Usuario.objects.filter(is_active=True, entidad=sede.entidad)
 
     # Verificar si el documento está bloqueado
-    bloqueado = evaluacion.estado_documento == 'AP' and not request.user.es_administrador
+    bloqueado = evaluacion.estado_documento == 'AP' and not request.principal.es_administrador
 
     if request.method == 'POST' and not bloqueado:
         estado_anterior = evaluacion.estado
@@ -448,7 +567,7 @@ def evaluar_criterio(request, sede_pk, criterio_pk):
         evaluacion.save()
 
         # Registrar en historial
-        HistorialEvaluacion.objects.create(
+        registrar_historial(
             evaluacion=evaluacion,
             usuario=request.user,
             accion='EDITAR',
@@ -509,79 +628,42 @@ def evaluar_criterio(request, sede_pk, criterio_pk):
 @login_required
 @require_POST
 def generar_documento_ia(request, pk):
-    """Genera contenido de documento usando OpenAI API"""
-    evaluacion = get_object_or_404(Evaluacion, pk=pk)
+    """
+    Encola la generación del documento con IA y responde de inmediato (202).
+    La interfaz consulta el estado de la SolicitudIA; al completarse, el
+    trabajador guarda el contenido en el DocumentoEvaluacion.
+    """
+    from documentos.ia import (
+        crear_solicitud, datos_solicitud, ia_disponible, prompt_documento_criterio
+    )
 
-    if evaluacion.estado_documento == 'AP' and not request.user.es_administrador:
+    evaluacion = get_object_or_404(Evaluacion.objects.select_related('sede', 'criterio'), pk=pk)
+
+    if evaluacion.estado_documento == 'AP' and not request.principal.es_administrador:
         return JsonResponse({'error': 'El documento está aprobado y no puede modificarse.'}, status=403)
 
-    try:
-        import openai
-        from django.conf import settings
-
-        prompt = request.POST.get('prompt', '')
-        criterio_texto = evaluacion.criterio.texto
-
-        # Construir prompt para la IA
-        prompt_completo = f"""
-        Eres un experto en habilitación de servicios de salud en Colombia,
-        específicamente en la Resolución 3100 de 2019.
-
-        Criterio a documentar:
-        {criterio_texto}
-
-        Instrucción del usuario: {prompt}
-
-        Genera un documento profesional en formato HTML que demuestre el cumplimiento
-        de este criterio. El documento debe ser formal, específico y aplicable a
-        una institución prestadora de servicios de salud.
-        """
-
-        # Llamar a la API de OpenAI
-        client = openai.OpenAI(api_key=getattr(settings, 'OPENAI_API_KEY', ''))
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Eres un experto en documentación de calidad en salud para Colombia."},
-                {"role": "user", "content": prompt_completo}
-            ],
-            max_tokens=2000
-        )
+    entidad = evaluacion.sede.entidad
+    if not request.principal.accede_entidad(entidad.pk):
+        return JsonResponse({'error': 'No tiene acceso'}, status=403)
 
-        contenido_generado = response.choices[0].message.content
+    disponible, mensaje = ia_disponible(entidad)
+    if not disponible:
+        return JsonResponse({'error': mensaje}, status=400)
 
-        # Guardar o actualizar documento
-        doc, created = DocumentoEvaluacion.objects.get_or_create(
-            evaluacion=evaluacion,
-            defaults={
-                'nombre': f'Documento - {evaluacion.criterio.numero}',
-                'contenido_html': contenido_generado,
-                'generado_con_ia': True,
-                'prompt_ia': prompt,
-                'creado_por': request.user
-            }
-        )
-
-        if not created:
-            doc.contenido_html = contenido_generado
-            doc.generado_con_ia = True
-            doc.prompt_ia = prompt
-            doc.save()
+    prompt = request.POST.get('prompt', '')
 
-        # Actualizar estado del documento a "En Desarrollo"
-        if evaluacion.estado_documento == 'NT':
-            evaluacion.estado_documento = 'ED'
-            evaluacion.save()
+    # Construir prompt para la IA
+    prompt_completo = prompt_documento_criterio(evaluacion, prompt)
 
-        return JsonResponse({
-            'success': True,
-            'contenido': contenido_generado
-        })
+    # Con sin_cache=1 se fuerza una nueva generación aunque exista una respuesta idéntica
+    solicitud = crear_solicitud(
+        request.user, entidad, prompt_completo, instruccion=prompt, evaluacion=evaluacion,
+        usar_cache=request.POST.get('sin_cache') != '1'
+    )
 
-    except Exception as e:
-        return JsonResponse({
-            'error': f'Error al generar documento: {str(e)}'
-        }, status=500)
+    datos = datos_solicitud(solicitud)
+    datos['success'] = True
+    return JsonResponse(datos, status=200 if solicitud.terminada else 202)
 
 
 @login_required
@@ -625,7 +707,7 @@ def iniciar_evaluacion_sede(request, sede_pk):
 @login_required
 def dashboard_evaluacion_entidad(request):
     """Dashboard de evaluacion para la entidad del usuario"""
-    if not request.user.entidad:
+    if not request.principal.entidad_id:
         messages.error(request, 'No tiene una entidad asignada.')
         return redirect('core:dashboard')
 
@@ -700,7 +782,7 @@ def dashboard_evaluacion_entidad(request):
 @login_required
 def tabla_criterios_estandar(request, estandar_pk):
     """Vista de tabla para evaluar criterios de un estandar"""
-    if not request.user.entidad:
+    if not request.principal.entidad_id:
         messages.error(request, 'No tiene una entidad asignada.')
         return redirect('core:dashboard')
 
@@ -715,14 +797,14 @@ def tabla_criterios_estandar(request, estandar_pk):
     ).exists()
 
     # Los estandares del grupo 11.1 son obligatorios
-    es_obligatorio = estandar.grupo.codigo.startswith('11.1')
+    es_obligatorio = estandar.grupo.codigo.startswith(GRUPO_OBLIGATORIO)
 
     if not tiene_acceso and not es_obligatorio:
         messages.error(request, 'No tiene acceso a este estandar.')
         return redirect('evaluacion:dashboard_entidad')
 
     # Obtener criterios del estandar
-    criterios = estandar.criterios.filter(activo=True, es_titulo=False).order_by('orden', 'numero')
+    criterios = estandar.criterios.filter(activo=True, es_titulo=False).order_by('clave_orden', 'orden')
 
     # Obtener o crear evaluaciones para cada criterio
     evaluaciones_data = []
@@ -735,7 +817,7 @@ def tabla_criterios_estandar(request, estandar_pk):
         evaluaciones_data.append({
             'criterio': criterio,
             'evaluacion': evaluacion,
-            'archivos': evaluacion.archivos_repositorio.all()
+            'archivos': evaluacion.archivos_repositorio.select_related('contenido')
         })
 
     # Obtener usuarios de la entidad para asignar responsables
@@ -755,7 +837,7 @@ def tabla_criterios_estandar(request, estandar_pk):
 @require_POST
 def guardar_evaluacion_criterio(request):
     """API para guardar evaluacion de un criterio (AJAX)"""
-    if not request.user.entidad:
+    if not request.principal.entidad_id:
         return JsonResponse({'error': 'No tiene entidad asignada'}, status=403)
 
     try:
@@ -767,7 +849,7 @@ def guardar_evaluacion_criterio(request):
         evaluacion = get_object_or_404(
             EvaluacionCriterio,
             pk=evaluacion_id,
-            entidad=request.user.entidad
+            entidad_id=request.principal.entidad_id
         )
 
         # Actualizar el campo correspondiente
@@ -799,29 +881,27 @@ def guardar_evaluacion_criterio(request):
 @require_POST
 def subir_archivo_criterio(request, evaluacion_pk):
     """Subir archivo al repositorio de un criterio"""
-    if not request.user.entidad:
+    if not request.principal.entidad_id:
         return JsonResponse({'error': 'No tiene entidad asignada'}, status=403)
 
     evaluacion = get_object_or_404(
         EvaluacionCriterio,
         pk=evaluacion_pk,
-        entidad=request.user.entidad
+        entidad_id=request.principal.entidad_id
     )
 
     if 'archivo' not in request.FILES:
         return JsonResponse({'error': 'No se envio ningun archivo'}, status=400)
 
     archivo = request.FILES['archivo']
-    nombre = request.POST.get('nombre', archivo.name)
+    nombre = request.POST.get('nombre') or archivo.name
     descripcion = request.POST.get('descripcion', '')
 
-    archivo_repo = ArchivoRepositorio.objects.create(
-        evaluacion=evaluacion,
-        archivo=archivo,
-        nombre=nombre,
-        descripcion=descripcion,
-        subido_por=request.user
-    )
+    with transaction.atomic():
+        contenido = ContenidoArchivo.registrar(archivo, archivo.name)
+        archivo_repo = ArchivoRepositorio.crear_desde_contenido(
+            evaluacion, contenido, nombre, descripcion, request.user
+        )
 
     return JsonResponse({
         'success': True,
@@ -838,17 +918,16 @@ def subir_archivo_criterio(request, evaluacion_pk):
 @require_POST
 def eliminar_archivo_criterio(request, archivo_pk):
     """Eliminar archivo del repositorio"""
-    if not request.user.entidad:
+    if not request.principal.entidad_id:
         return JsonResponse({'error': 'No tiene entidad asignada'}, status=403)
 
     archivo = get_object_or_404(
         ArchivoRepositorio,
         pk=archivo_pk,
-        evaluacion__entidad=request.user.entidad
+        evaluacion__entidad_id=request.principal.entidad_id
     )
 
-    archivo.archivo.delete()
-    archivo.delete()
+    archivo.eliminar()
 
     return JsonResponse({'success': True})
 
@@ -856,7 +935,7 @@ def eliminar_archivo_criterio(request, archivo_pk):
 @login_required
 def lista_estandares_evaluar(request):
     """Lista de estandares disponibles para evaluar"""
-    if not request.user.entidad:
+    if not request.principal.entidad_id:
         messages.error(request, 'No tiene una entidad asignada.')
         return redirect('core:dashboard')
 
@@ -875,7 +954,7 @@ def lista_estandares_evaluar(request):
 
     for grupo in grupos:
         # Grupo 11.1 es obligatorio para todos
-        es_obligatorio = grupo.codigo.startswith('11.1')
+        es_obligatorio = grupo.codigo.startswith(GRUPO_OBLIGATORIO)
 
         if es_obligatorio or grupo.id in configuraciones:
             for estandar in grupo.estandares.filter(activo=True):
@@ -909,59 +988,32 @@ def lista_estandares_evaluar(request):
 @login_required
 def lista_sedes_evaluar(request):
     """Lista de sedes disponibles para evaluar"""
-    if not request.user.entidad:
+    if not request.principal.entidad_id:
         messages.error(request, 'No tiene una entidad asignada.')
         return redirect('core:dashboard')
 
     entidad = request.user.entidad
-    sedes = Sede.objects.filter(entidad=entidad, activa=True)
+    sedes = list(Sede.objects.filter(entidad=entidad, activa=True))
+
+    # Conteos de todas las sedes en una consulta contra la matriz de aplicabilidad
+    resumenes = resumen_aplicable(sedes, por='sede_id')
+    grupos_por_sede = dict(
+        ConfiguracionEvaluacionSede.objects.filter(sede__in=sedes, activo=True)
+        .values('sede_id').annotate(cantidad=Count('id')).values_list('sede_id', 'cantidad')
+    )
 
-    # Calcular estadísticas por sede
     sedes_data = []
     for sede in sedes:
-        # Obtener grupos habilitados para esta sede
-        grupos_habilitados = ConfiguracionEvaluacionSede.objects.filter(
-            sede=sede, activo=True
-        ).select_related('grupo_estandar')
-
-        # Contar criterios y evaluaciones
-        total_criterios = 0
-        evaluados = 0
-        cumple = 0
-        no_cumple = 0
-        no_aplica = 0
-
-        for config in grupos_habilitados:
-            grupo = config.grupo_estandar
-            criterios_grupo = Criterio.objects.filter(
-                estandar__grupo=grupo,
-                activo=True,
-                es_titulo=False
-            ).count()
-            total_criterios += criterios_grupo
-
-            evals = EvaluacionCriterio.objects.filter(
-                sede=sede,
-                criterio__estandar__grupo=grupo
-            )
-            evaluados += evals.exclude(estado='P').count()
-            cumple += evals.filter(estado='C').count()
-            no_cumple += evals.filter(estado='NC').count()
-            no_aplica += evals.filter(estado='NA').count()
-
-        # Porcentaje de cumplimiento (sobre criterios que aplican)
-        criterios_aplican = total_criterios - no_aplica
-        porcentaje = round((cumple / criterios_aplican * 100), 1) if criterios_aplican > 0 else 0
-
+        resumen = resumenes.get(sede.pk) or resumen_vacio()
         sedes_data.append({
             'sede': sede,
-            'total_criterios': total_criterios,
-            'evaluados': evaluados,
-            'cumple': cumple,
-            'no_cumple': no_cumple,
-            'no_aplica': no_aplica,
-            'porcentaje': porcentaje,
-            'grupos_habilitados': grupos_habilitados.count()
+            'total_criterios': resumen['total'],
+            'evaluados': resumen['evaluados'],
+            'cumple': resumen['cumple'],
+            'no_cumple': resumen['no_cumple'],
+            'no_aplica': resumen['no_aplica'],
+            'porcentaje': resumen['porcentaje'],
+            'grupos_habilitados': grupos_por_sede.get(sede.pk, 0)
         })
 
     return render(request, 'evaluacion/sedes/lista.html', {
@@ -980,7 +1032,7 @@ def sede_categorias(request, sede_pk):
     sede = get_object_or_404(Sede, pk=sede_pk)
 
     # Verificar acceso
-    if request.user.entidad != sede.entidad and request.user.rol != 'SUPER':
+    if not request.principal.accede_entidad(sede.entidad_id):
         messages.error(request, 'No tiene acceso a esta sede.')
         return redirect('evaluacion:sedes_evaluar')
 
@@ -996,44 +1048,13 @@ def sede_categorias(request, sede_pk):
             sede=sede, activo=True
         ).select_related('grupo_estandar')
 
-    categorias_data = []
-    total_criterios_sede = 0
-    total_cumple_sede = 0
-    total_no_cumple_sede = 0
-    total_na_sede = 0
-    total_pendiente_sede = 0
+    resumenes = resumen_aplicable(sede, por='grupo_id')
+    resumen_sede = resumen_aplicable(sede)
 
+    categorias_data = []
     for config in configuraciones:
         grupo = config.grupo_estandar
-
-        # Contar criterios del grupo
-        criterios_grupo = Criterio.objects.filter(
-            estandar__grupo=grupo,
-            activo=True,
-            es_titulo=False
-        )
-        total_criterios = criterios_grupo.count()
-
-        # Contar evaluaciones
-        evals = EvaluacionCriterio.objects.filter(
-            sede=sede,
-            criterio__in=criterios_grupo
-        )
-        cumple = evals.filter(estado='C').count()
-        no_cumple = evals.filter(estado='NC').count()
-        no_aplica = evals.filter(estado='NA').count()
-        pendiente = total_criterios - cumple - no_cumple - no_aplica
-
-        # Acumular totales
-        total_criterios_sede += total_criterios
-        total_cumple_sede += cumple
-        total_no_cumple_sede += no_cumple
-        total_na_sede += no_aplica
-        total_pendiente_sede += pendiente
-
-        # Porcentaje de cumplimiento
-        criterios_aplican = total_criterios - no_aplica
-        porcentaje = round((cumple / criterios_aplican * 100), 1) if criterios_aplican > 0 else 0
+        resumen = resumenes.get(grupo.pk) or resumen_vacio()
 
         # Obtener subcategorías (estándares)
         estandares = Estandar.objects.filter(grupo=grupo, activo=True).order_by('orden')
@@ -1042,30 +1063,26 @@ def sede_categorias(request, sede_pk):
             'grupo': grupo,
             'config': config,
             'estandares': estandares,
-            'total_criterios': total_criterios,
-            'cumple': cumple,
-            'no_cumple': no_cumple,
-            'no_aplica': no_aplica,
-            'pendiente': pendiente,
-            'porcentaje': porcentaje,
-            'es_obligatorio': grupo.codigo == '11.1'
+            'total_criterios': resumen['total'],
+            'cumple': resumen['cumple'],
+            'no_cumple': resumen['no_cumple'],
+            'no_aplica': resumen['no_aplica'],
+            'pendiente': resumen['pendiente'],
+            'porcentaje': resumen['porcentaje'],
+            'es_obligatorio': grupo.codigo == GRUPO_OBLIGATORIO
         })
 
-    # Calcular porcentaje general
-    criterios_aplican_sede = total_criterios_sede - total_na_sede
-    porcentaje_general = round((total_cumple_sede / criterios_aplican_sede * 100), 1) if criterios_aplican_sede > 0 else 0
-
     return render(request, 'evaluacion/sedes/categorias.html', {
         'titulo': f'Evaluación - {sede.nombre}',
         'sede': sede,
         'categorias_data': categorias_data,
         'resumen': {
-            'total_criterios': total_criterios_sede,
-            'cumple': total_cumple_sede,
-            'no_cumple': total_no_cumple_sede,
-            'no_aplica': total_na_sede,
-            'pendiente': total_pendiente_sede,
-            'porcentaje': porcentaje_general
+            'total_criterios': resumen_sede['total'],
+            'cumple': resumen_sede['cumple'],
+            'no_cumple': resumen_sede['no_cumple'],
+            'no_aplica': resumen_sede['no_aplica'],
+            'pendiente': resumen_sede['pendiente'],
+            'porcentaje': resumen_sede['porcentaje']
         }
     })
 
@@ -1080,12 +1097,12 @@ def sede_subcategorias(request, sede_pk, grupo_pk):
     grupo = get_object_or_404(GrupoEstandar, pk=grupo_pk)
 
     # Verificar acceso
-    if request.user.entidad != sede.entidad and request.user.rol != 'SUPER':
+    if not request.principal.accede_entidad(sede.entidad_id):
         messages.error(request, 'No tiene acceso a esta sede.')
         return redirect('evaluacion:sedes_evaluar')
 
     # Verificar que el grupo está habilitado para esta sede
-    es_obligatorio = grupo.codigo == '11.1'
+    es_obligatorio = grupo.codigo == GRUPO_OBLIGATORIO
     config = ConfiguracionEvaluacionSede.objects.filter(
         sede=sede, grupo_estandar=grupo, activo=True
     ).first()
@@ -1097,38 +1114,19 @@ def sede_subcategorias(request, sede_pk, grupo_pk):
     # Obtener estándares del grupo
     estandares = Estandar.objects.filter(grupo=grupo, activo=True).order_by('orden')
 
+    resumenes = resumen_aplicable(sede, por='estandar_id', grupo=grupo)
+
     subcategorias_data = []
     for estandar in estandares:
-        # Contar criterios
-        criterios = Criterio.objects.filter(
-            estandar=estandar,
-            activo=True,
-            es_titulo=False
-        )
-        total_criterios = criterios.count()
-
-        # Contar evaluaciones
-        evals = EvaluacionCriterio.objects.filter(
-            sede=sede,
-            criterio__in=criterios
-        )
-        cumple = evals.filter(estado='C').count()
-        no_cumple = evals.filter(estado='NC').count()
-        no_aplica = evals.filter(estado='NA').count()
-        pendiente = total_criterios - cumple - no_cumple - no_aplica
-
-        # Porcentaje
-        criterios_aplican = total_criterios - no_aplica
-        porcentaje = round((cumple / criterios_aplican * 100), 1) if criterios_aplican > 0 else 0
-
+        resumen = resumenes.get(estandar.pk) or resumen_vacio()
         subcategorias_data.append({
             'estandar': estandar,
-            'total_criterios': total_criterios,
-            'cumple': cumple,
-            'no_cumple': no_cumple,
-            'no_aplica': no_aplica,
-            'pendiente': pendiente,
-            'porcentaje': porcentaje
+            'total_criterios': resumen['total'],
+            'cumple': resumen['cumple'],
+            'no_cumple': resumen['no_cumple'],
+            'no_aplica': resumen['no_aplica'],
+            'pendiente': resumen['pendiente'],
+            'porcentaje': resumen['porcentaje']
         })
 
     return render(request, 'evaluacion/sedes/subcategorias.html', {
@@ -1145,83 +1143,120 @@ def sede_criterios_estandar(request, sede_pk, estandar_pk):
     """
     Vista de criterios para evaluar dentro de un estándar.
     Estructura: Sede -> Categoría -> Subcategoría (Estándar) -> Criterios
+
+    Por defecto el texto de los criterios sale de un fragmento en caché por
+    versión del estándar (común a todas las sedes) y las celdas de estado,
+    documentos y acciones se arman en el navegador desde un JSON compacto con
+    las evaluaciones de la sede. Con ?modo=completo toda la tabla se renderiza
+    en el servidor.
     """
     sede = get_object_or_404(Sede, pk=sede_pk)
-    estandar = get_object_or_404(Estandar, pk=estandar_pk)
+    estandar = get_object_or_404(Estandar.objects.select_related('grupo'), pk=estandar_pk)
 
     # Verificar acceso
-    if request.user.entidad != sede.entidad and request.user.rol != 'SUPER':
+    if not request.principal.accede_entidad(sede.entidad_id):
         messages.error(request, 'No tiene acceso a esta sede.')
         return redirect('evaluacion:sedes_evaluar')
 
+    modo_completo = request.GET.get('modo') == 'completo'
+
     # Obtener criterios del estándar (incluyendo títulos para estructura)
     criterios = Criterio.objects.filter(
         estandar=estandar,
         activo=True
-    ).order_by('orden', 'numero')
-
-    # Crear o obtener evaluaciones
-    criterios_data = []
-    for criterio in criterios:
-        # Solo los criterios de tipo 'CRITERIO' son evaluables
-        if criterio.tipo_criterio != 'CRITERIO':
-            # Es un título o subtítulo, no requiere evaluación
-            criterios_data.append({
-                'criterio': criterio,
-                'es_titulo': True,
-                'tipo': criterio.tipo_criterio,
-                'evaluacion': None
-            })
-        else:
-            # Obtener o crear evaluación para criterios evaluables
-            evaluacion, created = EvaluacionCriterio.objects.get_or_create(
-                sede=sede,
-                criterio=criterio,
-                defaults={'estado': 'P', 'modificado_por': request.user}
-            )
-            criterios_data.append({
-                'criterio': criterio,
-                'es_titulo': False,
-                'tipo': 'CRITERIO',
-                'evaluacion': evaluacion,
-                'archivos_count': evaluacion.cantidad_archivos
-            })
-
-    # Calcular resumen (solo criterios evaluables)
-    evaluaciones = EvaluacionCriterio.objects.filter(
-        sede=sede,
-        criterio__estandar=estandar,
-        criterio__tipo_criterio='CRITERIO'
-    )
-    total = evaluaciones.count()
-    cumple = evaluaciones.filter(estado='C').count()
-    no_cumple = evaluaciones.filter(estado='NC').count()
-    no_aplica = evaluaciones.filter(estado='NA').count()
-    pendiente = total - cumple - no_cumple - no_aplica
-
-    criterios_aplican = total - no_aplica
-    porcentaje = round((cumple / criterios_aplican * 100), 1) if criterios_aplican > 0 else 0
-
-    # Obtener usuarios para asignar responsables
-    usuarios_entidad = Usuario.objects.filter(entidad=sede.entidad, is_active=True)
-
-    return render(request, 'evaluacion/sedes/criterios.html', {
+    ).order_by('clave_orden', 'orden')
+    # En modo compacto el texto solo se lee si el fragmento no está en caché
+    evaluables = [
+        criterio_id for criterio_id, tipo in criterios.values_list('pk', 'tipo_criterio')
+        if tipo == 'CRITERIO' and aplica(sede, criterio_id)
+    ]
+
+    # Miniaturas de evidencias ya generadas (hasta 3 por criterio), en una sola consulta
+    miniaturas = {}
+    archivos_con_miniatura = ArchivoRepositorio.objects.filter(
+        evaluacion__sede=sede,
+        evaluacion__criterio__estandar=estandar,
+        contenido__estado_versiones='LISTA'
+    ).exclude(contenido__miniatura='').order_by('-fecha_subida').only('id', 'nombre', 'evaluacion_id')
+    for archivo in archivos_con_miniatura:
+        lista = miniaturas.setdefault(archivo.evaluacion_id, [])
+        if len(lista) < 3:
+            lista.append(archivo)
+
+    # Evaluaciones de los criterios que aplican a la sede: las que faltan se crean en bloque
+    evaluaciones = {
+        evaluacion.criterio_id: evaluacion
+        for evaluacion in EvaluacionCriterio.objects.filter(sede=sede, criterio__estandar=estandar)
+        .annotate(archivos_count=Count('archivos_repositorio'))
+    }
+    faltantes = [
+        EvaluacionCriterio(sede=sede, criterio_id=criterio_id, estado='P', modificado_por=request.user)
+        for criterio_id in evaluables if criterio_id not in evaluaciones
+    ]
+    if faltantes:
+        EvaluacionCriterio.objects.bulk_create(faltantes, ignore_conflicts=True)
+        incrementar_sedes([sede.pk])
+        programar_actualizacion_cartera(sede_ids=[sede.pk])
+        for evaluacion in EvaluacionCriterio.objects.filter(
+            sede=sede, criterio__in=[e.criterio_id for e in faltantes]
+        ):
+            evaluacion.archivos_count = 0
+            evaluaciones[evaluacion.criterio_id] = evaluacion
+
+    contexto = {
         'titulo': f'{estandar.nombre}',
         'sede': sede,
         'estandar': estandar,
         'grupo': estandar.grupo,
-        'criterios_data': criterios_data,
-        'usuarios_entidad': usuarios_entidad,
         'estados': EvaluacionCriterio.ESTADOS,
-        'resumen': {
-            'total': total,
-            'cumple': cumple,
-            'no_cumple': no_cumple,
-            'no_aplica': no_aplica,
-            'pendiente': pendiente,
-            'porcentaje': porcentaje
+        'resumen': resumen_aplicable(sede, estandar=estandar),
+        'modo_completo': modo_completo,
+    }
+
+    if modo_completo:
+        aplicables = set(evaluables)
+        criterios_data = []
+        for criterio in criterios:
+            # Solo los criterios de tipo 'CRITERIO' son evaluables
+            if criterio.tipo_criterio != 'CRITERIO':
+                # Es un título o subtítulo, no requiere evaluación
+                criterios_data.append({
+                    'criterio': criterio,
+                    'es_titulo': True,
+                    'tipo': criterio.tipo_criterio,
+                    'evaluacion': None
+                })
+            elif criterio.pk in aplicables:
+                evaluacion = evaluaciones[criterio.pk]
+                criterios_data.append({
+                    'criterio': criterio,
+                    'es_titulo': False,
+                    'tipo': 'CRITERIO',
+                    'evaluacion': evaluacion,
+                    'archivos_count': evaluacion.archivos_count,
+                    'miniaturas': miniaturas.get(evaluacion.pk, [])
+                })
+        contexto['criterios_data'] = criterios_data
+    else:
+        # criterio_id -> [evaluacion_id, estado, archivos, [[archivo_id, nombre], ...]]
+        filas = {}
+        for criterio_id in evaluables:
+            evaluacion = evaluaciones[criterio_id]
+            filas[criterio_id] = [
+                evaluacion.pk,
+                evaluacion.estado,
+                evaluacion.archivos_count,
+                [[archivo.pk, archivo.nombre] for archivo in miniaturas.get(evaluacion.pk, [])],
+            ]
+        contexto['criterios'] = criterios
+        contexto['segundos_cache'] = settings.HABILITACION_CONFIG['CACHE_CRITERIOS_SEGUNDOS']
+        contexto['datos_criterios'] = {
+            'solo_lectura': request.principal.solo_lectura,
+            'estados': EvaluacionCriterio.ESTADOS,
+            'evaluaciones': filas,
         }
-    })
+
+    return render(request, 'evaluacion/sedes/criterios.html', contexto)
 
 
 @login_required
@@ -1236,7 +1271,7 @@ def sede_configuracion(request, sede_pk):
     sede = get_object_or_404(Sede, pk=sede_pk)
 
     # Verificar acceso
-    if request.user.entidad != sede.entidad and request.user.rol != 'SUPER':
+    if not request.principal.accede_entidad(sede.entidad_id):
         messages.error(request, 'No tiene acceso a esta sede.')
         return redirect('evaluacion:sedes_evaluar')
 
@@ -1247,29 +1282,31 @@ def sede_configuracion(request, sede_pk):
         estandares_seleccionados = request.POST.getlist('estandares')
 
         # Obtener todos los estándares
-        todos_estandares = Estandar.objects.filter(activo=True)
-
-        for estandar in todos_estandares:
-            es_obligatorio = estandar.grupo.codigo == '11.1'
-            esta_seleccionado = str(estandar.id) in estandares_seleccionados
-
-            if es_obligatorio:
-                # Los estándares del grupo obligatorio siempre están activos
-                ConfiguracionEstandarSede.objects.get_or_create(
-                    sede=sede,
-                    estandar=estandar,
-                    defaults={'activo': True, 'activado_por': request.user}
-                )
-            else:
-                config, created = ConfiguracionEstandarSede.objects.get_or_create(
-                    sede=sede,
-                    estandar=estandar,
-                    defaults={'activo': esta_seleccionado, 'activado_por': request.user}
-                )
-                if not created and config.activo != esta_seleccionado:
-                    config.activo = esta_seleccionado
-                    config.activado_por = request.user
-                    config.save()
+        todos_estandares = Estandar.objects.filter(activo=True).select_related('grupo')
+
+        # En una transacción para que la matriz de aplicabilidad se recalcule una sola vez
+        with transaction.atomic():
+            for estandar in todos_estandares:
+                es_obligatorio = estandar.grupo.codigo == GRUPO_OBLIGATORIO
+                esta_seleccionado = str(estandar.id) in estandares_seleccionados
+
+                if es_obligatorio:
+                    # Los estándares del grupo obligatorio siempre están activos
+                    ConfiguracionEstandarSede.objects.get_or_create(
+                        sede=sede,
+                        estandar=estandar,
+                        defaults={'activo': True, 'activado_por': request.user}
+                    )
+                else:
+                    config, created = ConfiguracionEstandarSede.objects.get_or_create(
+                        sede=sede,
+                        estandar=estandar,
+                        defaults={'activo': esta_seleccionado, 'activado_por': request.user}
+                    )
+                    if not created and config.activo != esta_seleccionado:
+                        config.activo = esta_seleccionado
+                        config.activado_por = request.user
+                        config.save()
 
         messages.success(request, 'Configuración guardada correctamente.')
         return redirect('evaluacion:sede_categorias', sede_pk=sede.pk)
@@ -1277,7 +1314,7 @@ def sede_configuracion(request, sede_pk):
     # Preparar datos de grupos con sus estándares
     grupos_data = []
     for grupo in grupos:
-        es_obligatorio = grupo.codigo == '11.1'
+        es_obligatorio = grupo.codigo == GRUPO_OBLIGATORIO
 
         # Obtener estándares del grupo
         estandares = Estandar.objects.filter(grupo=grupo, activo=True).order_by('orden')
@@ -1335,11 +1372,11 @@ def ver_documentos_criterio(request, evaluacion_pk):
     evaluacion = get_object_or_404(EvaluacionCriterio, pk=evaluacion_pk)
 
     # Verificar acceso
-    if request.user.entidad != evaluacion.sede.entidad and request.user.rol != 'SUPER':
+    if not request.principal.accede_entidad(evaluacion.sede.entidad_id):
         messages.error(request, 'No tiene acceso a estos documentos.')
         return redirect('core:dashboard')
 
-    archivos = evaluacion.archivos_repositorio.all().order_by('-fecha_subida')
+    archivos = evaluacion.archivos_repositorio.select_related('contenido', 'subido_por').order_by('-fecha_subida')
 
     return render(request, 'evaluacion/sedes/documentos_criterio.html', {
         'titulo': f'Documentos - {evaluacion.criterio.numero}',
@@ -1359,7 +1396,7 @@ def resumen_evaluacion_sede(request, sede_pk):
     sede = get_object_or_404(Sede, pk=sede_pk)
 
     # Verificar acceso
-    if request.user.entidad != sede.entidad and request.user.rol != 'SUPER':
+    if not request.principal.accede_entidad(sede.entidad_id):
         messages.error(request, 'No tiene acceso a esta sede.')
         return redirect('evaluacion:sedes_evaluar')
 
@@ -1368,63 +1405,60 @@ def resumen_evaluacion_sede(request, sede_pk):
         sede=sede, activo=True
     ).select_related('grupo_estandar')
 
-    resumen_grupos = []
-    totales = {'criterios': 0, 'cumple': 0, 'no_cumple': 0, 'no_aplica': 0, 'pendiente': 0}
+    resumenes = resumen_aplicable(sede, por='grupo_id')
 
+    resumen_grupos = []
     for config in configuraciones:
-        grupo = config.grupo_estandar
-
-        # Calcular estadísticas del grupo
-        evals = EvaluacionCriterio.objects.filter(
-            sede=sede,
-            criterio__estandar__grupo=grupo,
-            criterio__es_titulo=False
-        )
-
-        total = Criterio.objects.filter(
-            estandar__grupo=grupo,
-            activo=True,
-            es_titulo=False
-        ).count()
-
-        cumple = evals.filter(estado='C').count()
-        no_cumple = evals.filter(estado='NC').count()
-        no_aplica = evals.filter(estado='NA').count()
-        pendiente = total - cumple - no_cumple - no_aplica
+        resumen = resumenes.get(config.grupo_estandar_id) or resumen_vacio()
+        resumen_grupos.append(dict(resumen, grupo=config.grupo_estandar))
 
-        # Porcentaje sobre criterios que aplican
-        criterios_aplican = total - no_aplica
-        porcentaje = round((cumple / criterios_aplican * 100), 1) if criterios_aplican > 0 else 0
-
-        resumen_grupos.append({
-            'grupo': grupo,
-            'total': total,
-            'cumple': cumple,
-            'no_cumple': no_cumple,
-            'no_aplica': no_aplica,
-            'pendiente': pendiente,
-            'porcentaje': porcentaje
-        })
-
-        # Acumular totales
-        totales['criterios'] += total
-        totales['cumple'] += cumple
-        totales['no_cumple'] += no_cumple
-        totales['no_aplica'] += no_aplica
-        totales['pendiente'] += pendiente
-
-    # Porcentaje general
-    criterios_aplican = totales['criterios'] - totales['no_aplica']
-    totales['porcentaje'] = round((totales['cumple'] / criterios_aplican * 100), 1) if criterios_aplican > 0 else 0
+    resumen = resumen_aplicable(sede)
+    totales = dict(resumen, criterios=resumen['total'])
 
     return render(request, 'evaluacion/sedes/resumen.html', {
         'titulo': f'Resumen de Evaluación - {sede.nombre}',
         'sede': sede,
         'resumen_grupos': resumen_grupos,
-        'totales': totales
+        'totales': totales,
+        'grupos': GrupoEstandar.objects.filter(activo=True).order_by('orden'),
+        'estandares': Estandar.objects.filter(activo=True).order_by('grupo__orden', 'orden'),
+        'estados': EvaluacionCriterio.ESTADOS,
     })
 
 
+@login_required
+def paquete_evidencias_sede(request, sede_pk):
+    """
+    Descarga en un ZIP (streaming, ZIP64) todos los archivos del repositorio de
+    la sede con la estructura documentos/entidad/grupo/estandar/criterio/ y un
+    indice.csv con sumas SHA-256. Filtros opcionales: grupo, estandar, estado.
+    """
+    from .paquete_evidencias import archivos_sede, generar_paquete, nombre_paquete
+
+    sede = get_object_or_404(Sede.objects.select_related('entidad'), pk=sede_pk)
+
+    # Verificar acceso
+    if not request.principal.accede_entidad(sede.entidad_id):
+        messages.error(request, 'No tiene acceso a esta sede.')
+        return redirect('evaluacion:sedes_evaluar')
+
+    grupo = estandar = None
+    if request.GET.get('grupo'):
+        grupo = get_object_or_404(GrupoEstandar, pk=request.GET['grupo'])
+    if request.GET.get('estandar'):
+        estandar = get_object_or_404(Estandar, pk=request.GET['estandar'])
+    estado = request.GET.get('estado', '')
+    if estado not in dict(EvaluacionCriterio.ESTADOS):
+        estado = ''
+
+    response = StreamingHttpResponse(
+        generar_paquete(archivos_sede(sede, grupo, estandar, estado)),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nombre_paquete(sede)}"'
+    return response
+
+
 # ===============================
 # APIS AJAX ACTUALIZADAS PARA SEDES
 # ===============================
@@ -1442,7 +1476,7 @@ def guardar_evaluacion_criterio_sede(request):
         evaluacion = get_object_or_404(EvaluacionCriterio, pk=evaluacion_id)
 
         # Verificar acceso
-        if request.user.entidad != evaluacion.sede.entidad and request.user.rol != 'SUPER':
+        if not request.principal.accede_entidad(evaluacion.sede.entidad_id):
             return JsonResponse({'error': 'No tiene acceso'}, status=403)
 
         # Actualizar el campo correspondiente
@@ -1473,6 +1507,159 @@ def guardar_evaluacion_criterio_sede(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+# Campos que la tabla de criterios puede modificar por AJAX
+CAMPOS_EDITABLES_CRITERIO = {
+    'estado': 'estado',
+    'en_proceso': 'en_proceso',
+    'responsable': 'responsable_id',
+    'comentarios': 'comentarios',
+    'justificacion_na': 'justificacion_na',
+}
+
+
+@login_required
+@require_POST
+def guardar_evaluaciones_criterio_lote(request):
+    """
+    API para guardar en lote los cambios de la tabla de criterios (AJAX).
+    Recibe {"cambios": [{"evaluacion_id", "campo", "valor"}, ...]}.
+    El acceso se verifica una vez por sede y los cambios se aplican con
+    bulk_update solo sobre los campos modificados. Los cambios inválidos se
+    omiten y se devuelven en "rechazados" sin impedir que se guarden los demás.
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+
+    cambios = data.get('cambios') if isinstance(data, dict) else None
+    if not isinstance(cambios, list) or not cambios:
+        return JsonResponse({'error': 'No se enviaron cambios'}, status=400)
+
+    # Agrupar cambios por evaluación; si un campo llega varias veces gana el último
+    cambios_por_evaluacion = {}
+    rechazados = []
+    for indice, cambio in enumerate(cambios):
+        if not isinstance(cambio, dict):
+            rechazados.append({'indice': indice, 'error': 'Cambio inválido'})
+            continue
+        campo = cambio.get('campo')
+        valor = cambio.get('valor')
+        rechazo = {'indice': indice, 'evaluacion_id': cambio.get('evaluacion_id'), 'campo': campo}
+        if not isinstance(campo, str) or campo not in CAMPOS_EDITABLES_CRITERIO:
+            rechazados.append(dict(rechazo, error=f'Campo no permitido: {campo}'))
+            continue
+        if campo == 'estado' and (not isinstance(valor, str) or valor not in dict(EvaluacionCriterio.ESTADOS)):
+            rechazados.append(dict(rechazo, error=f'Estado no válido: {valor}'))
+            continue
+        try:
+            evaluacion_id = int(cambio.get('evaluacion_id'))
+            if campo == 'responsable':
+                valor = int(valor) if valor else None
+        except (TypeError, ValueError):
+            rechazados.append(dict(rechazo, error='Identificador inválido'))
+            continue
+        if campo == 'en_proceso':
+            valor = bool(valor)
+        elif valor is None and campo != 'responsable':
+            valor = ''
+        elif campo != 'responsable' and not isinstance(valor, str):
+            valor = str(valor)
+        cambios_por_evaluacion.setdefault(evaluacion_id, {})[campo] = valor
+
+    if not cambios_por_evaluacion:
+        return JsonResponse({'error': 'Ningún cambio es válido', 'rechazados': rechazados}, status=400)
+
+    evaluaciones = EvaluacionCriterio.objects.filter(
+        pk__in=cambios_por_evaluacion.keys()
+    ).select_related('sede')
+    evaluaciones = {e.pk: e for e in evaluaciones}
+
+    faltantes = set(cambios_por_evaluacion) - set(evaluaciones)
+    if faltantes and not evaluaciones:
+        return JsonResponse({'error': f'Evaluaciones no encontradas: {sorted(faltantes)}'}, status=404)
+    for evaluacion_id in sorted(faltantes):
+        del cambios_por_evaluacion[evaluacion_id]
+        rechazados.append({'evaluacion_id': evaluacion_id, 'error': 'Evaluación no encontrada'})
+
+    # Verificar acceso una sola vez por sede
+    if not request.principal.es_super:
+        entidades_sedes = {e.sede_id: e.sede.entidad_id for e in evaluaciones.values()}
+        if any(entidad_id != request.principal.entidad_id for entidad_id in entidades_sedes.values()):
+            return JsonResponse({'error': 'No tiene acceso'}, status=403)
+
+    # El responsable debe ser un usuario activo de la entidad de la sede
+    responsables = {
+        campos['responsable'] for campos in cambios_por_evaluacion.values() if campos.get('responsable')
+    }
+    entidad_responsable = dict(Usuario.objects.filter(
+        pk__in=responsables, is_active=True, entidad__isnull=False
+    ).values_list('pk', 'entidad_id')) if responsables else {}
+    for evaluacion_id, campos in cambios_por_evaluacion.items():
+        responsable_id = campos.get('responsable')
+        if responsable_id and entidad_responsable.get(responsable_id) != evaluaciones[evaluacion_id].sede.entidad_id:
+            del campos['responsable']
+            rechazados.append({
+                'evaluacion_id': evaluacion_id, 'campo': 'responsable',
+                'error': f'Responsable no válido: {responsable_id}'
+            })
+
+    ahora = timezone.now()
+    campos_actualizados = {'modificado_por', 'fecha_modificacion'}
+    modificadas = []
+    historial = []
+
+    for evaluacion_id, campos in cambios_por_evaluacion.items():
+        evaluacion = evaluaciones[evaluacion_id]
+        estado_anterior = evaluacion.estado
+        modificados = {}
+
+        for campo, valor in campos.items():
+            atributo = CAMPOS_EDITABLES_CRITERIO[campo]
+            if getattr(evaluacion, atributo) != valor:
+                setattr(evaluacion, atributo, valor)
+                modificados[campo] = valor
+                campos_actualizados.add(atributo)
+
+        if not modificados:
+            continue
+
+        if 'estado' in modificados:
+            evaluacion.fecha_evaluacion = ahora
+            campos_actualizados.add('fecha_evaluacion')
+
+        # bulk_update no dispara auto_now
+        evaluacion.modificado_por = request.user
+        evaluacion.fecha_modificacion = ahora
+        modificadas.append(evaluacion)
+
+        historial.append(HistorialEvaluacion(
+            evaluacion_criterio=evaluacion,
+            usuario=request.user,
+            accion='CAMBIAR_ESTADO' if 'estado' in modificados else 'EDITAR',
+            descripcion=f'Campos modificados: {", ".join(sorted(modificados))}',
+            estado_anterior=estado_anterior if 'estado' in modificados else '',
+            estado_nuevo=evaluacion.estado if 'estado' in modificados else '',
+            datos_adicionales=modificados
+        ))
+
+    if modificadas:
+        with transaction.atomic():
+            EvaluacionCriterio.objects.bulk_update(modificadas, sorted(campos_actualizados))
+            HistorialEvaluacion.objects.bulk_create(historial)
+            # bulk_update no emite señales: versiones de la API y resúmenes de cartera
+            sede_ids = {evaluacion.sede_id for evaluacion in modificadas}
+            incrementar_sedes(sede_ids)
+            programar_actualizacion_cartera(sede_ids=sede_ids)
+
+    return JsonResponse({
+        'success': True,
+        'mensaje': 'Guardado correctamente',
+        'actualizadas': [e.pk for e in modificadas],
+        'rechazados': rechazados,
+    })
+
+
 @login_required
 @require_POST
 def subir_archivo_criterio_sede(request, evaluacion_pk):
@@ -1480,23 +1667,21 @@ def subir_archivo_criterio_sede(request, evaluacion_pk):
     evaluacion = get_object_or_404(EvaluacionCriterio, pk=evaluacion_pk)
 
     # Verificar acceso
-    if request.user.entidad != evaluacion.sede.entidad and request.user.rol != 'SUPER':
+    if not request.principal.accede_entidad(evaluacion.sede.entidad_id):
         return JsonResponse({'error': 'No tiene acceso'}, status=403)
 
     if 'archivo' not in request.FILES:
         return JsonResponse({'error': 'No se envió ningún archivo'}, status=400)
 
     archivo = request.FILES['archivo']
-    nombre = request.POST.get('nombre', archivo.name)
+    nombre = request.POST.get('nombre') or archivo.name
     descripcion = request.POST.get('descripcion', '')
 
-    archivo_repo = ArchivoRepositorio.objects.create(
-        evaluacion=evaluacion,
-        archivo=archivo,
-        nombre=nombre,
-        descripcion=descripcion,
-        subido_por=request.user
-    )
+    with transaction.atomic():
+        contenido = ContenidoArchivo.registrar(archivo, archivo.name)
+        archivo_repo = ArchivoRepositorio.crear_desde_contenido(
+            evaluacion, contenido, nombre, descripcion, request.user
+        )
 
     return JsonResponse({
         'success': True,
@@ -1516,45 +1701,466 @@ def eliminar_archivo_criterio_sede(request, archivo_pk):
     archivo = get_object_or_404(ArchivoRepositorio, pk=archivo_pk)
 
     # Verificar acceso
-    if request.user.entidad != archivo.evaluacion.sede.entidad and request.user.rol != 'SUPER':
+    if not request.principal.accede_entidad(archivo.evaluacion.sede.entidad_id):
         return JsonResponse({'error': 'No tiene acceso'}, status=403)
 
-    archivo.archivo.delete()
-    archivo.delete()
+    archivo.eliminar()
 
     return JsonResponse({'success': True})
 
 
+def _datos_archivo_repositorio(archivo_repo):
+    """Datos JSON de un archivo del repositorio para las tablas de criterios"""
+    return {
+        'id': archivo_repo.id,
+        'nombre': archivo_repo.nombre,
+        'url': archivo_repo.archivo.url,
+        'fecha': archivo_repo.fecha_subida.strftime('%Y-%m-%d %H:%M')
+    }
+
+
+def _datos_carga(carga):
+    """Estado JSON de una carga fragmentada"""
+    return {
+        'token': str(carga.token),
+        'estado': carga.estado,
+        'tamano_fragmento': carga.tamano_fragmento,
+        'total_fragmentos': carga.total_fragmentos,
+        'recibidos': carga.fragmentos_recibidos,
+        'faltantes': carga.fragmentos_faltantes,
+    }
+
+
+def _obtener_carga(request, token):
+    """Obtiene una carga abierta del usuario actual"""
+    return get_object_or_404(CargaArchivo, token=token, usuario=request.user, estado='ABIERTA')
+
+
 @login_required
-@xframe_options_sameorigin
-def preview_archivo(request, archivo_pk):
+@require_POST
+def iniciar_carga_archivo(request, evaluacion_pk):
     """
-    Vista para previsualizar archivos en iframe (para auditores).
-    Sirve el archivo con headers que permiten embedding en iframes del mismo origen.
+    Inicia una carga fragmentada y reanudable (paso 1 de 3).
+    Recibe JSON {nombre_archivo, tamano, nombre, descripcion, sha256 opcional}.
+    Si se envía el SHA-256 y el contenido ya existe, el archivo se enlaza
+    de inmediato sin transferir los datos.
     """
-    archivo = get_object_or_404(ArchivoRepositorio, pk=archivo_pk)
+    evaluacion = get_object_or_404(EvaluacionCriterio.objects.select_related('sede'), pk=evaluacion_pk)
 
-    # Verificar acceso - debe pertenecer a la entidad del usuario
-    if request.user.rol != 'SUPER':
-        if request.user.entidad != archivo.evaluacion.sede.entidad:
-            return HttpResponse('Acceso denegado', status=403)
+    # Verificar acceso
+    if not request.principal.accede_entidad(evaluacion.sede.entidad_id):
+        return JsonResponse({'error': 'No tiene acceso'}, status=403)
+
+    try:
+        data = json.loads(request.body)
+        nombre_archivo = str(data.get('nombre_archivo') or '').strip()
+        tamano = int(data.get('tamano'))
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'Datos de carga inválidos'}, status=400)
+
+    config = settings.HABILITACION_CONFIG
+    if not nombre_archivo or tamano <= 0:
+        return JsonResponse({'error': 'Datos de carga inválidos'}, status=400)
+    if tamano > config['CARGA_TAMANO_MAXIMO']:
+        return JsonResponse({'error': 'El archivo supera el tamaño máximo permitido'}, status=400)
+
+    nombre = data.get('nombre') or nombre_archivo
+    descripcion = data.get('descripcion', '')
+    sha256 = str(data.get('sha256') or '').lower()
+    if sha256 and (len(sha256) != 64 or any(c not in '0123456789abcdef' for c in sha256)):
+        return JsonResponse({'error': 'SHA-256 inválido'}, status=400)
+
+    # Enlace inmediato solo a contenido ya presente en la misma entidad
+    contenido = None
+    if sha256:
+        contenido = ContenidoArchivo.objects.filter(
+            sha256=sha256,
+            tamano=tamano,
+            archivos__evaluacion__sede__entidad_id=evaluacion.sede.entidad_id
+        ).first()
+    if contenido:
+        with transaction.atomic():
+            contenido.retener()
+            archivo_repo = ArchivoRepositorio.crear_desde_contenido(
+                evaluacion, contenido, nombre, descripcion, request.user
+            )
+        return JsonResponse({
+            'success': True,
+            'duplicado': True,
+            'archivo': _datos_archivo_repositorio(archivo_repo)
+        })
+
+    carga = CargaArchivo.objects.create(
+        evaluacion=evaluacion,
+        usuario=request.user,
+        nombre_archivo=nombre_archivo,
+        nombre=nombre,
+        descripcion=descripcion,
+        tamano_total=tamano,
+        tamano_fragmento=config['CARGA_TAMANO_FRAGMENTO'],
+        sha256_esperado=sha256
+    )
+
+    return JsonResponse({'success': True, 'carga': _datos_carga(carga)})
+
+
+@login_required
+def estado_carga_archivo(request, token):
+    """Estado de una carga fragmentada, para reanudarla tras un corte"""
+    carga = _obtener_carga(request, token)
+    return JsonResponse({'success': True, 'carga': _datos_carga(carga)})
+
+
+@login_required
+@require_POST
+def subir_fragmento_archivo(request, token, indice):
+    """Recibe un fragmento de una carga (paso 2 de 3). Reenviarlo es seguro."""
+    carga = _obtener_carga(request, token)
+
+    if 'fragmento' not in request.FILES:
+        return JsonResponse({'error': 'No se envió ningún fragmento'}, status=400)
+
+    try:
+        carga.guardar_fragmento(indice, request.FILES['fragmento'])
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'recibidos': len(carga.fragmentos_recibidos),
+        'total_fragmentos': carga.total_fragmentos
+    })
+
+
+@login_required
+@require_POST
+def completar_carga_archivo(request, token):
+    """Reensambla los fragmentos y crea el archivo del repositorio (paso 3 de 3)"""
+    carga = _obtener_carga(request, token)
+
+    try:
+        archivo_repo = carga.completar()
+    except ValueError as e:
+        return JsonResponse({'error': str(e), 'carga': _datos_carga(carga)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'archivo': _datos_archivo_repositorio(archivo_repo)
+    })
+
+
+def _etag_archivo(archivo):
+    """
+    ETag del archivo: fuerte a partir del SHA-256 almacenado; para archivos
+    anteriores al almacén por contenido, débil a partir de tamaño y fecha.
+    """
+    if archivo.contenido_id:
+        return f'"{archivo.contenido.sha256}"'
+    try:
+        tamano = archivo.archivo.size
+    except (FileNotFoundError, OSError):
+        return None
+    return f'W/"{archivo.pk}-{tamano}-{int(archivo.fecha_subida.timestamp())}"'
+
+
+def _rango_solicitado(request, tamano, etag):
+    """
+    Interpreta el header Range (un solo rango de bytes).
+    Retorna (inicio, fin) inclusivo, None para servir el archivo completo,
+    o False si el rango no es satisfacible.
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    if not header.startswith('bytes=') or ',' in header:
+        return None
 
+    # If-Range: solo se respeta el rango si el archivo no ha cambiado
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and (not etag or if_range.strip() != etag or etag.startswith('W/')):
+        return None
+
+    inicio, _, fin = header[len('bytes='):].strip().partition('-')
+    try:
+        if inicio == '':
+            # Sufijo: últimos N bytes
+            sufijo = int(fin)
+            if sufijo <= 0:
+                return False
+            return max(0, tamano - sufijo), tamano - 1
+        inicio = int(inicio)
+        fin = int(fin) if fin else tamano - 1
+    except ValueError:
+        return None
+
+    if inicio >= tamano or fin < inicio:
+        return False
+    return inicio, min(fin, tamano - 1)
+
+
+def _leer_rango(archivo_abierto, inicio, longitud, tamano_bloque=64 * 1024):
+    """Generador que lee un rango de bytes por bloques"""
+    try:
+        archivo_abierto.seek(inicio)
+        restante = longitud
+        while restante > 0:
+            bloque = archivo_abierto.read(min(tamano_bloque, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+    finally:
+        archivo_abierto.close()
+
+
+def _servir_archivo(request, fichero, etag, nombre, cache_control='private, no-cache'):
+    """
+    Respuesta para un archivo del almacenamiento: ETag con If-None-Match (304),
+    peticiones Range (206/416) y, si está configurado, delegación al proxy
+    (X-Accel-Redirect / X-Sendfile). El acceso debe verificarse antes.
+    """
     # Obtener el tipo MIME del archivo
-    content_type, _ = mimetypes.guess_type(archivo.archivo.name)
+    content_type, _ = mimetypes.guess_type(fichero.name)
     if not content_type:
         content_type = 'application/octet-stream'
 
-    # Para PDFs e imágenes, servir inline (no como descarga)
-    try:
-        response = FileResponse(
-            archivo.archivo.open('rb'),
-            content_type=content_type
-        )
-        # Content-Disposition: inline permite ver en el navegador
-        response['Content-Disposition'] = f'inline; filename="{archivo.nombre}"'
-        # Deshabilitar cache para seguridad
-        response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-        response['Pragma'] = 'no-cache'
+    cabeceras = {
+        'ETag': etag,
+        'Cache-Control': cache_control,
+        'Accept-Ranges': 'bytes',
+    }
+
+    # El navegador ya tiene esta versión
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # Comparación débil, como exige If-None-Match
+        etags_cliente = [e.strip().replace('W/', '', 1) for e in if_none_match.split(',')]
+        if '*' in etags_cliente or etag.replace('W/', '', 1) in etags_cliente:
+            response = HttpResponse(status=304)
+            for cabecera, valor in cabeceras.items():
+                response[cabecera] = valor
+            return response
+
+    # Content-Disposition: inline permite ver en el navegador
+    disposicion = f'inline; filename="{nombre}"'
+
+    # Delegar la transferencia al proxy una vez verificado el acceso
+    modo_proxy = settings.ARCHIVOS_ENVIO_PROXY
+    if modo_proxy in ('nginx', 'apache'):
+        response = HttpResponse(content_type=content_type)
+        if modo_proxy == 'nginx':
+            response['X-Accel-Redirect'] = settings.ARCHIVOS_PREFIJO_INTERNO + quote(fichero.name)
+        else:
+            response['X-Sendfile'] = fichero.path
+        response['Content-Disposition'] = disposicion
+        for cabecera, valor in cabeceras.items():
+            response[cabecera] = valor
         return response
+
+    try:
+        tamano = fichero.size
+        rango = _rango_solicitado(request, tamano, etag)
+
+        if rango is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{tamano}'
+        elif rango:
+            inicio, fin = rango
+            response = StreamingHttpResponse(
+                _leer_rango(fichero.open('rb'), inicio, fin - inicio + 1),
+                status=206,
+                content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+            response['Content-Length'] = str(fin - inicio + 1)
+        else:
+            response = FileResponse(
+                fichero.open('rb'),
+                content_type=content_type
+            )
     except FileNotFoundError:
         return HttpResponse('Archivo no encontrado', status=404)
+
+    response['Content-Disposition'] = disposicion
+    for cabecera, valor in cabeceras.items():
+        response[cabecera] = valor
+    return response
+
+
+def _obtener_archivo_visible(request, archivo_pk):
+    """Archivo del repositorio si pertenece a la entidad del usuario; None si no tiene acceso"""
+    archivo = get_object_or_404(
+        ArchivoRepositorio.objects.select_related('evaluacion__sede', 'contenido'),
+        pk=archivo_pk
+    )
+    if not request.principal.accede_entidad(archivo.evaluacion.sede.entidad_id):
+        return None
+    return archivo
+
+
+@login_required
+@xframe_options_sameorigin
+def preview_archivo(request, archivo_pk):
+    """
+    Vista para previsualizar archivos en iframe (para auditores).
+    Sirve el archivo con headers que permiten embedding en iframes del mismo origen.
+    Soporta peticiones Range (206) para PDF.js, ETag con If-None-Match (304) y,
+    si está configurado, delega la transferencia al proxy (X-Accel-Redirect / X-Sendfile).
+    Con ?version=pdf sirve la conversión a PDF de los documentos de Office.
+    """
+    # Verificar acceso - debe pertenecer a la entidad del usuario
+    archivo = _obtener_archivo_visible(request, archivo_pk)
+    if archivo is None:
+        return HttpResponse('Acceso denegado', status=403)
+
+    if request.GET.get('version') == 'pdf':
+        if not archivo.tiene_version_pdf:
+            return HttpResponse('Versión PDF no disponible', status=404)
+        nombre_pdf = os.path.splitext(archivo.nombre)[0] + '.pdf'
+        return _servir_archivo(
+            request, archivo.contenido.version_pdf, f'"{archivo.contenido.sha256}-pdf"', nombre_pdf
+        )
+
+    etag = _etag_archivo(archivo)
+    if etag is None:
+        return HttpResponse('Archivo no encontrado', status=404)
+
+    return _servir_archivo(request, archivo.archivo, etag, archivo.nombre)
+
+
+@login_required
+def miniatura_archivo(request, archivo_pk):
+    """Miniatura PNG de un archivo del repositorio (404 si aún no se ha generado)"""
+    archivo = _obtener_archivo_visible(request, archivo_pk)
+    if archivo is None:
+        return HttpResponse('Acceso denegado', status=403)
+
+    if not archivo.tiene_miniatura:
+        return HttpResponse('Miniatura no disponible', status=404)
+
+    # El contenido es inmutable (direccionado por SHA-256): se puede cachear
+    return _servir_archivo(
+        request, archivo.contenido.miniatura, f'"{archivo.contenido.sha256}-miniatura"',
+        'miniatura.png', cache_control='private, max-age=86400'
+    )
+
+
+
+# ===============================
+# API DE LECTURA (JSON CON ETAG)
+# ===============================
+# Las respuestas llevan un ETag calculado con la versión de datos de la sede o
+# entidad (core.versiones); con If-None-Match vigente responden 304 sin armar
+# el contenido.
+
+def _sede_api(request, sede_pk):
+    """Sede visible para el usuario (con su matriz calculada) o None"""
+    sede = get_object_or_404(Sede, pk=sede_pk)
+    if not request.principal.accede_entidad(sede.entidad_id):
+        return None
+    # Calcular la matriz antes del ETag: si es la primera vez cambia la versión
+    asegurar(sede)
+    return sede
+
+
+@login_required
+@require_GET
+def api_resumen_sede(request, sede_pk):
+    """Resumen de cumplimiento de la sede, total y por grupo y estándar"""
+    sede = _sede_api(request, sede_pk)
+    if sede is None:
+        return JsonResponse({'error': 'No tiene acceso'}, status=403)
+
+    def construir():
+        por_grupo = resumen_aplicable(sede, por='grupo_id')
+        por_estandar = resumen_aplicable(sede, por='estandar_id')
+        grupos = GrupoEstandar.objects.filter(pk__in=por_grupo).order_by('orden')
+        estandares = Estandar.objects.filter(pk__in=por_estandar).order_by('grupo__orden', 'orden')
+        return {
+            'sede': {'id': sede.pk, 'nombre': sede.nombre, 'entidad_id': sede.entidad_id},
+            'resumen': resumen_aplicable(sede),
+            'grupos': [
+                dict(por_grupo[grupo.pk], id=grupo.pk, codigo=grupo.codigo, nombre=grupo.nombre)
+                for grupo in grupos
+            ],
+            'estandares': [
+                dict(
+                    por_estandar[estandar.pk], id=estandar.pk, grupo_id=estandar.grupo_id,
+                    codigo=estandar.codigo, nombre=estandar.nombre
+                )
+                for estandar in estandares
+            ],
+        }
+
+    return respuesta_condicional(request, [ambito_sede(sede.pk), AMBITO_CATALOGO], construir)
+
+
+@login_required
+@require_GET
+def api_resumen_entidad(request, entidad_pk):
+    """Resumen de cumplimiento de la entidad y de cada una de sus sedes activas"""
+    if not request.principal.accede_entidad(entidad_pk):
+        return JsonResponse({'error': 'No tiene acceso'}, status=403)
+    entidad = get_object_or_404(EntidadPrestadora, pk=entidad_pk)
+    sedes = list(Sede.objects.filter(entidad=entidad, activa=True))
+    for sede in sedes:
+        asegurar(sede)
+
+    def construir():
+        resumenes = resumen_aplicable(sedes, por='sede_id')
+        return {
+            'entidad': {'id': entidad.pk, 'nombre': entidad.razon_social},
+            'resumen': resumen_aplicable(sedes),
+            'sedes': [
+                dict(resumenes.get(sede.pk) or resumen_vacio(), id=sede.pk, nombre=sede.nombre)
+                for sede in sedes
+            ],
+        }
+
+    return respuesta_condicional(request, [ambito_entidad(entidad.pk)], construir)
+
+
+@login_required
+@require_GET
+def api_criterios_sede(request, sede_pk, estandar_pk):
+    """
+    Criterios de un estándar con la evaluación de la sede: títulos y subtítulos
+    para la estructura y, para los criterios que aplican, estado, responsable y
+    cantidad de archivos (evaluacion es null si aún no se ha creado).
+    """
+    sede = _sede_api(request, sede_pk)
+    if sede is None:
+        return JsonResponse({'error': 'No tiene acceso'}, status=403)
+    estandar = get_object_or_404(Estandar, pk=estandar_pk)
+
+    def construir():
+        evaluaciones = {
+            fila['criterio_id']: fila
+            for fila in EvaluacionCriterio.objects.filter(sede=sede, criterio__estandar=estandar)
+            .annotate(archivos=Count('archivos_repositorio'))
+            .values('id', 'criterio_id', 'estado', 'en_proceso', 'responsable_id', 'archivos')
+        }
+        criterios = []
+        for criterio in Criterio.objects.filter(estandar=estandar, activo=True).order_by('clave_orden', 'orden'):
+            fila = {
+                'id': criterio.pk,
+                'numero': criterio.numero,
+                'tipo': criterio.tipo_criterio,
+                'texto': criterio.texto,
+            }
+            if criterio.tipo_criterio == 'CRITERIO':
+                if not aplica(sede, criterio.pk):
+                    continue
+                evaluacion = evaluaciones.get(criterio.pk)
+                if evaluacion is not None:
+                    evaluacion = {clave: valor for clave, valor in evaluacion.items() if clave != 'criterio_id'}
+                fila['evaluacion'] = evaluacion
+            criterios.append(fila)
+        return {
+            'sede_id': sede.pk,
+            'estandar': {'id': estandar.pk, 'codigo': estandar.codigo, 'nombre': estandar.nombre},
+            'resumen': resumen_aplicable(sede, estandar=estandar),
+            'criterios': criterios,
+        }
+
+    return respuesta_condicional(
+        request, [ambito_sede(sede.pk), AMBITO_CATALOGO], construir, estandar.version_criterios
+    )
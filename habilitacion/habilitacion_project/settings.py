@@ -74,8 +74,10 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "core.middleware.PrincipalMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.AuditoriaMiddleware",
 ]
 
 ROOT_URLCONF = "habilitacion_project.urls"
@@ -171,11 +173,83 @@ LOGOUT_REDIRECT_URL = 'usuarios:login'
 
 # OpenAI API Key
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
+# Cliente de IA: 'documentos.ia.ClienteOpenAI' o 'documentos.ia.ClienteSimulado' (sin red)
+IA_BACKEND = os.getenv('IA_BACKEND', 'documentos.ia.ClienteOpenAI')
+# Generación por fragmentos (stream=True): la respuesta parcial se guarda cada INTERVALO_GUARDADO segundos.
+# Cada conexión de /stream/ ocupa un hilo del servidor durante DURACION_CONEXION segundos como máximo;
+# el navegador reconecta y continúa con Last-Event-ID. Con muchos usuarios simultáneos conviene un
+# servidor con hilos o asíncrono (gunicorn --threads / -k gthread, uvicorn) en lugar de trabajadores sync.
+IA_STREAMING = {
+    'ACTIVO': True,
+    'INTERVALO_GUARDADO': 0.5,
+    'DURACION_CONEXION': 25,
+    'INTERVALO_CONSULTA_MAXIMO': 2,
+}
+
+# Caché de respuestas de IA por huella de la solicitud (TTL + descarte LRU)
+IA_CACHE = {
+    'ACTIVA': os.getenv('IA_CACHE_ACTIVA', 'True').lower() == 'true',
+    'TTL_HORAS': 24 * 30,
+    'MAX_ENTRADAS': 5000,
+}
+
+# Envío de archivos del repositorio a través del proxy frontal.
+# '' = Django transmite el archivo; 'nginx' = X-Accel-Redirect; 'apache' = X-Sendfile.
+# Con nginx, ARCHIVOS_PREFIJO_INTERNO debe ser una location `internal` que apunte a MEDIA_ROOT.
+ARCHIVOS_ENVIO_PROXY = os.getenv('ARCHIVOS_ENVIO_PROXY', '')
+ARCHIVOS_PREFIJO_INTERNO = os.getenv('ARCHIVOS_PREFIJO_INTERNO', '/media-protegida/')
+
+# Cola de tareas en segundo plano (core.tareas), respaldada por la base de datos.
+# 'HILOS' = hilos en cada proceso web, iniciados con su primera petición; 'EXTERNO' = comando `procesar_tareas`;
+# 'INMEDIATO' = se ejecutan al confirmar la transacción (útil en pruebas).
+TAREAS_SEGUNDO_PLANO = {
+    'MODO': os.getenv('TAREAS_MODO', 'HILOS'),
+    'HILOS': int(os.getenv('TAREAS_HILOS', '2')),
+    'INTERVALO_SEGUNDOS': 2,
+    'TIEMPO_MAXIMO_SEGUNDOS': 900,  # Tareas EN_PROCESO más antiguas se consideran colgadas
+    'ESPERA_REINTENTO_SEGUNDOS': 30,
+}
+
+# Auditoría (core.auditoria): las entradas se escriben en lotes al final de cada
+# petición; RETENCION_DIAS la usa el comando `depurar_auditoria`.
+AUDITORIA = {
+    'TAMANO_LOTE': 500,
+    'INTERVALO_SEGUNDOS': 5,
+    'RETENCION_DIAS': int(os.getenv('AUDITORIA_RETENCION_DIAS', '730')),
+    'LONGITUD_MAXIMA_TEXTO': 500,
+    # Proxies propios delante de Django (nginx = 1): solo entonces se usa X-Forwarded-For para la IP
+    'PROXIES_CONFIABLES': int(os.getenv('AUDITORIA_PROXIES_CONFIABLES', '0')),
+    # Archivo histórico de `depurar_auditoria` (IPs, navegadores y diferencias de
+    # datos): fuera de MEDIA_ROOT, que se publica por URL
+    'DIRECTORIO_ARCHIVO': os.getenv('AUDITORIA_ARCHIVO_DIR', str(BASE_DIR / 'archivo_auditoria')),
+}
+
+# Correo saliente (avisos de vencimiento). Sin EMAIL_HOST los correos se escriben en la consola.
+EMAIL_BACKEND = os.getenv(
+    'EMAIL_BACKEND',
+    'django.core.mail.backends.smtp.EmailBackend' if os.getenv('EMAIL_HOST')
+    else 'django.core.mail.backends.console.EmailBackend'
+)
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True').lower() == 'true'
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'habilitacion@localhost')
 
 # Configuración del sistema de habilitación
 HABILITACION_CONFIG = {
     'VIGENCIA_DIAS': 1460,  # 4 años según Resolución 3100
     'DIAS_ALERTA_VENCIMIENTO': 90,  # Alertar 90 días antes del vencimiento
+    # Carga fragmentada de archivos del repositorio (fragmentos bajo el límite de 10M del proxy)
+    'CARGA_TAMANO_FRAGMENTO': 4 * 1024 * 1024,
+    'CARGA_TAMANO_MAXIMO': 1024 * 1024 * 1024,
+    'CARGA_HORAS_EXPIRACION': 48,
+    # Reportes con más filas que este límite se generan en segundo plano
+    'EXPORTACION_FILAS_DIRECTAS': 5000,
+    # Vigencia del fragmento en caché con el texto de los criterios de un estándar
+    # (la llave incluye la versión de criterios, así que un cambio no espera a que expire)
+    'CACHE_CRITERIOS_SEGUNDOS': 7 * 24 * 3600,
     'TIPOS_PRESTADOR': [
         ('IPS', 'Institución Prestadora de Servicios de Salud'),
         ('PI', 'Profesional Independiente'),
@@ -5,7 +5,7 @@ Sistema de Habilitación de Servicios de Salud
 
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import ProgramaPAMEC, CicloPHVA
+from .models import AccionMejora, ProgramaPAMEC, CicloPHVA
 
 
 class CicloPHVAInline(admin.TabularInline):
@@ -13,13 +13,14 @@ class CicloPHVAInline(admin.TabularInline):
     model = CicloPHVA
     extra = 0
     fields = ['fase', 'descripcion', 'fecha_inicio', 'fecha_fin', 'porcentaje_avance', 'responsable']
+    readonly_fields = ['porcentaje_avance']
 
 
 @admin.register(ProgramaPAMEC)
 class ProgramaPAMECAdmin(admin.ModelAdmin):
     """Admin para programas PAMEC"""
 
-    list_display = ['nombre', 'entidad', 'periodo', 'fecha_inicio', 'fecha_fin', 'estado_badge']
+    list_display = ['nombre', 'entidad', 'periodo', 'fecha_inicio', 'fecha_fin', 'estado_badge', 'porcentaje_avance']
     list_filter = ['estado', 'entidad']
     search_fields = ['nombre', 'entidad__razon_social', 'periodo']
     date_hierarchy = 'fecha_inicio'
@@ -70,11 +71,12 @@ class CicloPHVAAdmin(admin.ModelAdmin):
             'fields': (('fecha_inicio', 'fecha_fin'),)
         }),
         ('Avance', {
-            'fields': ('porcentaje_avance', 'responsable')
+            'fields': ('porcentaje_avance', 'total_acciones', 'acciones_completadas', 'responsable')
         }),
     )
 
     autocomplete_fields = ['programa', 'responsable']
+    readonly_fields = ['porcentaje_avance', 'total_acciones', 'acciones_completadas']
 
     def avance_display(self, obj):
         color = 'green' if obj.porcentaje_avance >= 80 else 'orange' if obj.porcentaje_avance >= 50 else 'red'
@@ -83,3 +85,19 @@ class CicloPHVAAdmin(admin.ModelAdmin):
             color, obj.porcentaje_avance
         )
     avance_display.short_description = 'Avance'
+
+
+@admin.register(AccionMejora)
+class AccionMejoraAdmin(admin.ModelAdmin):
+    """Admin para acciones de mejora"""
+
+    list_display = ['descripcion_corta', 'ciclo', 'responsable', 'fecha_limite', 'estado', 'porcentaje_avance']
+    list_filter = ['estado', 'ciclo__fase', 'ciclo__programa__entidad']
+    search_fields = ['descripcion', 'ciclo__programa__nombre']
+    date_hierarchy = 'fecha_limite'
+    raw_id_fields = ['ciclo', 'evaluacion_criterio']
+    autocomplete_fields = ['responsable']
+
+    def descripcion_corta(self, obj):
+        return obj.descripcion[:60] + ('...' if len(obj.descripcion) > 60 else '')
+    descripcion_corta.short_description = 'Acción'
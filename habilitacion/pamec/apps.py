@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PamecConfig(AppConfig):
     name = "pamec"
+
+    def ready(self):
+        from . import signals  # noqa: F401
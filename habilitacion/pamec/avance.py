@@ -0,0 +1,119 @@
+"""
+Acumulado del avance del PAMEC
+Sistema de Habilitación de Servicios de Salud
+
+Fase y programa guardan total de acciones, acciones completadas, suma del
+avance y porcentaje (suma / total). Al guardar o eliminar una acción,
+`aplicar_aporte` resta su aporte guardado y suma el nuevo con UPDATE
+relativos (F) sobre la fila de la fase y la del programa: el costo no depende
+de cuántas acciones tengan. `recalcular` reconstruye los acumulados desde las
+acciones con una consulta agrupada, para cargas en lote o correcciones.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Round
+
+CAMPOS_ACUMULADOS = ['total_acciones', 'acciones_completadas', 'suma_avance', 'porcentaje_avance']
+
+
+def _porcentaje(suma, total):
+    return round(Decimal(suma) / total, 2) if total else Decimal(0)
+
+
+def _ajustar(queryset, cuenta, completadas, suma):
+    queryset.update(
+        total_acciones=F('total_acciones') + cuenta,
+        acciones_completadas=F('acciones_completadas') + completadas,
+        suma_avance=F('suma_avance') + suma,
+    )
+    queryset.update(porcentaje_avance=Case(
+        When(total_acciones__gt=0, then=Round(
+            Cast('suma_avance', FloatField()) / Cast('total_acciones', FloatField()), 2
+        )),
+        default=Value(0.0),
+        output_field=FloatField(),
+    ))
+
+
+def aplicar_aporte(anterior, nuevo):
+    """
+    Ajusta los acumulados con la diferencia entre el aporte anterior y el
+    nuevo de una acción, cada uno (ciclo_id, cuenta, completada, avance) o
+    None si la acción no existía o se eliminó.
+    """
+    from .models import CicloPHVA, ProgramaPAMEC
+
+    por_ciclo = {}
+    for aporte, signo in ((anterior, -1), (nuevo, 1)):
+        if aporte is None:
+            continue
+        ciclo_id, cuenta, completada, avance = aporte
+        delta = por_ciclo.setdefault(ciclo_id, [0, 0, Decimal(0)])
+        delta[0] += signo * cuenta
+        delta[1] += signo * completada
+        delta[2] += signo * avance
+    por_ciclo = {ciclo_id: delta for ciclo_id, delta in por_ciclo.items() if any(delta)}
+    if not por_ciclo:
+        return
+
+    por_programa = {}
+    programas = dict(CicloPHVA.objects.filter(pk__in=por_ciclo).values_list('pk', 'programa_id'))
+    for ciclo_id, delta in por_ciclo.items():
+        _ajustar(CicloPHVA.objects.filter(pk=ciclo_id), *delta)
+        acumulado = por_programa.setdefault(programas[ciclo_id], [0, 0, Decimal(0)])
+        for posicion, valor in enumerate(delta):
+            acumulado[posicion] += valor
+    for programa_id, delta in por_programa.items():
+        if any(delta):
+            _ajustar(ProgramaPAMEC.objects.filter(pk=programa_id), *delta)
+
+
+def recalcular(programa_ids=None):
+    """
+    Reconstruye los acumulados de los programas indicados (todos si es None)
+    y de sus fases. Retorna la cantidad de programas recalculados.
+    """
+    from .models import AccionMejora, CicloPHVA, ProgramaPAMEC
+
+    programas = ProgramaPAMEC.objects.all()
+    ciclos = CicloPHVA.objects.all()
+    acciones = AccionMejora.objects.exclude(estado='CANCELADA')
+    if programa_ids is not None:
+        programas = programas.filter(pk__in=programa_ids)
+        ciclos = ciclos.filter(programa_id__in=programa_ids)
+        acciones = acciones.filter(ciclo__programa_id__in=programa_ids)
+
+    sumas = {
+        fila['ciclo_id']: fila
+        for fila in acciones.values('ciclo_id').annotate(
+            total=Count('id'),
+            completadas=Count('id', filter=Q(estado='COMPLETADA')),
+            suma=Sum('porcentaje_avance'),
+        ).order_by()
+    }
+
+    ciclos = list(ciclos.only('pk', 'programa_id'))
+    programas = {programa.pk: programa for programa in programas.only('pk')}
+    for programa in programas.values():
+        programa.total_acciones = programa.acciones_completadas = 0
+        programa.suma_avance = Decimal(0)
+    for ciclo in ciclos:
+        fila = sumas.get(ciclo.pk, {})
+        ciclo.total_acciones = fila.get('total') or 0
+        ciclo.acciones_completadas = fila.get('completadas') or 0
+        ciclo.suma_avance = Decimal(fila.get('suma') or 0)
+        ciclo.porcentaje_avance = _porcentaje(ciclo.suma_avance, ciclo.total_acciones)
+        programa = programas[ciclo.programa_id]
+        programa.total_acciones += ciclo.total_acciones
+        programa.acciones_completadas += ciclo.acciones_completadas
+        programa.suma_avance += ciclo.suma_avance
+    for programa in programas.values():
+        programa.porcentaje_avance = _porcentaje(programa.suma_avance, programa.total_acciones)
+
+    with transaction.atomic():
+        CicloPHVA.objects.bulk_update(ciclos, CAMPOS_ACUMULADOS, batch_size=500)
+        ProgramaPAMEC.objects.bulk_update(list(programas.values()), CAMPOS_ACUMULADOS, batch_size=500)
+    return len(programas)
@@ -0,0 +1,26 @@
+"""
+Comando que reconstruye el avance acumulado de fases y programas PAMEC desde
+sus acciones. Durante la operación normal el acumulado se ajusta al guardar
+cada acción; este comando sirve tras cargas o cambios hechos por fuera de la
+aplicación (p. ej. actualizaciones masivas en la base de datos).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from pamec.avance import recalcular
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el avance de las fases y programas PAMEC a partir de sus acciones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--programa', type=int, action='append', help='ID del programa (se puede repetir)')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total = recalcular(options['programa'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Avance recalculado: {total} programas en {time.perf_counter() - inicio:.2f}s'
+        ))
@@ -0,0 +1,179 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("evaluacion", "0010_historial_fecha_registro"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("pamec", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AccionMejora",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("descripcion", models.TextField(verbose_name="Descripción")),
+                ("fecha_limite", models.DateField(verbose_name="Fecha límite")),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("PENDIENTE", "Pendiente"),
+                            ("EN_PROCESO", "En Proceso"),
+                            ("COMPLETADA", "Completada"),
+                            ("CANCELADA", "Cancelada"),
+                        ],
+                        default="PENDIENTE",
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "porcentaje_avance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=5,
+                        verbose_name="Porcentaje de avance",
+                    ),
+                ),
+                (
+                    "fecha_completada",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="Fecha de cierre"
+                    ),
+                ),
+                (
+                    "fecha_modificacion",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Fecha de modificación"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Acción de Mejora",
+                "verbose_name_plural": "Acciones de Mejora",
+                "ordering": ["fecha_limite", "id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="ciclophva",
+            name="acciones_completadas",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Acciones completadas"
+            ),
+        ),
+        migrations.AddField(
+            model_name="ciclophva",
+            name="suma_avance",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                max_digits=12,
+                verbose_name="Suma del avance de las acciones",
+            ),
+        ),
+        migrations.AddField(
+            model_name="ciclophva",
+            name="total_acciones",
+            field=models.PositiveIntegerField(default=0, verbose_name="Acciones"),
+        ),
+        migrations.AddField(
+            model_name="programapamec",
+            name="acciones_completadas",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Acciones completadas"
+            ),
+        ),
+        migrations.AddField(
+            model_name="programapamec",
+            name="porcentaje_avance",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                max_digits=5,
+                verbose_name="Porcentaje de avance",
+            ),
+        ),
+        migrations.AddField(
+            model_name="programapamec",
+            name="suma_avance",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=0,
+                max_digits=12,
+                verbose_name="Suma del avance de las acciones",
+            ),
+        ),
+        migrations.AddField(
+            model_name="programapamec",
+            name="total_acciones",
+            field=models.PositiveIntegerField(default=0, verbose_name="Acciones"),
+        ),
+        migrations.AddIndex(
+            model_name="programapamec",
+            index=models.Index(
+                fields=["entidad", "porcentaje_avance"],
+                name="pamec_prog_ent_avance_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accionmejora",
+            name="ciclo",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="acciones",
+                to="pamec.ciclophva",
+                verbose_name="Fase",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accionmejora",
+            name="evaluacion_criterio",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="acciones_pamec",
+                to="evaluacion.evaluacioncriterio",
+                verbose_name="No conformidad",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accionmejora",
+            name="responsable",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="acciones_pamec",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="accionmejora",
+            index=models.Index(
+                fields=["ciclo", "estado"], name="pamec_accion_ciclo_est_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="accionmejora",
+            index=models.Index(
+                fields=["estado", "fecha_limite"], name="pamec_accion_est_fecha_idx"
+            ),
+        ),
+    ]
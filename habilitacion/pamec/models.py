@@ -1,16 +1,40 @@
 """
 Modelos para PAMEC - Programa de Auditoría para el Mejoramiento de la Calidad en Salud
-Este módulo está reservado para desarrollo futuro.
+Cada programa tiene un ciclo por fase PHVA y cada ciclo sus acciones de
+mejora, que pueden atender criterios evaluados como No Cumple. El avance se
+acumula de las acciones a la fase y de la fase al programa en columnas de
+resumen que mantiene pamec.avance al guardar cada acción.
 """
 
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
+
+
+class AvanceAcumulado(models.Model):
+    """Columnas de avance acumulado de las acciones de mejora (las canceladas no cuentan)"""
+
+    total_acciones = models.PositiveIntegerField('Acciones', default=0)
+    acciones_completadas = models.PositiveIntegerField('Acciones completadas', default=0)
+    suma_avance = models.DecimalField('Suma del avance de las acciones', max_digits=12, decimal_places=2, default=0)
+    porcentaje_avance = models.DecimalField(
+        'Porcentaje de avance',
+        max_digits=5,
+        decimal_places=2,
+        default=0
+    )
+
+    class Meta:
+        abstract = True
 
 
-class ProgramaPAMEC(models.Model):
+class ProgramaPAMEC(AvanceAcumulado):
     """
     Programa de Auditoría para el Mejoramiento de la Calidad.
-    Placeholder para desarrollo futuro.
+    Al crearse genera sus cuatro ciclos PHVA; el avance es el promedio del
+    avance de todas sus acciones.
     """
     entidad = models.ForeignKey(
         'entidades.EntidadPrestadora',
@@ -40,41 +64,47 @@ class ProgramaPAMEC(models.Model):
         verbose_name = 'Programa PAMEC'
         verbose_name_plural = 'Programas PAMEC'
         ordering = ['entidad', '-fecha_inicio']
+        indexes = [
+            models.Index(fields=['entidad', 'porcentaje_avance'], name='pamec_prog_ent_avance_idx'),
+        ]
 
     def __str__(self):
         return f"PAMEC {self.periodo} - {self.entidad.razon_social}"
 
+    def save(self, *args, **kwargs):
+        nuevo = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if nuevo:
+                CicloPHVA.objects.bulk_create([
+                    CicloPHVA(programa=self, fase=fase, descripcion=etiqueta)
+                    for fase, etiqueta in CicloPHVA.FASES
+                ])
+
 
-class CicloPHVA(models.Model):
+class CicloPHVA(AvanceAcumulado):
     """
     Ciclo PHVA (Planear, Hacer, Verificar, Actuar) del PAMEC.
-    Placeholder para desarrollo futuro.
+    El avance es el promedio del avance de las acciones de la fase.
     """
+
+    FASES = [
+        ('PLANEAR', 'Planear'),
+        ('HACER', 'Hacer'),
+        ('VERIFICAR', 'Verificar'),
+        ('ACTUAR', 'Actuar'),
+    ]
+
     programa = models.ForeignKey(
         ProgramaPAMEC,
         on_delete=models.CASCADE,
         related_name='ciclos',
         verbose_name='Programa'
     )
-    fase = models.CharField(
-        'Fase',
-        max_length=20,
-        choices=[
-            ('PLANEAR', 'Planear'),
-            ('HACER', 'Hacer'),
-            ('VERIFICAR', 'Verificar'),
-            ('ACTUAR', 'Actuar'),
-        ]
-    )
+    fase = models.CharField('Fase', max_length=20, choices=FASES)
     descripcion = models.TextField('Descripción')
     fecha_inicio = models.DateField('Fecha de inicio', null=True, blank=True)
     fecha_fin = models.DateField('Fecha de fin', null=True, blank=True)
-    porcentaje_avance = models.DecimalField(
-        'Porcentaje de avance',
-        max_digits=5,
-        decimal_places=2,
-        default=0
-    )
     responsable = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -90,3 +120,104 @@ class CicloPHVA(models.Model):
 
     def __str__(self):
         return f"{self.get_fase_display()} - {self.programa}"
+
+
+class AccionMejora(models.Model):
+    """
+    Acción de mejora de una fase del PAMEC, con responsable y fecha límite.
+    Puede atender un criterio evaluado como No Cumple en una sede. Al
+    guardarla se ajustan las columnas de avance de su fase y de su programa
+    con la diferencia respecto al valor guardado; al eliminarla (también en
+    lote o en cascada) lo hace pamec.signals.
+    """
+
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En Proceso'),
+        ('COMPLETADA', 'Completada'),
+        ('CANCELADA', 'Cancelada'),
+    ]
+
+    ciclo = models.ForeignKey(
+        CicloPHVA,
+        on_delete=models.CASCADE,
+        related_name='acciones',
+        verbose_name='Fase'
+    )
+    evaluacion_criterio = models.ForeignKey(
+        'evaluacion.EvaluacionCriterio',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='acciones_pamec',
+        verbose_name='No conformidad'
+    )
+    descripcion = models.TextField('Descripción')
+    responsable = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='acciones_pamec'
+    )
+    fecha_limite = models.DateField('Fecha límite')
+    estado = models.CharField('Estado', max_length=20, choices=ESTADOS, default='PENDIENTE')
+    porcentaje_avance = models.DecimalField(
+        'Porcentaje de avance',
+        max_digits=5,
+        decimal_places=2,
+        default=0
+    )
+    fecha_completada = models.DateField('Fecha de cierre', null=True, blank=True)
+    fecha_modificacion = models.DateTimeField('Fecha de modificación', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Acción de Mejora'
+        verbose_name_plural = 'Acciones de Mejora'
+        ordering = ['fecha_limite', 'id']
+        indexes = [
+            models.Index(fields=['ciclo', 'estado'], name='pamec_accion_ciclo_est_idx'),
+            models.Index(fields=['estado', 'fecha_limite'], name='pamec_accion_est_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return self.descripcion[:80]
+
+    def aporte(self):
+        """(ciclo_id, cuenta, completada, avance) con que la acción suma a los acumulados"""
+        if self.estado == 'CANCELADA':
+            return (self.ciclo_id, 0, 0, Decimal(0))
+        return (
+            self.ciclo_id, 1, int(self.estado == 'COMPLETADA'),
+            Decimal(self.porcentaje_avance or 0)
+        )
+
+    @property
+    def vencida(self):
+        return self.estado in ['PENDIENTE', 'EN_PROCESO'] and self.fecha_limite < timezone.localdate()
+
+    def save(self, *args, **kwargs):
+        from .avance import aplicar_aporte
+
+        if self.estado == 'COMPLETADA':
+            self.porcentaje_avance = 100
+            self.fecha_completada = self.fecha_completada or timezone.localdate()
+        else:
+            self.porcentaje_avance = min(max(Decimal(self.porcentaje_avance or 0), Decimal(0)), Decimal(100))
+            self.fecha_completada = None
+        with transaction.atomic():
+            # El aporte anterior se lee de la fila bloqueada, no de la instancia,
+            # que puede estar desactualizada frente a otro guardado
+            anterior = aporte_guardado(self.pk)
+            super().save(*args, **kwargs)
+            aplicar_aporte(anterior, self.aporte())
+
+
+def aporte_guardado(accion_id):
+    """Aporte de la acción según la base de datos (fila bloqueada), o None si no existe"""
+    if accion_id is None:
+        return None
+    guardada = AccionMejora.objects.select_for_update().filter(pk=accion_id).only(
+        'ciclo_id', 'estado', 'porcentaje_avance'
+    ).first()
+    return guardada.aporte() if guardada else None
@@ -0,0 +1,22 @@
+"""
+Señales del módulo PAMEC: descuentan de la fase y del programa el aporte de
+las acciones eliminadas, sea una por una, en lote (p. ej. "eliminar
+seleccionados" del admin) o en cascada al eliminar su fase.
+"""
+
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+
+from .avance import aplicar_aporte
+from .models import AccionMejora, aporte_guardado
+
+
+@receiver(pre_delete, sender=AccionMejora)
+def accion_por_eliminar(sender, instance, **kwargs):
+    # Corre dentro de la transacción del borrado: el aporte sale de la fila bloqueada
+    instance._aporte_eliminado = aporte_guardado(instance.pk)
+
+
+@receiver(post_delete, sender=AccionMejora)
+def accion_eliminada(sender, instance, **kwargs):
+    aplicar_aporte(getattr(instance, '_aporte_eliminado', None), None)
@@ -7,5 +7,9 @@ app_name = 'pamec'
 urlpatterns = [
     path('', views.dashboard_pamec, name='dashboard'),
     path('programas/', views.lista_programas, name='programas'),
+    path('programas/nuevo/', views.nuevo_programa, name='nuevo'),
     path('programas/<int:pk>/', views.detalle_programa, name='detalle'),
+    path('programas/<int:pk>/acciones/', views.nueva_accion, name='nueva_accion'),
+    path('programas/<int:pk>/no-conformidades/', views.vincular_no_conformidades, name='vincular_no_conformidades'),
+    path('acciones/<int:pk>/', views.actualizar_accion, name='actualizar_accion'),
 ]
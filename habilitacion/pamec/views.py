@@ -1,43 +1,288 @@
 """
 Vistas del módulo PAMEC.
 Programa de Auditoría para el Mejoramiento de la Calidad en Salud.
-Este módulo está reservado para desarrollo futuro.
+Los porcentajes de avance se leen de las columnas acumuladas de programas y
+fases (ver pamec.avance); las vistas nunca recorren las acciones para calcularlos.
 """
 
-from django.shortcuts import render, get_object_or_404
+from datetime import date
+
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .models import ProgramaPAMEC
+from django.core.paginator import Paginator
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from .avance import recalcular
+from .models import AccionMejora, CicloPHVA, ProgramaPAMEC
+
+ESTADOS_ABIERTOS = ['PENDIENTE', 'EN_PROCESO']
+
+
+def _programas_visibles(principal):
+    if principal.es_super:
+        return ProgramaPAMEC.objects.all()
+    if principal.entidad_id:
+        return ProgramaPAMEC.objects.filter(entidad_id=principal.entidad_id)
+    return ProgramaPAMEC.objects.none()
+
+
+def _acciones_vencidas_por_programa(programa_ids):
+    hoy = timezone.localdate()
+    return dict(
+        AccionMejora.objects.filter(
+            ciclo__programa_id__in=programa_ids, estado__in=ESTADOS_ABIERTOS, fecha_limite__lt=hoy
+        ).values('ciclo__programa_id').annotate(cantidad=Count('id'))
+        .values_list('ciclo__programa_id', 'cantidad').order_by()
+    )
+
+
+def _leer_fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        return None
 
 
 @login_required
 def dashboard_pamec(request):
-    """Dashboard del módulo PAMEC"""
+    """Dashboard del módulo PAMEC: indicadores de los programas y acciones por vencer"""
+    programas = _programas_visibles(request.principal)
+    hoy = timezone.localdate()
+
+    indicadores = programas.aggregate(
+        total=Count('id'),
+        en_curso=Count('id', filter=~Q(estado='FINALIZADO')),
+        avance_promedio=Avg('porcentaje_avance'),
+        acciones=Sum('total_acciones'),
+        completadas=Sum('acciones_completadas'),
+    )
+    acciones_abiertas = AccionMejora.objects.filter(
+        ciclo__programa__in=programas, estado__in=ESTADOS_ABIERTOS
+    )
+    indicadores['vencidas'] = acciones_abiertas.filter(fecha_limite__lt=hoy).count()
+
+    rezagados = list(
+        programas.exclude(estado='FINALIZADO').filter(total_acciones__gt=0)
+        .select_related('entidad').order_by('porcentaje_avance', 'pk')[:10]
+    )
+    vencidas = _acciones_vencidas_por_programa([programa.pk for programa in rezagados])
+    for programa in rezagados:
+        programa.acciones_vencidas = vencidas.get(programa.pk, 0)
+
     return render(request, 'pamec/dashboard.html', {
         'titulo': 'PAMEC',
-        'mensaje': 'Módulo en desarrollo. Próximamente disponible.',
+        'indicadores': indicadores,
+        'rezagados': rezagados,
+        'proximas': acciones_abiertas.select_related(
+            'ciclo__programa', 'responsable'
+        ).order_by('fecha_limite', 'pk')[:15],
+        'hoy': hoy,
     })
 
 
 @login_required
 def lista_programas(request):
-    """Lista de programas PAMEC"""
-    if request.user.entidad:
-        programas = ProgramaPAMEC.objects.filter(entidad=request.user.entidad)
-    else:
-        programas = ProgramaPAMEC.objects.none()
+    """Lista paginada de programas PAMEC con su avance acumulado"""
+    programas = _programas_visibles(request.principal).select_related('entidad')
+    estado = request.GET.get('estado', '')
+    if estado:
+        programas = programas.filter(estado=estado)
+    busqueda = request.GET.get('q', '').strip()
+    if busqueda:
+        programas = programas.filter(Q(nombre__icontains=busqueda) | Q(periodo__icontains=busqueda))
+
+    orden = '-fecha_inicio' if request.GET.get('orden') != 'avance' else 'porcentaje_avance'
+    pagina = Paginator(programas.order_by(orden, 'pk'), 50).get_page(request.GET.get('pagina'))
+    vencidas = _acciones_vencidas_por_programa([programa.pk for programa in pagina])
+    for programa in pagina:
+        programa.acciones_vencidas = vencidas.get(programa.pk, 0)
+    parametros = request.GET.copy()
+    parametros.pop('pagina', None)
 
     return render(request, 'pamec/programas/lista.html', {
         'titulo': 'Programas PAMEC',
-        'programas': programas,
+        'pagina': pagina,
+        'estados': ProgramaPAMEC._meta.get_field('estado').choices,
+        'estado': estado,
+        'busqueda': busqueda,
+        'orden': request.GET.get('orden', ''),
+        'parametros': parametros.urlencode(),
+        'puede_crear': bool(request.principal.entidad_id) and not request.principal.solo_lectura,
     })
 
 
+@login_required
+def nuevo_programa(request):
+    """Crear un programa PAMEC con sus cuatro fases PHVA"""
+    if not request.principal.entidad_id or request.principal.solo_lectura:
+        messages.error(request, 'No tiene permisos para crear programas PAMEC.')
+        return redirect('pamec:programas')
+
+    if request.method == 'POST':
+        nombre = request.POST.get('nombre', '').strip()
+        periodo = request.POST.get('periodo', '').strip()
+        fecha_inicio = _leer_fecha(request.POST.get('fecha_inicio'))
+        fecha_fin = _leer_fecha(request.POST.get('fecha_fin'))
+        if not (nombre and periodo and fecha_inicio and fecha_fin) or fecha_fin < fecha_inicio:
+            messages.error(request, 'Complete nombre, período y un rango de fechas válido.')
+        else:
+            programa = ProgramaPAMEC.objects.create(
+                entidad_id=request.principal.entidad_id,
+                nombre=nombre,
+                periodo=periodo,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                observaciones=request.POST.get('observaciones', '').strip(),
+            )
+            messages.success(request, f'Programa "{programa.nombre}" creado.')
+            return redirect('pamec:detalle', pk=programa.pk)
+
+    return render(request, 'pamec/programas/nuevo.html', {
+        'titulo': 'Nuevo Programa PAMEC',
+        'datos': request.POST,
+    })
+
+
+def _programa_con_acceso(request, pk, gestion=False):
+    """Programa si el usuario tiene acceso (y puede editar si gestion=True); None en otro caso"""
+    programa = get_object_or_404(ProgramaPAMEC.objects.select_related('entidad'), pk=pk)
+    if not request.principal.accede_entidad(programa.entidad_id):
+        messages.error(request, 'No tiene acceso a este programa.')
+        return None
+    if gestion and request.principal.solo_lectura:
+        messages.error(request, 'No tiene permisos para modificar este programa.')
+        return None
+    return programa
+
+
 @login_required
 def detalle_programa(request, pk):
-    """Detalle de un programa PAMEC"""
-    programa = get_object_or_404(ProgramaPAMEC, pk=pk)
+    """Detalle de un programa: fases con su avance, acciones y no conformidades sin atender"""
+    from evaluacion.models import EvaluacionCriterio
+    from usuarios.models import Usuario
+
+    programa = _programa_con_acceso(request, pk)
+    if programa is None:
+        return redirect('pamec:programas')
+
+    ciclos = list(programa.ciclos.order_by('pk'))
+    acciones = AccionMejora.objects.filter(ciclo__programa=programa).select_related(
+        'responsable', 'evaluacion_criterio__criterio', 'evaluacion_criterio__sede'
+    ).order_by('fecha_limite', 'pk')
+    por_ciclo = {}
+    for accion in acciones:
+        por_ciclo.setdefault(accion.ciclo_id, []).append(accion)
+    for ciclo in ciclos:
+        ciclo.lista_acciones = por_ciclo.get(ciclo.pk, [])
+
+    no_conformidades = EvaluacionCriterio.objects.filter(
+        sede__entidad=programa.entidad, estado='NC'
+    ).exclude(
+        acciones_pamec__ciclo__programa=programa
+    ).select_related('sede', 'criterio').order_by('sede__nombre', 'criterio__orden')
 
     return render(request, 'pamec/programas/detalle.html', {
         'titulo': programa.nombre,
         'programa': programa,
+        'ciclos': ciclos,
+        'no_conformidades': no_conformidades[:200],
+        'total_no_conformidades': no_conformidades.count(),
+        'usuarios': Usuario.objects.filter(entidad=programa.entidad, is_active=True),
+        'estados_accion': AccionMejora.ESTADOS,
+        'puede_gestionar': not request.principal.solo_lectura,
+        'hoy': timezone.localdate(),
     })
+
+
+@login_required
+@require_POST
+def nueva_accion(request, pk):
+    """Agregar una acción de mejora a una fase del programa"""
+    programa = _programa_con_acceso(request, pk, gestion=True)
+    if programa is None:
+        return redirect('pamec:programas')
+
+    ciclo = programa.ciclos.filter(pk=request.POST.get('ciclo') or 0).first()
+    descripcion = request.POST.get('descripcion', '').strip()
+    fecha_limite = _leer_fecha(request.POST.get('fecha_limite'))
+    if ciclo is None or not descripcion or fecha_limite is None:
+        messages.error(request, 'Indique la fase, la descripción y la fecha límite de la acción.')
+        return redirect('pamec:detalle', pk=pk)
+
+    responsable = request.POST.get('responsable', '')
+    AccionMejora.objects.create(
+        ciclo=ciclo,
+        descripcion=descripcion,
+        fecha_limite=fecha_limite,
+        responsable=programa.entidad.usuarios.filter(pk=responsable).first() if responsable.isdigit() else None,
+    )
+    messages.success(request, 'Acción de mejora agregada.')
+    return redirect('pamec:detalle', pk=pk)
+
+
+@login_required
+@require_POST
+def vincular_no_conformidades(request, pk):
+    """Crea una acción en la fase Hacer por cada criterio No Cumple seleccionado"""
+    from evaluacion.models import EvaluacionCriterio
+
+    programa = _programa_con_acceso(request, pk, gestion=True)
+    if programa is None:
+        return redirect('pamec:programas')
+
+    ciclo = programa.ciclos.filter(fase='HACER').order_by('pk').first()
+    if ciclo is None:
+        ciclo = CicloPHVA.objects.create(programa=programa, fase='HACER', descripcion='Hacer')
+    fecha_limite = _leer_fecha(request.POST.get('fecha_limite')) or programa.fecha_fin
+
+    seleccion = [valor for valor in request.POST.getlist('no_conformidades') if valor.isdigit()]
+    no_conformidades = EvaluacionCriterio.objects.filter(
+        pk__in=seleccion, sede__entidad=programa.entidad, estado='NC'
+    ).exclude(acciones_pamec__ciclo__programa=programa).select_related('sede', 'criterio')
+    acciones = [
+        AccionMejora(
+            ciclo=ciclo,
+            evaluacion_criterio=evaluacion,
+            descripcion=f'Subsanar criterio {evaluacion.criterio.numero} en {evaluacion.sede.nombre}: '
+                        f'{evaluacion.criterio.texto[:300]}',
+            responsable_id=evaluacion.responsable_id,
+            fecha_limite=fecha_limite,
+        )
+        for evaluacion in no_conformidades
+    ]
+    if acciones:
+        AccionMejora.objects.bulk_create(acciones, batch_size=500)
+        recalcular([programa.pk])
+        messages.success(request, f'Se crearon {len(acciones)} acciones desde no conformidades.')
+    else:
+        messages.warning(request, 'No se seleccionaron no conformidades pendientes.')
+    return redirect('pamec:detalle', pk=pk)
+
+
+@login_required
+@require_POST
+def actualizar_accion(request, pk):
+    """Actualiza estado y avance de una acción; el acumulado se ajusta al guardar"""
+    accion = get_object_or_404(AccionMejora.objects.select_related('ciclo'), pk=pk)
+    programa = _programa_con_acceso(request, accion.ciclo.programa_id, gestion=True)
+    if programa is None:
+        return redirect('pamec:programas')
+
+    estado = request.POST.get('estado', accion.estado)
+    if estado not in dict(AccionMejora.ESTADOS):
+        messages.error(request, 'Estado no válido.')
+        return redirect('pamec:detalle', pk=programa.pk)
+    accion.estado = estado
+    try:
+        accion.porcentaje_avance = int(request.POST.get('porcentaje_avance', accion.porcentaje_avance))
+    except (TypeError, ValueError):
+        pass
+    fecha_limite = _leer_fecha(request.POST.get('fecha_limite'))
+    if fecha_limite:
+        accion.fecha_limite = fecha_limite
+    accion.save()
+    messages.success(request, 'Acción actualizada.')
+    return redirect('pamec:detalle', pk=programa.pk)
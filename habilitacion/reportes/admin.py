@@ -2,11 +2,49 @@
 Admin para el módulo de Reportes
 Sistema de Habilitación de Servicios de Salud
 
-Este módulo no tiene modelos propios, solo genera reportes
-desde otros modelos del sistema.
+Los reportes se generan desde otros modelos del sistema; este módulo solo
+tiene las tablas de resumen del tablero de cartera, que son calculadas, y
+las exportaciones generadas en segundo plano.
 """
 
 from django.contrib import admin
 
-# El módulo de reportes no tiene modelos propios
-# Utiliza datos de evaluacion, estandares y entidades para generar reportes
+from .models import ExportacionReporte, ResumenCarteraEntidad, ResumenCarteraSede
+
+
+class ResumenCarteraAdmin(admin.ModelAdmin):
+    """Base de solo lectura para los resúmenes de cartera"""
+
+    list_filter = ['entidad__estado']
+    search_fields = ['entidad__razon_social', 'entidad__nit']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ResumenCarteraEntidad)
+class ResumenCarteraEntidadAdmin(ResumenCarteraAdmin):
+    list_display = [
+        'entidad', 'total_sedes', 'porcentaje_cumplimiento', 'criterios_pendientes',
+        'documentos_vencidos', 'ultima_actividad', 'fecha_calculo'
+    ]
+
+
+@admin.register(ResumenCarteraSede)
+class ResumenCarteraSedeAdmin(ResumenCarteraAdmin):
+    list_display = [
+        'sede', 'entidad', 'porcentaje_cumplimiento', 'criterios_pendientes',
+        'documentos_vencidos', 'ultima_actividad', 'fecha_calculo'
+    ]
+    search_fields = ResumenCarteraAdmin.search_fields + ['sede__nombre']
+
+
+@admin.register(ExportacionReporte)
+class ExportacionReporteAdmin(admin.ModelAdmin):
+    list_display = ['entidad', 'sede', 'estandar', 'formato', 'estado', 'total_filas', 'usuario', 'fecha_creacion']
+    list_filter = ['formato', 'estado']
+    search_fields = ['entidad__razon_social', 'sede__nombre']
+    readonly_fields = ['total_filas', 'archivo', 'mensaje', 'tarea', 'fecha_creacion', 'fecha_fin']
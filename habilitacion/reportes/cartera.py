@@ -0,0 +1,180 @@
+"""
+Resúmenes de cartera para el tablero de usuarios SUPER
+Sistema de Habilitación de Servicios de Salud
+
+Cada sede activa tiene una fila en ResumenCarteraSede y cada entidad una en
+ResumenCarteraEntidad (suma de sus sedes más sus documentos legales vencidos).
+`actualizar_sedes` calcula cualquier conjunto de sedes con consultas agrupadas,
+de modo que la actualización nocturna de toda la cartera cuesta lo mismo en
+consultas que la de una sola sede.
+"""
+
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from core.diferido import programar
+
+
+def _porcentaje(cumple, total, no_aplica):
+    aplican = total - no_aplica
+    return round(cumple / aplican * 100, 2) if aplican > 0 else 0
+
+
+def _maximo_por(queryset, clave, campo, sede_ids):
+    return dict(
+        queryset.filter(**{f'{clave}__in': sede_ids}).values(clave)
+        .annotate(maximo=Max(campo)).values_list(clave, 'maximo').order_by()
+    )
+
+
+def actualizar_sedes(sede_ids=None):
+    """
+    Recalcula el resumen de las sedes indicadas (todas si es None) y de sus
+    entidades. Las sedes inactivas o eliminadas salen de la cartera.
+    """
+    from entidades.models import Sede
+    from evaluacion.aplicabilidad import resumen_aplicable, resumen_vacio
+    from evaluacion.models import ArchivoRepositorio, Evaluacion, EvaluacionCriterio
+
+    from .models import ResumenCarteraSede
+
+    sedes = Sede.objects.filter(activa=True)
+    entidad_ids = set()
+    if sede_ids is not None:
+        sede_ids = set(sede_ids)
+        sedes = sedes.filter(pk__in=sede_ids)
+        salientes = ResumenCarteraSede.objects.filter(sede_id__in=sede_ids)
+    else:
+        salientes = ResumenCarteraSede.objects.all()
+    sedes = list(sedes.only('pk', 'entidad_id', 'version_aplicabilidad'))
+    ids = [sede.pk for sede in sedes]
+
+    salientes = salientes.exclude(sede_id__in=ids)
+    entidad_ids.update(salientes.values_list('entidad_id', flat=True))
+    salientes.delete()
+
+    resumenes = resumen_aplicable(sedes, por='sede_id') if sedes else {}
+    vencidos = dict(
+        Evaluacion.objects.filter(sede_id__in=ids, fecha_vencimiento__lt=timezone.localdate())
+        .values('sede_id').annotate(cantidad=Count('id')).values_list('sede_id', 'cantidad').order_by()
+    )
+    actividades = [
+        _maximo_por(EvaluacionCriterio.objects, 'sede_id', 'fecha_modificacion', ids),
+        _maximo_por(Evaluacion.objects, 'sede_id', 'fecha_modificacion', ids),
+        _maximo_por(ArchivoRepositorio.objects, 'evaluacion__sede_id', 'fecha_subida', ids),
+    ]
+
+    existentes = {
+        resumen.sede_id: resumen
+        for resumen in ResumenCarteraSede.objects.filter(sede_id__in=ids)
+    }
+    nuevos, modificados = [], []
+    ahora = timezone.now()
+    for sede in sedes:
+        resumen = resumenes.get(sede.pk) or resumen_vacio()
+        fila = existentes.get(sede.pk)
+        if fila is None:
+            fila = ResumenCarteraSede(sede_id=sede.pk)
+            nuevos.append(fila)
+        else:
+            modificados.append(fila)
+        fila.entidad_id = sede.entidad_id
+        fila.total_criterios = resumen['total']
+        fila.criterios_cumple = resumen['cumple']
+        fila.criterios_no_cumple = resumen['no_cumple']
+        fila.criterios_no_aplica = resumen['no_aplica']
+        fila.criterios_pendientes = resumen['pendiente']
+        fila.porcentaje_cumplimiento = _porcentaje(resumen['cumple'], resumen['total'], resumen['no_aplica'])
+        fila.documentos_vencidos = vencidos.get(sede.pk, 0)
+        fechas = [actividad[sede.pk] for actividad in actividades if actividad.get(sede.pk)]
+        fila.ultima_actividad = max(fechas) if fechas else None
+        fila.fecha_calculo = ahora
+        entidad_ids.add(sede.entidad_id)
+
+    with transaction.atomic():
+        ResumenCarteraSede.objects.bulk_create(nuevos, batch_size=500)
+        ResumenCarteraSede.objects.bulk_update(modificados, [
+            'entidad', 'total_criterios', 'criterios_cumple', 'criterios_no_cumple',
+            'criterios_no_aplica', 'criterios_pendientes', 'porcentaje_cumplimiento',
+            'documentos_vencidos', 'ultima_actividad', 'fecha_calculo'
+        ], batch_size=500)
+
+    actualizar_entidades(None if sede_ids is None else entidad_ids)
+    return len(sedes)
+
+
+def actualizar_entidades(entidad_ids=None):
+    """Recalcula el resumen de las entidades a partir de los resúmenes de sus sedes"""
+    from entidades.models import DocumentoEntidad, EntidadPrestadora
+
+    from .models import ResumenCarteraEntidad, ResumenCarteraSede
+
+    entidades = EntidadPrestadora.objects.all()
+    if entidad_ids is not None:
+        entidades = entidades.filter(pk__in=entidad_ids)
+    ids = list(entidades.values_list('pk', flat=True))
+
+    sumas = {
+        fila['entidad_id']: fila
+        for fila in ResumenCarteraSede.objects.filter(entidad_id__in=ids).values('entidad_id').annotate(
+            sedes=Count('id'),
+            total=Sum('total_criterios'),
+            cumple=Sum('criterios_cumple'),
+            no_cumple=Sum('criterios_no_cumple'),
+            no_aplica=Sum('criterios_no_aplica'),
+            pendiente=Sum('criterios_pendientes'),
+            vencidos=Sum('documentos_vencidos'),
+            actividad=Max('ultima_actividad'),
+        ).order_by()
+    }
+    legales_vencidos = dict(
+        DocumentoEntidad.objects.filter(entidad_id__in=ids, fecha_vencimiento__lt=timezone.localdate())
+        .values('entidad_id').annotate(cantidad=Count('id')).values_list('entidad_id', 'cantidad').order_by()
+    )
+    existentes = {
+        resumen.entidad_id: resumen
+        for resumen in ResumenCarteraEntidad.objects.filter(entidad_id__in=ids)
+    }
+
+    nuevos, modificados = [], []
+    ahora = timezone.now()
+    for entidad_id in ids:
+        suma = sumas.get(entidad_id, {})
+        fila = existentes.get(entidad_id)
+        if fila is None:
+            fila = ResumenCarteraEntidad(entidad_id=entidad_id)
+            nuevos.append(fila)
+        else:
+            modificados.append(fila)
+        fila.total_sedes = suma.get('sedes') or 0
+        fila.total_criterios = suma.get('total') or 0
+        fila.criterios_cumple = suma.get('cumple') or 0
+        fila.criterios_no_cumple = suma.get('no_cumple') or 0
+        fila.criterios_no_aplica = suma.get('no_aplica') or 0
+        fila.criterios_pendientes = suma.get('pendiente') or 0
+        fila.porcentaje_cumplimiento = _porcentaje(
+            fila.criterios_cumple, fila.total_criterios, fila.criterios_no_aplica
+        )
+        fila.documentos_vencidos = (suma.get('vencidos') or 0) + legales_vencidos.get(entidad_id, 0)
+        fila.ultima_actividad = suma.get('actividad')
+        fila.fecha_calculo = ahora
+
+    with transaction.atomic():
+        ResumenCarteraEntidad.objects.bulk_create(nuevos, batch_size=500)
+        ResumenCarteraEntidad.objects.bulk_update(modificados, [
+            'total_sedes', 'total_criterios', 'criterios_cumple', 'criterios_no_cumple',
+            'criterios_no_aplica', 'criterios_pendientes', 'porcentaje_cumplimiento',
+            'documentos_vencidos', 'ultima_actividad', 'fecha_calculo'
+        ], batch_size=500)
+    return len(ids)
+
+
+def programar_actualizacion(sede_ids=(), entidad_ids=()):
+    """
+    Actualiza los resúmenes al confirmar la transacción actual, una sola vez
+    por sede/entidad aunque la petición haga varias escrituras.
+    """
+    programar('cartera:sedes', sede_ids, actualizar_sedes)
+    programar('cartera:entidades', entidad_ids, actualizar_entidades)
@@ -0,0 +1,317 @@
+"""
+Exportación del reporte de cumplimiento a Excel y PDF
+Sistema de Habilitación de Servicios de Salud
+
+Las filas salen de una sola consulta sobre la matriz de aplicabilidad (un
+criterio por fila, con el estado, responsable, comentarios y número de
+evidencias de su evaluación), recorrida por bloques con `iterator()`. Ambos
+formatos se escriben a medida que llegan las filas: Excel en modo de solo
+escritura de openpyxl (una hoja por sede) y PDF dibujando directamente en
+el lienzo de reportlab, página por página. Ninguno carga en memoria todas
+las evaluaciones de la entidad.
+"""
+
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+
+TAMANO_BLOQUE = 2000
+
+ENCABEZADOS = [
+    'Grupo', 'Estándar', 'Número', 'Criterio', 'Estado', 'Responsable', 'Comentarios', 'Evidencias'
+]
+
+TIPOS_CONTENIDO = {
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pdf': 'application/pdf',
+}
+EXTENSIONES = {'excel': 'xlsx', 'pdf': 'pdf'}
+
+
+def limite_descarga_directa():
+    """Filas a partir de las cuales la exportación pasa a segundo plano"""
+    return settings.HABILITACION_CONFIG.get('EXPORTACION_FILAS_DIRECTAS', 5000)
+
+
+def _aplicables(entidad, sede=None, estandar=None):
+    from evaluacion.aplicabilidad import asegurar
+    from evaluacion.models import AplicabilidadCriterio
+
+    for pendiente in entidad.sedes.filter(activa=True, version_aplicabilidad=0):
+        asegurar(pendiente)
+
+    filas = AplicabilidadCriterio.objects.filter(sede__entidad=entidad, sede__activa=True)
+    if sede is not None:
+        filas = filas.filter(sede=sede)
+    if estandar is not None:
+        filas = filas.filter(estandar=estandar)
+    return filas
+
+
+def contar_filas(entidad, sede=None, estandar=None):
+    return _aplicables(entidad, sede, estandar).count()
+
+
+def consulta_filas(entidad, sede=None, estandar=None):
+    """
+    Filas del reporte ordenadas por sede, grupo, estándar y criterio. Los criterios
+    sin evaluación registrada salen como pendientes.
+    """
+    from evaluacion.models import ArchivoRepositorio, EvaluacionCriterio
+
+    evaluacion = EvaluacionCriterio.objects.filter(
+        sede_id=OuterRef('sede_id'), criterio_id=OuterRef('criterio_id')
+    )
+    evidencias = ArchivoRepositorio.objects.filter(
+        evaluacion__sede_id=OuterRef('sede_id'), evaluacion__criterio_id=OuterRef('criterio_id')
+    ).order_by().values('evaluacion_id').annotate(cantidad=Count('id')).values('cantidad')
+
+    return _aplicables(entidad, sede, estandar).annotate(
+        estado=Coalesce(Subquery(evaluacion.values('estado')[:1]), Value('P')),
+        responsable=Subquery(evaluacion.annotate(
+            nombre=Concat('responsable__primer_nombre', Value(' '), 'responsable__primer_apellido')
+        ).values('nombre')[:1]),
+        comentarios=Subquery(evaluacion.values('comentarios')[:1]),
+        evidencias=Coalesce(Subquery(evidencias, output_field=IntegerField()), 0),
+    ).order_by(
+        'sede__nombre', 'sede_id', 'grupo__orden', 'estandar__orden', 'criterio__clave_orden', 'criterio__orden'
+    ).values_list(
+        'sede_id', 'sede__nombre', 'grupo__codigo', 'estandar__codigo', 'criterio__numero',
+        'criterio__texto', 'estado', 'responsable', 'comentarios', 'evidencias'
+    )
+
+
+def _recorrer(filas):
+    """Filas como (sede_id, sede, [columnas del reporte]) leídas por bloques"""
+    from evaluacion.models import EvaluacionCriterio
+
+    estados = dict(EvaluacionCriterio.ESTADOS)
+    for (sede_id, sede, grupo, estandar, numero, texto, estado,
+         responsable, comentarios, evidencias) in filas.iterator(chunk_size=TAMANO_BLOQUE):
+        yield sede_id, sede, [
+            grupo, estandar, numero, texto, estados.get(estado, estado),
+            (responsable or '').strip(), comentarios or '', evidencias
+        ]
+
+
+def _titulo_hoja(nombre, usados):
+    """Título válido y único de hoja de Excel (máximo 31 caracteres)"""
+    base = re.sub(r'[\[\]:*?/\\]', ' ', nombre).strip()[:31] or 'Sede'
+    titulo, numero = base, 2
+    while titulo.lower() in usados:
+        sufijo = f' ({numero})'
+        titulo = base[:31 - len(sufijo)] + sufijo
+        numero += 1
+    usados.add(titulo.lower())
+    return titulo
+
+
+def escribir_excel(destino, entidad, sede=None, estandar=None):
+    """Escribe el libro en `destino` (ruta o archivo binario). Retorna el número de filas."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    from evaluacion.aplicabilidad import resumen_aplicable
+
+    libro = Workbook(write_only=True)
+    negrita = Font(bold=True, color='FFFFFF')
+    relleno = PatternFill('solid', fgColor='1F4E78')
+
+    def encabezado(hoja, columnas):
+        celdas = []
+        for columna in columnas:
+            celda = WriteOnlyCell(hoja, value=columna)
+            celda.font = negrita
+            celda.fill = relleno
+            celdas.append(celda)
+        hoja.append(celdas)
+
+    # Hoja de resumen con los totales de cada sede (una consulta agrupada)
+    sedes = entidad.sedes.filter(activa=True).order_by('nombre', 'pk')
+    if sede is not None:
+        sedes = sedes.filter(pk=sede.pk)
+    filtros = {'estandar': estandar} if estandar is not None else {}
+    resumenes = resumen_aplicable(sedes, por='sede_id', **filtros)
+
+    hoja = libro.create_sheet('Resumen')
+    hoja.append([f'Reporte de cumplimiento - {entidad.razon_social}'])
+    hoja.append([f'Generado: {timezone.localtime():%d/%m/%Y %H:%M}'
+                 + (f' - Estándar {estandar.codigo}' if estandar is not None else '')])
+    hoja.append([])
+    encabezado(hoja, ['Sede', 'Criterios', 'Cumple', 'No cumple', 'No aplica', 'Pendiente', '% Cumplimiento'])
+    for registro in sedes:
+        resumen = resumenes.get(registro.pk)
+        if resumen:
+            hoja.append([
+                registro.nombre, resumen['total'], resumen['cumple'], resumen['no_cumple'],
+                resumen['no_aplica'], resumen['pendiente'], resumen['porcentaje']
+            ])
+
+    usados = {'resumen'}
+    ajuste = Alignment(wrap_text=True, vertical='top')
+    hoja, sede_actual, total = None, None, 0
+    for sede_id, nombre_sede, columnas in _recorrer(consulta_filas(entidad, sede, estandar)):
+        if sede_id != sede_actual:
+            sede_actual = sede_id
+            hoja = libro.create_sheet(_titulo_hoja(nombre_sede, usados))
+            for letra, ancho in zip('ABCDEFGH', [8, 10, 10, 70, 12, 24, 40, 11]):
+                hoja.column_dimensions[letra].width = ancho
+            hoja.freeze_panes = 'A2'
+            encabezado(hoja, ENCABEZADOS)
+        texto = WriteOnlyCell(hoja, value=columnas[3])
+        texto.alignment = ajuste
+        columnas[3] = texto
+        hoja.append(columnas)
+        total += 1
+
+    libro.save(destino)
+    return total
+
+
+class _LienzoReporte:
+    """Dibuja la tabla del reporte en páginas horizontales, fila por fila"""
+
+    MARGEN = 36
+    FUENTE = 'Helvetica'
+    TAMANO = 7.5
+    INTERLINEADO = 9
+    # (encabezado, ancho en puntos, líneas máximas)
+    COLUMNAS = [
+        ('Grupo', 34, 1), ('Estándar', 42, 1), ('Número', 40, 2), ('Criterio', 300, 30),
+        ('Estado', 52, 1), ('Responsable', 80, 3), ('Comentarios', 140, 12), ('Evid.', 32, 1),
+    ]
+
+    def __init__(self, destino, titulo):
+        from reportlab.lib.pagesizes import landscape, letter
+        from reportlab.pdfgen import canvas
+
+        self.ancho, self.alto = landscape(letter)
+        self.lienzo = canvas.Canvas(destino, pagesize=(self.ancho, self.alto))
+        self.lienzo.setTitle(titulo)
+        self.titulo = titulo
+        self.pagina = 0
+        self.subtitulo = ''
+        self.y = 0
+
+    def nueva_pagina(self, subtitulo=None):
+        if self.pagina:
+            self.lienzo.showPage()
+        self.pagina += 1
+        if subtitulo is not None:
+            self.subtitulo = subtitulo
+
+        lienzo = self.lienzo
+        lienzo.setFont('Helvetica-Bold', 11)
+        lienzo.drawString(self.MARGEN, self.alto - self.MARGEN, self.titulo)
+        lienzo.setFont('Helvetica', 9)
+        lienzo.drawString(self.MARGEN, self.alto - self.MARGEN - 13, self.subtitulo)
+        lienzo.drawRightString(self.ancho - self.MARGEN, self.MARGEN - 18, f'Página {self.pagina}')
+
+        self.y = self.alto - self.MARGEN - 32
+        lienzo.setFont('Helvetica-Bold', self.TAMANO)
+        x = self.MARGEN
+        for nombre, ancho, _ in self.COLUMNAS:
+            lienzo.drawString(x + 2, self.y, nombre)
+            x += ancho
+        self.y -= 4
+        lienzo.line(self.MARGEN, self.y, self.ancho - self.MARGEN, self.y)
+        self.y -= self.INTERLINEADO
+
+    def fila(self, columnas):
+        from reportlab.lib.utils import simpleSplit
+
+        celdas = []
+        for valor, (_, ancho, maximo) in zip(columnas, self.COLUMNAS):
+            lineas = simpleSplit(str(valor), self.FUENTE, self.TAMANO, ancho - 4) or ['']
+            if len(lineas) > maximo:
+                lineas = lineas[:maximo]
+                lineas[-1] = lineas[-1][:-1] + '…'
+            celdas.append(lineas)
+        alto = max(len(lineas) for lineas in celdas) * self.INTERLINEADO
+
+        if self.y - alto < self.MARGEN:
+            self.nueva_pagina()
+
+        lienzo = self.lienzo
+        lienzo.setFont(self.FUENTE, self.TAMANO)
+        x = self.MARGEN
+        for lineas, (_, ancho, _) in zip(celdas, self.COLUMNAS):
+            texto = lienzo.beginText(x + 2, self.y)
+            texto.setLeading(self.INTERLINEADO)
+            for linea in lineas:
+                texto.textLine(linea)
+            lienzo.drawText(texto)
+            x += ancho
+        self.y -= alto
+        lienzo.setStrokeColorRGB(0.85, 0.85, 0.85)
+        lienzo.line(self.MARGEN, self.y + self.INTERLINEADO - 2, self.ancho - self.MARGEN, self.y + self.INTERLINEADO - 2)
+        lienzo.setStrokeColorRGB(0, 0, 0)
+
+    def guardar(self):
+        if not self.pagina:
+            self.nueva_pagina('Sin criterios para los filtros seleccionados')
+        self.lienzo.save()
+
+
+def escribir_pdf(destino, entidad, sede=None, estandar=None):
+    """Escribe el PDF paginado en `destino` (ruta o archivo binario). Retorna el número de filas."""
+    titulo = f'Reporte de cumplimiento - {entidad.razon_social}'
+    if estandar is not None:
+        titulo += f' - Estándar {estandar.codigo}'
+    lienzo = _LienzoReporte(destino, titulo)
+
+    sede_actual, total = None, 0
+    for sede_id, nombre_sede, columnas in _recorrer(consulta_filas(entidad, sede, estandar)):
+        if sede_id != sede_actual:
+            sede_actual = sede_id
+            lienzo.nueva_pagina(f'Sede: {nombre_sede}')
+        lienzo.fila(columnas)
+        total += 1
+
+    lienzo.guardar()
+    return total
+
+
+ESCRITORES = {'excel': escribir_excel, 'pdf': escribir_pdf}
+
+
+def nombre_archivo(entidad, formato, sede=None):
+    partes = ['reporte_cumplimiento', entidad.nit]
+    if sede is not None:
+        partes.append(sede.codigo_reps_sede or str(sede.pk))
+    return f"{'_'.join(partes)}.{EXTENSIONES[formato]}"
+
+
+def generar_temporal(formato, entidad, sede=None, estandar=None):
+    """Genera el reporte en un archivo temporal, listo para leer desde el inicio"""
+    temporal = tempfile.TemporaryFile()
+    ESCRITORES[formato](temporal, entidad, sede, estandar)
+    temporal.seek(0)
+    return temporal
+
+
+def ejecutar_exportacion(exportacion):
+    """Genera el archivo de una ExportacionReporte (desde la tarea en segundo plano)"""
+    from .models import ExportacionReporte
+
+    ExportacionReporte.objects.filter(pk=exportacion.pk).update(estado='EN_PROCESO')
+    with tempfile.TemporaryFile() as temporal:
+        exportacion.total_filas = ESCRITORES[exportacion.formato](
+            temporal, exportacion.entidad, exportacion.sede, exportacion.estandar
+        )
+        temporal.seek(0)
+        exportacion.archivo.save(
+            nombre_archivo(exportacion.entidad, exportacion.formato, exportacion.sede),
+            File(temporal),
+            save=False
+        )
+    exportacion.estado = 'COMPLETADA'
+    exportacion.fecha_fin = timezone.now()
+    exportacion.save(update_fields=['total_filas', 'archivo', 'estado', 'fecha_fin'])
+    return exportacion
@@ -0,0 +1,23 @@
+"""
+Comando para recalcular los resúmenes de cartera de todas las sedes y entidades.
+Se programa cada noche (p. ej. cron: `0 2 * * * python manage.py actualizar_cartera`)
+para que los documentos que vencen sin que nadie escriba queden reflejados;
+durante el día los resúmenes se actualizan al escribir.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from reportes.cartera import actualizar_sedes
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los resúmenes de cumplimiento del tablero de cartera'
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total = actualizar_sedes()
+        self.stdout.write(self.style.SUCCESS(
+            f'Cartera actualizada: {total} sedes en {time.perf_counter() - inicio:.2f}s'
+        ))
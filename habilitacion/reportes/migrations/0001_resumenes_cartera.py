@@ -0,0 +1,218 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("entidades", "0006_version_aplicabilidad_sede"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumenCarteraSede",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total_criterios",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Total criterios"
+                    ),
+                ),
+                (
+                    "criterios_cumple",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Criterios que cumplen"
+                    ),
+                ),
+                (
+                    "criterios_no_cumple",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Criterios que no cumplen"
+                    ),
+                ),
+                (
+                    "criterios_no_aplica",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Criterios no aplica"
+                    ),
+                ),
+                (
+                    "criterios_pendientes",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Criterios pendientes"
+                    ),
+                ),
+                (
+                    "porcentaje_cumplimiento",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=5,
+                        verbose_name="Porcentaje de cumplimiento",
+                    ),
+                ),
+                (
+                    "documentos_vencidos",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Documentos vencidos"
+                    ),
+                ),
+                (
+                    "ultima_actividad",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Última actividad"
+                    ),
+                ),
+                (
+                    "fecha_calculo",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Fecha de cálculo"
+                    ),
+                ),
+                (
+                    "entidad",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resumenes_cartera_sedes",
+                        to="entidades.entidadprestadora",
+                        verbose_name="Entidad",
+                    ),
+                ),
+                (
+                    "sede",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resumen_cartera",
+                        to="entidades.sede",
+                        verbose_name="Sede",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen de Cartera por Sede",
+                "verbose_name_plural": "Resúmenes de Cartera por Sede",
+                "ordering": ["entidad", "sede"],
+                "indexes": [
+                    models.Index(
+                        fields=["entidad", "porcentaje_cumplimiento"],
+                        name="rep_cart_sede_ent_pct_idx",
+                    ),
+                    models.Index(
+                        fields=["porcentaje_cumplimiento"], name="rep_cart_sede_pct_idx"
+                    ),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="ResumenCarteraEntidad",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total_criterios",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Total criterios"
+                    ),
+                ),
+                (
+                    "criterios_cumple",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Criterios que cumplen"
+                    ),
+                ),
+                (
+                    "criterios_no_cumple",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Criterios que no cumplen"
+                    ),
+                ),
+                (
+                    "criterios_no_aplica",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Criterios no aplica"
+                    ),
+                ),
+                (
+                    "criterios_pendientes",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Criterios pendientes"
+                    ),
+                ),
+                (
+                    "porcentaje_cumplimiento",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=5,
+                        verbose_name="Porcentaje de cumplimiento",
+                    ),
+                ),
+                (
+                    "documentos_vencidos",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Documentos vencidos"
+                    ),
+                ),
+                (
+                    "ultima_actividad",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Última actividad"
+                    ),
+                ),
+                (
+                    "fecha_calculo",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Fecha de cálculo"
+                    ),
+                ),
+                (
+                    "total_sedes",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Sedes activas"
+                    ),
+                ),
+                (
+                    "entidad",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="resumen_cartera",
+                        to="entidades.entidadprestadora",
+                        verbose_name="Entidad",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumen de Cartera por Entidad",
+                "verbose_name_plural": "Resúmenes de Cartera por Entidad",
+                "ordering": ["entidad"],
+                "indexes": [
+                    models.Index(
+                        fields=["porcentaje_cumplimiento"], name="rep_cart_ent_pct_idx"
+                    ),
+                    models.Index(
+                        fields=["ultima_actividad"], name="rep_cart_ent_act_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
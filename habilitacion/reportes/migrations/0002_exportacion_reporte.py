@@ -0,0 +1,134 @@
+# Generated by Django 4.2.25 on 2026-10-19 12:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("estandares", "0003_tipo_criterio"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0001_tareas_segundo_plano"),
+        ("entidades", "0006_version_aplicabilidad_sede"),
+        ("reportes", "0001_resumenes_cartera"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportacionReporte",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "formato",
+                    models.CharField(
+                        choices=[("excel", "Excel"), ("pdf", "PDF")],
+                        max_length=10,
+                        verbose_name="Formato",
+                    ),
+                ),
+                (
+                    "estado",
+                    models.CharField(
+                        choices=[
+                            ("PENDIENTE", "Pendiente"),
+                            ("EN_PROCESO", "En proceso"),
+                            ("COMPLETADA", "Completada"),
+                            ("ERROR", "Error"),
+                        ],
+                        default="PENDIENTE",
+                        max_length=20,
+                        verbose_name="Estado",
+                    ),
+                ),
+                (
+                    "total_filas",
+                    models.PositiveIntegerField(default=0, verbose_name="Filas"),
+                ),
+                (
+                    "archivo",
+                    models.FileField(
+                        blank=True,
+                        upload_to="reportes/exportaciones/%Y/%m/",
+                        verbose_name="Archivo",
+                    ),
+                ),
+                ("mensaje", models.TextField(blank=True, verbose_name="Mensaje")),
+                (
+                    "fecha_creacion",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Fecha de creación"
+                    ),
+                ),
+                (
+                    "fecha_fin",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Fecha de finalización"
+                    ),
+                ),
+                (
+                    "entidad",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="exportaciones_reporte",
+                        to="entidades.entidadprestadora",
+                    ),
+                ),
+                (
+                    "estandar",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Vacío para todos los estándares",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="exportaciones_reporte",
+                        to="estandares.estandar",
+                    ),
+                ),
+                (
+                    "sede",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Vacío para todas las sedes activas de la entidad",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="exportaciones_reporte",
+                        to="entidades.sede",
+                    ),
+                ),
+                (
+                    "tarea",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="core.tareasegundoplano",
+                    ),
+                ),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="exportaciones_reporte",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Exportación de Reporte",
+                "verbose_name_plural": "Exportaciones de Reportes",
+                "ordering": ["-fecha_creacion"],
+            },
+        ),
+    ]
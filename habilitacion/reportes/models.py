@@ -1,3 +1,162 @@
+"""
+Modelos del módulo reportes
+Sistema de Habilitación de Servicios de Salud
+
+Tablas de resumen precalculadas para el tablero de cartera (usuarios SUPER).
+Se actualizan al escribir (ver reportes.signals) y cada noche con el comando
+`actualizar_cartera`, de modo que el tablero solo ordena y filtra en SQL.
+Además, las exportaciones de reportes generadas en segundo plano.
+"""
+
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class IndicadoresCartera(models.Model):
+    """Campos comunes de los resúmenes de cartera"""
+
+    total_criterios = models.PositiveIntegerField('Total criterios', default=0)
+    criterios_cumple = models.PositiveIntegerField('Criterios que cumplen', default=0)
+    criterios_no_cumple = models.PositiveIntegerField('Criterios que no cumplen', default=0)
+    criterios_no_aplica = models.PositiveIntegerField('Criterios no aplica', default=0)
+    criterios_pendientes = models.PositiveIntegerField('Criterios pendientes', default=0)
+    porcentaje_cumplimiento = models.DecimalField(
+        'Porcentaje de cumplimiento',
+        max_digits=5,
+        decimal_places=2,
+        default=0
+    )
+    documentos_vencidos = models.PositiveIntegerField('Documentos vencidos', default=0)
+    ultima_actividad = models.DateTimeField('Última actividad', null=True, blank=True)
+    fecha_calculo = models.DateTimeField('Fecha de cálculo', auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class ResumenCarteraSede(IndicadoresCartera):
+    """Indicadores de cumplimiento de una sede activa"""
+
+    sede = models.OneToOneField(
+        'entidades.Sede',
+        on_delete=models.CASCADE,
+        related_name='resumen_cartera',
+        verbose_name='Sede'
+    )
+    entidad = models.ForeignKey(
+        'entidades.EntidadPrestadora',
+        on_delete=models.CASCADE,
+        related_name='resumenes_cartera_sedes',
+        verbose_name='Entidad'
+    )
+
+    class Meta:
+        verbose_name = 'Resumen de Cartera por Sede'
+        verbose_name_plural = 'Resúmenes de Cartera por Sede'
+        ordering = ['entidad', 'sede']
+        indexes = [
+            models.Index(fields=['entidad', 'porcentaje_cumplimiento'], name='rep_cart_sede_ent_pct_idx'),
+            models.Index(fields=['porcentaje_cumplimiento'], name='rep_cart_sede_pct_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sede}: {self.porcentaje_cumplimiento}%"
+
+
+class ResumenCarteraEntidad(IndicadoresCartera):
+    """Indicadores de una entidad: suma de sus sedes activas más sus documentos legales"""
+
+    entidad = models.OneToOneField(
+        'entidades.EntidadPrestadora',
+        on_delete=models.CASCADE,
+        related_name='resumen_cartera',
+        verbose_name='Entidad'
+    )
+    total_sedes = models.PositiveIntegerField('Sedes activas', default=0)
+
+    class Meta:
+        verbose_name = 'Resumen de Cartera por Entidad'
+        verbose_name_plural = 'Resúmenes de Cartera por Entidad'
+        ordering = ['entidad']
+        indexes = [
+            models.Index(fields=['porcentaje_cumplimiento'], name='rep_cart_ent_pct_idx'),
+            models.Index(fields=['ultima_actividad'], name='rep_cart_ent_act_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entidad}: {self.porcentaje_cumplimiento}%"
+
+
+class ExportacionReporte(models.Model):
+    """
+    Exportación del reporte de cumplimiento (Excel o PDF) generada en segundo
+    plano cuando supera el límite de filas para descarga directa.
+    """
+
+    FORMATOS = [
+        ('excel', 'Excel'),
+        ('pdf', 'PDF'),
+    ]
+
+    ESTADOS = [
+        ('PENDIENTE', 'Pendiente'),
+        ('EN_PROCESO', 'En proceso'),
+        ('COMPLETADA', 'Completada'),
+        ('ERROR', 'Error'),
+    ]
+
+    entidad = models.ForeignKey(
+        'entidades.EntidadPrestadora',
+        on_delete=models.CASCADE,
+        related_name='exportaciones_reporte'
+    )
+    sede = models.ForeignKey(
+        'entidades.Sede',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='exportaciones_reporte',
+        help_text='Vacío para todas las sedes activas de la entidad'
+    )
+    estandar = models.ForeignKey(
+        'estandares.Estandar',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='exportaciones_reporte',
+        help_text='Vacío para todos los estándares'
+    )
+    formato = models.CharField('Formato', max_length=10, choices=FORMATOS)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='exportaciones_reporte'
+    )
+
+    estado = models.CharField('Estado', max_length=20, choices=ESTADOS, default='PENDIENTE')
+    total_filas = models.PositiveIntegerField('Filas', default=0)
+    archivo = models.FileField('Archivo', upload_to='reportes/exportaciones/%Y/%m/', blank=True)
+    mensaje = models.TextField('Mensaje', blank=True)
+    tarea = models.ForeignKey(
+        'core.TareaSegundoPlano',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+
+    fecha_creacion = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    fecha_fin = models.DateTimeField('Fecha de finalización', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Exportación de Reporte'
+        verbose_name_plural = 'Exportaciones de Reportes'
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"{self.entidad} - {self.get_formato_display()} ({self.get_estado_display()})"
+
+    @property
+    def terminada(self):
+        return self.estado in ('COMPLETADA', 'ERROR')
@@ -0,0 +1,54 @@
+"""
+Señales del módulo reportes: mantienen al día los resúmenes de cartera
+cuando se evalúa un criterio, cambia la aplicabilidad de una sede o se
+registran documentos con vencimiento.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from entidades.models import DocumentoEntidad, EntidadPrestadora, Sede
+from evaluacion.aplicabilidad import aplicabilidad_actualizada
+from evaluacion.models import ArchivoRepositorio, Evaluacion, EvaluacionCriterio
+
+from .cartera import programar_actualizacion
+
+
+@receiver(post_save, sender=EvaluacionCriterio)
+@receiver(post_delete, sender=EvaluacionCriterio)
+@receiver(post_save, sender=Evaluacion)
+@receiver(post_delete, sender=Evaluacion)
+def evaluacion_cambiada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        programar_actualizacion(sede_ids=[instance.sede_id])
+
+
+@receiver(post_save, sender=ArchivoRepositorio)
+def archivo_subido(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        programar_actualizacion(sede_ids=[instance.evaluacion.sede_id])
+
+
+@receiver(aplicabilidad_actualizada)
+def aplicabilidad_cambiada(sender, sede_id, **kwargs):
+    programar_actualizacion(sede_ids=[sede_id])
+
+
+@receiver(post_save, sender=Sede)
+def sede_guardada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        programar_actualizacion(sede_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Sede)
+@receiver(post_save, sender=DocumentoEntidad)
+@receiver(post_delete, sender=DocumentoEntidad)
+def entidad_afectada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        programar_actualizacion(entidad_ids=[instance.entidad_id])
+
+
+@receiver(post_save, sender=EntidadPrestadora)
+def entidad_guardada(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        programar_actualizacion(entidad_ids=[instance.pk])
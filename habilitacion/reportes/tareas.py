@@ -0,0 +1,31 @@
+"""
+Tareas en segundo plano del módulo de reportes
+"""
+
+from django.utils import timezone
+
+from core.tareas import tarea
+
+
+def _registrar_falla(error, exportacion_id):
+    from .models import ExportacionReporte
+
+    ExportacionReporte.objects.filter(pk=exportacion_id).update(
+        estado='ERROR', mensaje=str(error), fecha_fin=timezone.now()
+    )
+
+
+@tarea('reportes.exportar', al_fallar=_registrar_falla)
+def exportar(exportacion_id):
+    """Genera el archivo Excel o PDF de una exportación de reporte"""
+    from .exportacion import ejecutar_exportacion
+    from .models import ExportacionReporte
+
+    exportacion = ExportacionReporte.objects.select_related(
+        'entidad', 'sede', 'estandar'
+    ).filter(pk=exportacion_id).first()
+    if exportacion is None or exportacion.terminada:
+        return {'estado': 'OMITIDA'}
+
+    exportacion = ejecutar_exportacion(exportacion)
+    return {'estado': exportacion.estado, 'filas': exportacion.total_filas}
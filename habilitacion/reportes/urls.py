@@ -8,8 +8,11 @@ urlpatterns = [
     path('', views.dashboard_reportes, name='dashboard'),
     path('cumplimiento/', views.reporte_cumplimiento, name='cumplimiento'),
     path('cumplimiento/<int:entidad_pk>/', views.reporte_cumplimiento_entidad, name='cumplimiento_entidad'),
+    path('cartera/', views.cartera, name='cartera'),
     path('por-estandar/', views.reporte_por_estandar, name='por_estandar'),
     path('vencimientos/', views.reporte_vencimientos, name='vencimientos'),
     path('exportar/', views.exportar_dashboard, name='exportar'),
     path('exportar/<str:formato>/', views.exportar_reporte, name='exportar_formato'),
+    path('exportaciones/<int:pk>/', views.estado_exportacion, name='exportacion'),
+    path('exportaciones/<int:pk>/descargar/', views.descargar_exportacion, name='descargar_exportacion'),
 ]
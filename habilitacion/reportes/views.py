@@ -3,10 +3,23 @@ Vistas del módulo reportes.
 Dashboard y generación de reportes de cumplimiento.
 """
 
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.http import HttpResponse
-from django.db.models import Count, Q
+from django.db.models import Count, F, Q, Sum
+
+# Ordenamientos del tablero de cartera: clave del parámetro `orden` -> expresión SQL
+ORDENES_CARTERA = {
+    'cumplimiento': [F('porcentaje_cumplimiento').asc()],
+    '-cumplimiento': [F('porcentaje_cumplimiento').desc()],
+    'pendientes': [F('criterios_pendientes').desc()],
+    'vencidos': [F('documentos_vencidos').desc()],
+    'actividad': [F('ultima_actividad').desc(nulls_last=True)],
+    'inactividad': [F('ultima_actividad').asc(nulls_first=True)],
+    'nombre': ['entidad__razon_social'],
+}
 
 
 @login_required
@@ -16,7 +29,7 @@ def dashboard_reportes(request):
         'titulo': 'Reportes',
     }
 
-    if request.user.entidad:
+    if request.principal.entidad_id:
         from entidades.models import EntidadPrestadora, Sede
         from evaluacion.models import Evaluacion
 
@@ -44,79 +57,223 @@ def dashboard_reportes(request):
 @login_required
 def reporte_cumplimiento(request):
     """Reporte general de cumplimiento"""
-    from entidades.models import EntidadPrestadora
+    from entidades.models import EntidadPrestadora, Sede
+    from evaluacion.aplicabilidad import resumen_aplicable
+    from estandares.models import GrupoEstandar
+    from .models import ResumenCarteraEntidad
 
-    if request.user.rol == 'SUPER':
+    if request.principal.es_super:
         entidades = EntidadPrestadora.objects.all()
-    elif request.user.entidad:
-        entidades = EntidadPrestadora.objects.filter(pk=request.user.entidad.pk)
+    elif request.principal.entidad_id:
+        entidades = EntidadPrestadora.objects.filter(pk=request.principal.entidad_id)
     else:
         entidades = EntidadPrestadora.objects.none()
 
+    totales = ResumenCarteraEntidad.objects.filter(entidad__in=entidades).aggregate(
+        total=Sum('total_criterios'),
+        cumple=Sum('criterios_cumple'),
+        no_cumple=Sum('criterios_no_cumple'),
+        no_aplica=Sum('criterios_no_aplica'),
+        pendientes=Sum('criterios_pendientes'),
+    )
+    aplican = (totales['total'] or 0) - (totales['no_aplica'] or 0)
+
+    # El detalle por grupo solo se calcula en vivo para una entidad; la cartera completa
+    # se consulta en el tablero de cartera
+    grupos_cumplimiento = []
+    if not request.principal.es_super and request.principal.entidad_id:
+        sedes = Sede.objects.filter(entidad_id=request.principal.entidad_id, activa=True)
+        resumenes = resumen_aplicable(sedes, por='grupo_id')
+        for grupo in GrupoEstandar.objects.filter(pk__in=resumenes).order_by('orden'):
+            grupos_cumplimiento.append({
+                'nombre': grupo.nombre,
+                'porcentaje': resumenes[grupo.pk]['porcentaje'],
+            })
+
     return render(request, 'reportes/cumplimiento.html', {
         'titulo': 'Reporte de Cumplimiento',
         'entidades': entidades,
+        'porcentaje_cumplimiento': round((totales['cumple'] or 0) / aplican * 100, 1) if aplican > 0 else 0,
+        'total_cumple': totales['cumple'],
+        'total_no_cumple': totales['no_cumple'],
+        'total_pendientes': totales['pendientes'],
+        'grupos_cumplimiento': grupos_cumplimiento,
     })
 
 
 @login_required
 def reporte_cumplimiento_entidad(request, entidad_pk):
     """Reporte de cumplimiento para una entidad específica"""
-    from entidades.models import EntidadPrestadora, Sede
-    from evaluacion.models import Evaluacion, ResumenCumplimiento
+    from entidades.models import EntidadPrestadora, ServicioHabilitado, Sede
+    from evaluacion.aplicabilidad import resumen_aplicable
     from estandares.models import GrupoEstandar
 
     entidad = get_object_or_404(EntidadPrestadora, pk=entidad_pk)
-    sedes = Sede.objects.filter(entidad=entidad, activa=True)
-    grupos = GrupoEstandar.objects.filter(activo=True)
+    if not request.principal.accede_entidad(entidad.pk):
+        messages.error(request, 'No tiene acceso a esta entidad.')
+        return redirect('reportes:dashboard')
 
-    # Calcular cumplimiento por sede y grupo
-    datos_cumplimiento = []
+    # Porcentajes por sede desde la tabla de resumen de cartera
+    sedes = Sede.objects.filter(entidad=entidad, activa=True).select_related(
+        'municipio', 'resumen_cartera'
+    ).annotate(
+        total_servicios=Count('servicios_habilitados', filter=Q(servicios_habilitados__activo=True))
+    ).order_by('nombre')
     for sede in sedes:
-        sede_data = {'sede': sede, 'grupos': []}
-        for grupo in grupos:
-            resumen, _ = ResumenCumplimiento.objects.get_or_create(
-                sede=sede,
-                grupo_estandar=grupo
-            )
-            resumen.calcular()
-            sede_data['grupos'].append({
-                'grupo': grupo,
-                'resumen': resumen
-            })
-        datos_cumplimiento.append(sede_data)
+        resumen = getattr(sede, 'resumen_cartera', None)
+        sede.porcentaje_cumplimiento = resumen.porcentaje_cumplimiento if resumen else 0
+
+    # Cumplimiento por grupo en una sola consulta sobre la matriz de aplicabilidad
+    resumenes = resumen_aplicable(sedes, por='grupo_id')
+    grupos = []
+    for grupo in GrupoEstandar.objects.filter(pk__in=resumenes).order_by('orden'):
+        resumen = resumenes[grupo.pk]
+        grupos.append({
+            'nombre': grupo.nombre,
+            'total_criterios': resumen['total'],
+            'cumplidos': resumen['cumple'],
+            'pendientes': resumen['pendiente'],
+            'porcentaje': resumen['porcentaje'],
+        })
+
+    resumen_entidad = getattr(entidad, 'resumen_cartera', None)
 
     return render(request, 'reportes/cumplimiento_entidad.html', {
         'titulo': f'Cumplimiento - {entidad.razon_social}',
         'entidad': entidad,
         'sedes': sedes,
         'grupos': grupos,
-        'datos_cumplimiento': datos_cumplimiento,
+        'porcentaje_general': resumen_entidad.porcentaje_cumplimiento if resumen_entidad else 0,
+        'total_sedes': len(sedes),
+        'total_servicios': ServicioHabilitado.objects.filter(
+            sede__entidad=entidad, sede__activa=True, activo=True
+        ).count(),
+    })
+
+
+@login_required
+def cartera(request):
+    """
+    Tablero de cartera para usuarios SUPER: cumplimiento, pendientes, documentos
+    vencidos y última actividad de todas las entidades (o sedes). Se lee de las
+    tablas de resumen; el orden, los filtros y la paginación se resuelven en SQL.
+    """
+    from entidades.models import EntidadPrestadora
+    from .models import ResumenCarteraEntidad, ResumenCarteraSede
+
+    if not request.principal.es_super:
+        messages.error(request, 'No tiene permisos para esta acción.')
+        return redirect('reportes:dashboard')
+
+    vista = 'sedes' if request.GET.get('vista') == 'sedes' else 'entidades'
+    if vista == 'sedes':
+        filas = ResumenCarteraSede.objects.select_related(
+            'sede__municipio', 'entidad'
+        ).filter(sede__activa=True)
+    else:
+        filas = ResumenCarteraEntidad.objects.select_related('entidad__departamento')
+
+    busqueda = request.GET.get('q', '').strip()
+    if busqueda:
+        filtro = Q(entidad__razon_social__icontains=busqueda) | Q(entidad__nit__icontains=busqueda)
+        if vista == 'sedes':
+            filtro |= Q(sede__nombre__icontains=busqueda)
+        filas = filas.filter(filtro)
+
+    estado = request.GET.get('estado', '')
+    if estado:
+        filas = filas.filter(entidad__estado=estado)
+
+    try:
+        porcentaje_max = float(request.GET.get('porcentaje_max', ''))
+    except ValueError:
+        porcentaje_max = None
+    if porcentaje_max is not None:
+        filas = filas.filter(porcentaje_cumplimiento__lte=porcentaje_max)
+
+    if request.GET.get('con_vencidos'):
+        filas = filas.filter(documentos_vencidos__gt=0)
+
+    totales = filas.aggregate(
+        registros=Count('id'),
+        pendientes=Sum('criterios_pendientes'),
+        vencidos=Sum('documentos_vencidos'),
+    )
+
+    orden = request.GET.get('orden', 'cumplimiento')
+    if orden not in ORDENES_CARTERA:
+        orden = 'cumplimiento'
+    filas = filas.order_by(*ORDENES_CARTERA[orden], 'pk')
+
+    pagina = Paginator(filas, 50).get_page(request.GET.get('pagina'))
+    parametros = request.GET.copy()
+    parametros.pop('pagina', None)
+
+    return render(request, 'reportes/cartera.html', {
+        'titulo': 'Cartera de Entidades',
+        'vista': vista,
+        'pagina': pagina,
+        'totales': totales,
+        'orden': orden,
+        'busqueda': busqueda,
+        'estado': estado,
+        'estados': EntidadPrestadora.ESTADOS,
+        'porcentaje_max': request.GET.get('porcentaje_max', ''),
+        'con_vencidos': bool(request.GET.get('con_vencidos')),
+        'parametros': parametros.urlencode(),
     })
 
 
 @login_required
 def reporte_vencimientos(request):
-    """Reporte de documentos por vencer"""
-    from entidades.models import DocumentoEntidad
+    """
+    Reporte de vencimientos: documentos, habilitación, vigencias, documentos
+    de criterios y PQRS. Se lee de la tabla de alertas que mantiene el comando
+    generar_alertas_vencimiento; los usuarios SUPER ven todas las entidades.
+    """
+    from django.conf import settings
     from django.utils import timezone
     from datetime import timedelta
+    from core.models import AlertaVencimiento
 
-    fecha_limite = timezone.now().date() + timedelta(days=90)
+    hoy = timezone.localdate()
+    fecha_limite = hoy + timedelta(days=settings.HABILITACION_CONFIG['DIAS_ALERTA_VENCIMIENTO'])
 
-    if request.user.entidad:
-        documentos = DocumentoEntidad.objects.filter(
-            entidad=request.user.entidad,
-            fecha_vencimiento__isnull=False,
-            fecha_vencimiento__lte=fecha_limite
-        ).order_by('fecha_vencimiento')
+    if request.principal.es_super:
+        alertas = AlertaVencimiento.objects.all()
+    elif request.principal.entidad_id:
+        alertas = AlertaVencimiento.objects.filter(entidad_id=request.principal.entidad_id)
     else:
-        documentos = DocumentoEntidad.objects.none()
+        alertas = AlertaVencimiento.objects.none()
+
+    tipo = request.GET.get('tipo', '')
+    if tipo:
+        alertas = alertas.filter(tipo=tipo)
+
+    conteos = alertas.aggregate(
+        vencidos=Count('id', filter=Q(fecha_vencimiento__lt=hoy)),
+        por_vencer_30=Count('id', filter=Q(
+            fecha_vencimiento__gte=hoy, fecha_vencimiento__lte=hoy + timedelta(days=30)
+        )),
+        por_vencer_60=Count('id', filter=Q(
+            fecha_vencimiento__gt=hoy + timedelta(days=30), fecha_vencimiento__lte=hoy + timedelta(days=60)
+        )),
+    )
+
+    documentos = alertas.select_related('entidad', 'sede').order_by('fecha_vencimiento', 'pk')
+    pagina = Paginator(documentos, 100).get_page(request.GET.get('pagina'))
+    parametros = request.GET.copy()
+    parametros.pop('pagina', None)
 
     return render(request, 'reportes/vencimientos.html', {
         'titulo': 'Documentos por Vencer',
-        'documentos': documentos,
+        'documentos': pagina,
+        'pagina': pagina,
         'fecha_limite': fecha_limite,
+        'tipo': tipo,
+        'tipos': AlertaVencimiento.TIPOS,
+        'parametros': parametros.urlencode(),
+        **conteos,
     })
 
 
@@ -133,29 +290,134 @@ def reporte_por_estandar(request):
     })
 
 
+def _alcance_exportacion(request):
+    """
+    Entidad, sede y estándar del reporte a exportar según los parámetros GET.
+    Retorna None si el usuario no tiene acceso.
+    """
+    from entidades.models import EntidadPrestadora, Sede
+    from estandares.models import Estandar
+
+    if request.principal.es_super:
+        entidad_id = request.GET.get('entidad') or request.principal.entidad_id
+    else:
+        entidad_id = request.principal.entidad_id
+    if not entidad_id:
+        return None
+    entidad = get_object_or_404(EntidadPrestadora, pk=entidad_id)
+
+    sede = None
+    if request.GET.get('sede'):
+        sede = get_object_or_404(Sede, pk=request.GET['sede'], entidad=entidad)
+    estandar = None
+    if request.GET.get('estandar'):
+        estandar = get_object_or_404(Estandar, pk=request.GET['estandar'])
+    return entidad, sede, estandar
+
+
 @login_required
 def exportar_dashboard(request):
     """Vista para opciones de exportación"""
+    from entidades.models import EntidadPrestadora, Sede
+    from estandares.models import Estandar
+    from .models import ExportacionReporte
+
+    if request.principal.es_super:
+        entidades = EntidadPrestadora.objects.order_by('razon_social')
+        sedes = Sede.objects.filter(activa=True).select_related('entidad').order_by('entidad__razon_social', 'nombre')
+    else:
+        entidades = EntidadPrestadora.objects.filter(pk=request.principal.entidad_id)
+        sedes = Sede.objects.filter(entidad_id=request.principal.entidad_id, activa=True).order_by('nombre')
+
     return render(request, 'reportes/exportar.html', {
         'titulo': 'Exportar Reportes',
+        'entidades': entidades,
+        'sedes': sedes,
+        'estandares': Estandar.objects.filter(activo=True).select_related('grupo').order_by('grupo__orden', 'orden'),
+        'exportaciones': ExportacionReporte.objects.filter(usuario=request.user).select_related('entidad', 'sede')[:10],
     })
 
 
 @login_required
 def exportar_reporte(request, formato):
-    """Exportar reporte en diferentes formatos"""
-    # Placeholder para exportación a Excel/PDF
-    if formato == 'excel':
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    """
+    Exporta el reporte de cumplimiento en Excel o PDF. Hasta el límite de filas
+    se descarga directamente; por encima se genera en segundo plano y se
+    redirige a la página con el enlace de descarga.
+    """
+    from django.http import FileResponse
+    from core.tareas import encolar
+    from .exportacion import (
+        TIPOS_CONTENIDO, contar_filas, generar_temporal, limite_descarga_directa, nombre_archivo
+    )
+    from .models import ExportacionReporte
+
+    if formato not in TIPOS_CONTENIDO:
+        return HttpResponse('Formato no soportado', status=400)
+
+    alcance = _alcance_exportacion(request)
+    if alcance is None:
+        messages.error(request, 'Seleccione una entidad para exportar.')
+        return redirect('reportes:exportar')
+    entidad, sede, estandar = alcance
+
+    total = contar_filas(entidad, sede, estandar)
+    if total > limite_descarga_directa():
+        exportacion = ExportacionReporte.objects.create(
+            entidad=entidad, sede=sede, estandar=estandar, formato=formato,
+            usuario=request.user, total_filas=total
+        )
+        exportacion.tarea = encolar(
+            'reportes.exportar',
+            {'exportacion_id': exportacion.pk},
+            max_intentos=2,
+            clave_concurrencia='reportes-exportar',
+            limite_concurrencia=1
         )
-        response['Content-Disposition'] = 'attachment; filename="reporte_habilitacion.xlsx"'
-        # Aquí iría la lógica de generación del Excel
-        return response
-    elif formato == 'pdf':
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="reporte_habilitacion.pdf"'
-        # Aquí iría la lógica de generación del PDF
-        return response
-
-    return HttpResponse('Formato no soportado', status=400)
+        exportacion.save(update_fields=['tarea'])
+        messages.info(request, f'El reporte tiene {total} criterios; se está generando en segundo plano.')
+        return redirect('reportes:exportacion', pk=exportacion.pk)
+
+    return FileResponse(
+        generar_temporal(formato, entidad, sede, estandar),
+        as_attachment=True,
+        filename=nombre_archivo(entidad, formato, sede),
+        content_type=TIPOS_CONTENIDO[formato]
+    )
+
+
+def _obtener_exportacion(request, pk):
+    from django.http import Http404
+    from .models import ExportacionReporte
+
+    exportacion = get_object_or_404(ExportacionReporte.objects.select_related('entidad', 'sede', 'estandar'), pk=pk)
+    if not request.principal.es_super and exportacion.usuario_id != request.user.pk:
+        raise Http404
+    return exportacion
+
+
+@login_required
+def estado_exportacion(request, pk):
+    """Estado de una exportación en segundo plano con su enlace de descarga"""
+    exportacion = _obtener_exportacion(request, pk)
+    return render(request, 'reportes/exportacion.html', {
+        'titulo': 'Exportación de Reporte',
+        'exportacion': exportacion,
+    })
+
+
+@login_required
+def descargar_exportacion(request, pk):
+    """Descarga el archivo de una exportación completada"""
+    from django.http import FileResponse, Http404
+    from .exportacion import TIPOS_CONTENIDO
+
+    exportacion = _obtener_exportacion(request, pk)
+    if exportacion.estado != 'COMPLETADA' or not exportacion.archivo:
+        raise Http404
+    return FileResponse(
+        exportacion.archivo.open('rb'),
+        as_attachment=True,
+        filename=exportacion.archivo.name.rsplit('/', 1)[-1],
+        content_type=TIPOS_CONTENIDO[exportacion.formato]
+    )
@@ -5,7 +5,7 @@ Sistema de Habilitación de Servicios de Salud
 
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import ConfiguracionSIAU, PQRS, EncuestaSatisfaccion
+from .models import ConfiguracionSIAU, ConsecutivoRadicado, PQRS, EncuestaSatisfaccion, ResumenEncuestaDiario
 
 
 @admin.register(ConfiguracionSIAU)
@@ -15,6 +15,7 @@ class ConfiguracionSIAUAdmin(admin.ModelAdmin):
     list_display = ['entidad', 'telefono_atencion', 'email_atencion', 'responsable', 'activo']
     list_filter = ['activo']
     search_fields = ['entidad__razon_social']
+    readonly_fields = ['token_kiosco']
 
     fieldsets = (
         ('Entidad', {
@@ -30,6 +31,9 @@ class ConfiguracionSIAUAdmin(admin.ModelAdmin):
         ('Responsable', {
             'fields': ('responsable',)
         }),
+        ('Kiosco de encuestas', {
+            'fields': ('token_kiosco',)
+        }),
     )
 
     autocomplete_fields = ['entidad', 'responsable']
@@ -76,6 +80,7 @@ class PQRSAdmin(admin.ModelAdmin):
     )
 
     autocomplete_fields = ['entidad', 'sede', 'responsable']
+    readonly_fields = ['radicado']
 
     def asunto_corto(self, obj):
         if len(obj.asunto) > 40:
@@ -98,29 +103,37 @@ class PQRSAdmin(admin.ModelAdmin):
     estado_badge.short_description = 'Estado'
 
     def vencimiento_badge(self, obj):
-        from django.utils import timezone
-
-        if obj.estado in ['RESPONDIDA', 'CERRADA']:
+        sla = obj.estado_sla
+        if sla in ['CUMPLIDA', 'INCUMPLIDA', None]:
             return format_html('<span style="color: green;">Cerrada</span>')
 
-        hoy = timezone.now().date()
-        if obj.fecha_vencimiento < hoy:
+        if sla == 'VENCIDA':
             return format_html('<span style="color: red; font-weight: bold;">VENCIDA</span>')
 
-        dias = (obj.fecha_vencimiento - hoy).days
-        if dias <= 3:
-            return format_html('<span style="color: orange;">En {} días</span>', dias)
+        dias = obj.dias_habiles_restantes
+        if sla == 'POR_VENCER':
+            return format_html('<span style="color: orange;">En {} días hábiles</span>', dias)
 
-        return format_html('<span style="color: green;">{} días</span>', dias)
+        return format_html('<span style="color: green;">{} días hábiles</span>', dias)
     vencimiento_badge.short_description = 'Vencimiento'
 
 
+@admin.register(ConsecutivoRadicado)
+class ConsecutivoRadicadoAdmin(admin.ModelAdmin):
+    """Admin para consecutivos de radicado"""
+
+    list_display = ['entidad', 'anio', 'ultimo']
+    list_filter = ['anio']
+    search_fields = ['entidad__razon_social']
+    readonly_fields = ['ultimo']
+
+
 @admin.register(EncuestaSatisfaccion)
 class EncuestaSatisfaccionAdmin(admin.ModelAdmin):
     """Admin para encuestas de satisfacción"""
 
-    list_display = ['fecha', 'entidad', 'sede', 'servicio', 'calificacion_display']
-    list_filter = ['calificacion_general', 'entidad', 'sede']
+    list_display = ['fecha', 'entidad', 'sede', 'servicio', 'calificacion_display', 'recomendaria', 'origen']
+    list_filter = ['calificacion_general', 'origen', 'entidad', 'sede']
     search_fields = ['entidad__razon_social', 'comentarios']
     date_hierarchy = 'fecha'
     ordering = ['-fecha']
@@ -130,7 +143,7 @@ class EncuestaSatisfaccionAdmin(admin.ModelAdmin):
             'fields': ('entidad', 'sede', 'servicio')
         }),
         ('Resultado', {
-            'fields': ('calificacion_general', 'comentarios')
+            'fields': ('fecha', 'calificacion_general', 'recomendaria', 'comentarios', 'origen')
         }),
     )
 
@@ -144,3 +157,18 @@ class EncuestaSatisfaccionAdmin(admin.ModelAdmin):
             color, estrellas
         )
     calificacion_display.short_description = 'Calificación'
+
+
+@admin.register(ResumenEncuestaDiario)
+class ResumenEncuestaDiarioAdmin(admin.ModelAdmin):
+    """Admin de solo lectura para el resumen diario de encuestas"""
+
+    list_display = ['fecha', 'entidad', 'sede', 'servicio', 'total', 'promedio', 'promotores', 'detractores']
+    list_filter = ['entidad']
+    date_hierarchy = 'fecha'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
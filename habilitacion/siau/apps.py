@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class SiauConfig(AppConfig):
     name = "siau"
+
+    def ready(self):
+        from . import signals  # noqa: F401
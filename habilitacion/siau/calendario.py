@@ -0,0 +1,73 @@
+"""
+Calendario de días hábiles en Colombia para los plazos de respuesta de PQRS
+Sistema de Habilitación de Servicios de Salud
+
+Festivos según la Ley 51 de 1983 (Ley Emiliani): los fijos se celebran en su
+fecha; los trasladables pasan al lunes siguiente; los que dependen de la
+Pascua se calculan a partir del Domingo de Resurrección.
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+# Celebrados en su fecha
+FESTIVOS_FIJOS = [(1, 1), (5, 1), (7, 20), (8, 7), (12, 8), (12, 25)]
+
+# Trasladados al lunes siguiente si no caen en lunes
+FESTIVOS_TRASLADABLES = [(1, 6), (3, 19), (6, 29), (8, 15), (10, 12), (11, 1), (11, 11)]
+
+# Días respecto al Domingo de Resurrección: Jueves y Viernes Santo, y los
+# lunes de Ascensión, Corpus Christi y Sagrado Corazón
+FESTIVOS_PASCUA = [-3, -2, 43, 64, 71]
+
+
+def domingo_pascua(anio):
+    """Domingo de Resurrección (algoritmo anónimo gregoriano)"""
+    a = anio % 19
+    b, c = divmod(anio, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    n = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * n) // 451
+    mes, dia = divmod(h + n - 7 * m + 114, 31)
+    return date(anio, mes, dia + 1)
+
+
+def _lunes_siguiente(fecha):
+    return fecha + timedelta(days=(7 - fecha.weekday()) % 7)
+
+
+@lru_cache(maxsize=64)
+def festivos(anio):
+    """Conjunto de festivos de un año"""
+    dias = {date(anio, mes, dia) for mes, dia in FESTIVOS_FIJOS}
+    dias.update(_lunes_siguiente(date(anio, mes, dia)) for mes, dia in FESTIVOS_TRASLADABLES)
+    pascua = domingo_pascua(anio)
+    dias.update(pascua + timedelta(days=desfase) for desfase in FESTIVOS_PASCUA)
+    return frozenset(dias)
+
+
+def es_habil(fecha):
+    return fecha.weekday() < 5 and fecha not in festivos(fecha.year)
+
+
+def sumar_dias_habiles(fecha, dias):
+    """Fecha en que se cumplen `dias` hábiles contados desde el día siguiente a `fecha`"""
+    while dias > 0:
+        fecha += timedelta(days=1)
+        if es_habil(fecha):
+            dias -= 1
+    return fecha
+
+
+def dias_habiles_entre(desde, hasta):
+    """
+    Días hábiles desde el día siguiente a `desde` hasta `hasta` inclusive;
+    negativo si `hasta` es anterior a `desde`.
+    """
+    if hasta < desde:
+        return -dias_habiles_entre(hasta, desde)
+    return sum(1 for n in range(1, (hasta - desde).days + 1) if es_habil(desde + timedelta(days=n)))
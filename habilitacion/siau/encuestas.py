@@ -0,0 +1,221 @@
+"""
+Ingesta de encuestas de satisfacción y resumen diario para la analítica
+Sistema de Habilitación de Servicios de Salud
+
+Las encuestas entran en lote (archivo CSV o kiosco) por `registrar_encuestas`,
+que las inserta con bulk_create y programa el recálculo de los días afectados
+al confirmar la transacción. ResumenEncuestaDiario guarda por entidad, sede,
+servicio y día la cantidad, la suma y la distribución de la calificación y la
+clasificación NPS, de modo que los informes de varios años suman unos cientos
+de filas por sede en lugar de recorrer todas las encuestas.
+"""
+
+import csv
+import io
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.diferido import programar
+
+# Escala de recomendación (0 a 10): promotores 9-10, pasivos 7-8, detractores 0-6
+MINIMO_PROMOTOR = 9
+MAXIMO_DETRACTOR = 6
+
+COLUMNAS_CSV = ['fecha', 'sede', 'servicio', 'calificacion', 'recomendaria', 'comentarios']
+MAXIMO_ERRORES_CSV = 20
+
+
+def indice_nps(promotores, detractores, respuestas):
+    """Porcentaje de promotores menos porcentaje de detractores (-100 a 100)"""
+    if not respuestas:
+        return None
+    return round((promotores - detractores) / respuestas * 100, 1)
+
+
+def sumas_resumen():
+    """Expresiones para sumar filas de ResumenEncuestaDiario en cualquier agrupación"""
+    campos = ['total', 'suma_calificacion', 'respuestas_nps', 'promotores', 'detractores']
+    campos += [f'calificacion_{valor}' for valor in range(1, 6)]
+    return {campo: Sum(campo) for campo in campos}
+
+
+def indicadores(fila):
+    """Completa una fila de sumas con promedio, índice NPS y distribución porcentual"""
+    total = fila.get('total') or 0
+    fila['promedio'] = round(fila['suma_calificacion'] / total, 2) if total else None
+    fila['nps'] = indice_nps(fila.get('promotores') or 0, fila.get('detractores') or 0, fila.get('respuestas_nps'))
+    fila['distribucion'] = [
+        (valor, fila.get(f'calificacion_{valor}') or 0,
+         round((fila.get(f'calificacion_{valor}') or 0) / total * 100, 1) if total else 0)
+        for valor in range(5, 0, -1)
+    ]
+    return fila
+
+
+# --- Ingesta -----------------------------------------------------------------
+
+def _fecha(texto):
+    texto = texto.strip()
+    if not texto:
+        return timezone.now()
+    for formato in ('%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d/%m/%Y %H:%M', '%d/%m/%Y'):
+        try:
+            return timezone.make_aware(datetime.strptime(texto, formato))
+        except ValueError:
+            continue
+    raise ValueError(f'fecha "{texto}" no válida (use AAAA-MM-DD o DD/MM/AAAA)')
+
+
+def _entero(texto, minimo, maximo, campo, obligatorio=True):
+    texto = texto.strip()
+    if not texto and not obligatorio:
+        return None
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise ValueError(f'{campo} "{texto}" no es un número')
+    if not minimo <= valor <= maximo:
+        raise ValueError(f'{campo} debe estar entre {minimo} y {maximo}')
+    return valor
+
+
+def leer_csv(archivo, entidad):
+    """
+    Convierte un CSV (separado por coma o punto y coma, UTF-8) en encuestas sin
+    guardar. Columnas: fecha, sede (código REPS o nombre), servicio (código),
+    calificacion (1-5), recomendaria (0-10, opcional) y comentarios.
+    Retorna (encuestas, errores) con errores como lista de (línea, mensaje).
+    """
+    from entidades.models import Sede
+    from estandares.models import Servicio
+
+    from .models import EncuestaSatisfaccion
+
+    contenido = archivo.read()
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode('utf-8-sig', errors='replace')
+    try:
+        dialecto = csv.Sniffer().sniff(contenido[:4096], delimiters=',;')
+    except csv.Error:
+        dialecto = csv.excel
+    lector = csv.DictReader(io.StringIO(contenido), dialect=dialecto)
+    lector.fieldnames = [(nombre or '').strip().lower() for nombre in lector.fieldnames or []]
+    if 'calificacion' not in lector.fieldnames:
+        return [], [(1, f'El archivo debe tener las columnas: {", ".join(COLUMNAS_CSV)}')]
+
+    sedes = {}
+    for sede_id, codigo, nombre in Sede.objects.filter(entidad=entidad).values_list('pk', 'codigo_reps_sede', 'nombre'):
+        sedes[nombre.strip().lower()] = sede_id
+        if codigo:
+            sedes[codigo.strip().lower()] = sede_id
+    servicios = {codigo.lower(): pk for pk, codigo in Servicio.objects.values_list('pk', 'codigo')}
+
+    encuestas, errores = [], []
+    for linea, fila in enumerate(lector, start=2):
+        try:
+            sede = (fila.get('sede') or '').strip().lower()
+            servicio = (fila.get('servicio') or '').strip().lower()
+            if sede and sede not in sedes:
+                raise ValueError(f'sede "{fila["sede"]}" no pertenece a la entidad')
+            if servicio and servicio not in servicios:
+                raise ValueError(f'servicio "{fila["servicio"]}" no existe')
+            encuestas.append(EncuestaSatisfaccion(
+                entidad=entidad,
+                sede_id=sedes.get(sede),
+                servicio_id=servicios.get(servicio),
+                fecha=_fecha(fila.get('fecha') or ''),
+                calificacion_general=_entero(fila.get('calificacion') or '', 1, 5, 'calificacion'),
+                recomendaria=_entero(fila.get('recomendaria') or '', 0, 10, 'recomendaria', obligatorio=False),
+                comentarios=(fila.get('comentarios') or '').strip(),
+                origen='IMPORTACION',
+            ))
+        except ValueError as error:
+            errores.append((linea, str(error)))
+            if len(errores) >= MAXIMO_ERRORES_CSV:
+                break
+    return encuestas, errores
+
+
+def registrar_encuestas(encuestas):
+    """Inserta las encuestas en lote y programa el recálculo de sus días"""
+    from .models import EncuestaSatisfaccion
+
+    with transaction.atomic():
+        EncuestaSatisfaccion.objects.bulk_create(encuestas, batch_size=1000)
+        programar_actualizacion(
+            (encuesta.entidad_id, timezone.localtime(encuesta.fecha).date()) for encuesta in encuestas
+        )
+    return len(encuestas)
+
+
+# --- Resumen diario ----------------------------------------------------------
+
+def _inicio_dia(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def actualizar_resumenes(entidad_id, desde=None, hasta=None):
+    """
+    Recalcula el resumen diario de una entidad entre dos días (inclusive; todo
+    el historial si no se indican) con una consulta agrupada por día, sede y
+    servicio. Retorna la cantidad de filas de resumen escritas.
+
+    Los recálculos de una misma entidad se serializan bloqueando su fila: dos
+    cargas simultáneas no pueden borrar nada a la vez e insertar el mismo día
+    dos veces, y la segunda agrupa las encuestas ya confirmadas por la primera.
+    """
+    from entidades.models import EntidadPrestadora
+
+    from .models import EncuestaSatisfaccion, ResumenEncuestaDiario
+
+    encuestas = EncuestaSatisfaccion.objects.filter(entidad_id=entidad_id)
+    resumenes = ResumenEncuestaDiario.objects.filter(entidad_id=entidad_id)
+    if desde is not None:
+        encuestas = encuestas.filter(fecha__gte=_inicio_dia(desde))
+        resumenes = resumenes.filter(fecha__gte=desde)
+    if hasta is not None:
+        encuestas = encuestas.filter(fecha__lt=_inicio_dia(hasta + timedelta(days=1)))
+        resumenes = resumenes.filter(fecha__lte=hasta)
+
+    with transaction.atomic():
+        EntidadPrestadora.objects.select_for_update().filter(pk=entidad_id).only('pk').first()
+        filas = []
+        for fila in encuestas.annotate(dia=TruncDate('fecha')).values(
+            'sede_id', 'servicio_id', 'dia'
+        ).annotate(
+            total=Count('id'),
+            suma_calificacion=Sum('calificacion_general'),
+            respuestas_nps=Count('recomendaria'),
+            promotores=Count('id', filter=Q(recomendaria__gte=MINIMO_PROMOTOR)),
+            detractores=Count('id', filter=Q(recomendaria__lte=MAXIMO_DETRACTOR)),
+            **{
+                f'calificacion_{valor}': Count('id', filter=Q(calificacion_general=valor))
+                for valor in range(1, 6)
+            }
+        ).order_by():
+            fila['fecha'] = fila.pop('dia')
+            filas.append(ResumenEncuestaDiario(entidad_id=entidad_id, **fila))
+
+        resumenes.delete()
+        ResumenEncuestaDiario.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def programar_actualizacion(dias):
+    """
+    Recalcula los días (entidad_id, fecha) indicados al confirmar la
+    transacción actual, una sola vez aunque la petición registre varias encuestas.
+    """
+    programar('encuestas:dias', dias, _actualizar_pendientes)
+
+
+def _actualizar_pendientes(pendientes):
+    por_entidad = {}
+    for entidad_id, dia in pendientes:
+        por_entidad.setdefault(entidad_id, []).append(dia)
+    for entidad_id, dias in por_entidad.items():
+        actualizar_resumenes(entidad_id, min(dias), max(dias))
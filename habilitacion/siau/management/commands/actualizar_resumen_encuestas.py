@@ -0,0 +1,35 @@
+"""
+Comando para reconstruir el resumen diario de encuestas de satisfacción.
+Se ejecuta una vez después de migrar (para resumir las encuestas existentes) o
+tras cargas hechas por fuera de la aplicación; durante la operación normal los
+resúmenes se actualizan al registrar las encuestas.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from entidades.models import EntidadPrestadora
+from siau.encuestas import actualizar_resumenes
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el resumen diario de encuestas de satisfacción por entidad'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entidad', type=int, help='ID de la entidad (todas si se omite)')
+
+    def handle(self, *args, **options):
+        entidades = EntidadPrestadora.objects.order_by('pk')
+        if options['entidad']:
+            entidades = entidades.filter(pk=options['entidad'])
+            if not entidades.exists():
+                raise CommandError(f'No existe la entidad {options["entidad"]}')
+
+        inicio = time.perf_counter()
+        filas = 0
+        for entidad_id in entidades.values_list('pk', flat=True):
+            filas += actualizar_resumenes(entidad_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Resumen de encuestas actualizado: {filas} filas en {time.perf_counter() - inicio:.2f}s'
+        ))
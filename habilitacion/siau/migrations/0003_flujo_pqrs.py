@@ -0,0 +1,95 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("entidades", "0006_version_aplicabilidad_sede"),
+        ("siau", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConsecutivoRadicado",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("anio", models.PositiveSmallIntegerField(verbose_name="Año")),
+                (
+                    "ultimo",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Último número"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Consecutivo de Radicado",
+                "verbose_name_plural": "Consecutivos de Radicado",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="pqrs",
+            options={
+                "ordering": ["-fecha_radicacion", "-id"],
+                "verbose_name": "PQRS",
+                "verbose_name_plural": "PQRS",
+            },
+        ),
+        migrations.AlterField(
+            model_name="pqrs",
+            name="fecha_vencimiento",
+            field=models.DateField(
+                blank=True,
+                help_text="Vacía para calcularla en días hábiles según el tipo",
+                verbose_name="Fecha de vencimiento respuesta",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="pqrs",
+            name="radicado",
+            field=models.CharField(
+                blank=True,
+                help_text="Se asigna automáticamente al crear la PQRS",
+                max_length=50,
+                unique=True,
+                verbose_name="Número de radicado",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pqrs",
+            index=models.Index(
+                fields=["entidad", "estado", "fecha_vencimiento"],
+                name="siau_pqrs_ent_est_venc_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pqrs",
+            index=models.Index(
+                fields=["entidad", "-fecha_radicacion", "-id"],
+                name="siau_pqrs_ent_fecha_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="consecutivoradicado",
+            name="entidad",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="consecutivos_radicado",
+                to="entidades.entidadprestadora",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="consecutivoradicado",
+            unique_together={("entidad", "anio")},
+        ),
+    ]
@@ -0,0 +1,174 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+def generar_tokens_kiosco(apps, schema_editor):
+    ConfiguracionSIAU = apps.get_model("siau", "ConfiguracionSIAU")
+    for configuracion in ConfiguracionSIAU.objects.all():
+        configuracion.token_kiosco = uuid.uuid4()
+        configuracion.save(update_fields=["token_kiosco"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("estandares", "0003_tipo_criterio"),
+        ("entidades", "0006_version_aplicabilidad_sede"),
+        ("siau", "0003_flujo_pqrs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResumenEncuestaDiario",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("fecha", models.DateField(verbose_name="Día")),
+                (
+                    "total",
+                    models.PositiveIntegerField(default=0, verbose_name="Encuestas"),
+                ),
+                (
+                    "suma_calificacion",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Suma de calificaciones"
+                    ),
+                ),
+                ("calificacion_1", models.PositiveIntegerField(default=0)),
+                ("calificacion_2", models.PositiveIntegerField(default=0)),
+                ("calificacion_3", models.PositiveIntegerField(default=0)),
+                ("calificacion_4", models.PositiveIntegerField(default=0)),
+                ("calificacion_5", models.PositiveIntegerField(default=0)),
+                (
+                    "respuestas_nps",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Respuestas de recomendación"
+                    ),
+                ),
+                ("promotores", models.PositiveIntegerField(default=0)),
+                ("detractores", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Resumen Diario de Encuestas",
+                "verbose_name_plural": "Resúmenes Diarios de Encuestas",
+                "ordering": ["-fecha"],
+            },
+        ),
+        # El token se agrega sin restricción, se genera uno distinto por fila y luego se vuelve único
+        migrations.AddField(
+            model_name="configuracionsiau",
+            name="token_kiosco",
+            field=models.UUIDField(null=True, editable=False),
+        ),
+        migrations.RunPython(generar_tokens_kiosco, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="configuracionsiau",
+            name="token_kiosco",
+            field=models.UUIDField(
+                default=uuid.uuid4,
+                editable=False,
+                help_text="Identifica el formulario público de encuestas de la entidad",
+                unique=True,
+                verbose_name="Token del kiosco",
+            ),
+        ),
+        migrations.AddField(
+            model_name="encuestasatisfaccion",
+            name="origen",
+            field=models.CharField(
+                choices=[
+                    ("MANUAL", "Manual"),
+                    ("KIOSCO", "Kiosco"),
+                    ("IMPORTACION", "Importación CSV"),
+                ],
+                default="MANUAL",
+                max_length=20,
+                verbose_name="Origen",
+            ),
+        ),
+        migrations.AddField(
+            model_name="encuestasatisfaccion",
+            name="recomendaria",
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                choices=[
+                    (0, "0"),
+                    (1, "1"),
+                    (2, "2"),
+                    (3, "3"),
+                    (4, "4"),
+                    (5, "5"),
+                    (6, "6"),
+                    (7, "7"),
+                    (8, "8"),
+                    (9, "9"),
+                    (10, "10"),
+                ],
+                help_text="De 0 (nada probable) a 10 (muy probable)",
+                null=True,
+                verbose_name="¿Recomendaría la institución?",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="encuestasatisfaccion",
+            name="fecha",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="Fecha"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="encuestasatisfaccion",
+            index=models.Index(
+                fields=["entidad", "fecha"], name="siau_encuesta_ent_fecha_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="resumenencuestadiario",
+            name="entidad",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="resumenes_encuestas",
+                to="entidades.entidadprestadora",
+                verbose_name="Entidad",
+            ),
+        ),
+        migrations.AddField(
+            model_name="resumenencuestadiario",
+            name="sede",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="resumenes_encuestas",
+                to="entidades.sede",
+            ),
+        ),
+        migrations.AddField(
+            model_name="resumenencuestadiario",
+            name="servicio",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="resumenes_encuestas",
+                to="estandares.servicio",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="resumenencuestadiario",
+            index=models.Index(
+                fields=["entidad", "fecha"], name="siau_resenc_ent_fecha_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.25 on 2026-10-19 14:15
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def eliminar_duplicados(apps, schema_editor):
+    # Recálculos concurrentes pudieron insertar el mismo día dos veces: se
+    # conserva la primera fila de cada (entidad, sede, servicio, fecha)
+    ResumenEncuestaDiario = apps.get_model("siau", "ResumenEncuestaDiario")
+    conservar = ResumenEncuestaDiario.objects.values(
+        "entidad_id", "sede_id", "servicio_id", "fecha"
+    ).annotate(primera=Min("id")).order_by().values_list("primera", flat=True)
+    ResumenEncuestaDiario.objects.exclude(pk__in=list(conservar)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("siau", "0004_encuestas_resumen"),
+    ]
+
+    operations = [
+        migrations.RunPython(eliminar_duplicados, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="resumenencuestadiario",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("sede__isnull", False), ("servicio__isnull", False)
+                ),
+                fields=("entidad", "sede", "servicio", "fecha"),
+                name="siau_resenc_unico",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="resumenencuestadiario",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("sede__isnull", False), ("servicio__isnull", True)),
+                fields=("entidad", "sede", "fecha"),
+                name="siau_resenc_unico_sin_servicio",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="resumenencuestadiario",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("sede__isnull", True), ("servicio__isnull", False)),
+                fields=("entidad", "servicio", "fecha"),
+                name="siau_resenc_unico_sin_sede",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="resumenencuestadiario",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("sede__isnull", True), ("servicio__isnull", True)),
+                fields=("entidad", "fecha"),
+                name="siau_resenc_unico_entidad",
+            ),
+        ),
+    ]
@@ -1,10 +1,19 @@
 """
 Modelos para SIAU - Sistema de Información y Atención al Usuario
-Este módulo está reservado para desarrollo futuro.
+PQRS con radicado consecutivo por entidad y año, flujo de estados y plazo de
+respuesta en días hábiles (ver siau.calendario). Encuestas de satisfacción con
+resumen diario precalculado para la analítica (ver siau.encuestas).
 """
 
-from django.db import models
+import uuid
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .calendario import dias_habiles_entre, sumar_dias_habiles
 
 
 class ConfiguracionSIAU(models.Model):
@@ -29,6 +38,10 @@ class ConfiguracionSIAU(models.Model):
         related_name='siau_responsable'
     )
     activo = models.BooleanField('SIAU activo', default=True)
+    token_kiosco = models.UUIDField(
+        'Token del kiosco', default=uuid.uuid4, unique=True, editable=False,
+        help_text='Identifica el formulario público de encuestas de la entidad'
+    )
 
     class Meta:
         verbose_name = 'Configuración SIAU'
@@ -41,7 +54,8 @@ class ConfiguracionSIAU(models.Model):
 class PQRS(models.Model):
     """
     Peticiones, Quejas, Reclamos y Sugerencias.
-    Placeholder para desarrollo futuro.
+    Al crearse recibe su radicado y su fecha de vencimiento en días hábiles
+    según el tipo; los cambios de estado pasan por `cambiar_estado`.
     """
 
     TIPOS = [
@@ -59,6 +73,28 @@ class PQRS(models.Model):
         ('CERRADA', 'Cerrada'),
     ]
 
+    ESTADOS_ABIERTOS = ['RECIBIDA', 'EN_PROCESO']
+
+    # Estado actual -> estados a los que puede pasar
+    TRANSICIONES = {
+        'RECIBIDA': ['EN_PROCESO', 'RESPONDIDA', 'CERRADA'],
+        'EN_PROCESO': ['RESPONDIDA', 'CERRADA'],
+        'RESPONDIDA': ['EN_PROCESO', 'CERRADA'],
+        'CERRADA': [],
+    }
+
+    # Plazo de respuesta en días hábiles (Ley 1755 de 2015)
+    DIAS_HABILES_RESPUESTA = {
+        'PETICION': 15,
+        'QUEJA': 15,
+        'RECLAMO': 15,
+        'SUGERENCIA': 15,
+        'FELICITACION': 15,
+    }
+
+    # Días hábiles restantes desde los que una PQRS abierta se considera por vencer
+    DIAS_ALERTA = 3
+
     entidad = models.ForeignKey(
         'entidades.EntidadPrestadora',
         on_delete=models.CASCADE,
@@ -74,7 +110,10 @@ class PQRS(models.Model):
     )
 
     tipo = models.CharField('Tipo', max_length=20, choices=TIPOS)
-    radicado = models.CharField('Número de radicado', max_length=50, unique=True)
+    radicado = models.CharField(
+        'Número de radicado', max_length=50, unique=True, blank=True,
+        help_text='Se asigna automáticamente al crear la PQRS'
+    )
 
     # Datos del solicitante
     nombre_solicitante = models.CharField('Nombre del solicitante', max_length=200)
@@ -95,7 +134,10 @@ class PQRS(models.Model):
     # Estado y gestión
     estado = models.CharField('Estado', max_length=20, choices=ESTADOS, default='RECIBIDA')
     fecha_radicacion = models.DateTimeField('Fecha de radicación', auto_now_add=True)
-    fecha_vencimiento = models.DateField('Fecha de vencimiento respuesta')
+    fecha_vencimiento = models.DateField(
+        'Fecha de vencimiento respuesta', blank=True,
+        help_text='Vacía para calcularla en días hábiles según el tipo'
+    )
     fecha_respuesta = models.DateTimeField('Fecha de respuesta', null=True, blank=True)
     respuesta = models.TextField('Respuesta', blank=True)
     responsable = models.ForeignKey(
@@ -109,17 +151,138 @@ class PQRS(models.Model):
     class Meta:
         verbose_name = 'PQRS'
         verbose_name_plural = 'PQRS'
-        ordering = ['-fecha_radicacion']
+        ordering = ['-fecha_radicacion', '-id']
+        indexes = [
+            models.Index(fields=['entidad', 'estado', 'fecha_vencimiento'], name='siau_pqrs_ent_est_venc_idx'),
+            models.Index(fields=['entidad', '-fecha_radicacion', '-id'], name='siau_pqrs_ent_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.radicado} - {self.get_tipo_display()}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            radicacion = timezone.localtime(self.fecha_radicacion or timezone.now()).date()
+            if not self.fecha_vencimiento:
+                self.fecha_vencimiento = sumar_dias_habiles(
+                    radicacion, self.DIAS_HABILES_RESPUESTA.get(self.tipo, 15)
+                )
+            if not self.radicado:
+                with transaction.atomic():
+                    numero = ConsecutivoRadicado.siguiente(self.entidad_id, radicacion.year)
+                    self.radicado = ConsecutivoRadicado.formato(self.entidad_id, radicacion.year, numero)
+                    return super().save(*args, **kwargs)
+        return super().save(*args, **kwargs)
+
+    @property
+    def abierta(self):
+        return self.estado in self.ESTADOS_ABIERTOS
+
+    @property
+    def dias_habiles_restantes(self):
+        """Días hábiles hasta el vencimiento (negativo si ya venció); None si está cerrada"""
+        if not self.abierta:
+            return None
+        return dias_habiles_entre(timezone.localdate(), self.fecha_vencimiento)
+
+    @property
+    def estado_sla(self):
+        """VENCIDA, POR_VENCER o A_TIEMPO si está abierta; CUMPLIDA o INCUMPLIDA si se respondió"""
+        if not self.abierta:
+            if self.fecha_respuesta is None:
+                return None
+            respondida = timezone.localtime(self.fecha_respuesta).date()
+            return 'CUMPLIDA' if respondida <= self.fecha_vencimiento else 'INCUMPLIDA'
+        restantes = self.dias_habiles_restantes
+        if restantes < 0:
+            return 'VENCIDA'
+        if restantes <= self.DIAS_ALERTA:
+            return 'POR_VENCER'
+        return 'A_TIEMPO'
+
+    def transiciones_posibles(self):
+        etiquetas = dict(self.ESTADOS)
+        return [(estado, etiquetas[estado]) for estado in self.TRANSICIONES[self.estado]]
+
+    def cambiar_estado(self, nuevo_estado, usuario=None, respuesta=''):
+        """
+        Aplica una transición del flujo. Pasar a RESPONDIDA exige la respuesta
+        y fija la fecha de respuesta. Lanza ValidationError si no es válida.
+        """
+        if nuevo_estado not in self.TRANSICIONES.get(self.estado, []):
+            raise ValidationError(
+                f'No se puede pasar de {self.get_estado_display()} a {dict(self.ESTADOS).get(nuevo_estado, nuevo_estado)}.'
+            )
+        if nuevo_estado == 'RESPONDIDA':
+            respuesta = (respuesta or '').strip()
+            if not respuesta:
+                raise ValidationError('Debe registrar la respuesta al solicitante.')
+            self.respuesta = respuesta
+            self.fecha_respuesta = timezone.now()
+        if nuevo_estado == 'EN_PROCESO' and usuario is not None and self.responsable_id is None:
+            self.responsable = usuario
+        self.estado = nuevo_estado
+        self.save()
+
+
+class ConsecutivoRadicado(models.Model):
+    """
+    Último número de radicado de PQRS asignado por entidad y año. Cada
+    radicación incrementa solo la fila de su entidad y año (UPDATE atómico),
+    así que radicaciones simultáneas de distintas entidades no se bloquean.
+    """
+
+    entidad = models.ForeignKey(
+        'entidades.EntidadPrestadora',
+        on_delete=models.CASCADE,
+        related_name='consecutivos_radicado'
+    )
+    anio = models.PositiveSmallIntegerField('Año')
+    ultimo = models.PositiveIntegerField('Último número', default=0)
+
+    class Meta:
+        verbose_name = 'Consecutivo de Radicado'
+        verbose_name_plural = 'Consecutivos de Radicado'
+        unique_together = ['entidad', 'anio']
+
+    def __str__(self):
+        return f"{self.entidad_id}/{self.anio}: {self.ultimo}"
+
+    @classmethod
+    def siguiente(cls, entidad_id, anio):
+        """
+        Reserva el siguiente número. Debe llamarse dentro de la transacción
+        que guarda la PQRS: la fila queda bloqueada hasta confirmarla.
+        """
+        actualizadas = cls.objects.filter(entidad_id=entidad_id, anio=anio).update(ultimo=F('ultimo') + 1)
+        if not actualizadas:
+            try:
+                with transaction.atomic():
+                    cls.objects.create(entidad_id=entidad_id, anio=anio, ultimo=1)
+                    return 1
+            except IntegrityError:
+                # Otra radicación creó la fila al mismo tiempo
+                cls.objects.filter(entidad_id=entidad_id, anio=anio).update(ultimo=F('ultimo') + 1)
+        return cls.objects.filter(entidad_id=entidad_id, anio=anio).values_list('ultimo', flat=True).get()
+
+    @staticmethod
+    def formato(entidad_id, anio, numero):
+        return f'PQRS-{entidad_id:04d}-{anio}-{numero:06d}'
+
 
 class EncuestaSatisfaccion(models.Model):
     """
-    Encuestas de satisfacción al usuario.
-    Placeholder para desarrollo futuro.
+    Respuesta a la encuesta de satisfacción del usuario: calificación general
+    de 1 a 5 y, opcionalmente, la probabilidad de recomendar (0 a 10) para el
+    indicador NPS. Se cargan en lote con siau.encuestas.registrar_encuestas.
     """
+
+    ORIGENES = [
+        ('MANUAL', 'Manual'),
+        ('KIOSCO', 'Kiosco'),
+        ('IMPORTACION', 'Importación CSV'),
+    ]
+
     entidad = models.ForeignKey(
         'entidades.EntidadPrestadora',
         on_delete=models.CASCADE,
@@ -140,17 +303,105 @@ class EncuestaSatisfaccion(models.Model):
         blank=True
     )
 
-    fecha = models.DateTimeField('Fecha', auto_now_add=True)
+    fecha = models.DateTimeField('Fecha', default=timezone.now)
     calificacion_general = models.PositiveIntegerField(
         'Calificación general',
         choices=[(i, str(i)) for i in range(1, 6)]
     )
+    recomendaria = models.PositiveSmallIntegerField(
+        '¿Recomendaría la institución?',
+        choices=[(i, str(i)) for i in range(0, 11)],
+        null=True,
+        blank=True,
+        help_text='De 0 (nada probable) a 10 (muy probable)'
+    )
     comentarios = models.TextField('Comentarios', blank=True)
+    origen = models.CharField('Origen', max_length=20, choices=ORIGENES, default='MANUAL')
 
     class Meta:
         verbose_name = 'Encuesta de Satisfacción'
         verbose_name_plural = 'Encuestas de Satisfacción'
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['entidad', 'fecha'], name='siau_encuesta_ent_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"Encuesta {self.fecha.date()} - {self.entidad.razon_social}"
+
+
+class ResumenEncuestaDiario(models.Model):
+    """
+    Agregado de las encuestas de un día por entidad, sede y servicio: cantidad,
+    suma y distribución de la calificación y clasificación NPS. La analítica
+    suma estas filas en lugar de recorrer las encuestas.
+    """
+
+    entidad = models.ForeignKey(
+        'entidades.EntidadPrestadora',
+        on_delete=models.CASCADE,
+        related_name='resumenes_encuestas',
+        verbose_name='Entidad'
+    )
+    sede = models.ForeignKey(
+        'entidades.Sede',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='resumenes_encuestas'
+    )
+    servicio = models.ForeignKey(
+        'estandares.Servicio',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='resumenes_encuestas'
+    )
+    fecha = models.DateField('Día')
+
+    total = models.PositiveIntegerField('Encuestas', default=0)
+    suma_calificacion = models.PositiveIntegerField('Suma de calificaciones', default=0)
+    calificacion_1 = models.PositiveIntegerField(default=0)
+    calificacion_2 = models.PositiveIntegerField(default=0)
+    calificacion_3 = models.PositiveIntegerField(default=0)
+    calificacion_4 = models.PositiveIntegerField(default=0)
+    calificacion_5 = models.PositiveIntegerField(default=0)
+    respuestas_nps = models.PositiveIntegerField('Respuestas de recomendación', default=0)
+    promotores = models.PositiveIntegerField(default=0)
+    detractores = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Resumen Diario de Encuestas'
+        verbose_name_plural = 'Resúmenes Diarios de Encuestas'
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['entidad', 'fecha'], name='siau_resenc_ent_fecha_idx'),
+        ]
+        # Una fila por entidad, sede, servicio y día. Sede y servicio admiten
+        # NULL y un índice único no compara NULL con NULL: una restricción
+        # parcial por cada combinación de campos nulos.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['entidad', 'sede', 'servicio', 'fecha'], name='siau_resenc_unico',
+                condition=Q(sede__isnull=False, servicio__isnull=False),
+            ),
+            models.UniqueConstraint(
+                fields=['entidad', 'sede', 'fecha'], name='siau_resenc_unico_sin_servicio',
+                condition=Q(sede__isnull=False, servicio__isnull=True),
+            ),
+            models.UniqueConstraint(
+                fields=['entidad', 'servicio', 'fecha'], name='siau_resenc_unico_sin_sede',
+                condition=Q(sede__isnull=True, servicio__isnull=False),
+            ),
+            models.UniqueConstraint(
+                fields=['entidad', 'fecha'], name='siau_resenc_unico_entidad',
+                condition=Q(sede__isnull=True, servicio__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.entidad_id} {self.fecha}: {self.total}"
+
+    @property
+    def promedio(self):
+        return round(self.suma_calificacion / self.total, 2) if self.total else None
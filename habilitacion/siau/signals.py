@@ -0,0 +1,19 @@
+"""
+Señales del módulo SIAU: mantienen al día el resumen diario de encuestas
+cuando una encuesta se crea, edita o elimina una por una (p. ej. desde el
+admin). Las cargas en lote programan su recálculo en registrar_encuestas.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .encuestas import programar_actualizacion
+from .models import EncuestaSatisfaccion
+
+
+@receiver(post_save, sender=EncuestaSatisfaccion)
+@receiver(post_delete, sender=EncuestaSatisfaccion)
+def encuesta_cambiada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        programar_actualizacion([(instance.entidad_id, timezone.localtime(instance.fecha).date())])
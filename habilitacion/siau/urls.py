@@ -7,6 +7,11 @@ app_name = 'siau'
 urlpatterns = [
     path('', views.dashboard_siau, name='dashboard'),
     path('pqrs/', views.lista_pqrs, name='pqrs'),
+    path('pqrs/nueva/', views.nueva_pqrs, name='nueva_pqrs'),
     path('pqrs/<int:pk>/', views.detalle_pqrs, name='detalle_pqrs'),
+    path('pqrs/<int:pk>/estado/', views.cambiar_estado_pqrs, name='cambiar_estado_pqrs'),
     path('encuestas/', views.lista_encuestas, name='encuestas'),
+    path('encuestas/importar/', views.importar_encuestas, name='importar_encuestas'),
+    path('encuestas/analitica/', views.analitica_encuestas, name='analitica_encuestas'),
+    path('kiosco/<uuid:token>/', views.kiosco_encuesta, name='kiosco_encuesta'),
 ]
@@ -1,13 +1,24 @@
 """
 Vistas del módulo SIAU.
 Sistema de Información y Atención al Usuario.
-Este módulo está reservado para desarrollo futuro.
 """
 
-from django.shortcuts import render, get_object_or_404
+from datetime import date, datetime
+
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.views.decorators.http import require_POST
+
+from .calendario import sumar_dias_habiles
+from .encuestas import COLUMNAS_CSV, indicadores, leer_csv, registrar_encuestas, sumas_resumen
 from .models import PQRS, EncuestaSatisfaccion
 
+TAMANO_PAGINA_PQRS = 50
+
 
 @login_required
 def dashboard_siau(request):
@@ -18,40 +29,402 @@ def dashboard_siau(request):
     })
 
 
+def _pqrs_visibles(principal):
+    if principal.es_super:
+        return PQRS.objects.all()
+    if principal.entidad_id:
+        return PQRS.objects.filter(entidad_id=principal.entidad_id)
+    return PQRS.objects.none()
+
+
+def _puede_gestionar(principal, pqrs):
+    return not principal.solo_lectura and principal.accede_entidad(pqrs.entidad_id)
+
+
+# Ordenamientos del listado: clave -> (campo, descendente)
+ORDENES_PQRS = {
+    'recientes': ('fecha_radicacion', True),
+    'vencimiento': ('fecha_vencimiento', False),
+}
+
+
+def _leer_cursor(valor, campo):
+    """Cursor de la paginación por llave: '<valor del campo>|<id>'"""
+    try:
+        texto, pk = valor.rsplit('|', 1)
+        if campo == 'fecha_radicacion':
+            return datetime.fromisoformat(texto), int(pk)
+        return date.fromisoformat(texto), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
 @login_required
 def lista_pqrs(request):
-    """Lista de PQRS"""
-    if request.user.entidad:
-        pqrs = PQRS.objects.filter(entidad=request.user.entidad)
-    else:
-        pqrs = PQRS.objects.none()
+    """
+    Lista de PQRS filtrable, con paginación por llave (cursor) y contadores
+    por estado y por plazo calculados en una sola consulta.
+    """
+    pqrs = _pqrs_visibles(request.principal)
+    hoy = timezone.localdate()
+    limite_alerta = sumar_dias_habiles(hoy, PQRS.DIAS_ALERTA)
+
+    tipo = request.GET.get('tipo', '')
+    if tipo:
+        pqrs = pqrs.filter(tipo=tipo)
+    sede = request.GET.get('sede', '')
+    if sede.isdigit():
+        pqrs = pqrs.filter(sede_id=sede)
+    busqueda = request.GET.get('q', '').strip()
+    if busqueda:
+        pqrs = pqrs.filter(
+            Q(radicado__icontains=busqueda) | Q(asunto__icontains=busqueda)
+            | Q(nombre_solicitante__icontains=busqueda) | Q(documento_solicitante=busqueda)
+        )
+
+    abiertas = Q(estado__in=PQRS.ESTADOS_ABIERTOS)
+    contadores = pqrs.aggregate(
+        total=Count('id'),
+        vencidas=Count('id', filter=abiertas & Q(fecha_vencimiento__lt=hoy)),
+        por_vencer=Count('id', filter=abiertas & Q(fecha_vencimiento__gte=hoy, fecha_vencimiento__lte=limite_alerta)),
+        **{estado.lower(): Count('id', filter=Q(estado=estado)) for estado, _ in PQRS.ESTADOS}
+    )
+
+    estado = request.GET.get('estado', '')
+    if estado:
+        pqrs = pqrs.filter(estado=estado)
+    plazo = request.GET.get('plazo', '')
+    if plazo == 'vencidas':
+        pqrs = pqrs.filter(abiertas, fecha_vencimiento__lt=hoy)
+    elif plazo == 'por_vencer':
+        pqrs = pqrs.filter(abiertas, fecha_vencimiento__gte=hoy, fecha_vencimiento__lte=limite_alerta)
+
+    orden = request.GET.get('orden', 'recientes')
+    if orden not in ORDENES_PQRS:
+        orden = 'recientes'
+    campo, descendente = ORDENES_PQRS[orden]
+    cursor = _leer_cursor(request.GET.get('despues', ''), campo)
+    if cursor:
+        valor, pk = cursor
+        comparacion = 'lt' if descendente else 'gt'
+        pqrs = pqrs.filter(
+            Q(**{f'{campo}__{comparacion}': valor}) | Q(**{campo: valor, f'id__{comparacion}': pk})
+        )
+    prefijo = '-' if descendente else ''
+    filas = list(
+        pqrs.select_related('sede', 'responsable').order_by(f'{prefijo}{campo}', f'{prefijo}id')[:TAMANO_PAGINA_PQRS + 1]
+    )
+    siguiente = None
+    if len(filas) > TAMANO_PAGINA_PQRS:
+        filas = filas[:TAMANO_PAGINA_PQRS]
+        ultima = filas[-1]
+        siguiente = f'{getattr(ultima, campo).isoformat()}|{ultima.pk}'
+
+    parametros = request.GET.copy()
+    parametros.pop('despues', None)
 
     return render(request, 'siau/pqrs/lista.html', {
         'titulo': 'PQRS',
-        'pqrs': pqrs,
+        'listado_pqrs': filas,
+        'contadores': contadores,
+        'estados': PQRS.ESTADOS,
+        'tipos': PQRS.TIPOS,
+        'estado': estado,
+        'tipo': tipo,
+        'plazo': plazo,
+        'orden': orden,
+        'busqueda': busqueda,
+        'siguiente': siguiente,
+        'es_primera': cursor is None,
+        'parametros': parametros.urlencode(),
+        'puede_crear': bool(request.principal.entidad_id) and not request.principal.solo_lectura,
+    })
+
+
+@login_required
+def nueva_pqrs(request):
+    """Radicar una PQRS: el radicado y el vencimiento se asignan al guardar"""
+    from entidades.models import Sede
+
+    if not request.principal.entidad_id or request.principal.solo_lectura:
+        messages.error(request, 'No tiene permisos para radicar PQRS.')
+        return redirect('siau:pqrs')
+
+    sedes = Sede.objects.filter(entidad_id=request.principal.entidad_id, activa=True)
+    if request.method == 'POST':
+        datos = {
+            campo: request.POST.get(campo, '').strip()
+            for campo in [
+                'tipo', 'nombre_solicitante', 'documento_solicitante', 'telefono_solicitante',
+                'email_solicitante', 'asunto', 'descripcion'
+            ]
+        }
+        if datos['tipo'] not in dict(PQRS.TIPOS) or not all(
+            datos[campo] for campo in ['nombre_solicitante', 'asunto', 'descripcion']
+        ):
+            messages.error(request, 'Complete el tipo, el solicitante, el asunto y la descripción.')
+        else:
+            sede_id = request.POST.get('sede', '')
+            pqrs = PQRS.objects.create(
+                entidad_id=request.principal.entidad_id,
+                sede=sedes.filter(pk=sede_id).first() if sede_id.isdigit() else None,
+                archivo_adjunto=request.FILES.get('archivo_adjunto'),
+                **datos
+            )
+            messages.success(
+                request,
+                f'PQRS radicada con número {pqrs.radicado}. Vence el {pqrs.fecha_vencimiento:%d/%m/%Y}.'
+            )
+            return redirect('siau:detalle_pqrs', pk=pqrs.pk)
+
+    return render(request, 'siau/pqrs/nueva.html', {
+        'titulo': 'Nueva PQRS',
+        'tipos': PQRS.TIPOS,
+        'sedes': sedes,
+        'datos': request.POST,
     })
 
 
 @login_required
 def detalle_pqrs(request, pk):
-    """Detalle de una PQRS"""
-    pqrs = get_object_or_404(PQRS, pk=pk)
+    """Detalle de una PQRS con su plazo y las transiciones disponibles"""
+    pqrs = get_object_or_404(PQRS.objects.select_related('entidad', 'sede', 'responsable'), pk=pk)
+
+    if not request.principal.accede_entidad(pqrs.entidad_id):
+        messages.error(request, 'No tiene acceso a esta PQRS.')
+        return redirect('siau:pqrs')
 
     return render(request, 'siau/pqrs/detalle.html', {
         'titulo': f'PQRS {pqrs.radicado}',
         'pqrs': pqrs,
+        'transiciones': pqrs.transiciones_posibles() if _puede_gestionar(request.principal, pqrs) else [],
     })
 
 
 @login_required
-def lista_encuestas(request):
-    """Lista de encuestas de satisfacción"""
-    if request.user.entidad:
-        encuestas = EncuestaSatisfaccion.objects.filter(entidad=request.user.entidad)
+@require_POST
+def cambiar_estado_pqrs(request, pk):
+    """Aplica una transición del flujo de la PQRS"""
+    pqrs = get_object_or_404(PQRS, pk=pk)
+
+    if not _puede_gestionar(request.principal, pqrs):
+        messages.error(request, 'No tiene permisos para gestionar esta PQRS.')
+        return redirect('siau:pqrs')
+
+    try:
+        pqrs.cambiar_estado(
+            request.POST.get('estado', ''), usuario=request.user, respuesta=request.POST.get('respuesta', '')
+        )
+    except ValidationError as error:
+        messages.error(request, error.messages[0])
     else:
-        encuestas = EncuestaSatisfaccion.objects.none()
+        messages.success(request, f'PQRS {pqrs.radicado}: {pqrs.get_estado_display()}.')
+    return redirect('siau:detalle_pqrs', pk=pk)
+
+
+def _rango_fechas(request, meses_por_defecto=None):
+    """Fechas desde/hasta del filtro (AAAA-MM-DD); None si no se indican o no son válidas"""
+    rango = []
+    for parametro in ['desde', 'hasta']:
+        try:
+            rango.append(date.fromisoformat(request.GET.get(parametro, '')))
+        except ValueError:
+            rango.append(None)
+    desde, hasta = rango
+    if desde is None and hasta is None and meses_por_defecto:
+        # Primer día del mes, `meses_por_defecto` meses atrás contando el actual
+        hoy = timezone.localdate()
+        meses = hoy.year * 12 + hoy.month - meses_por_defecto
+        desde = date(meses // 12, meses % 12 + 1, 1)
+    return desde, hasta
+
+
+@login_required
+def lista_encuestas(request):
+    """Encuestas de satisfacción de la entidad, paginadas y filtrables por sede y fecha"""
+    from django.core.paginator import Paginator
+
+    from entidades.models import Sede
+    from .models import ConfiguracionSIAU
+
+    entidad_id = request.principal.entidad_id
+    if not entidad_id:
+        messages.error(request, 'Su usuario no tiene una entidad asignada.')
+        return redirect('siau:dashboard')
+
+    encuestas = EncuestaSatisfaccion.objects.filter(
+        entidad_id=entidad_id
+    ).select_related('sede', 'servicio')
+    sede = request.GET.get('sede', '')
+    if sede.isdigit():
+        encuestas = encuestas.filter(sede_id=sede)
+    desde, hasta = _rango_fechas(request)
+    if desde:
+        encuestas = encuestas.filter(fecha__date__gte=desde)
+    if hasta:
+        encuestas = encuestas.filter(fecha__date__lte=hasta)
+
+    pagina = Paginator(encuestas.order_by('-fecha', '-id'), 50).get_page(request.GET.get('pagina'))
+    parametros = request.GET.copy()
+    parametros.pop('pagina', None)
+
+    puede_gestionar = not request.principal.solo_lectura
+    configuracion = None
+    if puede_gestionar:
+        configuracion, _ = ConfiguracionSIAU.objects.get_or_create(entidad_id=entidad_id)
 
     return render(request, 'siau/encuestas/lista.html', {
         'titulo': 'Encuestas de Satisfacción',
-        'encuestas': encuestas,
+        'pagina': pagina,
+        'sedes': Sede.objects.filter(entidad_id=entidad_id, activa=True),
+        'sede': sede,
+        'desde': request.GET.get('desde', ''),
+        'hasta': request.GET.get('hasta', ''),
+        'parametros': parametros.urlencode(),
+        'puede_gestionar': puede_gestionar,
+        'configuracion': configuracion,
+        'columnas_csv': COLUMNAS_CSV,
+    })
+
+
+@login_required
+@require_POST
+def importar_encuestas(request):
+    """Carga de encuestas desde un CSV: se importan todas o ninguna"""
+    if not request.principal.entidad_id or request.principal.solo_lectura:
+        messages.error(request, 'No tiene permisos para importar encuestas.')
+        return redirect('siau:encuestas')
+
+    archivo = request.FILES.get('archivo')
+    if not archivo:
+        messages.error(request, 'Seleccione un archivo CSV.')
+        return redirect('siau:encuestas')
+
+    encuestas, errores = leer_csv(archivo, request.user.entidad)
+    if errores:
+        detalle = '; '.join(f'línea {linea}: {mensaje}' for linea, mensaje in errores)
+        messages.error(request, f'No se importó el archivo. {detalle}')
+    elif not encuestas:
+        messages.warning(request, 'El archivo no contiene encuestas.')
+    else:
+        registrar_encuestas(encuestas)
+        messages.success(request, f'Se importaron {len(encuestas)} encuestas.')
+    return redirect('siau:encuestas')
+
+
+def kiosco_encuesta(request, token):
+    """
+    Formulario público de encuesta para tabletas o kioscos de las sedes. La
+    entidad se identifica por el token de su configuración SIAU; ?sede=<id>
+    deja fija la sede del kiosco.
+    """
+    from entidades.models import Sede
+    from estandares.models import Servicio
+
+    from .models import ConfiguracionSIAU
+
+    configuracion = get_object_or_404(
+        ConfiguracionSIAU.objects.select_related('entidad'), token_kiosco=token, activo=True
+    )
+    entidad = configuracion.entidad
+    sedes = Sede.objects.filter(entidad=entidad, activa=True)
+    servicios = Servicio.objects.filter(
+        sedes_habilitadas__sede__entidad=entidad, sedes_habilitadas__activo=True
+    ).distinct().order_by('codigo')
+    sede = request.GET.get('sede', '')
+
+    error = None
+    if request.method == 'POST':
+        calificacion = request.POST.get('calificacion', '')
+        recomendaria = request.POST.get('recomendaria', '')
+        sede_id = request.POST.get('sede', '')
+        servicio_id = request.POST.get('servicio', '')
+        if calificacion not in {str(valor) for valor in range(1, 6)}:
+            error = 'Seleccione una calificación de 1 a 5.'
+        else:
+            registrar_encuestas([EncuestaSatisfaccion(
+                entidad=entidad,
+                sede=sedes.filter(pk=sede_id).first() if sede_id.isdigit() else None,
+                servicio=servicios.filter(pk=servicio_id).first() if servicio_id.isdigit() else None,
+                calificacion_general=int(calificacion),
+                recomendaria=int(recomendaria) if recomendaria.isdigit() and int(recomendaria) <= 10 else None,
+                comentarios=request.POST.get('comentarios', '').strip()[:2000],
+                origen='KIOSCO',
+            )])
+            destino = request.path + '?gracias=1'
+            if sede_id.isdigit():
+                destino += f'&sede={sede_id}'
+            return redirect(destino)
+
+    return render(request, 'siau/encuestas/kiosco.html', {
+        'entidad': entidad,
+        'sedes': sedes,
+        'servicios': servicios,
+        'sede': sede,
+        'escala_recomendacion': range(0, 11),
+        'gracias': bool(request.GET.get('gracias')),
+        'error': error,
+    })
+
+
+@login_required
+def analitica_encuestas(request):
+    """
+    Analítica de satisfacción: totales, tendencia mensual y desglose por sede y
+    servicio con promedio, distribución e índice NPS. Todo se calcula sumando
+    el resumen diario, nunca sobre las encuestas individuales.
+    """
+    from django.db.models.functions import TruncMonth
+
+    from entidades.models import EntidadPrestadora
+    from .models import ResumenEncuestaDiario
+
+    entidad = request.user.entidad
+    if request.principal.es_super and request.GET.get('entidad', '').isdigit():
+        entidad = get_object_or_404(EntidadPrestadora, pk=request.GET['entidad'])
+    if entidad is None:
+        messages.error(request, 'Su usuario no tiene una entidad asignada.')
+        return redirect('siau:dashboard')
+
+    resumenes = ResumenEncuestaDiario.objects.filter(entidad=entidad)
+    desde, hasta = _rango_fechas(request, meses_por_defecto=12)
+    if desde:
+        resumenes = resumenes.filter(fecha__gte=desde)
+    if hasta:
+        resumenes = resumenes.filter(fecha__lte=hasta)
+    sede = request.GET.get('sede', '')
+    if sede.isdigit():
+        resumenes = resumenes.filter(sede_id=sede)
+    servicio = request.GET.get('servicio', '')
+    if servicio.isdigit():
+        resumenes = resumenes.filter(servicio_id=servicio)
+
+    sumas = sumas_resumen()
+    totales = indicadores(resumenes.aggregate(**sumas))
+    tendencia = [
+        indicadores(fila) for fila in resumenes.annotate(mes=TruncMonth('fecha'))
+        .values('mes').annotate(**sumas).order_by('mes')
+    ]
+    por_sede = [
+        indicadores(fila) for fila in resumenes.values('sede_id', 'sede__nombre')
+        .annotate(**sumas).order_by('sede__nombre')
+    ]
+    por_servicio = [
+        indicadores(fila) for fila in resumenes.values('servicio_id', 'servicio__codigo', 'servicio__nombre')
+        .annotate(**sumas).order_by('servicio__codigo')
+    ]
+
+    return render(request, 'siau/encuestas/analitica.html', {
+        'titulo': 'Analítica de Satisfacción',
+        'entidad': entidad,
+        'totales': totales,
+        'tendencia': tendencia,
+        'por_sede': por_sede,
+        'por_servicio': por_servicio,
+        'sedes': entidad.sedes.filter(activa=True),
+        'servicios': {fila['servicio_id']: fila['servicio__nombre'] for fila in por_servicio if fila['servicio_id']},
+        'sede': sede,
+        'servicio': servicio,
+        'desde': desde.isoformat() if desde else '',
+        'hasta': hasta.isoformat() if hasta else '',
     })
@@ -0,0 +1,91 @@
+"""
+Comando que aplica la política de retención del registro de actividad.
+Archiva en un JSON Lines comprimido los registros anteriores al límite y luego
+los elimina por lotes, apoyándose en el índice por fecha. Pensado para cron.
+"""
+
+import gzip
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+from core.auditoria import configuracion
+from usuarios.models import RegistroActividad
+
+TAMANO_LOTE = 2000
+
+
+def _dentro_de(ruta, directorio):
+    ruta, directorio = os.path.realpath(ruta), os.path.realpath(directorio)
+    return os.path.commonpath([ruta, directorio]) == directorio
+
+
+class Command(BaseCommand):
+    help = 'Archiva y elimina los registros de actividad más antiguos que la retención configurada'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=configuracion()['RETENCION_DIAS'],
+            help='Conservar los registros de los últimos N días'
+        )
+        parser.add_argument(
+            '--directorio',
+            default=configuracion()['DIRECTORIO_ARCHIVO'],
+            help='Directorio donde se escribe el archivo histórico (AUDITORIA_ARCHIVO_DIR por defecto)'
+        )
+        parser.add_argument(
+            '--sin-archivo',
+            action='store_true',
+            help='Eliminar sin archivar'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo cuenta los registros que se depurarían'
+        )
+
+    def handle(self, *args, **options):
+        if options['dias'] < 1:
+            raise CommandError('--dias debe ser mayor que cero')
+
+        limite = timezone.now() - timezone.timedelta(days=options['dias'])
+        antiguos = RegistroActividad.objects.filter(fecha__lt=limite)
+        total = antiguos.count()
+        if options['dry_run'] or not total:
+            self.stdout.write(f'Registros anteriores al {limite:%Y-%m-%d}: {total}')
+            return
+
+        ruta = None
+        if not options['sin_archivo']:
+            if not options['directorio']:
+                raise CommandError('Indique --directorio o configure AUDITORIA_ARCHIVO_DIR')
+            if _dentro_de(options['directorio'], settings.MEDIA_ROOT):
+                raise CommandError('El archivo de auditoría no puede quedar dentro de MEDIA_ROOT (se publica por URL)')
+            os.makedirs(options['directorio'], exist_ok=True)
+            ruta = os.path.join(
+                options['directorio'],
+                f'registro_actividad_hasta_{limite:%Y%m%d}_{timezone.now():%Y%m%d%H%M%S}.jsonl.gz'
+            )
+            with gzip.open(ruta, 'wt', encoding='utf-8') as archivo:
+                for registro in antiguos.order_by('pk').values().iterator(chunk_size=TAMANO_LOTE):
+                    archivo.write(json.dumps(registro, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+
+        eliminados = 0
+        while True:
+            ids = list(antiguos.order_by('pk').values_list('pk', flat=True)[:TAMANO_LOTE])
+            if not ids:
+                break
+            with transaction.atomic():
+                eliminados += RegistroActividad.objects.filter(pk__in=ids).delete()[0]
+
+        mensaje = f'Registros depurados: {eliminados}'
+        if ruta:
+            mensaje += f' (archivados en {ruta})'
+        self.stdout.write(self.style.SUCCESS(mensaje))
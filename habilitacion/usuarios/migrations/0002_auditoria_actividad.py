@@ -0,0 +1,32 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:01
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usuarios", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="registroactividad",
+            name="fecha",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False, verbose_name="Fecha"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="registroactividad",
+            index=models.Index(
+                fields=["modelo_afectado", "objeto_id", "fecha"],
+                name="usr_actividad_objeto_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="registroactividad",
+            index=models.Index(fields=["fecha"], name="usr_actividad_fecha_idx"),
+        ),
+    ]
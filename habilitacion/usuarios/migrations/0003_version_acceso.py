@@ -0,0 +1,20 @@
+# Generated by Django 4.2.25 on 2026-10-19 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usuarios", "0002_auditoria_actividad"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usuario",
+            name="version_acceso",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="Versión de acceso"
+            ),
+        ),
+    ]
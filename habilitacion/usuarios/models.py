@@ -6,6 +6,7 @@ Gestión de usuarios, roles y permisos por entidad
 from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 
 class UsuarioManager(BaseUserManager):
@@ -83,6 +84,10 @@ class Usuario(AbstractUser):
     # Foto de perfil
     foto = models.ImageField('Foto de perfil', upload_to='usuarios/fotos/', blank=True, null=True)
 
+    # Aumenta cuando cambian rol, entidad, estado o sedes; invalida el principal
+    # guardado en la sesión (ver usuarios.principal)
+    version_acceso = models.PositiveIntegerField('Versión de acceso', default=0, editable=False)
+
     # Auditoría
     fecha_ultimo_acceso = models.DateTimeField('Último acceso', null=True, blank=True)
     creado_por = models.ForeignKey(
@@ -103,9 +108,31 @@ class Usuario(AbstractUser):
         verbose_name_plural = 'Usuarios'
         ordering = ['primer_apellido', 'primer_nombre']
 
+    CAMPOS_ACCESO = ('rol', 'entidad_id', 'is_active')
+
     def __str__(self):
         return f"{self.nombre_completo} ({self.email})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        if not instancia.get_deferred_fields().intersection(cls.CAMPOS_ACCESO):
+            instancia._acceso_original = instancia._datos_acceso()
+        return instancia
+
+    def _datos_acceso(self):
+        return tuple(self.__dict__.get(campo) for campo in self.CAMPOS_ACCESO)
+
+    def save(self, *args, **kwargs):
+        original = getattr(self, '_acceso_original', None)
+        if original is not None and original != self._datos_acceso():
+            self.version_acceso += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'version_acceso'}
+        super().save(*args, **kwargs)
+        self._acceso_original = self._datos_acceso()
+
     @property
     def nombre_completo(self):
         """Retorna el nombre completo del usuario"""
@@ -147,9 +174,14 @@ class Usuario(AbstractUser):
         """Verifica si el usuario tiene acceso a una sede específica"""
         if self.rol == 'SUPER':
             return True
-        if self.rol == 'ADMIN' and self.entidad == sede.entidad:
+        if self.rol == 'ADMIN' and self.entidad_id == sede.entidad_id:
             return True
-        return self.sedes.filter(pk=sede.pk).exists()
+        return sede.pk in self.sede_ids
+
+    @cached_property
+    def sede_ids(self):
+        """Identificadores de las sedes asignadas, consultados una vez por instancia"""
+        return frozenset(self.sedes.values_list('pk', flat=True))
 
 
 class RegistroActividad(models.Model):
@@ -184,12 +216,17 @@ class RegistroActividad(models.Model):
     datos_nuevos = models.JSONField('Datos nuevos', null=True, blank=True)
     ip_address = models.GenericIPAddressField('Dirección IP', null=True, blank=True)
     user_agent = models.CharField('User Agent', max_length=500, blank=True)
-    fecha = models.DateTimeField('Fecha', auto_now_add=True)
+    # Se fija al registrar la actividad, no al escribir el lote (ver core.auditoria)
+    fecha = models.DateTimeField('Fecha', default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = 'Registro de actividad'
         verbose_name_plural = 'Registros de actividad'
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['modelo_afectado', 'objeto_id', 'fecha'], name='usr_actividad_objeto_idx'),
+            models.Index(fields=['fecha'], name='usr_actividad_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.usuario} - {self.tipo} - {self.fecha}"
@@ -0,0 +1,121 @@
+"""
+Principal de acceso del usuario autenticado
+Sistema de Habilitación de Servicios de Salud
+
+Reúne lo que las vistas consultan para autorizar una petición: rol, entidad y
+sedes asignadas. Se arma una vez con sus consultas y se guarda en la sesión;
+en las peticiones siguientes se reutiliza mientras `Usuario.version_acceso`
+coincida. El usuario ya viene cargado por la autenticación, así que validar la
+copia de la sesión no cuesta consultas. La versión aumenta al cambiar rol,
+entidad o estado del usuario, sus sedes asignadas o el nombre de su entidad
+(ver usuarios.signals).
+"""
+
+CLAVE_SESION = '_principal'
+
+ROLES_ADMINISTRADOR = ('SUPER', 'ADMIN')
+ROLES_APROBADOR = ('SUPER', 'ADMIN', 'APROBADOR')
+ROLES_EDITOR = ('SUPER', 'ADMIN', 'CALIDAD', 'EVALUADOR')
+ROLES_SOLO_LECTURA = ('AUDITOR', 'CONSULTOR')
+
+
+class Principal:
+    """Identidad y alcance de acceso de un usuario, sin consultas a la base de datos"""
+
+    def __init__(self, usuario_id=None, rol='', entidad_id=None, entidad_nombre='', sede_ids=(), version=0):
+        self.usuario_id = usuario_id
+        self.rol = rol
+        self.entidad_id = entidad_id
+        self.entidad_nombre = entidad_nombre
+        self.sede_ids = frozenset(sede_ids)
+        self.version = version
+
+    def __repr__(self):
+        return f'<Principal usuario={self.usuario_id} rol={self.rol} entidad={self.entidad_id}>'
+
+    @classmethod
+    def cargar(cls, usuario):
+        """Arma el principal desde la base de datos (nombre de la entidad y sedes asignadas)"""
+        from entidades.models import EntidadPrestadora
+
+        entidad_nombre = ''
+        if usuario.entidad_id:
+            entidad = EntidadPrestadora.objects.filter(pk=usuario.entidad_id).only(
+                'razon_social', 'nombre_comercial'
+            ).first()
+            entidad_nombre = entidad.nombre_display if entidad else ''
+        return cls(
+            usuario_id=usuario.pk,
+            rol=usuario.rol,
+            entidad_id=usuario.entidad_id,
+            entidad_nombre=entidad_nombre,
+            sede_ids=usuario.sedes.values_list('pk', flat=True),
+            version=usuario.version_acceso,
+        )
+
+    def como_dict(self):
+        return {
+            'usuario_id': self.usuario_id,
+            'rol': self.rol,
+            'entidad_id': self.entidad_id,
+            'entidad_nombre': self.entidad_nombre,
+            'sede_ids': sorted(self.sede_ids),
+            'version': self.version,
+        }
+
+    @property
+    def autenticado(self):
+        return self.usuario_id is not None
+
+    @property
+    def es_super(self):
+        return self.rol == 'SUPER'
+
+    @property
+    def es_administrador(self):
+        return self.rol in ROLES_ADMINISTRADOR
+
+    @property
+    def puede_aprobar(self):
+        return self.rol in ROLES_APROBADOR
+
+    @property
+    def puede_editar(self):
+        return self.rol in ROLES_EDITOR
+
+    @property
+    def solo_lectura(self):
+        return self.rol in ROLES_SOLO_LECTURA
+
+    def accede_entidad(self, entidad_id):
+        """El usuario es super administrador o pertenece a la entidad indicada"""
+        return self.es_super or (self.entidad_id is not None and self.entidad_id == entidad_id)
+
+    def tiene_acceso_sede(self, sede):
+        """Misma regla que Usuario.tiene_acceso_sede, resuelta con las sedes en memoria"""
+        if self.es_super:
+            return True
+        if self.rol == 'ADMIN' and self.entidad_id is not None and self.entidad_id == sede.entidad_id:
+            return True
+        return sede.pk in self.sede_ids
+
+
+ANONIMO = Principal()
+
+
+def obtener_principal(request):
+    """Principal del usuario de la petición, reutilizando la copia de la sesión si sigue vigente"""
+    usuario = getattr(request, 'user', None)
+    if usuario is None or not usuario.is_authenticated:
+        return ANONIMO
+
+    datos = request.session.get(CLAVE_SESION)
+    if datos and datos.get('usuario_id') == usuario.pk and datos.get('version') == usuario.version_acceso:
+        # Rol y entidad se toman del usuario ya cargado; la versión garantiza que
+        # las sedes y el nombre de la entidad de la sesión siguen vigentes.
+        datos = dict(datos, rol=usuario.rol, entidad_id=usuario.entidad_id)
+        return Principal(**datos)
+
+    principal = Principal.cargar(usuario)
+    request.session[CLAVE_SESION] = principal.como_dict()
+    return principal
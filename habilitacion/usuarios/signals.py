@@ -0,0 +1,42 @@
+"""
+Señales del módulo de usuarios.
+Aumentan la versión de acceso de los usuarios cuyas sedes asignadas o
+entidad cambian, para que su principal en sesión se vuelva a cargar.
+"""
+
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from entidades.models import EntidadPrestadora
+
+from .models import Usuario
+
+
+def invalidar_principal(usuario_ids):
+    """Invalida el principal en sesión de los usuarios indicados"""
+    usuario_ids = list(usuario_ids or [])
+    if usuario_ids:
+        Usuario.objects.filter(pk__in=usuario_ids).update(version_acceso=F('version_acceso') + 1)
+
+
+@receiver(m2m_changed, sender=Usuario.sedes.through)
+def sedes_asignadas_cambiadas(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # usuario.sedes.add/remove/clear
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidar_principal([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        # sede.usuarios.add/remove
+        invalidar_principal(pk_set)
+    elif action == 'pre_clear':
+        # sede.usuarios.clear: después ya no se sabe a quiénes afectó
+        instance.usuarios.update(version_acceso=F('version_acceso') + 1)
+
+
+@receiver(post_save, sender=EntidadPrestadora)
+def entidad_guardada(sender, instance, created, update_fields=None, **kwargs):
+    # El principal guarda el nombre de la entidad para la barra superior
+    if created or (update_fields is not None and not {'razon_social', 'nombre_comercial'} & set(update_fields)):
+        return
+    instance.usuarios.update(version_acceso=F('version_acceso') + 1)
@@ -21,13 +21,13 @@ def perfil(request):
 @login_required
 def lista_usuarios(request):
     """Lista de usuarios (solo administradores)"""
-    if not request.user.es_administrador:
+    if not request.principal.es_administrador:
         messages.error(request, 'No tiene permisos para ver esta página.')
         return redirect('core:dashboard')
 
     usuarios = Usuario.objects.all()
-    if request.user.rol != 'SUPER' and request.user.entidad:
-        usuarios = usuarios.filter(entidad=request.user.entidad)
+    if not request.principal.es_super and request.principal.entidad_id:
+        usuarios = usuarios.filter(entidad_id=request.principal.entidad_id)
 
     return render(request, 'usuarios/lista.html', {
         'titulo': 'Usuarios',
@@ -38,7 +38,7 @@ def lista_usuarios(request):
 @login_required
 def crear_usuario(request):
     """Crear nuevo usuario"""
-    if not request.user.es_administrador:
+    if not request.principal.es_administrador:
         messages.error(request, 'No tiene permisos para esta acción.')
         return redirect('core:dashboard')
 
@@ -54,7 +54,7 @@ def crear_usuario(request):
 @login_required
 def editar_usuario(request, pk):
     """Editar usuario existente"""
-    if not request.user.es_administrador:
+    if not request.principal.es_administrador:
         messages.error(request, 'No tiene permisos para esta acción.')
         return redirect('core:dashboard')
 